@@ -1,8 +1,13 @@
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+import json
+import random
+import threading
 import time
 import logging
-from typing import Optional, Dict, Any
+from typing import Callable, Optional, Dict, Any
+from urllib.parse import urlsplit
 
 # Attempt to import the config module with correct package path
 try:
@@ -17,39 +22,371 @@ except ImportError:
 DEFAULT_TIMEOUT = 15  # seconds
 MAX_RETRIES = 3
 BACKOFF_FACTOR = 0.5  # seconds
+MAX_BACKOFF = 8.0  # seconds
+POOL_SIZE = 10
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# Consecutive failures before the circuit opens, and how long it stays open
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0  # seconds
 
 logger = logging.getLogger(__name__)
 
 
+class CircuitBreaker:
+    """
+    Fails fast while an endpoint is down.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests are refused without touching the network. Once
+    ``reset_timeout`` seconds have passed a single trial request is let
+    through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                return True
+            return False  # A half-open trial request is already in flight
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"Circuit opened after {self._failures} consecutive failures"
+                    )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ApiClient:
+    """
+    HTTP client shared by all AI call sites.
+
+    Uses one ``requests.Session`` with a pooled ``HTTPAdapter`` so connections
+    are kept alive between calls, retries 429/5xx responses and connection
+    errors with jittered exponential backoff, and keeps a circuit breaker per
+    host so callers fall back to their offline paths immediately while the
+    endpoint is down.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = POOL_SIZE,
+        max_retries: int = MAX_RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+    ):
+        """
+        Args:
+            pool_size: Connections kept alive per host
+            max_retries: Retries after the first attempt
+            backoff_factor: Base delay in seconds; attempt ``n`` waits a
+                random time up to ``backoff_factor * 2**n``
+            failure_threshold: Consecutive failures before a host's circuit
+                opens
+            reset_timeout: Seconds before an open circuit allows a trial
+                request
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.session = requests.Session()
+        # Retries are handled here so they can feed the circuit breaker
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        """Return the circuit breaker for the host of ``url``."""
+        host = urlsplit(url).netloc
+        with self._breakers_lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[host] = breaker
+            return breaker
+
+    def _backoff_delay(self, attempt: int, response=None) -> float:
+        """Delay before retry ``attempt`` (0-based), honouring Retry-After."""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(MAX_BACKOFF, max(0.0, float(retry_after)))
+                except ValueError:
+                    pass
+        return random.uniform(0, min(MAX_BACKOFF, self.backoff_factor * 2**attempt))
+
+    def request(
+        self,
+        url: str,
+        method: str = "POST",
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Send a JSON request.
+
+        Args:
+            url: API endpoint URL
+            method: HTTP method
+            headers: Request headers
+            data: JSON payload
+            timeout: Per-attempt timeout in seconds
+            max_retries: Override for the client's retry count
+
+        Returns:
+            Response JSON as a dictionary, or None if the request failed or
+            the circuit for the host is open
+        """
+        retries = self.max_retries if max_retries is None else max_retries
+        breaker = self.breaker_for(url)
+
+        for attempt in range(retries + 1):
+            if not breaker.allow_request():
+                logger.warning(f"Circuit open for {url}; skipping API request")
+                return None
+
+            response = None
+            try:
+                response = self.session.request(
+                    method=method, url=url, headers=headers, json=data, timeout=timeout
+                )
+                if response.status_code not in RETRY_STATUS_CODES:
+                    # The endpoint answered; client errors do not trip the breaker
+                    breaker.record_success()
+                    response.raise_for_status()
+                    return response.json()
+                logger.warning(
+                    f"API request to {url} returned {response.status_code} "
+                    f"(attempt {attempt + 1}/{retries + 1})"
+                )
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                logger.warning(
+                    f"API request to {url} failed: {e} "
+                    f"(attempt {attempt + 1}/{retries + 1})"
+                )
+            except (RequestException, ValueError) as e:
+                logger.error(f"API request failed: {str(e)}")
+                if response is None:
+                    # Never reached the endpoint; don't leave a trial hanging
+                    breaker.record_failure()
+                return None
+
+            breaker.record_failure()
+            if attempt < retries:
+                time.sleep(self._backoff_delay(attempt, response))
+
+        logger.error(f"API request to {url} failed after {retries + 1} attempts")
+        return None
+
+    def stream_request(
+        self,
+        url: str,
+        on_chunk: Callable[[str], None],
+        headers: Optional[Dict[str, str]] = None,
+        data: Optional[Dict[str, Any]] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> Optional[str]:
+        """
+        POST a chat completion request with ``"stream": true`` and read the
+        server-sent events as they arrive.
+
+        Each ``data:`` event's ``choices[0].delta.content`` is passed to
+        ``on_chunk`` as soon as it is received. Streams are not retried, since
+        part of the text may already have been shown; callers fall back to
+        ``request`` when this returns None.
+
+        Args:
+            url: API endpoint URL
+            on_chunk: Called with each piece of generated text
+            headers: Request headers
+            data: JSON payload; ``"stream": true`` is added
+            timeout: Connect timeout and maximum gap between events, in seconds
+
+        Returns:
+            The complete generated text, or None if the stream failed or
+            produced no text
+        """
+        breaker = self.breaker_for(url)
+        if not breaker.allow_request():
+            logger.warning(f"Circuit open for {url}; skipping streaming request")
+            return None
+
+        payload = dict(data or {}, stream=True)
+        parts = []
+        answered = False
+        try:
+            with self.session.post(
+                url, headers=headers, json=payload, timeout=timeout, stream=True
+            ) as response:
+                if response.status_code in RETRY_STATUS_CODES:
+                    logger.warning(
+                        f"Streaming request to {url} returned {response.status_code}"
+                    )
+                    breaker.record_failure()
+                    return None
+                breaker.record_success()
+                answered = True
+                response.raise_for_status()
+
+                for line in response.iter_lines():
+                    if not line.startswith(b"data:"):
+                        continue  # Blank separators, comments and other fields
+                    event = line[5:].strip()
+                    if event == b"[DONE]":
+                        break
+                    choices = json.loads(event.decode("utf-8")).get("choices") or []
+                    if not choices:
+                        continue
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        parts.append(content)
+                        on_chunk(content)
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ) as e:
+            logger.warning(f"Streaming request to {url} failed: {e}")
+            if not answered:
+                breaker.record_failure()
+            return None
+        except (RequestException, ValueError) as e:
+            logger.error(f"Streaming request failed: {str(e)}")
+            if not answered:
+                # Never reached the endpoint; don't leave a trial hanging
+                breaker.record_failure()
+            return None
+
+        return "".join(parts) or None
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+
+_default_client: Optional[ApiClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> ApiClient:
+    """Return the process-wide API client, creating it on first use."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = ApiClient()
+        return _default_client
+
+
 def make_api_request(
     url: str,
     method: str = "POST",
     headers: Optional[Dict[str, str]] = None,
     data: Optional[Dict[str, Any]] = None,
     timeout: int = 30,
+    max_retries: Optional[int] = None,
 ) -> Optional[Dict[str, Any]]:
     """
     Make an API request to the specified endpoint.
 
+    Goes through the shared ApiClient, so connections are reused, transient
+    failures are retried and an unavailable endpoint fails fast.
+
     Args:
         url: API endpoint URL
         method: HTTP method (default: POST)
         headers: Request headers
         data: Request payload
         timeout: Request timeout in seconds
+        max_retries: Override for the number of retries
 
     Returns:
         Response data as dictionary or None if request fails
     """
-    try:
-        response = requests.request(
-            method=method, url=url, headers=headers, json=data, timeout=timeout
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        logger.error(f"API request failed: {str(e)}")
-        return None
+    return get_client().request(
+        url,
+        method=method,
+        headers=headers,
+        data=data,
+        timeout=timeout,
+        max_retries=max_retries,
+    )
+
+
+def stream_api_request(
+    url: str,
+    on_chunk: Callable[[str], None],
+    headers: Optional[Dict[str, str]] = None,
+    data: Optional[Dict[str, Any]] = None,
+    timeout: int = 30,
+) -> Optional[str]:
+    """
+    Make a streaming chat completion request through the shared ApiClient.
+
+    Args:
+        url: API endpoint URL
+        on_chunk: Called with each piece of generated text as it arrives
+        headers: Request headers
+        data: Request payload
+        timeout: Connect timeout and maximum gap between events, in seconds
+
+    Returns:
+        The complete generated text, or None if streaming failed
+    """
+    return get_client().stream_request(
+        url, on_chunk, headers=headers, data=data, timeout=timeout
+    )
 
 
 def get_api_key(service_name: str) -> str | None:
@@ -11,18 +11,23 @@
 
 import logging
 import json
-from typing import Dict, List, Any, Optional, Tuple
-from datetime import datetime
+import threading
+from collections import OrderedDict, deque
+from functools import partial
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from datetime import datetime, timezone
 from enum import Enum
 from dataclasses import dataclass
 
-from .api_client import get_api_key, make_api_request
+from .api_client import get_api_key, make_api_request, stream_api_request
+from .report_generator import WellbeingRollup
 
 logger = logging.getLogger(__name__)
 
 # API configuration
 ZHIPUAI_API_ENDPOINT = "https://open.bigmodel.cn/api/paas/v4/chat/completions"
 DEFAULT_MODEL = "glm-4"
+DIALOGUE_TIMEOUT = 30  # seconds per attempt
 
 
 # 基于Beck的认知扭曲类型
@@ -259,18 +264,32 @@ SOCRATIC_QUESTION_TEMPLATES = {
 class CBTConversationAnalyzer:
     """基于CBT理论的对话分析器"""
 
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, write_behind: bool = True):
         """
         初始化CBT对话分析器
 
         Args:
             db_manager: 数据库管理器实例
+            write_behind: 是否通过数据库的写后队列批量写入对话与分析记录
+                （不阻塞回复）；为False时同步写入
         """
         self.db_manager = db_manager
+        self._writer = db_manager.write_behind() if write_behind else None
         self._ensure_tables_exist()
+        # 报告使用的每日汇总，随消息和认知分析一起增量更新
+        self.rollup = WellbeingRollup(db_manager)
         self.api_key = get_api_key("ZHIPUAI")
         self.max_context_length = 50
         self.max_history_age_days = 30
+        # 最近消息的内存环形缓冲区：(user_id, context_id) -> deque，按LRU淘汰空闲用户；
+        # SQLite仍是持久存储，缓冲区在首次访问时从数据库加载
+        self.max_cached_contexts = 64
+        self._context_buffers: OrderedDict = OrderedDict()
+        self._context_lock = threading.Lock()
+        # 每次写入或失效时递增，防止并发加载把过期结果放进缓存
+        self._context_generation = 0
+        # 每个用户的消息总数，首次访问时从conversation_stats加载
+        self._message_counts: Dict[int, int] = {}
 
     def _ensure_tables_exist(self):
         """确保必要的数据库表存在"""
@@ -348,6 +367,9 @@ class CBTConversationAnalyzer:
         self.db_manager.connection.commit()
         self.db_manager.disconnect()
 
+        # 为对话历史与认知分析的按用户时间查询建立索引
+        self.db_manager.ensure_indexes("conversation_history", "cognitive_analysis")
+
     def analyze_cognitive_patterns(
         self, user_id: int, message: str, context: Optional[List[str]] = None
     ) -> CognitiveAnalysisResult:
@@ -753,9 +775,12 @@ class CBTConversationAnalyzer:
         )
 
     def _call_api(
-        self, prompt: str, system_prompt: Optional[str] = None
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        on_chunk: Optional[Callable[[str], None]] = None,
     ) -> Optional[str]:
-        """调用AI API"""
+        """调用AI API；提供on_chunk时优先流式输出，失败则回退为普通请求"""
         if not self.api_key:
             return None
 
@@ -778,12 +803,20 @@ class CBTConversationAnalyzer:
                 "temperature": 0.3,
             }
 
+            if on_chunk is not None:
+                streamed = stream_api_request(
+                    ZHIPUAI_API_ENDPOINT, on_chunk, headers=headers, data=data
+                )
+                if streamed and streamed.strip():
+                    return streamed.strip()
+                logger.warning("流式调用失败，回退为普通请求")
+
             response = make_api_request(
                 url=ZHIPUAI_API_ENDPOINT,
                 method="POST",
                 headers=headers,
                 data=data,
-                timeout=30,
+                timeout=DIALOGUE_TIMEOUT,
             )
 
             if response and "choices" in response:
@@ -957,8 +990,7 @@ class CBTConversationAnalyzer:
     def _record_socratic_dialogue(self, user_id: int, response: SocraticResponse):
         """记录苏格拉底式对话"""
         try:
-            self.db_manager.connect()
-            self.db_manager.cursor.execute(
+            self._write(
                 """
                 INSERT INTO socratic_dialogue
                 (user_id, question_type, question_text)
@@ -966,8 +998,6 @@ class CBTConversationAnalyzer:
                 """,
                 (user_id, response.question_type.value, response.question),
             )
-            self.db_manager.connection.commit()
-            self.db_manager.disconnect()
         except Exception as e:
             logger.error(f"记录苏格拉底式对话失败: {e}")
 
@@ -976,8 +1006,6 @@ class CBTConversationAnalyzer:
     ):
         """存储认知分析结果"""
         try:
-            self.db_manager.connect()
-
             # 将结果转换为JSON字符串
             import json
 
@@ -989,26 +1017,34 @@ class CBTConversationAnalyzer:
             )
             core_beliefs_json = json.dumps(result.core_beliefs)
             automatic_thoughts_json = json.dumps(result.automatic_thoughts)
+            timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
 
-            self.db_manager.cursor.execute(
-                """
-                INSERT INTO cognitive_analysis
-                (user_id, message_text, distortions, irrational_beliefs,
-                 core_beliefs, automatic_thoughts, confidence_score)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
+            statements = [
                 (
-                    user_id,
-                    message,
-                    distortions_json,
-                    beliefs_json,
-                    core_beliefs_json,
-                    automatic_thoughts_json,
-                    result.confidence,
-                ),
+                    """
+                    INSERT INTO cognitive_analysis
+                    (user_id, message_text, distortions, irrational_beliefs,
+                     core_beliefs, automatic_thoughts, confidence_score,
+                     analysis_timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        user_id,
+                        message,
+                        distortions_json,
+                        beliefs_json,
+                        core_beliefs_json,
+                        automatic_thoughts_json,
+                        result.confidence,
+                        timestamp,
+                    ),
+                )
+            ]
+            # 累加到当天的认知分析汇总，与原始记录在同一事务中提交
+            statements += self.rollup.analysis_statements(
+                user_id, timestamp[:10], distortions_json
             )
-            self.db_manager.connection.commit()
-            self.db_manager.disconnect()
+            self._write_many(statements)
         except Exception as e:
             logger.error(f"存储认知分析结果失败: {e}")
 
@@ -1021,8 +1057,7 @@ class CBTConversationAnalyzer:
     ):
         """存储认知重构记录"""
         try:
-            self.db_manager.connect()
-            self.db_manager.cursor.execute(
+            self._write(
                 """
                 INSERT INTO cognitive_restructuring
                 (user_id, original_thought, restructured_thought, technique_used)
@@ -1030,97 +1065,251 @@ class CBTConversationAnalyzer:
                 """,
                 (user_id, original_thought, restructured_thought, technique),
             )
-            self.db_manager.connection.commit()
-            self.db_manager.disconnect()
         except Exception as e:
             logger.error(f"存储认知重构记录失败: {e}")
 
+    def _write(self, query: str, params: tuple, on_written=None):
+        """
+        写入不需要立即读回的记录
+
+        启用写后队列时排队，由后台线程批量提交；否则同步写入。
+
+        Args:
+            query: 写入语句
+            params: 语句参数
+            on_written: 提交后以新行ID调用的回调
+        """
+        if self._writer is not None:
+            self._writer.submit(query, params, on_written)
+            return
+        row_id = self.db_manager.execute_insert(query, params)
+        if on_written is not None and row_id:
+            on_written(row_id)
+
+    def _write_many(self, statements: List[tuple]):
+        """
+        写入必须一起提交的一组记录（原始记录及其累加的汇总）
+
+        两者不在同一事务中提交时，恰在中间运行的补算会把记录计入两次。
+
+        Args:
+            statements: (写入语句, 参数) 或 (写入语句, 参数, 提交后的回调) 列表
+        """
+        if self._writer is not None:
+            self._writer.submit_many(statements)
+            return
+        written = []
+        with self.db_manager.transaction():
+            for query, params, *on_written in statements:
+                row_id = self.db_manager.execute_insert(query, params)
+                if on_written and on_written[0] is not None and row_id:
+                    written.append((on_written[0], row_id))
+        for on_written, row_id in written:
+            on_written(row_id)
+
+    def flush(self):
+        """等待写后队列中已提交的记录全部写入数据库"""
+        if self._writer is not None:
+            self._writer.flush()
+
     def store_message(
         self, user_id: int, message: str, response: str = "", emotion_detected: str = ""
     ):
-        """存储对话消息到数据库（向后兼容方法）"""
-        try:
-            self.db_manager.connect()
-
-            # 存储用户消息
-            self.db_manager.cursor.execute(
-                """
-                INSERT INTO conversation_history
-                (user_id, message, is_user, emotion_score, topic)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (user_id, message, 1, 0.5, emotion_detected or "neutral"),
-            )
+        """
+        存储对话消息（向后兼容方法），并追加到内存上下文缓冲区
 
+        数据库写入经写后队列异步完成；缓冲区中消息的id在写入提交后才会填上。
+        """
+        try:
+            # 显式写入时间戳（与CURRENT_TIMESTAMP格式一致），使缓冲区与数据库一致
+            timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            rows = [(message, 1, emotion_detected or "neutral")]
             # 如果有回复，也存储回复
             if response:
-                self.db_manager.cursor.execute(
+                rows.append((response, 0, "ai_response"))
+            # 当天汇总的累加语句（只有用户消息计入情感分布）
+            rollup_statements = self.rollup.message_statements(
+                user_id,
+                timestamp[:10],
+                [
+                    (content, topic if is_user else None)
+                    for content, is_user, topic in rows
+                ],
+            )
+
+            # 排队写入可能因写后队列已满而阻塞，不能持锁进行，否则会拖住所有
+            # 用户的上下文读取。写入前后各递增一次代数：写入前开始的并发加载
+            # 可能读不到这些消息，写入后、发布前开始的加载可能已读到它们，两者
+            # 的结果都不会被缓存，缓冲区中的消息也就不会缺失或重复
+            with self._context_lock:
+                self._context_generation += 1
+
+            stored, statements = [], []
+            for content, is_user, topic in rows:
+                entry = self._history_entry(
+                    (None, content, is_user, timestamp, None, topic, 0.5)
+                )
+                stored.append(entry)
+                statements.append(
+                    (
+                        """
+                        INSERT INTO conversation_history
+                        (user_id, message, is_user, emotion_score, topic, timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        (user_id, content, is_user, 0.5, topic, timestamp),
+                        partial(entry.__setitem__, "id"),
+                    )
+                )
+
+            # 维护消息计数
+            statements.append(
+                (
                     """
-                    INSERT INTO conversation_history
-                    (user_id, message, is_user, emotion_score, topic)
-                    VALUES (?, ?, ?, ?, ?)
+                    INSERT INTO conversation_stats (user_id, message_count)
+                    VALUES (?, ?)
+                    ON CONFLICT (user_id) DO UPDATE SET
+                        message_count = message_count + excluded.message_count
                     """,
-                    (user_id, response, 0, 0.5, "ai_response"),
+                    (user_id, len(rows)),
                 )
-
-            self.db_manager.connection.commit()
-            self.db_manager.disconnect()
+            )
+            # 消息、计数和当天汇总在同一事务中提交
+            self._write_many(statements + rollup_statements)
+
+            with self._context_lock:
+                self._context_generation += 1
+                # 新消息不带context_id，只属于该用户的全部消息缓冲区
+                buffer = self._context_buffers.get((user_id, None))
+                if buffer is not None:
+                    buffer.extend(stored)
+                if user_id in self._message_counts:
+                    self._message_counts[user_id] += len(rows)
 
         except Exception as e:
             logger.error(f"存储对话消息失败: {e}")
 
+    def get_message_count(self, user_id: int) -> int:
+        """获取用户的对话消息总数（首次从conversation_stats加载，之后由内存计数提供）"""
+        try:
+            with self._context_lock:
+                if user_id in self._message_counts:
+                    return self._message_counts[user_id]
+                generation = self._context_generation
+
+            self.flush()
+            rows = self.db_manager.execute_query(
+                "SELECT message_count FROM conversation_stats WHERE user_id = ?",
+                (user_id,),
+            )
+            count = rows[0]["message_count"] if rows else 0
+            with self._context_lock:
+                if generation == self._context_generation:
+                    self._message_counts[user_id] = count
+            return count
+        except Exception as e:
+            logger.error(f"获取消息计数失败: {e}")
+            return 0
+
     def get_conversation_history(
         self, user_id: int, limit: int = 50, context_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """获取对话历史"""
-        try:
-            self.db_manager.connect()
-
-            # 构建查询
-            if context_id:
-                query = """
-                    SELECT id, message, is_user, timestamp, context_id, topic, emotion_score
-                    FROM conversation_history
-                    WHERE user_id = ? AND context_id = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """
-                params = (user_id, context_id, limit)
-            else:
-                query = """
-                    SELECT id, message, is_user, timestamp, context_id, topic, emotion_score
-                    FROM conversation_history
-                    WHERE user_id = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """
-                params = (user_id, limit)
-
-            self.db_manager.cursor.execute(query, params)
-            rows = self.db_manager.cursor.fetchall()
-            self.db_manager.disconnect()
+        """
+        获取对话历史（按时间正序，最早的在前）
 
-            # 转换为标准格式
-            messages = []
-            for row in rows:
-                message = {
-                    "id": row[0],
-                    "content": row[1],
-                    "role": "user" if row[2] == 1 else "assistant",
-                    "timestamp": row[3],
-                    "context_id": row[4],
-                    "topic": row[5],
-                    "emotion_score": row[6],
-                }
-                messages.append(message)
-
-            # 按时间正序返回（最早的在前）
-            return list(reversed(messages))
+        不超过max_context_length条时由内存环形缓冲区提供，热路径上不访问数据库；
+        缓冲区在首次访问时从数据库加载。
+        """
+        try:
+            if limit <= 0 or limit > self.max_context_length:
+                self.flush()
+                return self._query_conversation_history(user_id, limit, context_id)
+
+            key = (user_id, context_id)
+            with self._context_lock:
+                buffer = self._context_buffers.get(key)
+                if buffer is not None:
+                    self._context_buffers.move_to_end(key)
+                    return [dict(msg) for msg in list(buffer)[-limit:]]
+                generation = self._context_generation
+
+            # 缓冲区未命中：从数据库加载（不持锁，避免阻塞其他用户）
+            self.flush()
+            messages = self._query_conversation_history(
+                user_id, self.max_context_length, context_id
+            )
+            with self._context_lock:
+                # 加载期间有新写入时结果可能已过期，只返回不缓存
+                if generation == self._context_generation:
+                    self._context_buffers[key] = deque(
+                        messages, maxlen=self.max_context_length
+                    )
+                    while len(self._context_buffers) > self.max_cached_contexts:
+                        self._context_buffers.popitem(last=False)
+            return messages[-limit:]
 
         except Exception as e:
             logger.error(f"获取对话历史失败: {e}")
             return []
 
+    def invalidate_context_cache(self, user_id: Optional[int] = None):
+        """丢弃内存中的上下文缓冲区和消息计数（全部或指定用户），下次访问时重新从数据库加载"""
+        with self._context_lock:
+            self._context_generation += 1
+            if user_id is None:
+                self._context_buffers.clear()
+                self._message_counts.clear()
+                return
+            for key in [k for k in self._context_buffers if k[0] == user_id]:
+                del self._context_buffers[key]
+            self._message_counts.pop(user_id, None)
+
+    @staticmethod
+    def _history_entry(row) -> Dict[str, Any]:
+        """将conversation_history查询行转换为标准消息格式"""
+        return {
+            "id": row[0],
+            "content": row[1],
+            "role": "user" if row[2] == 1 else "assistant",
+            "timestamp": row[3],
+            "context_id": row[4],
+            "topic": row[5],
+            "emotion_score": row[6],
+        }
+
+    def _query_conversation_history(
+        self, user_id: int, limit: int, context_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """从数据库读取最近limit条对话历史，按时间正序返回"""
+        self.db_manager.connect()
+
+        # 构建查询
+        if context_id:
+            query = """
+                SELECT id, message, is_user, timestamp, context_id, topic, emotion_score
+                FROM conversation_history
+                WHERE user_id = ? AND context_id = ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """
+            params = (user_id, context_id, limit)
+        else:
+            query = """
+                SELECT id, message, is_user, timestamp, context_id, topic, emotion_score
+                FROM conversation_history
+                WHERE user_id = ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """
+            params = (user_id, limit)
+
+        self.db_manager.cursor.execute(query, params)
+        rows = self.db_manager.cursor.fetchall()
+        self.db_manager.disconnect()
+
+        # 按时间正序返回（最早的在前）
+        return [self._history_entry(row) for row in reversed(rows)]
+
     def get_psychological_profile(self, user_id: int) -> Optional[Dict[str, Any]]:
         """获取用户心理画像（简化版本）"""
         try:
@@ -1160,9 +1349,13 @@ class CBTConversationAnalyzer:
             return None
 
     def generate_dialogue_with_style(
-        self, user_id: int, prompt: str, context_id: Optional[str] = None
+        self,
+        user_id: int,
+        prompt: str,
+        context_id: Optional[str] = None,
+        on_chunk: Optional[Callable[[str], None]] = None,
     ) -> Tuple[str, str]:
-        """生成带风格的对话"""
+        """生成带风格的对话；提供on_chunk时逐段回调生成的文本"""
         try:
             # 使用API生成对话
             if not self.api_key:
@@ -1178,7 +1371,7 @@ class CBTConversationAnalyzer:
 保持回应简洁（1-2句话），温暖自然，像真正的伙伴一样。
 避免空洞的套话。尝试与具体事件建立联系。"""
 
-            response = self._call_api(prompt, system_prompt)
+            response = self._call_api(prompt, system_prompt, on_chunk=on_chunk)
 
             if response:
                 generated_context_id = (
@@ -1201,6 +1394,7 @@ class CBTConversationAnalyzer:
     def cleanup_old_conversations(self, days_old: int = 30):
         """清理旧对话记录"""
         try:
+            self.flush()
             self.db_manager.connect()
             self.db_manager.cursor.execute(
                 """
@@ -1212,6 +1406,8 @@ class CBTConversationAnalyzer:
             )
             self.db_manager.connection.commit()
             self.db_manager.disconnect()
+            self.db_manager.rebuild_conversation_stats()
+            self.invalidate_context_cache()
             logger.info(f"清理了{days_old}天前的对话记录")
         except Exception as e:
             logger.error(f"清理对话记录失败: {e}")
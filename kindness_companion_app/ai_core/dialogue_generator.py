@@ -1,5 +1,6 @@
 import logging
-from .api_client import get_api_key, make_api_request
+from typing import Callable, Optional
+from .api_client import get_api_key, make_api_request, stream_api_request
 from requests.exceptions import RequestException
 
 logger = logging.getLogger(__name__)
@@ -9,8 +10,18 @@ ZHIPUAI_API_ENDPOINT = (
 DEFAULT_MODEL = "glm-4-flash"  # Or another suitable model
 
 
-def generate_pet_dialogue(user_id: int, event_type: str, event_data: dict) -> str:
-    """Generates pet dialogue based on user events using an AI API."""
+def generate_pet_dialogue(
+    user_id: int,
+    event_type: str,
+    event_data: dict,
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    Generates pet dialogue based on user events using an AI API.
+
+    If ``on_chunk`` is given, the reply is streamed and each piece of text is
+    passed to it as it arrives; the complete dialogue is still returned.
+    """
     # 1. Construct a prompt based on the event
     #    Improved prompt construction:
     prompt_parts = [
@@ -67,14 +78,19 @@ def generate_pet_dialogue(user_id: int, event_type: str, event_data: dict) -> st
     logger.debug(f"Generated dialogue prompt:\n{prompt}")
 
     # 2. Call the API
-    dialogue = _call_dialogue_api(prompt)
+    dialogue = _call_dialogue_api(prompt, on_chunk=on_chunk)
     return dialogue if dialogue else "..."  # Return ellipsis if API fails
 
 
-def _call_dialogue_api(prompt: str) -> str | None:
+def _call_dialogue_api(
+    prompt: str, on_chunk: Optional[Callable[[str], None]] = None
+) -> str | None:
     """
     Private helper function to call the configured dialogue generation API (ZhipuAI).
     Requires API key management (from config.py via api_client).
+
+    With ``on_chunk``, the streaming endpoint is tried first; if it fails or
+    returns nothing usable, the regular blocking request is made instead.
     """
     api_key = get_api_key("ZHIPUAI")
     if not api_key:
@@ -94,6 +110,15 @@ def _call_dialogue_api(prompt: str) -> str | None:
         "temperature": 0.8,  # Adjust creativity
     }
 
+    if on_chunk is not None:
+        streamed = stream_api_request(
+            ZHIPUAI_API_ENDPOINT, on_chunk, headers=headers, data=payload
+        )
+        if streamed and streamed.strip() not in ("", "[empty]", "[blank]"):
+            logger.info(f"Received streamed dialogue from API: {streamed[:50]}...")
+            return streamed.strip()
+        logger.warning("Streaming dialogue failed; falling back to blocking request")
+
     try:
         logger.debug(
             f"Calling ZhipuAI Dialogue API. Endpoint: {ZHIPUAI_API_ENDPOINT}, Model: {DEFAULT_MODEL}"
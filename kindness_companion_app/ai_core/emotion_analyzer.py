@@ -1,8 +1,6 @@
 import logging
-from typing import Optional, Dict, Tuple, List, Callable, NamedTuple
+from typing import Optional, Dict, Tuple, List, Callable, NamedTuple, Sequence
 import os
-import requests
-from requests.exceptions import RequestException
 import threading
 import queue
 import time
@@ -11,6 +9,12 @@ import math
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
+from .api_client import make_api_request
+from .lexicon_matcher import LexiconHits, LexiconMatcher
+from .result_cache import ResultCache, make_cache_key
+
 logger = logging.getLogger(__name__)
 
 # API configuration
@@ -485,14 +489,320 @@ CHINESE_EMOTION_KEYWORDS = {
 }
 
 
+# Russell维度关键词（命中一个词加/减 0.4）
+VALENCE_POSITIVE_WORDS = [
+    "开心",
+    "快乐",
+    "高兴",
+    "愉快",
+    "喜悦",
+    "满意",
+    "棒",
+    "好",
+    "很好",
+    "不错",
+    "不坏",
+    "不差",
+    "不赖",
+    "还行",
+    "还好",
+    "挺好",
+    "蛮好",
+    "真好",
+    "良好",
+    "美好",
+    "顺利",
+    "成功",
+    "满足",
+    "幸福",
+    "兴奋",
+    "期待",
+    "希望",
+    "信心",
+    "积极",
+    "正面",
+    "乐观",
+    "舒服",
+    "舒心",
+    "放心",
+    "安心",
+    "感谢",
+    "赞",
+]
+VALENCE_NEGATIVE_WORDS = [
+    "难过",
+    "伤心",
+    "痛苦",
+    "失望",
+    "沮丧",
+    "糟糕",
+    "差",
+    "不好",
+    "担心",
+    "焦虑",
+    "害怕",
+    "恐惧",
+    "紧张",
+    "不安",
+    "失落",
+    "绝望",
+    "愤怒",
+    "生气",
+    "讨厌",
+    "厌恶",
+    "反感",
+    "无助",
+    "疲惫",
+    "压力",
+]
+AROUSAL_HIGH_WORDS = [
+    "兴奋",
+    "激动",
+    "紧张",
+    "焦虑",
+    "愤怒",
+    "害怕",
+    "震惊",
+    "惊讶",
+    "急",
+    "忙",
+    "激烈",
+    "强烈",
+    "剧烈",
+    "猛烈",
+    "疯狂",
+    "狂热",
+    "冲动",
+    "热情",
+    "热烈",
+    "火热",
+    "沸腾",
+    "澎湃",
+]
+AROUSAL_LOW_WORDS = [
+    "平静",
+    "放松",
+    "疲惫",
+    "困倦",
+    "安静",
+    "淡定",
+    "冷静",
+    "宁静",
+    "安详",
+    "悠闲",
+    "慢",
+    "缓",
+    "轻松",
+    "舒缓",
+    "温和",
+    "柔和",
+    "平和",
+    "恬静",
+    "安逸",
+    "惬意",
+]
+DOMINANCE_HIGH_WORDS = [
+    "控制",
+    "决定",
+    "主动",
+    "自信",
+    "强大",
+    "能够",
+    "可以",
+    "确定",
+    "肯定",
+    "坚定",
+    "果断",
+    "坚强",
+    "有力",
+    "掌控",
+    "管理",
+    "指挥",
+    "领导",
+    "支配",
+    "影响",
+    "改变",
+    "创造",
+    "实现",
+]
+DOMINANCE_LOW_WORDS = [
+    "无助",
+    "被动",
+    "依赖",
+    "脆弱",
+    "不能",
+    "没办法",
+    "无奈",
+    "无力",
+    "迷茫",
+    "困惑",
+    "迷失",
+    "不知所措",
+    "听从",
+    "服从",
+    "顺从",
+    "屈服",
+    "妥协",
+    "让步",
+    "退缩",
+    "逃避",
+    "躲避",
+]
+
+# 否定词，以及包含否定词但表达积极的短语
+NEGATION_WORDS = ["不", "没", "无", "非", "未", "别", "勿"]
+POSITIVE_NEGATION_PHRASES = ["不错", "不坏", "不差", "不赖"]
+
+# 情感强度指示词
+INTENSITY_SUPER_HIGH_WORDS = [
+    "满分",
+    "完美",
+    "perfect",
+    "amazing",
+    "excellent",
+    "太棒了",
+    "厉害",
+]
+INTENSITY_HIGH_WORDS = [
+    "非常",
+    "特别",
+    "超级",
+    "极其",
+    "太",
+    "超",
+    "最",
+    "真的",
+    "好",
+    "很",
+]
+INTENSITY_LOW_WORDS = ["有点", "稍微", "一点", "轻微", "略", "还好", "还行"]
+
+# 特殊文本类型，按优先级排列: (动画状态, 模式列表)
+SPECIAL_TEXT_PATTERNS = [
+    (
+        "thinking",
+        [
+            "你猜",
+            "猜猜",
+            "你觉得",
+            "你认为",
+            "你说",
+            "你想",
+            "你看",
+            "怎么样",
+            "如何",
+            "什么样",
+            "好不好",
+            "对不对",
+            "是不是",
+        ],
+    ),  # 互动性问句
+    (
+        "thinking",
+        [
+            "怎么办",
+            "怎么做",
+            "如何",
+            "什么意思",
+            "为什么",
+            "哪里",
+            "什么时候",
+            "有什么",
+            "能不能",
+            "可以吗",
+            "行吗",
+            "好吗",
+        ],
+    ),  # 询问类问句
+    (
+        "happy",
+        [
+            "你好",
+            "hi",
+            "hello",
+            "早上好",
+            "晚上好",
+            "最近怎么样",
+            "在干嘛",
+            "在做什么",
+            "聊天",
+            "说话",
+        ],
+    ),  # 打招呼/日常对话
+    ("confused", ["测试", "试试", "看看", "检查", "test", "试探"]),  # 测试/试探
+]
+
+# 各关键词分析阶段使用的全部词表，按类别（tag）索引
+EMOTION_LEXICONS = {
+    **CHINESE_EMOTION_KEYWORDS,
+    "valence+": VALENCE_POSITIVE_WORDS,
+    "valence-": VALENCE_NEGATIVE_WORDS,
+    "arousal+": AROUSAL_HIGH_WORDS,
+    "arousal-": AROUSAL_LOW_WORDS,
+    "dominance+": DOMINANCE_HIGH_WORDS,
+    "dominance-": DOMINANCE_LOW_WORDS,
+    "negation": NEGATION_WORDS,
+    "positive_negation": POSITIVE_NEGATION_PHRASES,
+    "intensity_super_high": INTENSITY_SUPER_HIGH_WORDS,
+    "intensity_high": INTENSITY_HIGH_WORDS,
+    "intensity_low": INTENSITY_LOW_WORDS,
+    **{
+        ("special", index): patterns
+        for index, (_animation, patterns) in enumerate(SPECIAL_TEXT_PATTERNS)
+    },
+}
+
+# 所有词表编译成一个自动机；对一段文本只扫描一次，各阶段共享命中结果
+EMOTION_LEXICON = LexiconMatcher.from_lexicons(EMOTION_LEXICONS)
+
+# 批量分析使用的矩阵布局：前几列是各Plutchik情感的关键词得分
+_BATCH_EMOTIONS = list(CHINESE_EMOTION_KEYWORDS)
+_BATCH_SCORE_TAGS = _BATCH_EMOTIONS + [
+    "valence+",
+    "valence-",
+    "arousal+",
+    "arousal-",
+    "dominance+",
+    "dominance-",
+]
+_BATCH_COUNT_TAGS = [
+    "negation",
+    "positive_negation",
+    "intensity_super_high",
+    "intensity_high",
+    "intensity_low",
+]
+# 各Plutchik情感的维度中心，用于最近情感的向量化距离计算
+_CENTROID_EMOTIONS = list(PLUTCHIK_DIMENSIONS)
+_PLUTCHIK_CENTROIDS = np.array(
+    [
+        [dims.valence, dims.arousal, dims.dominance]
+        for dims in PLUTCHIK_DIMENSIONS.values()
+    ]
+)
+_INTENSITY_LEVELS = [
+    EmotionIntensity.LOW,
+    EmotionIntensity.MEDIUM,
+    EmotionIntensity.HIGH,
+]
+
+
 class EmotionAnalyzer:
     """基于科学理论的情感分析器"""
 
-    def __init__(self):
+    def __init__(self, result_cache: Optional[ResultCache] = None, timeline=None):
+        """
+        Args:
+            result_cache: API结果缓存，None时使用默认的持久化缓存
+            timeline: 情感时间序列（EmotionTimeline），设置后每条情感状态都会持久化
+        """
         self.api_key = self._get_api_key()
+        # 维度分析API结果按请求内容缓存，重复文本不再重复请求
+        self.result_cache = result_cache or ResultCache()
         self.emotion_history: Dict[int, List[EmotionState]] = {}  # 用户情感历史
         self.animation_history: Dict[int, List[str]] = {}  # 用户动画历史
         self.current_animation: Dict[int, str] = {}  # 用户当前动画状态
+        self.timeline = timeline  # 持久化的情感时间序列
 
     def _get_api_key(self) -> Optional[str]:
         """获取API密钥"""
@@ -516,8 +826,11 @@ class EmotionAnalyzer:
             EmotionState: 完整的情感状态
         """
         try:
+            # 所有关键词阶段共用同一次词表匹配结果
+            hits = EMOTION_LEXICON.match(text.lower())
+
             # 0. 首先检查特殊文本类型
-            special_animation = self._detect_special_text_types(text)
+            special_animation = self._detect_special_text_types(text, hits)
             if special_animation:
                 # 为特殊文本类型创建一个简化的情感状态
                 emotion_state = EmotionState(
@@ -542,20 +855,22 @@ class EmotionAnalyzer:
                 return emotion_state
 
             # 1. 多维度情感分析
-            dimensions = self._analyze_emotion_dimensions(text, context)
+            dimensions = self._analyze_emotion_dimensions(text, context, hits)
 
             # 2. Plutchik基础情感识别
             primary_emotion, intensity = self._identify_plutchik_emotion(
-                text, dimensions
+                text, dimensions, hits
             )
 
             # 3. 次要情感识别
             secondary_emotions = self._identify_secondary_emotions(
-                text, primary_emotion
+                text, primary_emotion, hits
             )
 
             # 4. 置信度计算
-            confidence = self._calculate_confidence(text, primary_emotion, dimensions)
+            confidence = self._calculate_confidence(
+                text, primary_emotion, dimensions, hits
+            )
 
             # 5. 构建情感状态
             emotion_state = EmotionState(
@@ -589,23 +904,218 @@ class EmotionAnalyzer:
                 confidence=0.1,
             )
 
+    def analyze_emotion_keywords(self, text: str) -> EmotionState:
+        """
+        只用本地词表的快速情感分析
+
+        不调用API、不读取也不更新情感历史，适合在远程分析返回之前
+        先给出一个情感标签（例如让对话生成提前开始）。
+
+        Args:
+            text: 待分析文本
+
+        Returns:
+            EmotionState: 基于关键词的情感状态
+        """
+        hits = EMOTION_LEXICON.match(text.lower())
+
+        special_animation = self._detect_special_text_types(text, hits)
+        if special_animation:
+            emotion_state = EmotionState(
+                primary_emotion=PlutchikEmotions.TRUST,
+                intensity=EmotionIntensity.MEDIUM,
+                dimensions=EmotionDimensions(0.0, 0.0, 0.0),
+                secondary_emotions=[],
+                confidence=0.8,
+            )
+            emotion_state._special_animation = special_animation
+            return emotion_state
+
+        dimensions = self._keyword_dimension_analysis(text, hits)
+        primary_emotion, intensity = self._identify_plutchik_emotion(
+            text, dimensions, hits
+        )
+        return EmotionState(
+            primary_emotion=primary_emotion,
+            intensity=intensity,
+            dimensions=dimensions,
+            secondary_emotions=self._identify_secondary_emotions(
+                text, primary_emotion, hits
+            ),
+            confidence=self._calculate_confidence(
+                text, primary_emotion, dimensions, hits
+            ),
+        )
+
+    def analyze_emotions_batch(
+        self,
+        texts: Sequence[str],
+        user_ids: Optional[Sequence[Optional[int]]] = None,
+    ) -> List[EmotionState]:
+        """
+        批量情感分析，结果与逐条调用 analyze_emotion_advanced 完全一致
+
+        词表命中数汇总成矩阵后，维度得分、最近的Plutchik情感、强度和置信度
+        都对整批文本做一次向量化计算；只有依赖用户情感历史的上下文调整
+        按原顺序逐条进行。
+
+        Args:
+            texts: 待分析文本列表
+            user_ids: 与texts一一对应的用户ID，None表示不追踪情感历史
+
+        Returns:
+            List[EmotionState]: 与texts顺序对应的情感状态
+        """
+        texts = list(texts)
+        if user_ids is None:
+            user_ids = [None] * len(texts)
+        elif len(user_ids) != len(texts):
+            raise ValueError("user_ids must have the same length as texts")
+        if not texts:
+            return []
+
+        hits = [EMOTION_LEXICON.match(text.lower()) for text in texts]
+        special = [
+            self._detect_special_text_types(text, text_hits)
+            for text, text_hits in zip(texts, hits)
+        ]
+
+        # 词表命中矩阵：每行一条文本，每列一个词表类别
+        scores = np.array(
+            [[h.score(tag) for tag in _BATCH_SCORE_TAGS] for h in hits],
+            dtype=float,
+        ).reshape(len(texts), len(_BATCH_SCORE_TAGS))
+        counts = np.array(
+            [[h.count(tag) for tag in _BATCH_COUNT_TAGS] for h in hits],
+            dtype=float,
+        ).reshape(len(texts), len(_BATCH_COUNT_TAGS))
+        column = {tag: i for i, tag in enumerate(_BATCH_SCORE_TAGS)}
+        count_column = {tag: i for i, tag in enumerate(_BATCH_COUNT_TAGS)}
+
+        # 1. 维度分析（与 _keyword_dimension_analysis 相同的运算顺序）
+        valence = (
+            0.4 * scores[:, column["valence+"]] - 0.4 * scores[:, column["valence-"]]
+        )
+        arousal = (
+            0.4 * scores[:, column["arousal+"]] - 0.4 * scores[:, column["arousal-"]]
+        )
+        dominance = (
+            0.4 * scores[:, column["dominance+"]]
+            - 0.4 * scores[:, column["dominance-"]]
+        )
+        exclaimed = np.array(["!" in t or "！" in t for t in texts], dtype=bool)
+        questioned = np.array(["?" in t or "？" in t for t in texts], dtype=bool)
+        arousal[exclaimed] += 0.2
+        dominance[questioned] -= 0.1
+        negated = counts[:, count_column["positive_negation"]] == 0
+        negation = counts[negated, count_column["negation"]]
+        valence[negated] -= 0.1 * negation
+        dominance[negated] -= 0.1 * negation
+        dimensions = np.clip(np.stack([valence, arousal, dominance], axis=1), -1.0, 1.0)
+
+        # 有API时维度仍由API逐条给出，保持与单条分析一致
+        if self.api_key:
+            for i, (text, text_hits) in enumerate(zip(texts, hits)):
+                if special[i]:
+                    continue
+                api_dims = self._analyze_emotion_dimensions(text, None, text_hits)
+                dimensions[i] = (api_dims.valence, api_dims.arousal, api_dims.dominance)
+
+        # 2. Plutchik情感：关键词得分最高者优先，否则取维度空间中最近的情感
+        emotion_scores = scores[:, : len(_BATCH_EMOTIONS)]
+        keyword_index = np.argmax(emotion_scores, axis=1)
+        has_keyword = emotion_scores.max(axis=1) > 0
+        diff = dimensions[:, np.newaxis, :] - _PLUTCHIK_CENTROIDS[np.newaxis, :, :]
+        distances = np.sqrt(
+            diff[:, :, 0] ** 2 + diff[:, :, 1] ** 2 + diff[:, :, 2] ** 2
+        )
+        # argmin 与逐个比较的 "<" 一样，距离相同时取靠前的情感
+        nearest_index = np.argmin(distances, axis=1)
+
+        # 3. 强度：维度模长给出基础强度，再按强度词升降一级
+        magnitude = np.sqrt(
+            dimensions[:, 0] ** 2 + dimensions[:, 1] ** 2 + dimensions[:, 2] ** 2
+        )
+        base_level = np.where(magnitude < 0.5, 0, np.where(magnitude < 1.0, 1, 2))
+        high = counts[:, count_column["intensity_high"]] + np.array(
+            [t.count("!") + t.count("！") for t in texts], dtype=float
+        )
+        low = counts[:, count_column["intensity_low"]]
+        level = np.where(
+            counts[:, count_column["intensity_super_high"]] > 0,
+            2,
+            np.where(
+                (high > low) & (high > 0),
+                np.minimum(base_level + 1, 2),
+                np.where(low > high, np.maximum(base_level - 1, 0), base_level),
+            ),
+        )
+
+        # 4. 置信度（与 _calculate_confidence 相同的运算顺序）
+        confidence = np.full(len(texts), 0.5)
+        confidence[has_keyword] += 0.3  # 关键词情感即为主要情感
+        confidence += magnitude * 0.2
+        confidence[np.array([len(t) > 10 for t in texts], dtype=bool)] += 0.1
+        confidence = np.minimum(1.0, confidence)
+
+        results = []
+        for i, (text, user_id) in enumerate(zip(texts, user_ids)):
+            if special[i]:
+                emotion_state = EmotionState(
+                    primary_emotion=PlutchikEmotions.TRUST,
+                    intensity=EmotionIntensity.MEDIUM,
+                    dimensions=EmotionDimensions(0.0, 0.0, 0.0),
+                    secondary_emotions=[],
+                    confidence=0.8,
+                )
+                emotion_state._special_animation = special[i]
+            else:
+                if has_keyword[i]:
+                    primary_emotion = _BATCH_EMOTIONS[keyword_index[i]]
+                else:
+                    primary_emotion = _CENTROID_EMOTIONS[nearest_index[i]]
+                emotion_state = EmotionState(
+                    primary_emotion=primary_emotion,
+                    intensity=_INTENSITY_LEVELS[level[i]],
+                    dimensions=EmotionDimensions(*map(float, dimensions[i])),
+                    secondary_emotions=self._identify_secondary_emotions(
+                        text, primary_emotion, hits[i]
+                    ),
+                    confidence=float(confidence[i]),
+                )
+
+            # 上下文调整依赖此前的情感历史，必须按顺序逐条处理
+            emotion_state = self._apply_emotional_context(emotion_state, user_id)
+            if user_id:
+                self._update_emotion_history(user_id, emotion_state)
+            results.append(emotion_state)
+
+        logger.info(f"批量情感分析完成: {len(texts)} 条文本")
+        return results
+
     def _analyze_emotion_dimensions(
-        self, text: str, context: Optional[List[str]] = None
+        self,
+        text: str,
+        context: Optional[List[str]] = None,
+        hits: Optional[LexiconHits] = None,
     ) -> EmotionDimensions:
         """基于Russell核心情感理论分析情感维度"""
 
         if self.api_key:
             try:
                 # 使用AI API进行维度分析
-                return self._api_dimension_analysis(text, context)
+                return self._api_dimension_analysis(text, context, hits)
             except Exception as e:
                 logger.warning(f"API维度分析失败，使用关键词分析: {e}")
 
         # 关键词基础的维度分析
-        return self._keyword_dimension_analysis(text)
+        return self._keyword_dimension_analysis(text, hits)
 
     def _api_dimension_analysis(
-        self, text: str, context: Optional[List[str]] = None
+        self,
+        text: str,
+        context: Optional[List[str]] = None,
+        hits: Optional[LexiconHits] = None,
     ) -> EmotionDimensions:
         """使用AI API进行维度分析"""
 
@@ -617,9 +1127,15 @@ class EmotionAnalyzer:
 
         请只返回JSON格式: {"valence": 数值, "arousal": 数值, "dominance": 数值}"""
 
+        context_window = list(context[-3:]) if context else []
         context_text = ""
-        if context:
-            context_text = f"对话上下文：{' '.join(context[-3:])}\n"
+        if context_window:
+            context_text = f"对话上下文：{' '.join(context_window)}\n"
+
+        cache_key = make_cache_key(DEFAULT_MODEL, system_prompt, context_window, text)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return EmotionDimensions(**cached)
 
         prompt = f"""{context_text}
         分析文本："{text}"
@@ -630,7 +1146,7 @@ class EmotionAnalyzer:
         if response:
             try:
                 dimensions_data = json.loads(response)
-                return EmotionDimensions(
+                dimensions = EmotionDimensions(
                     valence=max(
                         -1.0, min(1.0, float(dimensions_data.get("valence", 0.0)))
                     ),
@@ -641,213 +1157,35 @@ class EmotionAnalyzer:
                         -1.0, min(1.0, float(dimensions_data.get("dominance", 0.0)))
                     ),
                 )
+                # 只缓存成功解析的结果，失败的请求下次仍会重试
+                self.result_cache.set(
+                    cache_key,
+                    {
+                        "valence": dimensions.valence,
+                        "arousal": dimensions.arousal,
+                        "dominance": dimensions.dominance,
+                    },
+                )
+                return dimensions
             except (json.JSONDecodeError, ValueError, KeyError) as e:
                 logger.warning(f"API维度响应解析失败: {e}")
 
         # API失败时的备用分析
-        return self._keyword_dimension_analysis(text)
+        return self._keyword_dimension_analysis(text, hits)
 
-    def _keyword_dimension_analysis(self, text: str) -> EmotionDimensions:
+    def _keyword_dimension_analysis(
+        self, text: str, hits: Optional[LexiconHits] = None
+    ) -> EmotionDimensions:
         """基于关键词的维度分析"""
-        text_lower = text.lower()
-
-        # 初始化维度得分
-        valence_score = 0.0
-        arousal_score = 0.0
-        dominance_score = 0.0
-
-        # 扩展的愉悦度关键词
-        positive_words = [
-            "开心",
-            "快乐",
-            "高兴",
-            "愉快",
-            "喜悦",
-            "满意",
-            "棒",
-            "好",
-            "很好",
-            "不错",
-            "不坏",
-            "不差",
-            "不赖",
-            "还行",
-            "还好",
-            "挺好",
-            "蛮好",
-            "真好",
-            "良好",
-            "美好",
-            "顺利",
-            "成功",
-            "满足",
-            "幸福",
-            "兴奋",
-            "期待",
-            "希望",
-            "信心",
-            "积极",
-            "正面",
-            "乐观",
-            "舒服",
-            "舒心",
-            "放心",
-            "安心",
-            "感谢",
-            "赞",
-        ]
-        negative_words = [
-            "难过",
-            "伤心",
-            "痛苦",
-            "失望",
-            "沮丧",
-            "糟糕",
-            "差",
-            "不好",
-            "担心",
-            "焦虑",
-            "害怕",
-            "恐惧",
-            "紧张",
-            "不安",
-            "失落",
-            "绝望",
-            "愤怒",
-            "生气",
-            "讨厌",
-            "厌恶",
-            "反感",
-            "无助",
-            "疲惫",
-            "压力",
-        ]
-
-        # 扩展的唤醒度关键词
-        high_arousal_words = [
-            "兴奋",
-            "激动",
-            "紧张",
-            "焦虑",
-            "愤怒",
-            "害怕",
-            "震惊",
-            "惊讶",
-            "急",
-            "忙",
-            "激烈",
-            "强烈",
-            "剧烈",
-            "猛烈",
-            "疯狂",
-            "狂热",
-            "冲动",
-            "热情",
-            "热烈",
-            "火热",
-            "沸腾",
-            "澎湃",
-        ]
-        low_arousal_words = [
-            "平静",
-            "放松",
-            "疲惫",
-            "困倦",
-            "安静",
-            "淡定",
-            "冷静",
-            "宁静",
-            "安详",
-            "悠闲",
-            "慢",
-            "缓",
-            "轻松",
-            "舒缓",
-            "温和",
-            "柔和",
-            "平和",
-            "恬静",
-            "安逸",
-            "惬意",
-        ]
-
-        # 扩展的控制度关键词
-        high_dominance_words = [
-            "控制",
-            "决定",
-            "主动",
-            "自信",
-            "强大",
-            "能够",
-            "可以",
-            "确定",
-            "肯定",
-            "坚定",
-            "果断",
-            "坚强",
-            "有力",
-            "掌控",
-            "管理",
-            "指挥",
-            "领导",
-            "支配",
-            "影响",
-            "改变",
-            "创造",
-            "实现",
-        ]
-        low_dominance_words = [
-            "无助",
-            "被动",
-            "依赖",
-            "脆弱",
-            "不能",
-            "没办法",
-            "无奈",
-            "无力",
-            "迷茫",
-            "困惑",
-            "迷失",
-            "不知所措",
-            "听从",
-            "服从",
-            "顺从",
-            "屈服",
-            "妥协",
-            "让步",
-            "退缩",
-            "逃避",
-            "躲避",
-        ]
-
-        # 计算维度得分 - 使用更精确的权重
-        word_count = 0
-        for word in positive_words:
-            if word in text_lower:
-                valence_score += 0.4  # 增加权重
-                word_count += 1
-        for word in negative_words:
-            if word in text_lower:
-                valence_score -= 0.4  # 增加权重
-                word_count += 1
-
-        for word in high_arousal_words:
-            if word in text_lower:
-                arousal_score += 0.4  # 增加权重
-                word_count += 1
-        for word in low_arousal_words:
-            if word in text_lower:
-                arousal_score -= 0.4  # 增加权重
-                word_count += 1
-
-        for word in high_dominance_words:
-            if word in text_lower:
-                dominance_score += 0.4  # 增加权重
-                word_count += 1
-        for word in low_dominance_words:
-            if word in text_lower:
-                dominance_score -= 0.4  # 增加权重
-                word_count += 1
+        if hits is None:
+            hits = EMOTION_LEXICON.match(text.lower())
+
+        # 计算维度得分 - 每个命中的关键词加/减 0.4
+        valence_score = 0.4 * hits.score("valence+") - 0.4 * hits.score("valence-")
+        arousal_score = 0.4 * hits.score("arousal+") - 0.4 * hits.score("arousal-")
+        dominance_score = 0.4 * hits.score("dominance+") - 0.4 * hits.score(
+            "dominance-"
+        )
 
         # 基于文本整体语调进行调整
         # 检查感叹号和问号
@@ -856,25 +1194,11 @@ class EmotionAnalyzer:
         if "?" in text or "？" in text:
             dominance_score -= 0.1  # 问号降低控制感
 
-        # 检查否定词 - 优化逻辑，避免误处理积极短语
-        negative_indicators = ["不", "没", "无", "非", "未", "别", "勿"]
-        positive_phrases_with_negation = [
-            "不错",
-            "不坏",
-            "不差",
-            "不赖",
-        ]  # 包含否定词但表达积极的短语
-
-        # 先检查是否包含积极的否定短语
-        has_positive_negation = any(
-            phrase in text_lower for phrase in positive_phrases_with_negation
-        )
-
-        if not has_positive_negation:  # 只有在没有积极否定短语时才处理否定词
-            for neg in negative_indicators:
-                if neg in text_lower:
-                    valence_score -= 0.1
-                    dominance_score -= 0.1
+        # 检查否定词 - 包含积极的否定短语（如“不错”）时不做否定处理
+        if not hits.has("positive_negation"):
+            negation_count = hits.count("negation")
+            valence_score -= 0.1 * negation_count
+            dominance_score -= 0.1 * negation_count
 
         # 归一化到[-1, 1]范围
         return EmotionDimensions(
@@ -884,18 +1208,23 @@ class EmotionAnalyzer:
         )
 
     def _identify_plutchik_emotion(
-        self, text: str, dimensions: EmotionDimensions
+        self,
+        text: str,
+        dimensions: EmotionDimensions,
+        hits: Optional[LexiconHits] = None,
     ) -> Tuple[PlutchikEmotions, EmotionIntensity]:
         """基于Plutchik情感轮识别基础情感"""
+        if hits is None:
+            hits = EMOTION_LEXICON.match(text.lower())
 
         # 首先尝试关键词匹配
-        keyword_emotion = self._keyword_plutchik_match(text)
+        keyword_emotion = self._keyword_plutchik_match(text, hits)
         if keyword_emotion:
             # 根据维度强度确定情感强度
             base_intensity = self._calculate_intensity_from_dimensions(dimensions)
             # 使用关键词调整强度
             intensity = self._adjust_intensity_by_keywords(
-                text, base_intensity, keyword_emotion
+                text, base_intensity, keyword_emotion, hits
             )
             return keyword_emotion, intensity
 
@@ -918,22 +1247,22 @@ class EmotionAnalyzer:
         # 计算强度
         base_intensity = self._calculate_intensity_from_dimensions(dimensions)
         intensity = self._adjust_intensity_by_keywords(
-            text, base_intensity, best_emotion
+            text, base_intensity, best_emotion, hits
         )
 
         return best_emotion, intensity
 
-    def _keyword_plutchik_match(self, text: str) -> Optional[PlutchikEmotions]:
+    def _keyword_plutchik_match(
+        self, text: str, hits: Optional[LexiconHits] = None
+    ) -> Optional[PlutchikEmotions]:
         """基于关键词匹配Plutchik情感"""
-        text_lower = text.lower()
+        if hits is None:
+            hits = EMOTION_LEXICON.match(text.lower())
 
         emotion_scores = {}
 
-        for emotion, keywords in CHINESE_EMOTION_KEYWORDS.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in text_lower:
-                    score += 1
+        for emotion in CHINESE_EMOTION_KEYWORDS:
+            score = hits.score(emotion)
             if score > 0:
                 emotion_scores[emotion] = score
 
@@ -959,43 +1288,20 @@ class EmotionAnalyzer:
             return EmotionIntensity.HIGH
 
     def _adjust_intensity_by_keywords(
-        self, text: str, base_intensity: EmotionIntensity, emotion: PlutchikEmotions
+        self,
+        text: str,
+        base_intensity: EmotionIntensity,
+        emotion: PlutchikEmotions,
+        hits: Optional[LexiconHits] = None,
     ) -> EmotionIntensity:
         """基于关键词调整情感强度"""
-        text_lower = text.lower()
-
-        # 超高强度指示词（直接提升到HIGH）
-        super_high_words = [
-            "满分",
-            "完美",
-            "perfect",
-            "amazing",
-            "excellent",
-            "太棒了",
-            "厉害",
-        ]
-
-        # 高强度指示词
-        high_intensity_words = [
-            "非常",
-            "特别",
-            "超级",
-            "极其",
-            "太",
-            "超",
-            "最",
-            "真的",
-            "好",
-            "很",
-        ]
+        if hits is None:
+            hits = EMOTION_LEXICON.match(text.lower())
 
-        # 低强度指示词
-        low_intensity_words = ["有点", "稍微", "一点", "轻微", "略", "还好", "还行"]
-
-        # 检查超高强度词汇
-        super_high_count = sum(1 for word in super_high_words if word in text_lower)
-        high_count = sum(1 for word in high_intensity_words if word in text_lower)
-        low_count = sum(1 for word in low_intensity_words if word in text_lower)
+        # 超高强度词汇直接提升到HIGH；高/低强度指示词用于升降一级
+        super_high_count = hits.count("intensity_super_high")
+        high_count = hits.count("intensity_high")
+        low_count = hits.count("intensity_low")
 
         # 感叹号也增加强度
         exclamation_count = text.count("!") + text.count("！")
@@ -1026,20 +1332,21 @@ class EmotionAnalyzer:
         return base_intensity
 
     def _identify_secondary_emotions(
-        self, text: str, primary_emotion: PlutchikEmotions
+        self,
+        text: str,
+        primary_emotion: PlutchikEmotions,
+        hits: Optional[LexiconHits] = None,
     ) -> List[Tuple[PlutchikEmotions, float]]:
         """识别次要情感（混合情感）"""
-        text_lower = text.lower()
+        if hits is None:
+            hits = EMOTION_LEXICON.match(text.lower())
         secondary_emotions = []
 
-        for emotion, keywords in CHINESE_EMOTION_KEYWORDS.items():
+        for emotion in CHINESE_EMOTION_KEYWORDS:
             if emotion == primary_emotion:
                 continue
 
-            score = 0
-            for keyword in keywords:
-                if keyword in text_lower:
-                    score += 1
+            score = hits.score(emotion)
 
             if score > 0:
                 # 计算相对权重
@@ -1051,13 +1358,17 @@ class EmotionAnalyzer:
         return secondary_emotions[:2]
 
     def _calculate_confidence(
-        self, text: str, emotion: PlutchikEmotions, dimensions: EmotionDimensions
+        self,
+        text: str,
+        emotion: PlutchikEmotions,
+        dimensions: EmotionDimensions,
+        hits: Optional[LexiconHits] = None,
     ) -> float:
         """计算分析置信度"""
         confidence = 0.5  # 基础置信度
 
         # 基于关键词匹配增加置信度
-        keyword_match = self._keyword_plutchik_match(text)
+        keyword_match = self._keyword_plutchik_match(text, hits)
         if keyword_match == emotion:
             confidence += 0.3
 
@@ -1084,6 +1395,13 @@ class EmotionAnalyzer:
         if len(self.emotion_history[user_id]) > 20:
             self.emotion_history[user_id] = self.emotion_history[user_id][-20:]
 
+        # 完整的情感轨迹写入持久化的时间序列
+        if self.timeline is not None:
+            try:
+                self.timeline.append(user_id, emotion_state)
+            except Exception as e:
+                logger.warning(f"写入情感时间序列失败: {e}")
+
     def get_emotion_trajectory(self, user_id: int) -> List[EmotionState]:
         """获取用户情感轨迹"""
         return self.emotion_history.get(user_id, [])
@@ -1113,11 +1431,15 @@ class EmotionAnalyzer:
                 "temperature": 0.1,
             }
 
-            response = requests.post(
-                ZHIPUAI_API_ENDPOINT, headers=headers, json=payload, timeout=5
+            # 情感分析在对话链路上，只重试一次，失败时尽快回退到关键词分析
+            response_json = make_api_request(
+                url=ZHIPUAI_API_ENDPOINT,
+                method="POST",
+                headers=headers,
+                data=payload,
+                timeout=5,
+                max_retries=1,
             )
-            response.raise_for_status()
-            response_json = response.json()
 
             if (
                 response_json
@@ -1365,87 +1687,29 @@ class EmotionAnalyzer:
         except:
             return False
 
-    def _detect_special_text_types(self, text: str) -> Optional[str]:
+    def _detect_special_text_types(
+        self, text: str, hits: Optional[LexiconHits] = None
+    ) -> Optional[str]:
         """
         检测特殊文本类型，返回对应的动画状态
 
         Args:
             text: 待分析文本
+            hits: 已有的词表匹配结果，为None时重新匹配
 
         Returns:
             Optional[str]: 如果是特殊类型，返回对应动画；否则返回None
         """
-        text_lower = text.lower().strip()
-
-        # 互动性问句 - thinking
-        interactive_patterns = [
-            "你猜",
-            "猜猜",
-            "你觉得",
-            "你认为",
-            "你说",
-            "你想",
-            "你看",
-            "怎么样",
-            "如何",
-            "什么样",
-            "好不好",
-            "对不对",
-            "是不是",
-        ]
-
-        # 询问类问句 - thinking
-        inquiry_patterns = [
-            "怎么办",
-            "怎么做",
-            "如何",
-            "什么意思",
-            "为什么",
-            "哪里",
-            "什么时候",
-            "有什么",
-            "能不能",
-            "可以吗",
-            "行吗",
-            "好吗",
-        ]
-
-        # 打招呼/日常对话 - happy
-        greeting_patterns = [
-            "你好",
-            "hi",
-            "hello",
-            "早上好",
-            "晚上好",
-            "最近怎么样",
-            "在干嘛",
-            "在做什么",
-            "聊天",
-            "说话",
-        ]
-
-        # 测试/试探 - confused
-        test_patterns = ["测试", "试试", "看看", "检查", "test", "试探"]
+        if hits is None:
+            hits = EMOTION_LEXICON.match(text.lower())
 
         # 检查是否包含问号
         has_question_mark = "?" in text or "？" in text
 
-        # 检查各种模式
-        for pattern in interactive_patterns:
-            if pattern in text_lower:
-                return "thinking"  # 互动性问句用thinking
-
-        for pattern in inquiry_patterns:
-            if pattern in text_lower:
-                return "thinking"  # 询问类问句用thinking
-
-        for pattern in greeting_patterns:
-            if pattern in text_lower:
-                return "happy"  # 打招呼用happy
-
-        for pattern in test_patterns:
-            if pattern in text_lower:
-                return "confused"  # 测试用confused
+        # 按优先级检查各种模式（互动问句、询问、打招呼、测试）
+        for index, (animation, _patterns) in enumerate(SPECIAL_TEXT_PATTERNS):
+            if hits.has(("special", index)):
+                return animation
 
         # 如果有问号但没有匹配到特定模式，使用thinking
         if has_question_mark and len(text.strip()) < 20:  # 短问句
@@ -1732,6 +1996,20 @@ def analyze_emotion_for_pet(
         return None, ANIMATION_STATES["concerned"], "我有点担心你呢..."
 
 
+def quick_emotion_for_pet(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    宠物系统用的快速本地情感判断（仅关键词，无副作用）
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: (情感名称, 动画状态)；文本为空时为 (None, None)
+    """
+    if not text:
+        return None, None
+
+    emotion_state = emotion_analyzer.analyze_emotion_keywords(text)
+    return emotion_state.primary_emotion.value, emotion_state.to_animation_state()
+
+
 def test_emotion_analysis():
     """测试情感分析和动画系统"""
 
@@ -0,0 +1,327 @@
+"""
+持久化的情感时间序列
+
+EmotionAnalyzer.emotion_history 只在内存中保留每位用户最近20条情感状态，
+重启后即丢失。本模块把每次分析得到的情感状态压缩为18字节的定长记录持久化：
+每位用户每个UTC日一行，当天的记录依次追加在同一个BLOB中。读取时整段BLOB
+直接转换为NumPy列（时间、情感、强度、效价、唤醒度、控制感、置信度），
+范围查询和降采样都在列上完成，几个月的趋势也只需读取几百行。
+"""
+
+import logging
+import struct
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from .emotion_analyzer import EmotionDimensions, EmotionState, PlutchikEmotions
+
+logger = logging.getLogger(__name__)
+
+# 情感编号即在 PlutchikEmotions 中的顺序；新增情感只能追加在末尾
+EMOTION_CODES = [emotion.value for emotion in PlutchikEmotions]
+_EMOTION_IDS = {name: index for index, name in enumerate(EMOTION_CODES)}
+
+# 维度（-1..1）和置信度（0..1）按万分之一量化为16位整数
+_SCALE = 10000
+
+# 一条记录的定长格式（小端，无填充）；写入用struct，读取用NumPy
+SAMPLE_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),  # Unix时间（秒）
+        ("emotion", "u1"),  # EMOTION_CODES 中的编号
+        ("intensity", "u1"),  # EmotionIntensity 的值
+        ("valence", "<i2"),
+        ("arousal", "<i2"),
+        ("dominance", "<i2"),
+        ("confidence", "<u2"),
+    ]
+)
+_RECORD = struct.Struct("<qBBhhhH")
+assert _RECORD.size == SAMPLE_DTYPE.itemsize
+
+# 追加一条记录：当天已有行时把记录拼接到BLOB末尾，无需读出旧数据
+_APPEND_SAMPLE = """
+INSERT INTO emotion_timeline (user_id, day, sample_count, samples)
+VALUES (?, ?, 1, ?)
+ON CONFLICT (user_id, day) DO UPDATE SET
+    sample_count = sample_count + 1,
+    samples = CAST(samples || excluded.samples AS BLOB)
+"""
+
+TimePoint = Union[datetime, float, int]
+
+
+def _to_seconds(moment: TimePoint) -> float:
+    """把 datetime（无时区时按本地时间）或Unix时间转换为Unix时间"""
+    if isinstance(moment, datetime):
+        return moment.timestamp()
+    return float(moment)
+
+
+def _utc_day(seconds: float) -> str:
+    """Unix时间所在的UTC日期"""
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _quantize(value: float, low: float) -> int:
+    """把 [low, 1] 内的浮点数量化为整数"""
+    return int(round(max(low, min(1.0, value)) * _SCALE))
+
+
+class EmotionSample:
+    """
+    情感时间序列中的一条记录
+
+    使用 __slots__，大量记录常驻内存时也不为每条记录分配字典。
+    ``primary_emotion`` 和 ``dimensions`` 的访问方式与 EmotionState 相同。
+    """
+
+    __slots__ = (
+        "timestamp",
+        "emotion",
+        "intensity",
+        "valence",
+        "arousal",
+        "dominance",
+        "confidence",
+    )
+
+    def __init__(
+        self,
+        timestamp: float,
+        emotion: str,
+        intensity: int,
+        valence: float,
+        arousal: float,
+        dominance: float,
+        confidence: float,
+    ):
+        self.timestamp = timestamp
+        self.emotion = emotion
+        self.intensity = intensity
+        self.valence = valence
+        self.arousal = arousal
+        self.dominance = dominance
+        self.confidence = confidence
+
+    @property
+    def primary_emotion(self) -> PlutchikEmotions:
+        return PlutchikEmotions(self.emotion)
+
+    @property
+    def dimensions(self) -> EmotionDimensions:
+        return EmotionDimensions(self.valence, self.arousal, self.dominance)
+
+    def __repr__(self) -> str:
+        return (
+            f"EmotionSample({datetime.fromtimestamp(self.timestamp).isoformat()}, "
+            f"{self.emotion}, intensity={self.intensity}, valence={self.valence:.2f})"
+        )
+
+
+class EmotionTimeline:
+    """按用户持久化的情感时间序列"""
+
+    def __init__(self, db_manager):
+        """
+        初始化情感时间序列
+
+        Args:
+            db_manager: 数据库管理器实例，记录经其写后队列批量写入
+        """
+        self.db_manager = db_manager
+        self._ensure_tables_exist()
+
+    def _ensure_tables_exist(self):
+        """确保时间序列表存在"""
+        self.db_manager.connect()
+        self.db_manager.cursor.execute(
+            """
+        CREATE TABLE IF NOT EXISTS emotion_timeline (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,  -- UTC日期 YYYY-MM-DD
+            sample_count INTEGER NOT NULL,
+            samples BLOB NOT NULL,  -- SAMPLE_DTYPE 定长记录，按写入顺序排列
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+        """
+        )
+        self.db_manager.connection.commit()
+        self.db_manager.disconnect()
+
+    def append(
+        self,
+        user_id: int,
+        emotion_state: EmotionState,
+        timestamp: Optional[TimePoint] = None,
+    ) -> None:
+        """
+        追加一条情感记录（经写后队列异步写入）
+
+        Args:
+            user_id: 用户ID
+            emotion_state: 情感分析结果
+            timestamp: 记录时间，默认为当前时间
+        """
+        seconds = time.time() if timestamp is None else _to_seconds(timestamp)
+        dimensions = emotion_state.dimensions
+        record = _RECORD.pack(
+            int(seconds),
+            _EMOTION_IDS[emotion_state.primary_emotion.value],
+            emotion_state.intensity.value,
+            _quantize(dimensions.valence, -1.0),
+            _quantize(dimensions.arousal, -1.0),
+            _quantize(dimensions.dominance, -1.0),
+            _quantize(emotion_state.confidence, 0.0),
+        )
+        self.db_manager.write_behind().submit(
+            _APPEND_SAMPLE, (user_id, _utc_day(seconds), record)
+        )
+
+    def _load(
+        self,
+        user_id: int,
+        start: Optional[TimePoint] = None,
+        end: Optional[TimePoint] = None,
+    ) -> np.ndarray:
+        """读取时间范围（含首尾）内的原始记录，按时间排序"""
+        # 先提交仍在写后队列中的记录
+        self.db_manager.write_behind().flush()
+
+        query = "SELECT samples FROM emotion_timeline WHERE user_id = ?"
+        params: List[Any] = [user_id]
+        start_seconds = end_seconds = None
+        if start is not None:
+            start_seconds = _to_seconds(start)
+            query += " AND day >= ?"
+            params.append(_utc_day(start_seconds))
+        if end is not None:
+            end_seconds = _to_seconds(end)
+            query += " AND day <= ?"
+            params.append(_utc_day(end_seconds))
+        rows = self.db_manager.execute_query(query + " ORDER BY day", tuple(params))
+
+        records = np.frombuffer(
+            b"".join(row["samples"] for row in rows), dtype=SAMPLE_DTYPE
+        )
+        # 首尾两天只保留范围内的记录
+        mask = np.ones(len(records), dtype=bool)
+        if start_seconds is not None:
+            mask &= records["timestamp"] >= start_seconds
+        if end_seconds is not None:
+            mask &= records["timestamp"] <= end_seconds
+        records = records[mask]
+        return records[np.argsort(records["timestamp"], kind="stable")]
+
+    def series(
+        self,
+        user_id: int,
+        start: Optional[TimePoint] = None,
+        end: Optional[TimePoint] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        按列读取时间范围内的情感记录
+
+        Args:
+            user_id: 用户ID
+            start: 起始时间（含），None表示不限
+            end: 结束时间（含），None表示不限
+
+        Returns:
+            Dict[str, np.ndarray]: 各列数组，按时间排序。timestamp为Unix时间，
+            emotion为 EMOTION_CODES 中的编号，intensity为强度级别，
+            valence/arousal/dominance/confidence已还原为浮点数
+        """
+        records = self._load(user_id, start, end)
+        return {
+            "timestamp": records["timestamp"].copy(),
+            "emotion": records["emotion"].copy(),
+            "intensity": records["intensity"].copy(),
+            "valence": records["valence"] / _SCALE,
+            "arousal": records["arousal"] / _SCALE,
+            "dominance": records["dominance"] / _SCALE,
+            "confidence": records["confidence"] / _SCALE,
+        }
+
+    def samples(
+        self,
+        user_id: int,
+        start: Optional[TimePoint] = None,
+        end: Optional[TimePoint] = None,
+        limit: Optional[int] = None,
+    ) -> List[EmotionSample]:
+        """
+        读取时间范围内的情感记录
+
+        Args:
+            user_id: 用户ID
+            start: 起始时间（含），None表示不限
+            end: 结束时间（含），None表示不限
+            limit: 只返回范围内最近的若干条
+
+        Returns:
+            List[EmotionSample]: 按时间排序的记录
+        """
+        columns = self.series(user_id, start, end)
+        if limit is not None:
+            columns = {name: values[-limit:] for name, values in columns.items()}
+        # 列名与 EmotionSample 的字段顺序一致
+        rows = zip(*(columns[name].tolist() for name in EmotionSample.__slots__))
+        return [
+            EmotionSample(timestamp, EMOTION_CODES[emotion], *values)
+            for timestamp, emotion, *values in rows
+        ]
+
+    def downsample(
+        self,
+        user_id: int,
+        start: TimePoint,
+        end: TimePoint,
+        bucket_seconds: float = 24 * 3600,
+    ) -> List[Dict[str, Any]]:
+        """
+        按固定时间间隔汇总情感记录，用于绘制长期趋势
+
+        Args:
+            user_id: 用户ID
+            start: 起始时间（含），也是第一个区间的起点
+            end: 结束时间（含）
+            bucket_seconds: 区间长度（秒），默认一天
+
+        Returns:
+            List[Dict[str, Any]]: 每个有记录的区间一项，包括区间起点（datetime）、
+            记录数、主导情感，以及强度、效价、唤醒度、控制感、置信度的平均值
+        """
+        columns = self.series(user_id, start, end)
+        if not len(columns["timestamp"]):
+            return []
+
+        start_seconds = _to_seconds(start)
+        buckets = (columns["timestamp"] - start_seconds) // bucket_seconds
+        bucket_ids, inverse, counts = np.unique(
+            buckets, return_inverse=True, return_counts=True
+        )
+
+        means = {
+            name: np.bincount(inverse, weights=columns[name], minlength=len(bucket_ids))
+            / counts
+            for name in ("intensity", "valence", "arousal", "dominance", "confidence")
+        }
+        emotion_counts = np.zeros((len(bucket_ids), len(EMOTION_CODES)), dtype=np.int64)
+        np.add.at(emotion_counts, (inverse, columns["emotion"]), 1)
+        dominant = emotion_counts.argmax(axis=1)
+
+        return [
+            {
+                "start": datetime.fromtimestamp(
+                    start_seconds + bucket_id * bucket_seconds
+                ),
+                "count": int(counts[index]),
+                "emotion": EMOTION_CODES[dominant[index]],
+                **{name: float(values[index]) for name, values in means.items()},
+            }
+            for index, bucket_id in enumerate(bucket_ids)
+        ]
@@ -4,7 +4,8 @@ and maintains extended conversation context.
 """
 
 import logging
-from typing import Dict, Any, Optional, Tuple, List
+import threading
+from typing import Callable, Dict, Any, Optional, Tuple, List
 from datetime import datetime
 
 from .dialogue_generator import generate_pet_dialogue
@@ -29,11 +30,17 @@ class EnhancedDialogueGenerator:
         self.db_manager = db_manager
         self.conversation_analyzer = ConversationAnalyzer(db_manager)
         self.active_contexts = {}  # Store active conversation contexts by user_id
+        self.context_history_limit = 10  # Recent messages fetched per event
         self.context_cleanup_interval = 24 * 60 * 60  # 24小时清理一次
         self.last_cleanup_time = datetime.now()
 
     def generate_dialogue(
-        self, user_id: int, event_type: str, event_data: Dict[str, Any]
+        self,
+        user_id: int,
+        event_type: str,
+        event_data: Dict[str, Any],
+        on_chunk: Optional[Callable[[str], None]] = None,
+        cancelled: Optional[threading.Event] = None,
     ) -> Dict[str, Any]:
         """
         Generate dialogue with psychological profile adaptation and extended context.
@@ -42,6 +49,10 @@ class EnhancedDialogueGenerator:
             user_id: User ID
             event_type: Type of event triggering the dialogue
             event_data: Data associated with the event
+            on_chunk: Optional callback receiving the reply text piece by
+                piece as it is streamed
+            cancelled: Set by a caller that stopped waiting for the reply; a
+                reply finished after that is not stored in the history
 
         Returns:
             Dictionary containing dialogue and additional information
@@ -69,11 +80,7 @@ class EnhancedDialogueGenerator:
                 )
 
                 # 定期分析用户心理特征（每10条消息）
-                message_count = len(
-                    self.conversation_analyzer.get_conversation_history(
-                        user_id, limit=1000, context_id=None
-                    )
-                )
+                message_count = self.conversation_analyzer.get_message_count(user_id)
 
                 if message_count % 10 == 0:
                     logger.info(
@@ -81,23 +88,27 @@ class EnhancedDialogueGenerator:
                     )
                     self.conversation_analyzer.analyze_user_psychology(user_id)
 
-            # 构建基础提示词
-            base_prompt = self._construct_base_prompt(user_id, event_type, event_data)
-
-            # 获取对话历史作为上下文
+            # 获取对话历史作为上下文（一次有界查询，提示词与返回结果共用）
             conversation_history = self.conversation_analyzer.get_conversation_history(
-                user_id, context_id=context_id
+                user_id, limit=self.context_history_limit, context_id=context_id
+            )
+
+            # 构建基础提示词
+            base_prompt = self._construct_base_prompt(
+                user_id, event_type, event_data, conversation_history
             )
 
             # 生成带风格适应的对话
             dialogue, context_id = (
                 self.conversation_analyzer.generate_dialogue_with_style(
-                    user_id, base_prompt, context_id
+                    user_id, base_prompt, context_id, on_chunk=on_chunk
                 )
             )
 
-            # 存储AI回复
-            if dialogue:
+            # 存储AI回复（调用方已放弃等待时不存储，避免未展示的回复进入上下文）
+            if cancelled is not None and cancelled.is_set():
+                logger.info(f"Dialogue for user {user_id} cancelled; reply not stored")
+            elif dialogue:
                 self.conversation_analyzer.store_message(
                     user_id=user_id,
                     message="[AI回复]: " + dialogue,
@@ -139,7 +150,11 @@ class EnhancedDialogueGenerator:
             self.last_cleanup_time = current_time
 
     def _construct_base_prompt(
-        self, user_id: int, event_type: str, event_data: Dict[str, Any]
+        self,
+        user_id: int,
+        event_type: str,
+        event_data: Dict[str, Any],
+        conversation_history: Optional[List[Dict[str, Any]]] = None,
     ) -> str:
         """
         Construct a base prompt for dialogue generation.
@@ -148,14 +163,18 @@ class EnhancedDialogueGenerator:
             user_id: User ID
             event_type: Type of event triggering the dialogue
             event_data: Data associated with the event
+            conversation_history: Recent messages, if already fetched
 
         Returns:
             Base prompt for dialogue generation
         """
         # 获取对话历史
-        conversation_history = self.conversation_analyzer.get_conversation_history(
-            user_id, limit=10, context_id=self.active_contexts.get(user_id)
-        )
+        if conversation_history is None:
+            conversation_history = self.conversation_analyzer.get_conversation_history(
+                user_id,
+                limit=self.context_history_limit,
+                context_id=self.active_contexts.get(user_id),
+            )
 
         # 构建基础提示词
         prompt_parts = [
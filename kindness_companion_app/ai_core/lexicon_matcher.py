@@ -0,0 +1,162 @@
+"""
+多模式关键词匹配（Aho–Corasick 自动机）
+
+把多个词表编译成一个自动机，每个模式都带有所属类别（tag）和权重。
+对文本只扫描一遍即可得到所有命中的模式，各个关键词分析阶段共享同一份结果，
+不必再对每个关键词分别做一次子串查找。
+"""
+
+from collections import Counter, deque
+from typing import Dict, Hashable, Iterable, List, Mapping, Tuple
+
+
+class LexiconHits:
+    """一次匹配的结果：按类别记录命中的（去重后的）模式及其权重"""
+
+    __slots__ = ("_by_tag",)
+
+    def __init__(self, by_tag: Dict[Hashable, Dict[str, float]]):
+        self._by_tag = by_tag
+
+    def has(self, tag: Hashable) -> bool:
+        """该类别是否有任何模式命中"""
+        return bool(self._by_tag.get(tag))
+
+    def count(self, tag: Hashable) -> int:
+        """该类别命中的不同模式数量"""
+        return len(self._by_tag.get(tag, ()))
+
+    def score(self, tag: Hashable) -> float:
+        """该类别命中模式的权重之和（每个模式只计一次，与出现次数无关）"""
+        return sum(self._by_tag.get(tag, {}).values())
+
+    def patterns(self, tag: Hashable) -> List[str]:
+        """该类别命中的模式列表"""
+        return list(self._by_tag.get(tag, ()))
+
+    def tags(self) -> List[Hashable]:
+        """有命中的全部类别"""
+        return [tag for tag, hits in self._by_tag.items() if hits]
+
+
+class LexiconMatcher:
+    """
+    编译好的多模式匹配器
+
+    模式按 (pattern, tag, weight) 注册；同一个模式可以属于多个类别。
+    匹配结果与对每个模式执行 ``pattern in text`` 一致（包括相互重叠的模式），
+    但只需要对文本做一次线性扫描。
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Hashable, float]]):
+        """
+        Args:
+            entries: (模式, 类别, 权重) 三元组；空模式会被忽略
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, Hashable, float]]] = [[]]
+        self.size = 0
+
+        for pattern, tag, weight in entries:
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                node = next_node
+            self._output[node].append((pattern, tag, weight))
+            self.size += 1
+
+        self._build_failure_links()
+
+    @classmethod
+    def from_lexicons(cls, lexicons: Mapping[Hashable, Iterable[str]]):
+        """
+        由 {类别: 词表} 构建匹配器
+
+        词表中重复出现的词按出现次数作为权重，与逐词扫描时每次出现各计一分的
+        行为保持一致。
+
+        Args:
+            lexicons: 类别到词表的映射
+
+        Returns:
+            LexiconMatcher: 编译好的匹配器
+        """
+        return cls(
+            (word, tag, float(times))
+            for tag, words in lexicons.items()
+            for word, times in Counter(words).items()
+        )
+
+    def _build_failure_links(self) -> None:
+        """广度优先计算失败指针，并把后缀节点的输出合并进来"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = (
+                    self._output[child] + self._output[self._fail[child]]
+                )
+
+    def match(self, text: str) -> LexiconHits:
+        """
+        扫描文本一次，返回所有命中的模式
+
+        Args:
+            text: 待匹配文本（调用方负责大小写归一化）
+
+        Returns:
+            LexiconHits: 按类别分组的命中结果
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        by_tag: Dict[Hashable, Dict[str, float]] = {}
+
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern, tag, weight in output[node]:
+                by_tag.setdefault(tag, {})[pattern] = weight
+        return LexiconHits(by_tag)
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str, Hashable]]:
+        """
+        扫描文本一次，返回每一处命中的位置（同一模式出现几次就返回几条）
+
+        Args:
+            text: 待匹配文本（调用方负责大小写归一化）
+
+        Returns:
+            List[Tuple[int, int, str, Hashable]]: (起始下标, 结束下标, 模式, 类别)，
+            按结束位置排序
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found = []
+
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern, tag, _weight in output[node]:
+                found.append((end - len(pattern), end, pattern, tag))
+        return found
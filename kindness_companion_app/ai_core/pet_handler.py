@@ -1,11 +1,21 @@
 # ai_pet_handler.py
 
 import logging
-from typing import Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Any, Optional
 
 # Import functions from other ai_core modules
+from .api_client import MAX_BACKOFF, MAX_RETRIES
+from .conversation_analyzer import DIALOGUE_TIMEOUT
 from .dialogue_generator import generate_pet_dialogue
-from .emotion_analyzer import analyze_emotion_for_pet
+from .emotion_analyzer import (
+    analyze_emotion_for_pet,
+    emotion_analyzer,
+    quick_emotion_for_pet,
+)
+from .emotion_timeline import EmotionTimeline
 from .enhanced_dialogue_generator import EnhancedDialogueGenerator
 
 logger = logging.getLogger(__name__)
@@ -14,23 +24,94 @@ logger = logging.getLogger(__name__)
 # Will be initialized when db_manager is available
 _enhanced_dialogue_generator: Optional[EnhancedDialogueGenerator] = None
 
+# Concurrent mode: for text events, dialogue generation starts right after a
+# local keyword emotion pass and runs alongside the (API-backed) emotion
+# analysis. The dialogue may take as long as one API call with all of its
+# retries; the emotion analysis only gets a short deadline, after which the
+# keyword emotion is kept.
+DEFAULT_RESPONSE_DEADLINE = (
+    DIALOGUE_TIMEOUT * (MAX_RETRIES + 1) + MAX_BACKOFF * MAX_RETRIES
+)  # seconds
+DEFAULT_EMOTION_DEADLINE = 15.0  # seconds
+_concurrent_mode = False
+_response_deadline = DEFAULT_RESPONSE_DEADLINE
+_emotion_deadline = DEFAULT_EMOTION_DEADLINE
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
 
-def initialize_enhanced_dialogue(db_manager):
+
+def initialize_enhanced_dialogue(db_manager, concurrent: Optional[bool] = None):
     """
     Initialize the enhanced dialogue generator with a database manager.
 
     Args:
         db_manager: Database manager instance
+        concurrent: If given, enable or disable concurrent mode
+            (see configure_concurrency)
     """
     global _enhanced_dialogue_generator
     if _enhanced_dialogue_generator is None:
         logger.info("Initializing enhanced dialogue generator")
         _enhanced_dialogue_generator = EnhancedDialogueGenerator(db_manager)
+    if emotion_analyzer.timeline is None:
+        # Persist every analyzed emotion so reports see more than the last 20
+        emotion_analyzer.timeline = EmotionTimeline(db_manager)
+    if concurrent is not None:
+        configure_concurrency(concurrent)
     return _enhanced_dialogue_generator
 
 
+def configure_concurrency(
+    enabled: bool = True,
+    deadline: Optional[float] = None,
+    emotion_deadline: Optional[float] = None,
+):
+    """
+    Enable or disable concurrent emotion analysis and dialogue generation.
+
+    Args:
+        enabled: Whether text events fan out their AI sub-calls in parallel
+        deadline: Seconds to wait for the dialogue before answering with the
+            fallback reply (default: DEFAULT_RESPONSE_DEADLINE)
+        emotion_deadline: Seconds to wait for the refined emotion analysis
+            before keeping the keyword emotion (default:
+            DEFAULT_EMOTION_DEADLINE)
+    """
+    global _concurrent_mode, _response_deadline, _emotion_deadline
+    _concurrent_mode = enabled
+    if deadline is not None:
+        _response_deadline = deadline
+    if emotion_deadline is not None:
+        _emotion_deadline = emotion_deadline
+    logger.info(
+        f"Pet handler concurrent mode: {enabled} (dialogue deadline "
+        f"{_response_deadline}s, emotion deadline {_emotion_deadline}s)"
+    )
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the worker pool for concurrent sub-calls, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pet-ai")
+        return _executor
+
+
+def _event_text(event_type: str, event_data: Dict[str, Any]) -> str:
+    """Return the user-written text of a reflection or message event, if any."""
+    if event_type == "reflection_added":
+        return event_data.get("text", "")
+    if event_type == "user_message":
+        return event_data.get("message", "")
+    return ""
+
+
 def handle_pet_event(
-    user_id: int, event_type: str, event_data: Dict[str, Any]
+    user_id: int,
+    event_type: str,
+    event_data: Dict[str, Any],
+    on_chunk: Optional[Callable[[str], None]] = None,
 ) -> Dict[str, Any]:
     """
     Handles events triggered by user actions and determines the pet's response.
@@ -40,6 +121,9 @@ def handle_pet_event(
         user_id: The ID of the user.
         event_type: The type of event (e.g., 'check_in', 'reflection_added').
         event_data: Data associated with the event (e.g., reflection text, challenge details).
+        on_chunk: Optional callback that receives the dialogue piece by piece
+            while it is streamed from the API (called on a worker thread).
+            The returned 'dialogue' is always the complete text.
 
     Returns:
         A dictionary containing the pet's response, e.g.:
@@ -47,9 +131,12 @@ def handle_pet_event(
     """
     logger.info(f"Handling pet event for user {user_id}. Type: {event_type}")
 
-    # Check if enhanced dialogue generator is available
-    global _enhanced_dialogue_generator
-    use_enhanced = _enhanced_dialogue_generator is not None
+    if _concurrent_mode:
+        text = _event_text(event_type, event_data)
+        if text:
+            return _handle_text_event_concurrently(
+                user_id, event_type, event_data, text, on_chunk
+            )
 
     emotion = None
     dialogue_prompt_context = event_data.copy()  # Start with base event data
@@ -112,12 +199,54 @@ def handle_pet_event(
             )
 
     # 2. Generate dialogue based on the event and context
+    return _generate_response(
+        user_id,
+        event_type,
+        dialogue_prompt_context,
+        emotion,
+        smart_status_text,
+        on_chunk,
+    )
+
+
+def _generate_response(
+    user_id: int,
+    event_type: str,
+    dialogue_prompt_context: Dict[str, Any],
+    emotion: Optional[str],
+    smart_status_text: Optional[str],
+    on_chunk: Optional[Callable[[str], None]] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> Dict[str, Any]:
+    """
+    Generate the pet's dialogue and assemble the response dictionary.
+
+    Args:
+        user_id: The ID of the user.
+        event_type: The type of event.
+        dialogue_prompt_context: Event data plus any analyzed emotion.
+        emotion: Detected emotion label, if any.
+        smart_status_text: Status text from emotion analysis, if any.
+        on_chunk: Optional streaming callback (see handle_pet_event).
+        cancelled: Set once the caller has stopped waiting for this reply;
+            the enhanced generator then does not store it.
+
+    Returns:
+        The pet response dictionary (see handle_pet_event).
+    """
+    # Only passed when set, so non-streaming calls keep their old signature
+    stream_kwargs = {"on_chunk": on_chunk} if on_chunk is not None else {}
+    cancel_kwargs = {"cancelled": cancelled} if cancelled is not None else {}
     try:
-        if use_enhanced and _enhanced_dialogue_generator is not None:
+        if _enhanced_dialogue_generator is not None:
             # Use enhanced dialogue generator with psychological analysis and extended context
             logger.info("Using enhanced dialogue generator")
             response = _enhanced_dialogue_generator.generate_dialogue(
-                user_id, event_type, dialogue_prompt_context
+                user_id,
+                event_type,
+                dialogue_prompt_context,
+                **stream_kwargs,
+                **cancel_kwargs,
             )
             dialogue = response["dialogue"]
             suggested_animation = response["suggested_animation"]
@@ -141,7 +270,7 @@ def handle_pet_event(
                 "Using original dialogue generator (enhanced generator not initialized)"
             )
             dialogue = generate_pet_dialogue(
-                user_id, event_type, dialogue_prompt_context
+                user_id, event_type, dialogue_prompt_context, **stream_kwargs
             )
 
             # Use the suggested animation from emotion analysis if available
@@ -200,15 +329,116 @@ def handle_pet_event(
             }
     except Exception as e:
         logger.error(f"Error during dialogue generation: {e}")
-        dialogue = "... (The pet seems lost in thought)"
-
-        # Return fallback response
-        return {
-            "dialogue": dialogue,
-            "emotion_detected": emotion,
-            "suggested_animation": "confused",
-            "smart_status_text": "我好像有点困惑...",  # Fallback smart status text
-        }
+        return _fallback_response(emotion)
+
+
+def _fallback_response(emotion: Optional[str]) -> Dict[str, Any]:
+    """Response used when no dialogue could be generated."""
+    dialogue = "... (The pet seems lost in thought)"
+
+    # Return fallback response
+    return {
+        "dialogue": dialogue,
+        "emotion_detected": emotion,
+        "suggested_animation": "confused",
+        "smart_status_text": "我好像有点困惑...",  # Fallback smart status text
+    }
+
+
+def _handle_text_event_concurrently(
+    user_id: int,
+    event_type: str,
+    event_data: Dict[str, Any],
+    text: str,
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Concurrent mode for reflections and user messages.
+
+    A local keyword pass supplies the emotion label for the dialogue prompt,
+    so dialogue generation and the full emotion analysis can run in
+    parallel. If the refined analysis finishes within the emotion deadline,
+    its emotion, animation and status text replace the keyword ones. A
+    dialogue that misses the response deadline is cancelled: the fallback
+    reply is returned, and the late reply is neither streamed nor stored.
+
+    Args:
+        user_id: The ID of the user.
+        event_type: 'reflection_added' or 'user_message'.
+        event_data: Data associated with the event.
+        text: The user-written text of the event.
+        on_chunk: Optional streaming callback (see handle_pet_event).
+
+    Returns:
+        The pet response dictionary (see handle_pet_event).
+    """
+    dialogue_prompt_context = event_data.copy()
+    emotion = None
+    try:
+        emotion, quick_animation = quick_emotion_for_pet(text)
+        if emotion:
+            dialogue_prompt_context["analyzed_emotion"] = emotion
+            dialogue_prompt_context["suggested_animation"] = quick_animation
+            logger.info(f"Keyword emotion for {event_type}: {emotion}")
+    except Exception as e:
+        logger.error(f"Error during keyword emotion pass: {e}")
+
+    cancelled = threading.Event()
+
+    def stream_chunk(chunk: str) -> None:
+        # Chunks of a reply the caller gave up on are not shown
+        if on_chunk is not None and not cancelled.is_set():
+            on_chunk(chunk)
+
+    executor = _get_executor()
+    started = time.monotonic()
+    refined_future = executor.submit(analyze_emotion_for_pet, user_id, text)
+    dialogue_future = executor.submit(
+        _generate_response,
+        user_id,
+        event_type,
+        dialogue_prompt_context,
+        emotion,
+        None,
+        stream_chunk if on_chunk is not None else None,
+        cancelled,
+    )
+    done, _ = wait([dialogue_future], timeout=_response_deadline)
+    if dialogue_future not in done:
+        cancelled.set()
+        dialogue_future.cancel()
+
+    if dialogue_future.done() and not dialogue_future.cancelled():
+        # Also taken when the reply landed just as the deadline passed
+        response = dialogue_future.result()
+    else:
+        logger.warning(f"Dialogue generation missed the {_response_deadline}s deadline")
+        response = _fallback_response(emotion)
+
+    remaining = max(0.0, _emotion_deadline - (time.monotonic() - started))
+    done, _ = wait([refined_future], timeout=remaining)
+    if refined_future in done:
+        try:
+            refined_emotion, refined_animation, smart_status_text = (
+                refined_future.result()
+            )
+            if refined_emotion:
+                response["emotion_detected"] = refined_emotion
+                response["suggested_animation"] = refined_animation
+                response["smart_status_text"] = smart_status_text
+                logger.info(
+                    f"Refined emotion for {event_type}: {refined_emotion}, "
+                    f"suggested animation: {refined_animation}"
+                )
+        except Exception as e:
+            logger.error(f"Error during emotion analysis: {e}")
+    else:
+        logger.warning(
+            f"Emotion analysis missed the {_emotion_deadline}s deadline; "
+            "using keyword emotion"
+        )
+
+    return response
 
 
 # Example Usage (for testing purposes):
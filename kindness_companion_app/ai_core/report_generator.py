@@ -11,15 +11,23 @@
 
 import logging
 import json
-from typing import Dict, List, Any, Optional, Tuple
-from datetime import datetime, timedelta
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
 from dataclasses import dataclass
 from enum import Enum
 import statistics
 import math
+import re
 
-from .emotion_analyzer import EmotionState, emotion_analyzer
-from .conversation_analyzer import CognitiveAnalysisResult
+import numpy as np
+
+from .emotion_timeline import EmotionSample, EmotionTimeline
+from .lexicon_matcher import LexiconMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -84,6 +92,7 @@ class WellbeingReport:
     protective_factors: List[str]  # 保护因素
     confidence_score: float  # 整体分析置信度
     generated_at: datetime
+    degraded: bool = False  # 生成失败时返回的默认报告，不应缓存或存储
 
 
 # PERMA评估的关键词映射
@@ -215,6 +224,502 @@ PERMA_KEYWORDS = {
     },
 }
 
+# 计分矩阵的布局：维度按 PERMADimension 的定义顺序，极性 0 为正面、1 为负面
+PERMA_DIMENSIONS = list(PERMADimension)
+PERMA_POLARITIES = ("positive", "negative")
+
+# 全部维度、两种极性的关键词编译成一个自动机，类别为 (维度下标, 极性下标)
+PERMA_LEXICON = LexiconMatcher(
+    (word, (dim_index, polarity_index), 1.0)
+    for dim_index, dimension in enumerate(PERMA_DIMENSIONS)
+    for polarity_index, polarity in enumerate(PERMA_POLARITIES)
+    for word in PERMA_KEYWORDS[dimension][polarity]
+)
+
+# 分词：每个汉字单独算一个词，其余连续的字母/数字算一个词，标点和空白不计
+_CJK_CHARS = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_PATTERN = re.compile(f"[{_CJK_CHARS}]|[^\\W{_CJK_CHARS}]+")
+
+
+class PERMAScoringEngine:
+    """
+    PERMA关键词计分引擎
+
+    每条消息只分词一次、用 PERMA_LEXICON 扫描一次，得到
+    (消息数 × 维度数 × 极性) 的命中计数矩阵，五个维度的基础得分由矩阵一次算出。
+    同一维度内相互重叠的关键词只计最长的一个（如“无意义”不再同时算作“意义”）。
+    """
+
+    def count_matrix(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        统计每条消息在各维度、各极性上的关键词命中次数
+
+        Args:
+            texts: 消息文本列表
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 形状为 (消息数, 5, 2) 的命中计数矩阵，
+            以及形状为 (消息数,) 的词数
+        """
+        cells_per_row = len(PERMA_DIMENSIONS) * 2
+        hit_cells = []  # 每次有效命中在展平后的计数矩阵中的位置
+
+        for row, text in enumerate(texts):
+            text = (text or "").lower()
+
+            # 按起点从左到右、同起点长者优先，每个维度内贪心选取不重叠的命中
+            matches = sorted(
+                PERMA_LEXICON.find_all(text), key=lambda hit: (hit[0], -hit[1])
+            )
+            covered_until = [0] * len(PERMA_DIMENSIONS)
+            for start, end, _pattern, (dim_index, polarity_index) in matches:
+                if start >= covered_until[dim_index]:
+                    hit_cells.append(
+                        row * cells_per_row + dim_index * 2 + polarity_index
+                    )
+                    covered_until[dim_index] = end
+
+        counts = np.bincount(
+            np.asarray(hit_cells, dtype=np.int64), minlength=len(texts) * cells_per_row
+        ).reshape(len(texts), len(PERMA_DIMENSIONS), 2)
+        token_counts = np.fromiter(
+            (len(_TOKEN_PATTERN.findall((text or "").lower())) for text in texts),
+            dtype=np.int64,
+            count=len(texts),
+        )
+
+        return counts, token_counts
+
+    def base_scores(self, texts: List[str]) -> np.ndarray:
+        """
+        由关键词命中比例计算五个维度的基础得分
+
+        Args:
+            texts: 消息文本列表
+
+        Returns:
+            np.ndarray: 按 PERMA_DIMENSIONS 顺序排列的五个基础得分
+        """
+        counts, token_counts = self.count_matrix(texts)
+        return self.scores_from_counts(counts.sum(axis=0), int(token_counts.sum()))
+
+    def scores_from_counts(self, totals: np.ndarray, total_words: int) -> np.ndarray:
+        """
+        由汇总后的命中计数计算五个维度的基础得分
+
+        得分 = 5 + (正面命中数 - 负面命中数) / 总词数 × 100，截断到 0-10；
+        没有任何词时为中性的 5 分。
+
+        Args:
+            totals: 形状为 (5, 2) 的各维度正/负面命中总数
+            total_words: 总词数
+
+        Returns:
+            np.ndarray: 按 PERMA_DIMENSIONS 顺序排列的五个基础得分
+        """
+        if total_words <= 0:
+            return np.full(len(PERMA_DIMENSIONS), 5.0)
+
+        totals = np.asarray(totals)
+        ratios = (totals[:, 0] - totals[:, 1]) / total_words
+        return np.clip(5.0 + ratios * 100, 0.0, 10.0)
+
+
+# 每日汇总表中各维度、各极性的关键词命中数列，顺序与计数矩阵展平后一致
+PERMA_COUNT_COLUMNS = [
+    f"{dimension.value}_{polarity}"
+    for dimension in PERMA_DIMENSIONS
+    for polarity in PERMA_POLARITIES
+]
+DAILY_COUNT_COLUMNS = [
+    "message_count",
+    "token_count",
+    *PERMA_COUNT_COLUMNS,
+    "analysis_count",
+]
+
+# 累加写入：同一用户同一天的多次写入合并到一行
+_UPSERT_DAILY = """
+INSERT INTO wellbeing_daily (user_id, day, {columns})
+VALUES (?, ?, {placeholders})
+ON CONFLICT (user_id, day) DO UPDATE SET {updates}
+""".format(
+    columns=", ".join(DAILY_COUNT_COLUMNS),
+    placeholders=", ".join("?" for _ in DAILY_COUNT_COLUMNS),
+    updates=", ".join(
+        f"{column} = {column} + excluded.{column}" for column in DAILY_COUNT_COLUMNS
+    ),
+)
+_UPSERT_LABEL = """
+INSERT INTO wellbeing_daily_labels (user_id, day, kind, label, count, weight)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, day, kind, label) DO UPDATE SET
+    count = count + excluded.count,
+    weight = weight + excluded.weight
+"""
+
+# wellbeing_daily_labels 中的标签种类
+EMOTION_LABEL = "emotion"  # 用户消息的情感标签，weight 与 count 相同
+DISTORTION_LABEL = "distortion"  # 认知扭曲类型，weight 为严重程度之和
+
+
+def summarize_distortions(distortions_data: Optional[str]) -> Dict[str, List[float]]:
+    """
+    解析一条认知分析记录的 distortions 字段
+
+    Args:
+        distortions_data: [[扭曲类型, 严重程度], ...] 形式的JSON字符串
+
+    Returns:
+        Dict[str, List[float]]: {扭曲类型: [出现次数, 严重程度之和]}
+    """
+    summary: Dict[str, List[float]] = {}
+    try:
+        distortions = json.loads(distortions_data) if distortions_data else []
+        for distortion_info in distortions:
+            if isinstance(distortion_info, list) and len(distortion_info) >= 2:
+                totals = summary.setdefault(distortion_info[0], [0, 0.0])
+                totals[0] += 1
+                totals[1] += distortion_info[1]
+    except (json.JSONDecodeError, TypeError):
+        pass
+    return summary
+
+
+class WellbeingRollup:
+    """
+    按用户、按天的心理健康汇总
+
+    wellbeing_daily 记录每天的消息数、词数、各PERMA维度的正/负面关键词命中数和
+    认知分析次数；wellbeing_daily_labels 记录每天的情感标签分布和各类认知扭曲。
+    消息和认知分析写入时由调用方把 ``*_statements`` 返回的累加语句与原记录一起
+    提交，报告只需对评估期内的 7 或 30 行求和，耗时与用户的对话量无关。
+
+    日期取记录时间戳（UTC）的日期部分。升级前已有的数据在用户第一次生成报告时
+    由 ``backfill`` 补算；``backfill`` 也可随时手动运行以修复汇总。
+    """
+
+    def __init__(self, db_manager):
+        """
+        初始化每日汇总
+
+        Args:
+            db_manager: 数据库管理器实例
+        """
+        self.db_manager = db_manager
+        self.scoring_engine = PERMAScoringEngine()
+        self._ensure_tables_exist()
+
+    def _ensure_tables_exist(self):
+        """确保汇总表存在"""
+        self.db_manager.connect()
+
+        count_columns = ",\n            ".join(
+            f"{column} INTEGER NOT NULL DEFAULT 0" for column in DAILY_COUNT_COLUMNS
+        )
+        self.db_manager.cursor.execute(
+            f"""
+        CREATE TABLE IF NOT EXISTS wellbeing_daily (
+            user_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            {count_columns},
+            PRIMARY KEY (user_id, day)
+        )
+        """
+        )
+
+        self.db_manager.cursor.execute(
+            """
+        CREATE TABLE IF NOT EXISTS wellbeing_daily_labels (
+            user_id INTEGER NOT NULL,
+            day DATE NOT NULL,
+            kind TEXT NOT NULL,  -- emotion / distortion
+            label TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            weight FLOAT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, kind, label)
+        )
+        """
+        )
+
+        # 已完成补算的用户
+        self.db_manager.cursor.execute(
+            """
+        CREATE TABLE IF NOT EXISTS wellbeing_rollup_state (
+            user_id INTEGER PRIMARY KEY,
+            backfilled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        )
+
+        self.db_manager.connection.commit()
+        self.db_manager.disconnect()
+
+    def message_statements(
+        self, user_id: int, day: str, messages: List[Tuple[str, Optional[str]]]
+    ) -> List[Tuple[str, tuple]]:
+        """
+        生成把一组新消息累加进当天汇总的语句
+
+        Args:
+            user_id: 用户ID
+            day: 日期（YYYY-MM-DD，UTC）
+            messages: (消息文本, 情感标签) 列表；标签为None的消息不计入情感分布
+
+        Returns:
+            List[Tuple[str, tuple]]: (SQL, 参数) 列表
+        """
+        counts, token_counts = self.scoring_engine.count_matrix(
+            [text for text, _label in messages]
+        )
+        values = [
+            len(messages),
+            int(token_counts.sum()),
+            *counts.sum(axis=0).ravel().tolist(),
+            0,
+        ]
+        statements = [(_UPSERT_DAILY, (user_id, day, *values))]
+        emotions = Counter(label for _text, label in messages if label)
+        for label, count in emotions.items():
+            statements.append(
+                (_UPSERT_LABEL, (user_id, day, EMOTION_LABEL, label, count, count))
+            )
+        return statements
+
+    def analysis_statements(
+        self, user_id: int, day: str, distortions_data: Optional[str]
+    ) -> List[Tuple[str, tuple]]:
+        """
+        生成把一条认知分析结果累加进当天汇总的语句
+
+        Args:
+            user_id: 用户ID
+            day: 日期（YYYY-MM-DD，UTC）
+            distortions_data: 认知分析记录的 distortions JSON
+
+        Returns:
+            List[Tuple[str, tuple]]: (SQL, 参数) 列表
+        """
+        values = [0] * (len(DAILY_COUNT_COLUMNS) - 1) + [1]
+        statements = [(_UPSERT_DAILY, (user_id, day, *values))]
+        for distortion, (count, severity) in summarize_distortions(
+            distortions_data
+        ).items():
+            statements.append(
+                (
+                    _UPSERT_LABEL,
+                    (user_id, day, DISTORTION_LABEL, distortion, count, severity),
+                )
+            )
+        return statements
+
+    def backfill(self, user_id: Optional[int] = None) -> int:
+        """
+        由 conversation_history 和 cognitive_analysis 重新计算汇总
+
+        范围内已有的汇总行会被替换，因此也可用于修复与原始记录不一致的汇总。
+        注意已被清理的旧对话无法再计入。
+
+        Args:
+            user_id: 只重算该用户；为None时重算全部用户
+
+        Returns:
+            int: 写入的每日汇总行数
+        """
+        where, params = "", ()
+        if user_id is not None:
+            where, params = "WHERE user_id = ?", (user_id,)
+
+        daily: Dict[Tuple[int, str], List[float]] = {}
+        labels: Dict[Tuple[int, str, str, str], List[float]] = {}
+
+        with self.db_manager.transaction():
+            if self._table_exists("conversation_history"):
+                group, texts, emotions = None, [], []
+                for (
+                    row_user,
+                    message,
+                    is_user,
+                    topic,
+                    timestamp,
+                ) in self.db_manager.iter_query(
+                    f"""
+                        SELECT user_id, message, is_user, topic, timestamp
+                        FROM conversation_history {where}
+                        ORDER BY user_id, timestamp
+                        """,
+                    params,
+                    row_type="tuple",
+                ):
+                    key = (row_user, str(timestamp)[:10])
+                    if key != group:
+                        if texts:
+                            self._add_messages(daily, labels, group, texts, emotions)
+                        group, texts, emotions = key, [], []
+                    texts.append(message)
+                    emotions.append(topic if is_user else None)
+                if texts:
+                    self._add_messages(daily, labels, group, texts, emotions)
+
+            if self._table_exists("cognitive_analysis"):
+                for row_user, distortions_data, timestamp in self.db_manager.iter_query(
+                    f"""
+                    SELECT user_id, distortions, analysis_timestamp
+                    FROM cognitive_analysis {where}
+                    """,
+                    params,
+                    row_type="tuple",
+                ):
+                    key = (row_user, str(timestamp)[:10])
+                    daily.setdefault(key, [0] * len(DAILY_COUNT_COLUMNS))[-1] += 1
+                    for distortion, (count, severity) in summarize_distortions(
+                        distortions_data
+                    ).items():
+                        totals = labels.setdefault(
+                            (*key, DISTORTION_LABEL, distortion), [0, 0.0]
+                        )
+                        totals[0] += count
+                        totals[1] += severity
+
+            self.db_manager.execute_update(
+                f"DELETE FROM wellbeing_daily {where}", params
+            )
+            self.db_manager.execute_update(
+                f"DELETE FROM wellbeing_daily_labels {where}", params
+            )
+            self.db_manager.execute_many(
+                f"""
+                INSERT INTO wellbeing_daily (user_id, day, {", ".join(DAILY_COUNT_COLUMNS)})
+                VALUES (?, ?, {", ".join("?" for _ in DAILY_COUNT_COLUMNS)})
+                """,
+                [(*key, *values) for key, values in daily.items()],
+            )
+            self.db_manager.execute_many(
+                """
+                INSERT INTO wellbeing_daily_labels
+                (user_id, day, kind, label, count, weight)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [(*key, *totals) for key, totals in labels.items()],
+            )
+
+            users = {key[0] for key in daily}
+            if user_id is not None:
+                users.add(user_id)
+            self.db_manager.execute_many(
+                "INSERT OR REPLACE INTO wellbeing_rollup_state (user_id) VALUES (?)",
+                [(user,) for user in users],
+            )
+
+        logger.info(f"补算了{len(daily)}条每日心理健康汇总")
+        return len(daily)
+
+    def _add_messages(self, daily, labels, key, texts, emotions):
+        """把同一用户同一天的一组消息计入补算结果"""
+        counts, token_counts = self.scoring_engine.count_matrix(texts)
+        totals = daily.setdefault(key, [0] * len(DAILY_COUNT_COLUMNS))
+        values = [len(texts), int(token_counts.sum())]
+        values += counts.sum(axis=0).ravel().tolist()
+        for index, value in enumerate(values):
+            totals[index] += value
+        for label, count in Counter(label for label in emotions if label).items():
+            label_totals = labels.setdefault((*key, EMOTION_LABEL, label), [0, 0.0])
+            label_totals[0] += count
+            label_totals[1] += count
+
+    def _table_exists(self, table: str) -> bool:
+        """原始记录表是否存在（由各自的模块创建）"""
+        return bool(
+            self.db_manager.execute_query(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (table,),
+            )
+        )
+
+    def ensure_backfilled(self, user_id: int) -> None:
+        """用户的汇总尚未补算过时，先由原始记录补算"""
+        rows = self.db_manager.execute_query(
+            "SELECT 1 FROM wellbeing_rollup_state WHERE user_id = ?", (user_id,)
+        )
+        if not rows:
+            self.backfill(user_id)
+
+    def load(self, user_id: int, start_day: date, end_day: date) -> Dict[str, Any]:
+        """
+        汇总指定日期范围（含首尾两天）内的每日统计
+
+        Args:
+            user_id: 用户ID
+            start_day: 起始日期（UTC）
+            end_day: 结束日期（UTC）
+
+        Returns:
+            Dict[str, Any]: message_count、token_count、analysis_count、
+            active_days（有消息的天数）、perma_counts（形状为 (5, 2) 的命中总数）、
+            emotion_counts（{情感标签: 次数}）和
+            distortions（{扭曲类型: [次数, 严重程度之和]}）
+        """
+        params = (user_id, start_day.isoformat(), end_day.isoformat())
+        sums = ", ".join(
+            f"COALESCE(SUM({column}), 0) AS {column}" for column in DAILY_COUNT_COLUMNS
+        )
+        rows = self.db_manager.execute_query(
+            f"""
+            SELECT {sums},
+                   COUNT(CASE WHEN message_count > 0 THEN 1 END) AS active_days
+            FROM wellbeing_daily
+            WHERE user_id = ? AND day BETWEEN ? AND ?
+            """,
+            params,
+        )
+        row = rows[0] if rows else {}
+
+        totals = {
+            "message_count": int(row.get("message_count", 0)),
+            "token_count": int(row.get("token_count", 0)),
+            "analysis_count": int(row.get("analysis_count", 0)),
+            "active_days": int(row.get("active_days", 0)),
+            "perma_counts": np.array(
+                [row.get(column, 0) for column in PERMA_COUNT_COLUMNS], dtype=np.int64
+            ).reshape(len(PERMA_DIMENSIONS), len(PERMA_POLARITIES)),
+            "emotion_counts": {},
+            "distortions": {},
+        }
+
+        for label_row in self.db_manager.execute_query(
+            """
+            SELECT kind, label, SUM(count) AS count, SUM(weight) AS weight
+            FROM wellbeing_daily_labels
+            WHERE user_id = ? AND day BETWEEN ? AND ?
+            GROUP BY kind, label
+            """,
+            params,
+        ):
+            if label_row["kind"] == EMOTION_LABEL:
+                totals["emotion_counts"][label_row["label"]] = label_row["count"]
+            elif label_row["kind"] == DISTORTION_LABEL:
+                totals["distortions"][label_row["label"]] = [
+                    label_row["count"],
+                    label_row["weight"],
+                ]
+        return totals
+
+
+# 报告写入 perma_assessments / wellbeing_reports 的语句
+_INSERT_PERMA_ASSESSMENT = """
+INSERT INTO perma_assessments
+(user_id, positive_emotion_score, engagement_score, relationships_score,
+ meaning_score, achievement_score, overall_wellbeing_score, confidence_score)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_WELLBEING_REPORT = """
+INSERT INTO wellbeing_reports
+(user_id, report_data, report_period_start, report_period_end, confidence_score)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+
 # 基于积极心理学的干预策略
 POSITIVE_PSYCHOLOGY_INTERVENTIONS = {
     PERMADimension.POSITIVE_EMOTION: [
@@ -266,7 +771,10 @@ class PERMAReportGenerator:
             db_manager: 数据库管理器实例
         """
         self.db_manager = db_manager
+        self.scoring_engine = PERMAScoringEngine()
         self._ensure_tables_exist()
+        self.rollup = WellbeingRollup(db_manager)
+        self.emotion_timeline = EmotionTimeline(db_manager)
 
     def _ensure_tables_exist(self):
         """确保必要的数据库表存在"""
@@ -328,7 +836,7 @@ class PERMAReportGenerator:
         self.db_manager.disconnect()
 
     def generate_comprehensive_report(
-        self, user_id: int, days_back: int = 30
+        self, user_id: int, days_back: int = 30, store: bool = True
     ) -> WellbeingReport:
         """
         生成综合心理健康报告
@@ -336,9 +844,11 @@ class PERMAReportGenerator:
         Args:
             user_id: 用户ID
             days_back: 回溯分析的天数
+            store: 是否把报告存入数据库；批量生成时由调用方统一写入
 
         Returns:
-            WellbeingReport: 综合心理健康报告
+            WellbeingReport: 综合心理健康报告；生成失败时为标记了 ``degraded``
+            的默认报告（不会存储）
         """
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
@@ -392,7 +902,8 @@ class PERMAReportGenerator:
             )
 
             # 10. 存储报告
-            self._store_report(report)
+            if store:
+                self._store_report(report)
 
             logger.info(
                 f"生成用户{user_id}的综合心理健康报告，整体幸福感得分: {perma_scores.overall_wellbeing:.2f}"
@@ -402,81 +913,99 @@ class PERMAReportGenerator:
         except Exception as e:
             logger.error(f"生成综合报告失败: {e}")
             # 返回默认报告
-            return self._create_default_report(user_id, start_date, end_date)
+            report = self._create_default_report(user_id, start_date, end_date)
+            report.degraded = True
+            return report
 
     def _collect_user_data(
         self, user_id: int, start_date: datetime, end_date: datetime
     ) -> Dict[str, Any]:
-        """收集用户在指定时间段内的所有相关数据"""
+        """
+        收集用户在指定时间段内的所有相关数据
+
+        消息和认知分析的统计来自每日汇总表，只需对评估期内的每日行求和，
+        不再逐条读取、重新计分。读取失败时抛出异常，而不是返回不完整的数据。
+        """
 
         data = {
             "messages": [],
+            "perma_counts": None,  # 各维度正/负面关键词命中总数
+            "token_count": 0,
             "emotions": [],
-            "cognitive_analyses": [],
+            "emotion_distribution": {},  # 消息情感标签分布
+            "cognitive_analyses": [],  # 最近10次认知分析
+            "cognitive_summary": None,  # 认知分析次数与各类认知扭曲
             "conversations": [],
             "activities": [],
             "metadata": {
                 "total_interactions": 0,
                 "active_days": 0,
                 "avg_daily_interactions": 0,
+                "cognitive_analysis_count": 0,
             },
         }
 
         try:
-            # 收集对话消息
-            messages = self.db_manager.execute_query(
-                """
-                SELECT message, timestamp, emotion_score, topic
-                FROM conversation_history
-                WHERE user_id = ? AND timestamp BETWEEN ? AND ?
-                ORDER BY timestamp ASC
-                """,
-                (user_id, start_date, end_date),
+            # 同一数据库文件的写后队列在进程内共享，汇总及其原始记录
+            # 在同一事务中写入；先确保已排队的记录全部提交
+            self.db_manager.write_behind().flush()
+            self.rollup.ensure_backfilled(user_id)
+
+            # 汇总按UTC日期存储，评估期按整天计算
+            start_day = start_date.astimezone(timezone.utc).date()
+            end_day = end_date.astimezone(timezone.utc).date()
+            totals = self.rollup.load(user_id, start_day, end_day)
+            data["perma_counts"] = totals["perma_counts"]
+            data["token_count"] = totals["token_count"]
+            data["emotion_distribution"] = totals["emotion_counts"]
+            data["cognitive_summary"] = {
+                "analysis_count": totals["analysis_count"],
+                "distortions": totals["distortions"],
+            }
+
+            # 收集情感分析数据：评估期内最近100条持久化的情感记录
+            data["emotions"] = self.emotion_timeline.samples(
+                user_id, start_date, end_date, limit=100
             )
-            data["messages"] = messages or []
-
-            # 收集情感分析数据
-            emotions = emotion_analyzer.get_emotion_trajectory(user_id)
-            data["emotions"] = emotions[-100:]  # 最近100条情感记录
 
-            # 收集认知分析数据
-            cognitive_data = self.db_manager.execute_query(
+            # 认知扭曲扣分只看最近10次分析，与汇总取同样的整天范围
+            recent_analyses = self.db_manager.execute_query(
                 """
                 SELECT message_text, distortions, irrational_beliefs,
                        core_beliefs, automatic_thoughts, confidence_score, analysis_timestamp
                 FROM cognitive_analysis
-                WHERE user_id = ? AND analysis_timestamp BETWEEN ? AND ?
-                ORDER BY analysis_timestamp ASC
+                WHERE user_id = ? AND analysis_timestamp >= ? AND analysis_timestamp < ?
+                ORDER BY analysis_timestamp DESC
+                LIMIT 10
                 """,
-                (user_id, start_date, end_date),
+                (
+                    user_id,
+                    start_day.isoformat(),
+                    (end_day + timedelta(days=1)).isoformat(),
+                ),
             )
-            data["cognitive_analyses"] = cognitive_data or []
+            data["cognitive_analyses"] = list(reversed(recent_analyses))
 
             # 计算元数据
-            data["metadata"]["total_interactions"] = len(data["messages"])
-            if data["messages"]:
-                dates = set(
-                    msg["timestamp"][:10] for msg in data["messages"]
-                )  # 提取日期部分
-                data["metadata"]["active_days"] = len(dates)
-                data["metadata"]["avg_daily_interactions"] = data["metadata"][
-                    "total_interactions"
-                ] / max(1, data["metadata"]["active_days"])
+            metadata = data["metadata"]
+            metadata["total_interactions"] = totals["message_count"]
+            metadata["active_days"] = totals["active_days"]
+            metadata["cognitive_analysis_count"] = totals["analysis_count"]
+            if totals["message_count"]:
+                metadata["avg_daily_interactions"] = totals["message_count"] / max(
+                    1, totals["active_days"]
+                )
 
         except Exception as e:
             logger.error(f"收集用户数据失败: {e}")
+            raise
 
         return data
 
     def _assess_perma_dimensions(self, user_data: Dict[str, Any]) -> PERMAScore:
         """基于PERMA模型评估各维度得分"""
 
-        dimension_scores = {}
-
-        # 分析每个PERMA维度
-        for dimension in PERMADimension:
-            score = self._calculate_dimension_score(dimension, user_data)
-            dimension_scores[dimension.value] = score
+        dimension_scores = self._calculate_dimension_scores(user_data)
 
         # 计算总体幸福感得分（加权平均）
         weights = {
@@ -500,56 +1029,46 @@ class PERMAReportGenerator:
             overall_wellbeing=overall_wellbeing,
         )
 
-    def _calculate_dimension_score(
-        self, dimension: PERMADimension, user_data: Dict[str, Any]
-    ) -> float:
-        """计算单个PERMA维度的得分"""
-
-        positive_keywords = PERMA_KEYWORDS[dimension]["positive"]
-        negative_keywords = PERMA_KEYWORDS[dimension]["negative"]
-
-        positive_count = 0
-        negative_count = 0
-        total_words = 0
-
-        # 分析消息中的关键词
-        for message in user_data["messages"]:
-            text = message.get("message", "").lower()
-            words = text.split()
-            total_words += len(words)
+    def _calculate_dimension_scores(
+        self, user_data: Dict[str, Any]
+    ) -> Dict[str, float]:
+        """一次计算全部五个PERMA维度的得分"""
 
-            for word in words:
-                if any(keyword in word for keyword in positive_keywords):
-                    positive_count += 1
-                elif any(keyword in word for keyword in negative_keywords):
-                    negative_count += 1
-
-        # 基础得分计算
-        if total_words == 0:
-            base_score = 5.0  # 默认中性得分
+        # 基础得分：优先使用每日汇总的命中数，否则对消息只分词、匹配一遍
+        if user_data.get("perma_counts") is not None:
+            scores = self.scoring_engine.scores_from_counts(
+                user_data["perma_counts"], user_data["token_count"]
+            )
         else:
-            # 计算正负面关键词比例
-            positive_ratio = positive_count / max(1, total_words)
-            negative_ratio = negative_count / max(1, total_words)
+            texts = [message.get("message", "") for message in user_data["messages"]]
+            scores = self.scoring_engine.base_scores(texts)
 
-            # 转换为0-10分制
-            base_score = 5.0 + (positive_ratio - negative_ratio) * 100
-            base_score = max(0.0, min(10.0, base_score))
-
-        # 根据情感数据调整得分
-        if dimension == PERMADimension.POSITIVE_EMOTION:
-            base_score = self._adjust_for_emotions(base_score, user_data["emotions"])
+        # 根据情感数据调整积极情感维度得分
+        positive_index = PERMA_DIMENSIONS.index(PERMADimension.POSITIVE_EMOTION)
+        scores[positive_index] = self._adjust_for_emotions(
+            float(scores[positive_index]), user_data["emotions"]
+        )
 
-        # 根据认知分析调整得分
+        # 根据认知分析调整得分（各维度的扣分相同）
         if user_data["cognitive_analyses"]:
-            base_score = self._adjust_for_cognitive_patterns(
-                base_score, dimension, user_data["cognitive_analyses"]
+            penalty = self._cognitive_distortion_penalty(
+                user_data["cognitive_analyses"]
             )
+            scores = np.clip(scores - penalty, 0.0, 10.0)
 
-        return round(base_score, 2)
+        return {
+            dimension.value: round(float(score), 2)
+            for dimension, score in zip(PERMA_DIMENSIONS, scores)
+        }
+
+    def _calculate_dimension_score(
+        self, dimension: PERMADimension, user_data: Dict[str, Any]
+    ) -> float:
+        """计算单个PERMA维度的得分"""
+        return self._calculate_dimension_scores(user_data)[dimension.value]
 
     def _adjust_for_emotions(
-        self, base_score: float, emotions: List[EmotionState]
+        self, base_score: float, emotions: List[EmotionSample]
     ) -> float:
         """根据情感数据调整积极情感维度得分"""
         if not emotions:
@@ -583,6 +1102,16 @@ class PERMAReportGenerator:
         if not cognitive_analyses:
             return base_score
 
+        adjusted_score = base_score - self._cognitive_distortion_penalty(
+            cognitive_analyses
+        )
+
+        return max(0.0, min(10.0, adjusted_score))
+
+    def _cognitive_distortion_penalty(
+        self, cognitive_analyses: List[Dict[str, Any]]
+    ) -> float:
+        """根据最近认知分析中的认知扭曲数量计算扣分（0-2分）"""
         # 计算认知扭曲严重程度
         total_distortions = 0
         for analysis in cognitive_analyses[-10:]:  # 最近10次分析
@@ -596,10 +1125,7 @@ class PERMAReportGenerator:
         avg_distortions = total_distortions / len(cognitive_analyses[-10:])
 
         # 根据认知扭曲程度调整得分
-        distortion_penalty = min(2.0, avg_distortions * 0.5)
-        adjusted_score = base_score - distortion_penalty
-
-        return max(0.0, min(10.0, adjusted_score))
+        return min(2.0, avg_distortions * 0.5)
 
     def _generate_psychological_insights(
         self, user_data: Dict[str, Any], perma_scores: PERMAScore
@@ -685,6 +1211,14 @@ class PERMAReportGenerator:
 
         emotions = user_data["emotions"]
         if not emotions:
+            # 没有情感轨迹时，用每日汇总中的消息情感标签给出主导情感
+            distribution = user_data.get("emotion_distribution") or {}
+            trends["dominant_emotions"] = [
+                {"emotion": emotion, "frequency": count}
+                for emotion, count in sorted(
+                    distribution.items(), key=lambda x: x[1], reverse=True
+                )[:3]
+            ]
             return trends
 
         # 分析主导情感
@@ -758,70 +1292,68 @@ class PERMAReportGenerator:
     def _store_report(self, report: WellbeingReport):
         """存储心理健康报告到数据库"""
         try:
+            assessment_row, report_row = self._report_rows(report)
+
             # 存储PERMA评估
-            self.db_manager.execute_insert(
-                """
-                INSERT INTO perma_assessments
-                (user_id, positive_emotion_score, engagement_score, relationships_score,
-                 meaning_score, achievement_score, overall_wellbeing_score, confidence_score)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    report.user_id,
-                    report.perma_scores.positive_emotion,
-                    report.perma_scores.engagement,
-                    report.perma_scores.relationships,
-                    report.perma_scores.meaning,
-                    report.perma_scores.achievement,
-                    report.perma_scores.overall_wellbeing,
-                    report.confidence_score,
-                ),
-            )
+            self.db_manager.execute_insert(_INSERT_PERMA_ASSESSMENT, assessment_row)
 
             # 存储完整报告
-            report_json = json.dumps(
-                {
-                    "perma_scores": report.perma_scores.to_dict(),
-                    "psychological_insights": [
-                        {
-                            "category": insight.category,
-                            "insight": insight.insight,
-                            "evidence": insight.evidence,
-                            "confidence": insight.confidence,
-                            "intervention_suggestions": insight.intervention_suggestions,
-                        }
-                        for insight in report.psychological_insights
-                    ],
-                    "cognitive_patterns": report.cognitive_patterns,
-                    "emotional_trends": report.emotional_trends,
-                    "growth_recommendations": report.growth_recommendations,
-                    "risk_factors": report.risk_factors,
-                    "protective_factors": report.protective_factors,
-                },
-                ensure_ascii=False,
-                indent=2,
-            )
-
-            self.db_manager.execute_insert(
-                """
-                INSERT INTO wellbeing_reports
-                (user_id, report_data, report_period_start, report_period_end, confidence_score)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    report.user_id,
-                    report_json,
-                    report.assessment_period[0],
-                    report.assessment_period[1],
-                    report.confidence_score,
-                ),
-            )
+            self.db_manager.execute_insert(_INSERT_WELLBEING_REPORT, report_row)
 
             logger.info(f"成功存储用户{report.user_id}的心理健康报告")
 
         except Exception as e:
             logger.error(f"存储报告失败: {e}")
 
+    def _report_rows(self, report: WellbeingReport) -> Tuple[tuple, tuple]:
+        """
+        生成报告在 perma_assessments 和 wellbeing_reports 中的两行数据
+
+        Returns:
+            Tuple[tuple, tuple]: (PERMA评估行, 完整报告行)
+        """
+        assessment_row = (
+            report.user_id,
+            report.perma_scores.positive_emotion,
+            report.perma_scores.engagement,
+            report.perma_scores.relationships,
+            report.perma_scores.meaning,
+            report.perma_scores.achievement,
+            report.perma_scores.overall_wellbeing,
+            report.confidence_score,
+        )
+
+        report_json = json.dumps(
+            {
+                "perma_scores": report.perma_scores.to_dict(),
+                "psychological_insights": [
+                    {
+                        "category": insight.category,
+                        "insight": insight.insight,
+                        "evidence": insight.evidence,
+                        "confidence": insight.confidence,
+                        "intervention_suggestions": insight.intervention_suggestions,
+                    }
+                    for insight in report.psychological_insights
+                ],
+                "cognitive_patterns": report.cognitive_patterns,
+                "emotional_trends": report.emotional_trends,
+                "growth_recommendations": report.growth_recommendations,
+                "risk_factors": report.risk_factors,
+                "protective_factors": report.protective_factors,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+        report_row = (
+            report.user_id,
+            report_json,
+            report.assessment_period[0],
+            report.assessment_period[1],
+            report.confidence_score,
+        )
+        return assessment_row, report_row
+
     def _analyze_cognitive_patterns(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """分析认知模式"""
         patterns = {
@@ -831,27 +1363,20 @@ class PERMAReportGenerator:
             "rational_thinking_score": 0.0,
         }
 
-        cognitive_analyses = user_data.get("cognitive_analyses", [])
-        if not cognitive_analyses:
+        summary = user_data.get("cognitive_summary")
+        if summary is None:
+            summary = self._summarize_cognitive_analyses(
+                user_data.get("cognitive_analyses", [])
+            )
+        total_analyses = summary["analysis_count"]
+        if not total_analyses:
             return patterns
 
-        # 分析常见认知扭曲
-        distortion_counts = {}
-        total_analyses = len(cognitive_analyses)
-
-        for analysis in cognitive_analyses:
-            distortions_data = analysis.get("distortions", "[]")
-            try:
-                distortions = json.loads(distortions_data) if distortions_data else []
-                for distortion_info in distortions:
-                    if isinstance(distortion_info, list) and len(distortion_info) >= 2:
-                        distortion_type = distortion_info[0]
-                        severity = distortion_info[1]
-                        distortion_counts[distortion_type] = (
-                            distortion_counts.get(distortion_type, 0) + severity
-                        )
-            except (json.JSONDecodeError, TypeError):
-                continue
+        # 分析常见认知扭曲（按严重程度累计）
+        distortion_counts = {
+            distortion_type: severity
+            for distortion_type, (_count, severity) in summary["distortions"].items()
+        }
 
         # 获取最常见的认知扭曲
         if distortion_counts:
@@ -876,6 +1401,20 @@ class PERMAReportGenerator:
 
         return patterns
 
+    def _summarize_cognitive_analyses(
+        self, cognitive_analyses: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """把认知分析记录汇总成与每日汇总相同的形式"""
+        distortions: Dict[str, List[float]] = {}
+        for analysis in cognitive_analyses:
+            for distortion_type, (count, severity) in summarize_distortions(
+                analysis.get("distortions", "[]")
+            ).items():
+                totals = distortions.setdefault(distortion_type, [0, 0.0])
+                totals[0] += count
+                totals[1] += severity
+        return {"analysis_count": len(cognitive_analyses), "distortions": distortions}
+
     def _generate_growth_recommendations(
         self, perma_scores: PERMAScore, user_data: Dict[str, Any]
     ) -> List[str]:
@@ -971,8 +1510,12 @@ class PERMAReportGenerator:
         """计算整体分析置信度"""
         confidence_factors = []
 
+        metadata = user_data.get("metadata", {})
+
         # 数据量因素
-        message_count = len(user_data.get("messages", []))
+        message_count = metadata.get(
+            "total_interactions", len(user_data.get("messages", []))
+        )
         if message_count >= 50:
             confidence_factors.append(0.9)
         elif message_count >= 20:
@@ -984,7 +1527,9 @@ class PERMAReportGenerator:
 
         # 数据多样性因素
         emotion_count = len(user_data.get("emotions", []))
-        cognitive_count = len(user_data.get("cognitive_analyses", []))
+        cognitive_count = metadata.get(
+            "cognitive_analysis_count", len(user_data.get("cognitive_analyses", []))
+        )
 
         if emotion_count >= 10 and cognitive_count >= 5:
             confidence_factors.append(0.8)
@@ -994,7 +1539,7 @@ class PERMAReportGenerator:
             confidence_factors.append(0.4)
 
         # 时间跨度因素
-        active_days = user_data.get("metadata", {}).get("active_days", 0)
+        active_days = metadata.get("active_days", 0)
         if active_days >= 14:
             confidence_factors.append(0.8)
         elif active_days >= 7:
@@ -1046,6 +1591,9 @@ class PERMAReportGenerator:
         )
 
 
+# 报告生成逻辑（计分、洞察规则等）改变时递增，旧版本缓存的报告随之失效
+REPORT_GENERATOR_VERSION = "3"
+
 # 全局报告生成器实例（需要在使用时初始化）
 _report_generator = None
 
@@ -1058,13 +1606,70 @@ def get_report_generator(db_manager):
     return _report_generator
 
 
-def generate_weekly_report(user_id: int, days_back: int = 7):
+def _report_result(report: WellbeingReport, days_back: int) -> Dict[str, Any]:
+    """把综合报告转换为旧的周报字典格式"""
+    return {
+        "success": True,
+        "user_id": report.user_id,
+        "report_period": f"过去{days_back}天",
+        "perma_scores": report.perma_scores.to_dict(),
+        "insights": [
+            {
+                "category": insight.category,
+                "content": insight.insight,
+                "confidence": insight.confidence,
+            }
+            for insight in report.psychological_insights
+        ],
+        "recommendations": report.growth_recommendations,
+        "emotional_trends": report.emotional_trends,
+        "cognitive_patterns": report.cognitive_patterns,
+        "risk_factors": report.risk_factors,
+        "protective_factors": report.protective_factors,
+        "overall_wellbeing": report.perma_scores.overall_wellbeing,
+        "confidence": report.confidence_score,
+        "generated_at": report.generated_at.isoformat(),
+    }
+
+
+def get_cached_weekly_report(
+    user_id: int, days_back: int = 7
+) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    读取缓存的周报，不生成新报告
+
+    Args:
+        user_id: 用户ID
+        days_back: 回溯天数
+
+    Returns:
+        Tuple[Optional[Dict[str, Any]], bool]: (报告, 是否仍有效)；
+        没有当前版本生成器的缓存时报告为None
+    """
+    from ..backend.database_manager import DatabaseManager
+    from ..backend.report_cache import ReportCache
+
+    try:
+        return ReportCache(DatabaseManager()).get(
+            user_id, days_back, REPORT_GENERATOR_VERSION
+        )
+    except Exception as e:
+        logger.error(f"读取缓存周报失败: {e}")
+        return None, False
+
+
+def generate_weekly_report(user_id: int, days_back: int = 7, use_cache: bool = True):
     """
     生成用户周报（向后兼容函数）
 
+    评估期内的消息、认知分析和打卡记录自上次生成以来没有变化时，直接返回缓存的
+    报告（带 ``"cached": True``），不重新计算也不再存储一份相同的报告。
+    生成失败时返回错误信息，失败得到的默认报告不会被缓存。
+
     Args:
         user_id: 用户ID
         days_back: 回溯天数，默认7天
+        use_cache: 为False时忽略缓存，总是重新生成
 
     Returns:
         dict: 报告数据或错误信息
@@ -1073,36 +1678,34 @@ def generate_weekly_report(user_id: int, days_back: int = 7):
         # 这里需要获取数据库管理器实例
         # 为了向后兼容，使用简化的实现
         from ..backend.database_manager import DatabaseManager
+        from ..backend.report_cache import ReportCache
 
         db_manager = DatabaseManager()
+        cache = ReportCache(db_manager)
+        if use_cache:
+            cached, fresh = cache.get(user_id, days_back, REPORT_GENERATOR_VERSION)
+            if fresh:
+                return dict(cached, cached=True)
+
+        # 生成前记录数据指纹，生成期间到达的新数据会让这份缓存失效
+        fingerprint = cache.fingerprint(user_id, *ReportCache.window(days_back))
+
         report_generator = get_report_generator(db_manager)
 
         # 生成综合报告
         report = report_generator.generate_comprehensive_report(user_id, days_back)
+        if report.degraded:
+            return {
+                "success": False,
+                "degraded": True,
+                "error": "综合报告生成失败",
+                "message": "报告生成失败，请稍后重试",
+            }
 
         # 转换为旧格式以保持兼容性
-        return {
-            "success": True,
-            "user_id": user_id,
-            "report_period": f"过去{days_back}天",
-            "perma_scores": report.perma_scores.to_dict(),
-            "insights": [
-                {
-                    "category": insight.category,
-                    "content": insight.insight,
-                    "confidence": insight.confidence,
-                }
-                for insight in report.psychological_insights
-            ],
-            "recommendations": report.growth_recommendations,
-            "emotional_trends": report.emotional_trends,
-            "cognitive_patterns": report.cognitive_patterns,
-            "risk_factors": report.risk_factors,
-            "protective_factors": report.protective_factors,
-            "overall_wellbeing": report.perma_scores.overall_wellbeing,
-            "confidence": report.confidence_score,
-            "generated_at": report.generated_at.isoformat(),
-        }
+        result = _report_result(report, days_back)
+        cache.put(user_id, days_back, REPORT_GENERATOR_VERSION, result, fingerprint)
+        return result
 
     except Exception as e:
         logger.error(f"生成周报失败: {e}")
@@ -1111,3 +1714,184 @@ def generate_weekly_report(user_id: int, days_back: int = 7):
             "error": str(e),
             "message": "报告生成失败，请稍后重试",
         }
+
+
+# 批量生成时每个工作进程持有的报告生成器（只读数据库连接）
+_worker_generator = None
+
+
+def _init_report_worker(db_path: str) -> None:
+    """工作进程初始化：打开一个只读数据库连接，整个进程复用"""
+    global _worker_generator
+    from ..backend.database_manager import DatabaseManager
+
+    db_manager = DatabaseManager(db_path, use_pool=True, pool_size=1, read_only=True)
+    _worker_generator = PERMAReportGenerator(db_manager)
+
+
+def _generate_report_shard(
+    user_ids: List[int], days_back: int
+) -> List[Tuple[int, Optional[WellbeingReport], Optional[str]]]:
+    """
+    在工作进程中生成一组用户的报告，结果交回主进程写入
+
+    Returns:
+        List[Tuple[int, Optional[WellbeingReport], Optional[str]]]: 每位用户一项
+        (用户ID, 报告, 错误信息)；生成失败时报告为None
+    """
+    results = []
+    for user_id in user_ids:
+        try:
+            report = _worker_generator.generate_comprehensive_report(
+                user_id, days_back, store=False
+            )
+        except Exception as e:
+            results.append((user_id, None, str(e)))
+            continue
+        if report.degraded:
+            # 失败原因已记录在工作进程的日志中
+            results.append((user_id, None, "综合报告生成失败"))
+        else:
+            results.append((user_id, report, None))
+    return results
+
+
+def generate_all_weekly_reports(
+    db_manager=None,
+    days_back: int = 7,
+    max_workers: Optional[int] = None,
+    shard_size: int = 25,
+    use_cache: bool = True,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    为所有活跃用户批量生成周报
+
+    活跃用户指评估期内有消息、认知分析或打卡记录的用户。用户按 ``shard_size``
+    分片交给进程池，每个工作进程只打开一个只读连接；报告由主进程按分片在一个
+    事务中写入 perma_assessments、wellbeing_reports 和报告缓存。缓存仍然有效的
+    用户直接跳过；生成失败的用户计入失败数，不写入也不缓存。
+
+    Args:
+        db_manager: 数据库管理器实例，为None时使用默认数据库
+        days_back: 回溯天数，默认7天
+        max_workers: 工作进程数，默认为CPU核数
+        shard_size: 每个任务包含的用户数
+        use_cache: 为False时忽略缓存，为所有活跃用户重新生成
+        progress_callback: 每写入一个分片后以 (已完成用户数, 待生成用户数) 调用
+
+    Returns:
+        Dict[str, Any]: 统计信息，包括活跃用户数、生成/缓存命中/失败的报告数、
+        耗时（秒）和每秒生成的报告数
+    """
+    from ..backend.database_manager import DatabaseManager
+    from ..backend.report_cache import ReportCache
+
+    started = time.monotonic()
+    db_manager = db_manager or DatabaseManager()
+    # 主进程负责建表和全部写入，工作进程只读
+    generator = PERMAReportGenerator(db_manager)
+    cache = ReportCache(db_manager)
+    start_date, end_date = ReportCache.window(days_back)
+    user_ids = cache.active_users(start_date, end_date)
+    stats = {
+        "users": len(user_ids),
+        "generated": 0,
+        "cached": 0,
+        "failed": 0,
+        "elapsed": 0.0,
+        "reports_per_second": 0.0,
+    }
+
+    # 工作进程无法补算汇总，先提交写后队列并补齐所有待生成用户的汇总
+    db_manager.write_behind().flush()
+    fingerprints = {}
+    for user_id in user_ids:
+        if use_cache and cache.get(user_id, days_back, REPORT_GENERATOR_VERSION)[1]:
+            stats["cached"] += 1
+            continue
+        generator.rollup.ensure_backfilled(user_id)
+        # 生成前记录数据指纹，生成期间到达的新数据会让缓存失效
+        fingerprints[user_id] = cache.fingerprint(user_id, start_date, end_date)
+
+    pending = list(fingerprints)
+    shards = [
+        pending[i : i + max(1, shard_size)]
+        for i in range(0, len(pending), max(1, shard_size))
+    ]
+    if shards:
+        workers = min(max_workers or os.cpu_count() or 1, len(shards))
+        logger.info(f"开始为{len(pending)}位用户批量生成周报，{workers}个工作进程")
+        done = 0
+        # 主进程有写后队列等后台线程，用spawn避免fork复制持有中的锁
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_report_worker,
+            initargs=(db_manager.db_path,),
+        ) as executor:
+            futures = {
+                executor.submit(_generate_report_shard, shard, days_back): shard
+                for shard in shards
+            }
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.error(f"批量生成周报失败（{len(shard)}位用户）: {e}")
+                    results = [(user_id, None, str(e)) for user_id in shard]
+
+                reports = []
+                for user_id, report, error in results:
+                    if report is None:
+                        logger.error(f"生成用户{user_id}的周报失败: {error}")
+                        stats["failed"] += 1
+                    else:
+                        reports.append(report)
+                if reports:
+                    try:
+                        _write_report_batch(
+                            generator, cache, reports, fingerprints, days_back
+                        )
+                        stats["generated"] += len(reports)
+                    except Exception as e:
+                        logger.error(f"写入批量周报失败（{len(reports)}位用户）: {e}")
+                        stats["failed"] += len(reports)
+
+                done += len(shard)
+                elapsed = time.monotonic() - started
+                logger.info(
+                    f"批量周报进度 {done}/{len(pending)}，"
+                    f"{stats['generated'] / max(elapsed, 1e-9):.1f} 份/秒"
+                )
+                if progress_callback:
+                    progress_callback(done, len(pending))
+
+    stats["elapsed"] = time.monotonic() - started
+    stats["reports_per_second"] = stats["generated"] / max(stats["elapsed"], 1e-9)
+    logger.info(
+        f"批量周报完成：生成{stats['generated']}份，缓存命中{stats['cached']}份，"
+        f"失败{stats['failed']}份，耗时{stats['elapsed']:.1f}秒"
+    )
+    return stats
+
+
+def _write_report_batch(generator, cache, reports, fingerprints, days_back):
+    """在一个事务中写入一个分片的报告及其缓存"""
+    rows = [generator._report_rows(report) for report in reports]
+    with generator.db_manager.transaction():
+        generator.db_manager.execute_many(
+            _INSERT_PERMA_ASSESSMENT, [assessment for assessment, _ in rows]
+        )
+        generator.db_manager.execute_many(
+            _INSERT_WELLBEING_REPORT, [report_row for _, report_row in rows]
+        )
+        for report in reports:
+            cache.put(
+                report.user_id,
+                days_back,
+                REPORT_GENERATOR_VERSION,
+                _report_result(report, days_back),
+                fingerprints[report.user_id],
+            )
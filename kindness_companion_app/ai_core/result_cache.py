@@ -0,0 +1,231 @@
+"""
+远程API结果缓存
+
+按请求内容（模型、系统提示词、上下文、文本）的哈希缓存API结果，分两级：
+内存中的LRU，以及带过期时间（TTL）的SQLite持久层。相同的请求在进程重启后
+依然可以直接命中，不再消耗API配额。
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path.home() / ".kindness_challenge" / "api_cache.db"
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    根据请求内容生成缓存键
+
+    Args:
+        *parts: 决定API结果的全部输入（需可JSON序列化）
+
+    Returns:
+        str: 内容的SHA-256十六进制摘要
+    """
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    两级API结果缓存（内存LRU + SQLite，带TTL）
+
+    值需可JSON序列化。SQLite连接在第一次访问磁盘时才打开，
+    磁盘出错时只记录日志并退化为纯内存缓存。
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        persistent: bool = True,
+    ):
+        """
+        Args:
+            db_path: SQLite缓存文件路径，None时使用默认路径
+            max_entries: 内存LRU的最大条目数
+            ttl_seconds: 条目有效期（秒），两级缓存共用
+            persistent: 为False时只使用内存缓存
+        """
+        self.db_path = str(db_path or DEFAULT_CACHE_PATH)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+    def _get_connection(self) -> Optional[sqlite3.Connection]:
+        """打开（必要时创建）SQLite缓存；调用方需持有锁"""
+        if not self.persistent:
+            return None
+        if self._connection is None:
+            try:
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+                connection = sqlite3.connect(self.db_path, check_same_thread=False)
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS api_result_cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                    """)
+                # 顺便清掉上次运行遗留的过期条目
+                connection.execute(
+                    "DELETE FROM api_result_cache WHERE expires_at <= ?", (time.time(),)
+                )
+                connection.commit()
+                self._connection = connection
+            except sqlite3.Error as e:
+                logger.warning(
+                    f"无法打开API结果缓存 {self.db_path}，仅使用内存缓存: {e}"
+                )
+                self.persistent = False
+                return None
+        return self._connection
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        """写入内存LRU并淘汰最久未用的条目；调用方需持有锁"""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        读取缓存值
+
+        Args:
+            key: 缓存键（见 make_cache_key）
+
+        Returns:
+            缓存的值；未命中或已过期时返回None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+            connection = self._get_connection()
+            if connection is not None:
+                try:
+                    row = connection.execute(
+                        "SELECT value, expires_at FROM api_result_cache WHERE key = ?",
+                        (key,),
+                    ).fetchone()
+                    if row is not None and row[1] > now:
+                        value = json.loads(row[0])
+                        self._remember(key, row[1], value)
+                        self._stats["disk_hits"] += 1
+                        return value
+                except (sqlite3.Error, ValueError) as e:
+                    logger.warning(f"读取API结果缓存失败: {e}")
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        写入缓存值（两级同时写入）
+
+        Args:
+            key: 缓存键（见 make_cache_key）
+            value: 可JSON序列化的结果
+        """
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._stats["stores"] += 1
+
+            connection = self._get_connection()
+            if connection is not None:
+                try:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO api_result_cache (key, value, expires_at) "
+                        "VALUES (?, ?, ?)",
+                        (key, json.dumps(value, ensure_ascii=False), expires_at),
+                    )
+                    connection.commit()
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    logger.warning(f"写入API结果缓存失败: {e}")
+
+    def purge_expired(self) -> int:
+        """
+        删除已过期的条目
+
+        Returns:
+            int: 从SQLite中删除的条目数
+        """
+        now = time.time()
+        with self._lock:
+            for key in [
+                k for k, (expires_at, _) in self._memory.items() if expires_at <= now
+            ]:
+                del self._memory[key]
+
+            connection = self._get_connection()
+            if connection is None:
+                return 0
+            try:
+                cursor = connection.execute(
+                    "DELETE FROM api_result_cache WHERE expires_at <= ?", (now,)
+                )
+                connection.commit()
+                return cursor.rowcount
+            except sqlite3.Error as e:
+                logger.warning(f"清理API结果缓存失败: {e}")
+                return 0
+
+    def clear(self) -> None:
+        """清空两级缓存"""
+        with self._lock:
+            self._memory.clear()
+            connection = self._get_connection()
+            if connection is not None:
+                try:
+                    connection.execute("DELETE FROM api_result_cache")
+                    connection.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"清空API结果缓存失败: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取命中统计
+
+        Returns:
+            Dict[str, Any]: 内存/磁盘命中数、未命中数、写入数、命中率和内存条目数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (
+            (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        )
+        return stats
+
+    def close(self) -> None:
+        """关闭SQLite连接（内存缓存保留）"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -1,3 +1,5 @@
+import threading
+
 from .database_manager import DatabaseManager
 
 
@@ -15,6 +17,35 @@ class ChallengeManager:
                 If None, a new instance will be created.
         """
         self.db_manager = db_manager or DatabaseManager()
+        # Complete challenges by ID, in (difficulty, title) order. Loaded on
+        # first use; see invalidate_catalog().
+        self._catalog = None
+        self._catalog_lock = threading.Lock()
+
+    def _get_catalog(self):
+        """
+        Get the in-memory challenge catalog, loading it on first use.
+
+        Returns:
+            dict: Complete challenge dictionaries keyed by challenge ID
+        """
+        with self._catalog_lock:
+            if self._catalog is None:
+                challenges = self.db_manager.execute_query(
+                    "SELECT * FROM challenges ORDER BY difficulty, title"
+                )
+                # Filter out challenges with incomplete data
+                self._catalog = {
+                    challenge["id"]: challenge
+                    for challenge in challenges
+                    if self._is_challenge_complete(challenge)
+                }
+            return self._catalog
+
+    def invalidate_catalog(self):
+        """Drop the cached challenge catalog so the next read reloads it."""
+        with self._catalog_lock:
+            self._catalog = None
 
     def get_all_challenges(self):
         """
@@ -23,15 +54,7 @@ class ChallengeManager:
         Returns:
             list: List of complete challenge dictionaries (excluding incomplete records)
         """
-        challenges = self.db_manager.execute_query(
-            "SELECT * FROM challenges ORDER BY difficulty, title"
-        )
-        # Filter out challenges with incomplete data
-        return [
-            challenge
-            for challenge in challenges
-            if self._is_challenge_complete(challenge)
-        ]
+        return [dict(challenge) for challenge in self._get_catalog().values()]
 
     def get_challenge_by_id(self, challenge_id):
         """
@@ -46,14 +69,11 @@ class ChallengeManager:
         if not challenge_id:
             return None
 
-        result = self.db_manager.execute_query(
-            "SELECT * FROM challenges WHERE id = ?", (challenge_id,)
-        )
-
-        if result and len(result) > 0:
-            challenge = result[0]
-            return challenge if self._is_challenge_complete(challenge) else None
-        return None
+        try:
+            challenge = self._get_catalog().get(int(challenge_id))
+        except (TypeError, ValueError):
+            return None
+        return dict(challenge) if challenge else None
 
     def get_challenges_by_category(self, category):
         """
@@ -68,15 +88,10 @@ class ChallengeManager:
         if not category:
             return []
 
-        challenges = self.db_manager.execute_query(
-            "SELECT * FROM challenges WHERE category = ? ORDER BY difficulty, title",
-            (category,),
-        )
-        # Filter out challenges with incomplete data
         return [
-            challenge
-            for challenge in challenges
-            if self._is_challenge_complete(challenge)
+            dict(challenge)
+            for challenge in self._get_catalog().values()
+            if challenge["category"] == category
         ]
 
     def get_challenges_by_difficulty(self, difficulty):
@@ -319,13 +334,15 @@ class ChallengeManager:
         except (ValueError, TypeError):
             return None
 
-        return self.db_manager.execute_insert(
+        challenge_id = self.db_manager.execute_insert(
             """
             INSERT INTO challenges (title, description, category, difficulty)
             VALUES (?, ?, ?, ?)
             """,
             (title.strip(), description.strip(), category.strip(), difficulty),
         )
+        self.invalidate_catalog()
+        return challenge_id
 
     def verify_data_integrity(self):
         """
@@ -410,31 +427,41 @@ class ChallengeManager:
         }
 
         if not dry_run and report["invalid_challenges"]:
-            for invalid_challenge in report["invalid_challenges"]:
-                challenge_id = invalid_challenge.get("id")
-                if challenge_id:
-                    try:
-                        # Remove from user subscriptions first
-                        self.db_manager.execute_update(
-                            "DELETE FROM user_challenges WHERE challenge_id = ?",
-                            (challenge_id,),
-                        )
-
-                        # Remove from progress records
-                        self.db_manager.execute_update(
-                            "DELETE FROM progress WHERE challenge_id = ?",
-                            (challenge_id,),
-                        )
-
-                        # Remove the challenge itself
-                        self.db_manager.execute_update(
-                            "DELETE FROM challenges WHERE id = ?", (challenge_id,)
-                        )
-
-                        cleanup_report["cleaned_ids"].append(challenge_id)
-                    except Exception as e:
-                        cleanup_report["errors"].append(
-                            f"Error cleaning challenge {challenge_id}: {e}"
-                        )
+            # One transaction for the whole cleanup; each challenge runs in its
+            # own savepoint so a failure only skips that challenge.
+            with self.db_manager.transaction():
+                for invalid_challenge in report["invalid_challenges"]:
+                    challenge_id = invalid_challenge.get("id")
+                    if challenge_id:
+                        try:
+                            with self.db_manager.transaction():
+                                # Remove from user subscriptions first
+                                self.db_manager.execute_update(
+                                    "DELETE FROM user_challenges WHERE challenge_id = ?",
+                                    (challenge_id,),
+                                )
+
+                                # Remove from progress records
+                                self.db_manager.execute_update(
+                                    "DELETE FROM progress WHERE challenge_id = ?",
+                                    (challenge_id,),
+                                )
+                                self.db_manager.execute_update(
+                                    "DELETE FROM user_challenge_stats WHERE challenge_id = ?",
+                                    (challenge_id,),
+                                )
+
+                                # Remove the challenge itself
+                                self.db_manager.execute_update(
+                                    "DELETE FROM challenges WHERE id = ?",
+                                    (challenge_id,),
+                                )
+
+                            cleanup_report["cleaned_ids"].append(challenge_id)
+                        except Exception as e:
+                            cleanup_report["errors"].append(
+                                f"Error cleaning challenge {challenge_id}: {e}"
+                            )
+            self.invalidate_catalog()
 
         return cleanup_report
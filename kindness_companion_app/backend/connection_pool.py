@@ -0,0 +1,220 @@
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available before the timeout."""
+
+
+class ConnectionPool:
+    """
+    A bounded pool of long-lived SQLite connections.
+
+    Connections are opened lazily up to ``max_size`` and are kept open when
+    released. Every connection remembers the thread that used it last, and
+    ``acquire`` hands a thread its previous connection whenever it is idle, so
+    the UI thread, the APScheduler worker and QThread workers each keep reusing
+    a warm connection instead of reopening the database file for every query.
+    """
+
+    def __init__(
+        self, db_path, max_size=5, timeout=30.0, connect_hooks=None, uri=False
+    ):
+        """
+        Initialize the connection pool.
+
+        Args:
+            db_path (str): Path to the SQLite database file, or a ``file:``
+                URI if ``uri`` is True
+            max_size (int, optional): Maximum number of open connections
+            timeout (float, optional): Seconds to wait for a free connection
+                before ``PoolTimeoutError`` is raised
+            connect_hooks (list, optional): Callables invoked with every newly
+                opened connection (row factory, PRAGMAs, ...)
+            uri (bool, optional): Interpret ``db_path`` as a URI, e.g. to
+                open the database with ``?mode=ro``
+        """
+        self.db_path = str(db_path)
+        self.uri = uri
+        self.max_size = max(1, int(max_size))
+        self.timeout = timeout
+        self._connect_hooks = list(connect_hooks or [])
+        self._condition = threading.Condition()
+        self._idle = []  # list of (connection, thread ident of last user)
+        self._in_use = set()
+        self._size = 0
+        self._closed = False
+        self._stats = {"created": 0, "acquired": 0, "reused": 0, "waits": 0}
+
+    def add_connect_hook(self, hook):
+        """
+        Register a callable that is run on every newly opened connection.
+
+        Args:
+            hook (callable): Function accepting a ``sqlite3.Connection``
+        """
+        self._connect_hooks.append(hook)
+
+    def _open_connection(self):
+        """Open and configure a new connection."""
+        # Connections may be handed to a different thread on a later acquire,
+        # but are never used by two threads at the same time.
+        connection = sqlite3.connect(
+            self.db_path, check_same_thread=False, uri=self.uri
+        )
+        for hook in self._connect_hooks:
+            hook(connection)
+        return connection
+
+    def _take_idle(self, thread_id):
+        """Pop an idle connection, preferring the one last used by ``thread_id``."""
+        for index, (connection, owner) in enumerate(self._idle):
+            if owner == thread_id:
+                del self._idle[index]
+                return connection
+        if self._idle:
+            return self._idle.pop()[0]
+        return None
+
+    def acquire(self, timeout=None):
+        """
+        Check out a connection for the calling thread.
+
+        Args:
+            timeout (float, optional): Seconds to wait when the pool is
+                exhausted. Defaults to the pool timeout.
+
+        Returns:
+            sqlite3.Connection: A ready-to-use connection
+
+        Raises:
+            PoolTimeoutError: If no connection became available in time
+            sqlite3.ProgrammingError: If the pool has been closed
+        """
+        thread_id = threading.get_ident()
+        wait = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + wait
+        create = False
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+
+                connection = self._take_idle(thread_id)
+                if connection is not None:
+                    self._stats["reused"] += 1
+                    break
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No database connection available after {wait:.1f}s "
+                        f"(pool size {self.max_size})"
+                    )
+                self._stats["waits"] += 1
+                self._condition.wait(remaining)
+
+        if create:
+            try:
+                connection = self._open_connection()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._stats["created"] += 1
+
+        with self._condition:
+            self._in_use.add(connection)
+            self._stats["acquired"] += 1
+        return connection
+
+    def release(self, connection):
+        """
+        Return a connection to the pool.
+
+        Any transaction left open by the caller is rolled back so that the
+        next user never inherits a held write lock.
+
+        Args:
+            connection (sqlite3.Connection): Connection obtained from ``acquire``
+        """
+        if connection is None:
+            return
+
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding pooled connection after rollback error: {e}")
+            self._discard(connection)
+            return
+
+        with self._condition:
+            self._in_use.discard(connection)
+            if self._closed:
+                self._size -= 1
+                connection.close()
+                return
+            self._idle.append((connection, threading.get_ident()))
+            self._condition.notify()
+
+    def _discard(self, connection):
+        """Close a broken connection and free its slot."""
+        with self._condition:
+            self._in_use.discard(connection)
+            self._size -= 1
+            self._condition.notify()
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+    def close(self):
+        """
+        Close every idle connection and refuse further acquisitions.
+
+        Connections that are still checked out are closed when released.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection, _owner in idle:
+            try:
+                connection.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing pooled connection: {e}")
+
+    @property
+    def closed(self):
+        """bool: Whether ``close`` has been called."""
+        return self._closed
+
+    def stats(self):
+        """
+        Get pool usage counters.
+
+        Returns:
+            dict: Open, idle and in-use connection counts plus lifetime counters
+        """
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "max_size": self.max_size,
+                **self._stats,
+            }
@@ -1,20 +1,139 @@
 import sqlite3
 import os
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 
+from .connection_pool import ConnectionPool
+from .write_behind import WriteBehindQueue
+
+# Default number of pooled connections: the UI thread, the reminder scheduler
+# and a few QThread/AI workers.
+DEFAULT_POOL_SIZE = 5
+
+# PRAGMAs applied to every new connection, in order.
+STORAGE_PROFILES = {
+    # WAL lets the UI thread, the reminder scheduler and AI workers read while
+    # another thread writes; synchronous=NORMAL is crash-safe in WAL mode.
+    "performance": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,  # negative values are KiB, i.e. ~16 MB
+        "temp_store": "MEMORY",
+    },
+    # SQLite defaults, for file systems that do not support WAL (network shares)
+    "compatible": {
+        "busy_timeout": 5000,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+    },
+}
+DEFAULT_STORAGE_PROFILE = "performance"
+
+# Write-behind queues by resolved database path, so that every manager opened
+# on the same file in this process shares one queue (see write_behind()).
+_write_behind_queues = {}
+_write_behind_queues_lock = threading.Lock()
+
+# Secondary indexes by table. Tables created by other managers (wall, CBT
+# analysis) call ensure_indexes() right after creating themselves.
+SCHEMA_INDEXES = {
+    "conversation_history": [
+        ("idx_conversation_history_user_time", "user_id, timestamp"),
+        ("idx_conversation_history_user_context", "user_id, context_id"),
+    ],
+    "kindness_wall": [("idx_kindness_wall_created_at", "created_at")],
+    "wall_comments": [("idx_wall_comments_post", "wall_post_id")],
+    "cognitive_analysis": [
+        ("idx_cognitive_analysis_user_time", "user_id, analysis_timestamp"),
+    ],
+    "reminders": [("idx_reminders_enabled", "enabled")],
+    # Paged history across all challenges, newest first
+    "progress": [("idx_progress_user_date", "user_id, check_in_date")],
+}
+
+# Versioned schema migrations: (PRAGMA user_version, DatabaseManager method).
+SCHEMA_MIGRATIONS = [
+    (1, "_migrate_secondary_indexes"),
+    (2, "_migrate_challenge_stats"),
+    (3, "_migrate_secondary_indexes"),
+    (4, "_migrate_conversation_stats"),
+    (5, "_migrate_report_cache"),
+]
+
+# Per user/challenge streak summary computed from ``progress`` in one pass:
+# consecutive dates share the same (julian day - row number) value, so every
+# such group is one streak. ``{where}`` filters the progress rows.
+CHALLENGE_STATS_QUERY = """
+WITH runs AS (
+    SELECT user_id, challenge_id, check_in_date,
+           CAST(julianday(check_in_date) AS INTEGER) - ROW_NUMBER() OVER (
+               PARTITION BY user_id, challenge_id ORDER BY check_in_date
+           ) AS grp
+    FROM progress
+    {where}
+),
+islands AS (
+    SELECT user_id, challenge_id, COUNT(*) AS length,
+           MAX(check_in_date) AS end_date
+    FROM runs
+    GROUP BY user_id, challenge_id, grp
+),
+ranked AS (
+    SELECT *, ROW_NUMBER() OVER (
+        PARTITION BY user_id, challenge_id ORDER BY end_date DESC
+    ) AS rn
+    FROM islands
+)
+SELECT user_id, challenge_id,
+       MAX(CASE WHEN rn = 1 THEN length END) AS current_streak,
+       MAX(length) AS longest_streak,
+       MAX(end_date) AS last_check_in_date,
+       SUM(length) AS total_check_ins
+FROM ranked
+GROUP BY user_id, challenge_id
+"""
+
 
 class DatabaseManager:
     """
     Manages SQLite database connections and provides CRUD operations.
+
+    By default every query opens and closes its own connection. With
+    ``use_pool=True`` connections come from a bounded ``ConnectionPool`` and
+    stay open between queries; call ``close()`` on shutdown to release them.
+
+    With ``read_only=True`` the database is opened with ``mode=ro`` and the
+    schema is neither created nor migrated, so the database must already
+    exist. Worker processes use this to read alongside the application.
     """
 
-    def __init__(self, db_path=None):
+    def __init__(
+        self,
+        db_path=None,
+        use_pool=False,
+        pool_size=DEFAULT_POOL_SIZE,
+        storage_profile=DEFAULT_STORAGE_PROFILE,
+        read_only=False,
+    ):
         """
         Initialize the database manager.
 
         Args:
             db_path (str, optional): Path to the SQLite database file.
                 If None, a default path will be used.
+            use_pool (bool, optional): Keep long-lived pooled connections
+                instead of connecting and disconnecting around every query.
+            pool_size (int, optional): Maximum number of pooled connections.
+            storage_profile (str | dict, optional): Name of an entry in
+                ``STORAGE_PROFILES`` or a dict of PRAGMA settings applied to
+                every new connection.
+            read_only (bool, optional): Open an existing database for reading
+                only; writes fail with ``sqlite3.OperationalError``.
         """
         if db_path is None:
             # Create a data directory in the user's home directory
@@ -23,24 +142,100 @@ class DatabaseManager:
             db_path = data_dir / "kindness_challenge.db"
 
         self.db_path = str(db_path)
+        self.read_only = read_only
+        if isinstance(storage_profile, str):
+            storage_profile = STORAGE_PROFILES[storage_profile]
+        self.storage_profile = dict(storage_profile or {})
+        if read_only:
+            # The journal mode is stored in the file and can't be set read-only
+            self.storage_profile.pop("journal_mode", None)
+        # Connections are tracked per thread so the scheduler thread and
+        # worker threads never share a cursor with the UI thread.
+        self._local = threading.local()
         self.connection = None
         self.cursor = None
+        self._write_behind = None
+
+        self.pool = None
+        if use_pool:
+            self.pool = ConnectionPool(
+                self._connect_target(),
+                max_size=pool_size,
+                connect_hooks=[self._configure_connection],
+                uri=read_only,
+            )
 
         # Initialize the database
-        self._initialize_db()
+        if not read_only:
+            self._initialize_db()
+            self._run_migrations()
+
+    @property
+    def connection(self):
+        """sqlite3.Connection: The calling thread's current connection, if any."""
+        return getattr(self._local, "connection", None)
+
+    @connection.setter
+    def connection(self, value):
+        self._local.connection = value
+
+    @property
+    def cursor(self):
+        """sqlite3.Cursor: The calling thread's current cursor, if any."""
+        return getattr(self._local, "cursor", None)
+
+    @cursor.setter
+    def cursor(self, value):
+        self._local.cursor = value
+
+    def _configure_connection(self, connection):
+        """Apply per-connection settings to a freshly opened connection."""
+        connection.row_factory = sqlite3.Row  # Return rows as dictionaries
+        for pragma, value in self.storage_profile.items():
+            try:
+                connection.execute(f"PRAGMA {pragma} = {value}")
+            except sqlite3.Error as e:
+                print(f"Could not apply PRAGMA {pragma}={value}: {e}")
+
+    def _connect_target(self):
+        """Return the path (or ``mode=ro`` URI) passed to ``sqlite3.connect``."""
+        if self.read_only:
+            return Path(self.db_path).resolve().as_uri() + "?mode=ro"
+        return self.db_path
+
+    def _open_connection(self):
+        """Open and configure a new, unpooled connection."""
+        connection = sqlite3.connect(self._connect_target(), uri=self.read_only)
+        self._configure_connection(connection)
+        return connection
 
     def connect(self):
         """Establish a connection to the database."""
         if not self.connection:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row  # Return rows as dictionaries
+            if self.pool:
+                self.connection = self.pool.acquire()
+            else:
+                self.connection = self._open_connection()
             self.cursor = self.connection.cursor()
         return self.connection
 
     def disconnect(self):
-        """Close the database connection."""
+        """
+        Close the database connection.
+
+        In pooled mode the connection is returned to the pool and stays open.
+        Inside ``transaction()`` this is a no-op; the transaction releases the
+        connection when it finishes.
+        """
+        if self.in_transaction:
+            return
         if self.connection:
-            self.connection.close()
+            if self.pool:
+                if self.cursor:
+                    self.cursor.close()
+                self.pool.release(self.connection)
+            else:
+                self.connection.close()
             self.connection = None
             self.cursor = None
 
@@ -49,6 +244,71 @@ class DatabaseManager:
         if not self.connection or not self.cursor:
             self.connect()
 
+    def write_behind(self):
+        """
+        Get the write-behind queue for this database, creating it on first use.
+
+        Statements submitted to it are committed in batches on a background
+        thread; see ``WriteBehindQueue``. All writable managers opened on the
+        same file in this process share one queue, so ``flush()`` on any of
+        them also commits writes queued through another. The queue writes
+        through the manager that created it and is replaced once that manager
+        is closed. Read-only and in-memory managers get a queue of their own.
+
+        Returns:
+            WriteBehindQueue: The queue shared by all users of this database
+        """
+        with _write_behind_queues_lock:
+            key = self._write_behind_key()
+            if key is None:
+                if self._write_behind is None:
+                    self._write_behind = WriteBehindQueue(self)
+                return self._write_behind
+
+            queue = _write_behind_queues.get(key)
+            if queue is None:
+                queue = _write_behind_queues[key] = WriteBehindQueue(self)
+            if queue.db_manager is self:
+                self._write_behind = queue
+            return queue
+
+    def _write_behind_key(self):
+        """Return the key the write-behind queue is shared under, or None."""
+        if self.read_only or self.db_path == ":memory:":
+            return None
+        return os.path.realpath(self.db_path)
+
+    def close(self):
+        """
+        Release all database resources.
+
+        Call this once on application shutdown. Pending write-behind
+        statements are committed first; the shared queue is stopped only if
+        this manager created it. In pooled mode every pooled connection is
+        closed; afterwards queries fail until a new manager is created.
+        """
+        with _write_behind_queues_lock:
+            key = self._write_behind_key()
+            shared = _write_behind_queues.get(key)
+            if shared is not None and shared is self._write_behind:
+                del _write_behind_queues[key]
+        if self._write_behind is not None:
+            self._write_behind.close()
+        elif shared is not None:
+            shared.flush()
+        self.disconnect()
+        if self.pool:
+            self.pool.close()
+
+    def pool_stats(self):
+        """
+        Get connection pool usage counters.
+
+        Returns:
+            dict: Pool statistics, or None when pooling is disabled
+        """
+        return self.pool.stats() if self.pool else None
+
     def _initialize_db(self):
         """Create database tables if they don't exist."""
         try:
@@ -389,6 +649,395 @@ class DatabaseManager:
         finally:
             self.disconnect()
 
+    def _table_exists(self, table):
+        """Check whether ``table`` exists in the database."""
+        return bool(
+            self.execute_query(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (table,),
+            )
+        )
+
+    def ensure_indexes(self, *tables):
+        """
+        Create the secondary indexes declared in ``SCHEMA_INDEXES``.
+
+        Tables that do not exist yet are skipped; their owners call this again
+        after creating them. Safe to call repeatedly.
+
+        Args:
+            *tables (str): Tables to index. Defaults to every table in
+                ``SCHEMA_INDEXES``.
+        """
+        with self.transaction():
+            for table in tables or SCHEMA_INDEXES:
+                if not self._table_exists(table):
+                    continue
+                for index_name, columns in SCHEMA_INDEXES.get(table, []):
+                    self.execute_query(
+                        f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})"
+                    )
+
+    def get_schema_version(self):
+        """
+        Get the schema version recorded in the database.
+
+        Returns:
+            int: Value of ``PRAGMA user_version``
+        """
+        result = self.execute_query("PRAGMA user_version")
+        return result[0]["user_version"] if result else 0
+
+    def _run_migrations(self):
+        """Apply pending ``SCHEMA_MIGRATIONS`` in order, one transaction each."""
+        current = self.get_schema_version()
+        for version, method_name in SCHEMA_MIGRATIONS:
+            if version <= current:
+                continue
+            try:
+                with self.transaction():
+                    getattr(self, method_name)()
+                    self.execute_query(f"PRAGMA user_version = {int(version)}")
+                print(f"Applied schema migration {version}: {method_name}")
+            except sqlite3.Error as e:
+                print(f"Schema migration {version} failed: {e}")
+                break
+
+    def _migrate_secondary_indexes(self):
+        """Migrations 1 and 3: add the secondary indexes for hot lookups."""
+        self.ensure_indexes()
+
+    def _migrate_challenge_stats(self):
+        """Migration 2: materialize per-challenge streaks from ``progress``."""
+        self.execute_query(
+            """
+            CREATE TABLE IF NOT EXISTS user_challenge_stats (
+                user_id INTEGER NOT NULL,
+                challenge_id INTEGER NOT NULL,
+                current_streak INTEGER NOT NULL DEFAULT 0,
+                longest_streak INTEGER NOT NULL DEFAULT 0,
+                last_check_in_date DATE,
+                total_check_ins INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, challenge_id)
+            )
+            """
+        )
+        self.rebuild_challenge_stats()
+
+    def rebuild_challenge_stats(self, user_id=None, challenge_id=None):
+        """
+        Recompute ``user_challenge_stats`` from the ``progress`` table.
+
+        Existing rows in scope are replaced, so this also repairs a summary
+        that has drifted from the check-in history.
+
+        Args:
+            user_id (int, optional): Only rebuild this user's rows
+            challenge_id (int, optional): Only rebuild this challenge's rows
+
+        Returns:
+            int: Number of user/challenge rows written
+        """
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if challenge_id is not None:
+            conditions.append("challenge_id = ?")
+            params.append(challenge_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self.transaction():
+            self.execute_update(
+                f"DELETE FROM user_challenge_stats {where}", tuple(params)
+            )
+            return self.execute_update(
+                """
+                INSERT INTO user_challenge_stats (
+                    user_id, challenge_id, current_streak, longest_streak,
+                    last_check_in_date, total_check_ins
+                )
+                """
+                + CHALLENGE_STATS_QUERY.format(where=where),
+                tuple(params),
+            )
+
+    def _migrate_conversation_stats(self):
+        """Migration 4: keep a per-user message count for ``conversation_history``."""
+        self.execute_query(
+            """
+            CREATE TABLE IF NOT EXISTS conversation_stats (
+                user_id INTEGER PRIMARY KEY,
+                message_count INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self.rebuild_conversation_stats()
+
+    def rebuild_conversation_stats(self, user_id=None):
+        """
+        Recompute ``conversation_stats`` from ``conversation_history``.
+
+        Args:
+            user_id (int, optional): Only rebuild this user's count
+
+        Returns:
+            int: Number of user rows written
+        """
+        where, params = "", ()
+        if user_id is not None:
+            where, params = "WHERE user_id = ?", (user_id,)
+        with self.transaction():
+            self.execute_update(f"DELETE FROM conversation_stats {where}", params)
+            return self.execute_update(
+                f"""
+                INSERT INTO conversation_stats (user_id, message_count)
+                SELECT user_id, COUNT(*) FROM conversation_history
+                {where}
+                GROUP BY user_id
+                """,
+                params,
+            )
+
+    def _migrate_report_cache(self):
+        """Migration 5: cache generated reports and fingerprint saved weekly reports."""
+        self.execute_query(
+            """
+            CREATE TABLE IF NOT EXISTS report_cache (
+                user_id INTEGER NOT NULL,
+                window_days INTEGER NOT NULL,
+                generator_version TEXT NOT NULL,
+                start_date DATE NOT NULL,
+                end_date DATE NOT NULL,
+                fingerprint TEXT NOT NULL,
+                report TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, window_days, generator_version)
+            )
+            """
+        )
+        columns = {
+            row["name"]
+            for row in self.execute_query("PRAGMA table_info(weekly_reports)")
+        }
+        if "fingerprint" not in columns:
+            self.execute_query("ALTER TABLE weekly_reports ADD COLUMN fingerprint TEXT")
+
+    @property
+    def in_transaction(self):
+        """bool: Whether the calling thread is inside ``transaction()``."""
+        return getattr(self._local, "transaction_depth", 0) > 0
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several statements into a single unit of work.
+
+        All ``execute_*`` calls made by this thread inside the block share one
+        connection and are committed once when the block exits, or rolled back
+        if it raises. Inside a transaction, database errors are raised instead
+        of being swallowed so that the whole unit can be rolled back. Nested
+        blocks become savepoints: an error inside a nested block only undoes
+        that block.
+
+        Example:
+            with db_manager.transaction():
+                db_manager.execute_update("DELETE FROM reminders WHERE user_id = ?", (1,))
+                db_manager.execute_update("DELETE FROM users WHERE id = ?", (1,))
+
+        Yields:
+            DatabaseManager: This manager
+        """
+        depth = getattr(self._local, "transaction_depth", 0)
+
+        if depth:
+            savepoint = f"sp_{depth}"
+            self.cursor.execute(f"SAVEPOINT {savepoint}")
+            self._local.transaction_depth = depth + 1
+            try:
+                yield self
+            except BaseException:
+                self.cursor.execute(f"ROLLBACK TO {savepoint}")
+                raise
+            finally:
+                self.cursor.execute(f"RELEASE {savepoint}")
+                self._local.transaction_depth = depth
+            return
+
+        self.ensure_connected()
+        self.cursor.execute("BEGIN IMMEDIATE")
+        self._local.transaction_depth = 1
+        try:
+            yield self
+            self.connection.commit()
+        except BaseException:
+            self.connection.rollback()
+            raise
+        finally:
+            self._local.transaction_depth = 0
+            self.disconnect()
+
+    def execute_many(self, query: str, rows) -> int:
+        """
+        Execute one statement for every parameter tuple in ``rows``.
+
+        The statement is prepared once and all rows are written in a single
+        transaction (or inside the caller's ``transaction()``).
+
+        Args:
+            query (str): SQL statement with placeholders
+            rows (iterable): Parameter tuples or dicts, one per execution
+
+        Returns:
+            int: Number of affected rows, or 0 if the operation fails
+        """
+        try:
+            with self.transaction():
+                self.cursor.executemany(query, rows)
+                return max(self.cursor.rowcount, 0)
+        except sqlite3.Error as e:
+            if self.in_transaction:
+                raise
+            print(f"Database error: {e}")
+            return 0
+
+    def bulk_insert(self, table: str, rows, chunk_size: int = 1000, or_ignore=False):
+        """
+        Stream dictionaries into ``table`` in chunks.
+
+        Each chunk is written with a single prepared INSERT and committed in
+        its own transaction (a savepoint when called inside ``transaction()``),
+        so memory stays bounded for arbitrarily long iterables. The columns are
+        taken from the keys of the first row; missing keys insert NULL.
+
+        Args:
+            table (str): Target table name
+            rows (iterable): Dictionaries mapping column names to values
+            chunk_size (int, optional): Rows per transaction
+            or_ignore (bool, optional): Use INSERT OR IGNORE to skip rows that
+                violate a UNIQUE constraint
+
+        Returns:
+            dict: ``inserted`` row count and ``id_ranges``, a list of
+                ``(first_id, last_id)`` tuples per chunk. A chunk's range is
+                None when ids are not contiguous (explicit ``id`` values).
+        """
+        stats = {"inserted": 0, "id_ranges": []}
+        iterator = iter(rows)
+        columns = None
+        query = None
+
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+
+            if columns is None:
+                columns = list(chunk[0].keys())
+                for name in [table, *columns]:
+                    if not name.isidentifier():
+                        raise ValueError(f"Invalid SQL identifier: {name!r}")
+                query = "INSERT {}INTO {} ({}) VALUES ({})".format(
+                    "OR IGNORE " if or_ignore else "",
+                    table,
+                    ", ".join(columns),
+                    ", ".join("?" for _ in columns),
+                )
+
+            params = [tuple(row.get(column) for column in columns) for row in chunk]
+            try:
+                with self.transaction():
+                    self.cursor.executemany(query, params)
+                    inserted = max(self.cursor.rowcount, 0)
+                    last_id = self.cursor.execute(
+                        "SELECT last_insert_rowid()"
+                    ).fetchone()[0]
+            except sqlite3.Error as e:
+                if self.in_transaction:
+                    raise
+                print(f"Database error during bulk insert into {table}: {e}")
+                break
+
+            stats["inserted"] += inserted
+            # The write lock is held for the whole chunk, so SQLite assigns
+            # consecutive rowids unless the caller supplied explicit ids.
+            if inserted and "id" not in columns:
+                stats["id_ranges"].append((last_id - inserted + 1, last_id))
+            else:
+                stats["id_ranges"].append(None)
+
+        return stats
+
+    @contextmanager
+    def _reader_connection(self):
+        """
+        Yield a connection for a long-running read.
+
+        Inside ``transaction()`` the transaction's connection is reused so
+        uncommitted writes are visible. Otherwise a separate connection is
+        used, so that ``execute_*`` calls made while the caller is still
+        iterating cannot close it underneath the cursor.
+        """
+        if self.in_transaction:
+            yield self.connection
+        elif self.pool:
+            connection = self.pool.acquire()
+            try:
+                yield connection
+            finally:
+                self.pool.release(connection)
+        else:
+            connection = self._open_connection()
+            try:
+                yield connection
+            finally:
+                connection.close()
+
+    def iter_query(self, query: str, params=None, batch_size=500, row_type="dict"):
+        """
+        Execute a query and yield rows lazily.
+
+        Rows are fetched ``batch_size`` at a time with ``fetchmany`` so that
+        only one batch is held in memory. The connection is released when the
+        generator is exhausted or closed.
+
+        Args:
+            query (str): SQL query to execute
+            params (tuple, optional): Parameters for the query
+            batch_size (int, optional): Rows fetched per round trip
+            row_type (str, optional): ``"dict"`` (like ``execute_query``),
+                ``"tuple"`` for plain tuples or ``"namedtuple"`` for
+                attribute access without a per-row dict
+
+        Yields:
+            dict | tuple | namedtuple: One row at a time
+        """
+        if row_type not in ("dict", "tuple", "namedtuple"):
+            raise ValueError(f"Unsupported row_type: {row_type!r}")
+
+        with self._reader_connection() as connection:
+            cursor = connection.cursor()
+            cursor.row_factory = None  # build rows below, once per row
+            try:
+                cursor.execute(query, params or ())
+                columns = [column[0] for column in cursor.description or ()]
+                if row_type == "namedtuple":
+                    row_class = namedtuple("Row", columns, rename=True)
+
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    for row in batch:
+                        if row_type == "dict":
+                            yield dict(zip(columns, row))
+                        elif row_type == "namedtuple":
+                            yield row_class._make(row)
+                        else:
+                            yield row
+            finally:
+                cursor.close()
+
     def execute_query(self, query: str, params=None) -> list:
         """
         Execute a query and return the results.
@@ -411,14 +1060,17 @@ class DatabaseManager:
                 self.cursor.execute(query)
 
             results = self.cursor.fetchall()
-            if self.connection:
+            if self.connection and not self.in_transaction:
                 self.connection.commit()
             return [dict(row) for row in results]
         except sqlite3.Error as e:
+            if self.in_transaction:
+                raise
             print(f"Database error: {e}")
             return []
         finally:
-            self.disconnect()
+            if not self.in_transaction:
+                self.disconnect()
 
     def execute_insert(self, query: str, params=None) -> int:
         """
@@ -443,14 +1095,17 @@ class DatabaseManager:
                 self.cursor.execute(query)
 
             last_id = self.cursor.lastrowid if self.cursor else 0
-            if self.connection:
+            if self.connection and not self.in_transaction:
                 self.connection.commit()
             return last_id or 0  # 确保返回整数
         except sqlite3.Error as e:
+            if self.in_transaction:
+                raise
             print(f"Database error: {e}")
             return 0
         finally:
-            self.disconnect()
+            if not self.in_transaction:
+                self.disconnect()
 
     def execute_update(self, query: str, params=None) -> int:
         """
@@ -480,17 +1135,23 @@ class DatabaseManager:
                 affected_rows = self.cursor.rowcount if self.cursor else 0
                 print(f"SQL update affected {affected_rows} rows")
 
+                if self.in_transaction:
+                    return affected_rows
+
                 if self.connection:
                     self.connection.commit()
                     print("Changes committed to database")
 
                 return affected_rows
             except Exception as e:
+                if self.in_transaction:
+                    raise
                 print(f"SQL error: {e}")
                 if self.connection:
                     self.connection.rollback()
                     print("Transaction rolled back due to error")
                 return 0
         finally:
-            self.disconnect()
-            print("Database connection closed")
+            if not self.in_transaction:
+                self.disconnect()
+                print("Database connection closed")
@@ -1,6 +1,15 @@
 import datetime
+import threading
 from .database_manager import DatabaseManager
 from .challenge_manager import ChallengeManager  # Import ChallengeManager
+from .report_cache import ReportCache
+
+# Sort keys accepted by get_check_ins_page, mapped to SQL expressions
+CHECK_IN_SORT_COLUMNS = {
+    "date": "p.check_in_date",
+    "challenge": "c.title",
+    "category": "c.category",
+}
 
 
 class ProgressTracker:
@@ -21,6 +30,10 @@ class ProgressTracker:
         # If ProgressTracker is always created alongside ChallengeManager,
         # consider passing ChallengeManager in the constructor.
         self.challenge_manager = ChallengeManager(self.db_manager)
+        # user_id -> (date computed, window days, stats); see get_user_dashboard_stats
+        self._dashboard_cache = {}
+        self._dashboard_cache_lock = threading.Lock()
+        self.report_cache = ReportCache(self.db_manager)
 
     def check_in(self, user_id, challenge_id, date=None, notes=None):
         """
@@ -40,13 +53,16 @@ class ProgressTracker:
             date = datetime.date.today().isoformat()
 
         try:
-            self.db_manager.execute_insert(
-                """
-                INSERT INTO progress (user_id, challenge_id, check_in_date, notes)
-                VALUES (?, ?, ?, ?)
-                """,
-                (user_id, challenge_id, date, notes),
-            )
+            with self.db_manager.transaction():
+                self.db_manager.execute_insert(
+                    """
+                    INSERT INTO progress (user_id, challenge_id, check_in_date, notes)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (user_id, challenge_id, date, notes),
+                )
+                self._apply_check_in_to_stats(user_id, challenge_id, date)
+            self.invalidate_dashboard_stats(user_id)
             return True
         except Exception:
             return False  # Check-in failed (possibly already checked in for this date)
@@ -99,8 +115,13 @@ class ProgressTracker:
             print(f"[撤销打卡] 执行SQL: {sql}")
             print(f"[撤销打卡] SQL参数: {params}")
 
-            affected_rows = self.db_manager.execute_update(sql, params)
-            print(f"[撤销打卡] SQL删除受影响行数: {affected_rows}")
+            with self.db_manager.transaction():
+                affected_rows = self.db_manager.execute_update(sql, params)
+                print(f"[撤销打卡] SQL删除受影响行数: {affected_rows}")
+                if affected_rows > 0:
+                    # 删除的可能是连续打卡中间的一天，按该挑战重新计算统计
+                    self.db_manager.rebuild_challenge_stats(user_id, challenge_id)
+            self.invalidate_dashboard_stats(user_id)
 
             # 撤销后，打印当前数据库中该记录
             after = self.get_check_ins(user_id, challenge_id, date, date)
@@ -116,6 +137,70 @@ class ProgressTracker:
             print(f"[撤销打卡] 异常堆栈: {traceback.format_exc()}")
             return False
 
+    def _apply_check_in_to_stats(self, user_id, challenge_id, date):
+        """
+        Fold a new check-in into ``user_challenge_stats``.
+
+        A check-in dated after the last recorded one extends or restarts the
+        current streak in place. Back-dated check-ins can join or split earlier
+        streaks, so the pair is recomputed from ``progress`` instead.
+
+        Args:
+            user_id (int): User ID
+            challenge_id (int): Challenge ID
+            date (str): Check-in date in YYYY-MM-DD format
+        """
+        updated = self.db_manager.execute_update(
+            """
+            INSERT INTO user_challenge_stats (
+                user_id, challenge_id, current_streak, longest_streak,
+                last_check_in_date, total_check_ins
+            )
+            VALUES (?, ?, 1, 1, ?, 1)
+            ON CONFLICT (user_id, challenge_id) DO UPDATE SET
+                current_streak = CASE
+                    WHEN julianday(excluded.last_check_in_date)
+                         - julianday(last_check_in_date) = 1
+                    THEN current_streak + 1
+                    ELSE 1
+                END,
+                longest_streak = MAX(
+                    longest_streak,
+                    CASE
+                        WHEN julianday(excluded.last_check_in_date)
+                             - julianday(last_check_in_date) = 1
+                        THEN current_streak + 1
+                        ELSE 1
+                    END
+                ),
+                last_check_in_date = excluded.last_check_in_date,
+                total_check_ins = total_check_ins + 1
+            WHERE excluded.last_check_in_date > last_check_in_date
+            """,
+            (user_id, challenge_id, date),
+        )
+        if not updated:
+            self.db_manager.rebuild_challenge_stats(user_id, challenge_id)
+
+    def rebuild_challenge_stats(self, user_id=None):
+        """
+        Recompute the materialized streak statistics from the check-in history.
+
+        Args:
+            user_id (int, optional): Only rebuild this user's statistics.
+                If None, every user is rebuilt.
+
+        Returns:
+            int: Number of user/challenge rows rebuilt, or -1 on error
+        """
+        try:
+            rebuilt = self.db_manager.rebuild_challenge_stats(user_id)
+            self.invalidate_dashboard_stats(user_id)
+            return rebuilt
+        except Exception as e:
+            print(f"Error rebuilding challenge stats: {e}")
+            return -1
+
     def get_check_ins(self, user_id, challenge_id, start_date=None, end_date=None):
         """
         Get check-in records for a specific challenge.
@@ -127,30 +212,97 @@ class ProgressTracker:
             end_date (str, optional): End date in YYYY-MM-DD format
 
         Returns:
-            list: List of check-in dictionaries
+            list: List of check-in dictionaries with challenge title and category
         """
         try:
             query = """
-            SELECT * FROM progress
-            WHERE user_id = ? AND challenge_id = ?
+            SELECT p.*, c.title as challenge_title, c.category
+            FROM progress p
+            LEFT JOIN challenges c ON p.challenge_id = c.id
+            WHERE p.user_id = ? AND p.challenge_id = ?
             """
             params = [user_id, challenge_id]
 
             if start_date:
-                query += " AND check_in_date >= ?"
+                query += " AND p.check_in_date >= ?"
                 params.append(start_date)
 
             if end_date:
-                query += " AND check_in_date <= ?"
+                query += " AND p.check_in_date <= ?"
                 params.append(end_date)
 
-            query += " ORDER BY check_in_date DESC"
+            query += " ORDER BY p.check_in_date DESC"
 
             return self.db_manager.execute_query(query, tuple(params))
         except Exception as e:
             print(f"Error getting check-ins: {e}")
             return []
 
+    def get_check_ins_page(
+        self,
+        user_id,
+        challenge_id=None,
+        offset=0,
+        limit=200,
+        order="desc",
+        sort_by="date",
+        start_date=None,
+        end_date=None,
+    ):
+        """
+        Get one page of check-in records, sorted and sliced in SQL.
+
+        Args:
+            user_id (int): User ID
+            challenge_id (int, optional): Only return this challenge's check-ins
+            offset (int, optional): Number of rows to skip
+            limit (int, optional): Maximum number of rows to return
+            order (str, optional): "desc" or "asc"
+            sort_by (str, optional): Key of ``CHECK_IN_SORT_COLUMNS``
+            start_date (str, optional): Start date in YYYY-MM-DD format
+            end_date (str, optional): End date in YYYY-MM-DD format
+
+        Returns:
+            list: Check-in dictionaries with challenge title and category
+
+        Raises:
+            ValueError: If ``order`` or ``sort_by`` is not supported
+        """
+        if sort_by not in CHECK_IN_SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort column: {sort_by}")
+        direction = order.upper() if isinstance(order, str) else ""
+        if direction not in ("ASC", "DESC"):
+            raise ValueError(f"Unsupported sort order: {order}")
+
+        query = """
+        SELECT p.*, c.title as challenge_title, c.category
+        FROM progress p
+        LEFT JOIN challenges c ON p.challenge_id = c.id
+        WHERE p.user_id = ?
+        """
+        params = [user_id]
+
+        if challenge_id:
+            query += " AND p.challenge_id = ?"
+            params.append(challenge_id)
+
+        if start_date:
+            query += " AND p.check_in_date >= ?"
+            params.append(start_date)
+
+        if end_date:
+            query += " AND p.check_in_date <= ?"
+            params.append(end_date)
+
+        # Tie-break on the row id so pages never overlap or skip rows
+        query += (
+            f" ORDER BY {CHECK_IN_SORT_COLUMNS[sort_by]} {direction},"
+            f" p.id {direction} LIMIT ? OFFSET ?"
+        )
+        params.extend([int(limit), int(offset)])
+
+        return self.db_manager.execute_query(query, tuple(params))
+
     def get_all_user_check_ins(self, user_id, start_date=None, end_date=None):
         """
         Get all check-in records for a user across all challenges.
@@ -183,9 +335,19 @@ class ProgressTracker:
 
         return self.db_manager.execute_query(query, tuple(params))
 
+    @staticmethod
+    def _live_streak(row):
+        """Return the stored streak, or 0 if it ended before yesterday."""
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        if not row["last_check_in_date"]:
+            return 0
+        if row["last_check_in_date"] < yesterday.isoformat():
+            return 0  # Streak broken
+        return row["current_streak"]
+
     def get_streak(self, user_id, challenge_id):
         """
-        Calculate the current streak for a challenge.
+        Get the current streak for a challenge.
 
         Args:
             user_id (int): User ID
@@ -194,35 +356,36 @@ class ProgressTracker:
         Returns:
             int: Current streak (consecutive days)
         """
-        check_ins = self.db_manager.execute_query(
+        result = self.db_manager.execute_query(
             """
-            SELECT check_in_date FROM progress
+            SELECT current_streak, last_check_in_date FROM user_challenge_stats
             WHERE user_id = ? AND challenge_id = ?
-            ORDER BY check_in_date DESC
             """,
             (user_id, challenge_id),
         )
-
-        if not check_ins:
+        if not result:
             return 0
+        return self._live_streak(result[0])
 
-        # Convert string dates to datetime objects
-        dates = [datetime.date.fromisoformat(ci["check_in_date"]) for ci in check_ins]
-
-        # Check if the most recent check-in is today or yesterday
-        today = datetime.date.today()
-        if dates[0] < today - datetime.timedelta(days=1):
-            return 0  # Streak broken
+    def get_streaks(self, user_id):
+        """
+        Get the current streak of every challenge a user has checked in to.
 
-        # Count consecutive days
-        streak = 1
-        for i in range(len(dates) - 1):
-            if dates[i] - dates[i + 1] == datetime.timedelta(days=1):
-                streak += 1
-            else:
-                break
+        Args:
+            user_id (int): User ID
 
-        return streak
+        Returns:
+            dict: Mapping of challenge ID to current streak
+        """
+        rows = self.db_manager.execute_query(
+            """
+            SELECT challenge_id, current_streak, last_check_in_date
+            FROM user_challenge_stats
+            WHERE user_id = ?
+            """,
+            (user_id,),
+        )
+        return {row["challenge_id"]: self._live_streak(row) for row in rows or []}
 
     def get_completion_rate(self, user_id, challenge_id, days=30):
         """
@@ -300,17 +463,141 @@ class ProgressTracker:
             if not subscribed_challenges:
                 return 0
 
-            longest_streak = 0
-            for challenge in subscribed_challenges:
-                current_streak = self.get_streak(user_id, challenge["id"])
-                longest_streak = max(longest_streak, current_streak)
-
-            return longest_streak
+            streaks = self.get_streaks(user_id)
+            return max(
+                streaks.get(challenge["id"], 0) for challenge in subscribed_challenges
+            )
         except Exception as e:
             print(f"Error getting longest streak: {e}")
             return 0
 
-    def save_weekly_report(self, user_id, report_text, start_date, end_date):
+    def get_user_dashboard_stats(self, user_id, days=30):
+        """
+        Get everything the stats and achievements panels show in one call.
+
+        Results are cached per user until the next check-in, undo or
+        ``invalidate_dashboard_stats`` call, and for the current day only
+        (streaks expire at midnight). Treat the returned dict as read-only.
+
+        Args:
+            user_id (int): User ID
+            days (int, optional): Window for the completion rates
+
+        Returns:
+            dict: ``total_check_ins``, ``longest_streak`` (longest current
+                streak among subscribed challenges), ``subscribed_count``,
+                ``category_counts`` (category -> check-ins) and ``challenges``
+                (subscribed challenge ID -> title, category, streak,
+                longest_streak, total_check_ins and completion_rate)
+        """
+        today = datetime.date.today()
+        with self._dashboard_cache_lock:
+            cached = self._dashboard_cache.get(user_id)
+            if cached and cached[0] == today and cached[1] == days:
+                return cached[2]
+
+        try:
+            stats = self._compute_dashboard_stats(user_id, today, days)
+        except Exception as e:
+            print(f"Error getting dashboard stats: {e}")
+            return {
+                "total_check_ins": 0,
+                "longest_streak": 0,
+                "subscribed_count": 0,
+                "category_counts": {},
+                "challenges": {},
+            }
+
+        with self._dashboard_cache_lock:
+            self._dashboard_cache[user_id] = (today, days, stats)
+        return stats
+
+    def _compute_dashboard_stats(self, user_id, today, days):
+        """Run the two grouped queries behind ``get_user_dashboard_stats``."""
+        window_start = (today - datetime.timedelta(days=days - 1)).isoformat()
+
+        # Check-in totals per challenge, including unsubscribed ones
+        per_challenge = self.db_manager.execute_query(
+            """
+            SELECT p.challenge_id, c.category,
+                   COUNT(*) AS total,
+                   COUNT(DISTINCT CASE WHEN p.check_in_date BETWEEN ? AND ?
+                                       THEN p.check_in_date END) AS recent_days
+            FROM progress p
+            LEFT JOIN challenges c ON p.challenge_id = c.id
+            WHERE p.user_id = ?
+            GROUP BY p.challenge_id
+            """,
+            (window_start, today.isoformat(), user_id),
+        )
+
+        # Subscribed challenges with their materialized streaks
+        subscribed = self.db_manager.execute_query(
+            """
+            SELECT c.*, s.current_streak, s.longest_streak AS best_streak,
+                   s.last_check_in_date
+            FROM challenges c
+            JOIN user_challenges uc ON c.id = uc.challenge_id
+            LEFT JOIN user_challenge_stats s
+                ON s.user_id = uc.user_id AND s.challenge_id = c.id
+            WHERE uc.user_id = ?
+            ORDER BY c.difficulty, c.title
+            """,
+            (user_id,),
+        )
+
+        category_counts = {}
+        totals = {}
+        for row in per_challenge:
+            totals[row["challenge_id"]] = row
+            if row["category"] is not None:
+                category_counts[row["category"]] = (
+                    category_counts.get(row["category"], 0) + row["total"]
+                )
+
+        challenges = {}
+        for row in subscribed:
+            if not self.challenge_manager._is_challenge_complete(row):
+                continue
+            progress = totals.get(row["id"])
+            challenges[row["id"]] = {
+                "title": row["title"],
+                "category": row["category"],
+                "streak": self._live_streak(row) if row["current_streak"] else 0,
+                "longest_streak": row["best_streak"] or 0,
+                "total_check_ins": progress["total"] if progress else 0,
+                "completion_rate": (
+                    progress["recent_days"] / days if progress else 0.0
+                ),
+            }
+
+        return {
+            "total_check_ins": sum(row["total"] for row in per_challenge),
+            "longest_streak": max(
+                (challenge["streak"] for challenge in challenges.values()), default=0
+            ),
+            "subscribed_count": len(challenges),
+            "category_counts": category_counts,
+            "challenges": challenges,
+        }
+
+    def invalidate_dashboard_stats(self, user_id=None):
+        """
+        Drop cached dashboard statistics.
+
+        Args:
+            user_id (int, optional): User whose entry to drop. If None, the
+                whole cache is cleared.
+        """
+        with self._dashboard_cache_lock:
+            if user_id is None:
+                self._dashboard_cache.clear()
+            else:
+                self._dashboard_cache.pop(user_id, None)
+
+    def save_weekly_report(
+        self, user_id, report_text, start_date, end_date, fingerprint=None
+    ):
         """
         Save a weekly report to the database.
 
@@ -319,6 +606,9 @@ class ProgressTracker:
             report_text (str): The generated report text
             start_date (str): Start date in YYYY-MM-DD format
             end_date (str): End date in YYYY-MM-DD format
+            fingerprint (str, optional): ``report_fingerprint`` of the window,
+                taken before the report was generated. Without it the saved
+                report is always considered stale.
 
         Returns:
             bool: True if successful, False otherwise
@@ -326,17 +616,34 @@ class ProgressTracker:
         try:
             query = """
             INSERT OR REPLACE INTO weekly_reports 
-            (user_id, report_text, start_date, end_date)
-            VALUES (?, ?, ?, ?)
+            (user_id, report_text, start_date, end_date, fingerprint)
+            VALUES (?, ?, ?, ?, ?)
             """
-            params = (user_id, report_text, start_date, end_date)
+            params = (user_id, report_text, start_date, end_date, fingerprint)
             self.db_manager.execute_query(query, params)
             return True
         except Exception as e:
             print(f"Error saving weekly report: {e}")
             return False
 
-    def get_weekly_report(self, user_id, start_date=None, end_date=None):
+    def report_fingerprint(self, user_id, start_date, end_date):
+        """
+        Summarize the messages, analyses, check-ins and emotions in a window.
+
+        Args:
+            user_id (int): User ID
+            start_date (str): Start date in YYYY-MM-DD format
+            end_date (str): End date in YYYY-MM-DD format
+
+        Returns:
+            str: Value that changes when data in the window changes; see
+                ``ReportCache.fingerprint``
+        """
+        return self.report_cache.fingerprint(user_id, start_date, end_date)
+
+    def get_weekly_report(
+        self, user_id, start_date=None, end_date=None, check_stale=False
+    ):
         """
         Get a weekly report from the database.
 
@@ -344,12 +651,15 @@ class ProgressTracker:
             user_id (int): User ID
             start_date (str, optional): Start date in YYYY-MM-DD format
             end_date (str, optional): End date in YYYY-MM-DD format
+            check_stale (bool, optional): Whether to add a ``stale`` flag,
+                True if messages, cognitive analyses, check-ins or emotion
+                samples in the report's window changed after it was generated
 
         Returns:
             dict: Report data if found, None otherwise
         """
         query = """
-        SELECT report_text, start_date, end_date, created_at
+        SELECT report_text, start_date, end_date, created_at, fingerprint
         FROM weekly_reports
         WHERE user_id = ?
         """
@@ -367,12 +677,20 @@ class ProgressTracker:
 
         result = self.db_manager.execute_query(query, tuple(params))
         if result:
-            return {
-                "report_text": result[0]["report_text"],
-                "start_date": result[0]["start_date"],
-                "end_date": result[0]["end_date"],
-                "created_at": result[0]["created_at"],
+            row = result[0]
+            report = {
+                "report_text": row["report_text"],
+                "start_date": row["start_date"],
+                "end_date": row["end_date"],
+                "created_at": row["created_at"],
             }
+            if check_stale:
+                # Reports saved without a fingerprint can't be validated
+                fingerprint = row.get("fingerprint")
+                report["stale"] = fingerprint is None or fingerprint != (
+                    self.report_fingerprint(user_id, row["start_date"], row["end_date"])
+                )
+            return report
         return None
 
     def get_all_weekly_reports(self, user_id):
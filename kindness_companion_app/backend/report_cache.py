@@ -0,0 +1,261 @@
+import datetime
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Tables whose rows a report depends on: (table, user column, date column,
+# change marker, dates are UTC). The marker is an aggregate that grows whenever
+# rows are added; a report is stale once it or the row count changes in its
+# window. Check-in dates are local days, the other tables are stamped in UTC.
+REPORT_DEPENDENCIES = [
+    ("conversation_history", "user_id", "timestamp", "MAX(id)", True),
+    ("cognitive_analysis", "user_id", "analysis_timestamp", "MAX(id)", True),
+    ("progress", "user_id", "check_in_date", "MAX(id)", False),
+    # One row per user and UTC day; samples are appended to the day's row
+    ("emotion_timeline", "user_id", "day", "SUM(sample_count)", True),
+]
+
+
+class ReportCache:
+    """
+    Stores generated reports keyed by (user, window length, generator version).
+
+    A cached report is served as long as the data it was built from is
+    unchanged. Instead of invalidating on every write, each entry records a
+    fingerprint of its window: the row count and change marker (usually the
+    highest row id) of every table in ``REPORT_DEPENDENCIES`` for that user
+    and date range. New messages, cognitive analyses, check-ins (and undone
+    check-ins) or emotion samples change the fingerprint and make the entry
+    stale; activity outside the window does not. A new day moves the window,
+    so yesterday's entry is stale as well.
+
+    The fingerprint queries only touch the ``(user_id, date)`` indexes of the
+    window's rows, so checking an entry is much cheaper than regenerating it.
+    """
+
+    def __init__(self, db_manager):
+        """
+        Initialize the cache.
+
+        Args:
+            db_manager (DatabaseManager): Database holding the cache table
+        """
+        self.db_manager = db_manager
+        self._tables = None  # Dependency tables present in the database
+        self._tables_lock = threading.Lock()
+
+    @staticmethod
+    def window(window_days, end_date=None):
+        """
+        Get the local date range a report over ``window_days`` days covers.
+
+        Args:
+            window_days (int): Length of the report window in days
+            end_date (datetime.date, optional): Last day; defaults to today
+
+        Returns:
+            tuple: (start_date, end_date) as YYYY-MM-DD strings
+        """
+        end_date = end_date or datetime.date.today()
+        start_date = end_date - datetime.timedelta(days=window_days)
+        return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+
+    @staticmethod
+    def utc_days(start_date, end_date):
+        """
+        Get the UTC days that overlap a range of local days.
+
+        Reports read UTC-stamped rows by whole UTC days, from the UTC day of
+        the window's start to the UTC day of the time they are generated.
+        Those days always lie in this range, whenever during the last local
+        day the report is built.
+
+        Args:
+            start_date (str): First local day (YYYY-MM-DD)
+            end_date (str): Last local day (YYYY-MM-DD)
+
+        Returns:
+            tuple: (start_day, end_day) as YYYY-MM-DD strings
+        """
+        first = datetime.datetime.combine(
+            datetime.date.fromisoformat(start_date), datetime.time.min
+        )
+        last = datetime.datetime.combine(
+            datetime.date.fromisoformat(end_date), datetime.time.max
+        )
+        # Naive datetimes are taken as local time
+        return (
+            first.astimezone(datetime.timezone.utc).date().isoformat(),
+            last.astimezone(datetime.timezone.utc).date().isoformat(),
+        )
+
+    def _bounds(self, start_date, end_date, utc):
+        """Return the inclusive text bounds of a window for a date column."""
+        if utc:
+            start_date, end_date = self.utc_days(start_date, end_date)
+        # Timestamps compare as text; "<day>~" sorts after any time that day
+        return start_date, f"{end_date}~"
+
+    def _dependency_tables(self):
+        """Return the dependency tables that exist (created by their modules)."""
+        with self._tables_lock:
+            if self._tables is None or len(self._tables) < len(REPORT_DEPENDENCIES):
+                rows = self.db_manager.execute_query(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+                names = {row["name"] for row in rows}
+                self._tables = [dep for dep in REPORT_DEPENDENCIES if dep[0] in names]
+            return self._tables
+
+    def fingerprint(self, user_id, start_date, end_date):
+        """
+        Summarize the data a report for this window depends on.
+
+        Args:
+            user_id (int): User ID
+            start_date (str): First local day of the window (YYYY-MM-DD)
+            end_date (str): Last local day of the window (YYYY-MM-DD)
+
+        Returns:
+            str: Opaque value that changes whenever a dependency row inside
+                the window is added or removed
+        """
+        present = self._dependency_tables()
+        parts = []
+        for dependency in REPORT_DEPENDENCIES:
+            table, user_column, date_column, marker, utc = dependency
+            if dependency not in present:
+                # Same as an empty table, so creating the table (e.g. while
+                # the report is generated) doesn't change the fingerprint
+                parts.append(f"{table}:0:None")
+                continue
+            rows = self.db_manager.execute_query(
+                f"""
+                SELECT COUNT(*) AS row_count, {marker} AS marker FROM {table}
+                WHERE {user_column} = ? AND {date_column} >= ? AND {date_column} <= ?
+                """,
+                (user_id, *self._bounds(start_date, end_date, utc)),
+            )
+            row = rows[0] if rows else {}
+            parts.append(f"{table}:{row.get('row_count', 0)}:{row.get('marker')}")
+        return "|".join(parts)
+
+    def active_users(self, start_date, end_date):
+        """
+        Find the users with any dependency rows in a window.
+
+        Args:
+            start_date (str): First local day of the window (YYYY-MM-DD)
+            end_date (str): Last local day of the window (YYYY-MM-DD)
+
+        Returns:
+            list: Sorted IDs of users who have a report to generate
+        """
+        selects = []
+        params = []
+        for table, user_column, date_column, _marker, utc in self._dependency_tables():
+            selects.append(
+                f"SELECT {user_column} AS user_id FROM {table} "
+                f"WHERE {date_column} >= ? AND {date_column} <= ?"
+            )
+            params.extend(self._bounds(start_date, end_date, utc))
+        if not selects:
+            return []
+        rows = self.db_manager.execute_query(
+            " UNION ".join(selects) + " ORDER BY user_id", tuple(params)
+        )
+        return [row["user_id"] for row in rows if row["user_id"] is not None]
+
+    def get(self, user_id, window_days, version, end_date=None):
+        """
+        Look up the cached report for a window.
+
+        Args:
+            user_id (int): User ID
+            window_days (int): Length of the report window in days
+            version (str): Version of the generator that built the report
+            end_date (datetime.date, optional): Last day; defaults to today
+
+        Returns:
+            tuple: (report, fresh). ``report`` is the cached report or None if
+                there is none for this user, window and version; ``fresh``
+                is True if it is still valid and can be served as is
+        """
+        rows = self.db_manager.execute_query(
+            """
+            SELECT report, start_date, end_date, fingerprint FROM report_cache
+            WHERE user_id = ? AND window_days = ? AND generator_version = ?
+            """,
+            (user_id, window_days, str(version)),
+        )
+        if not rows:
+            return None, False
+
+        row = rows[0]
+        try:
+            report = json.loads(row["report"])
+        except (TypeError, ValueError) as e:
+            logger.error(f"Discarding unreadable cached report: {e}")
+            return None, False
+
+        start, end = self.window(window_days, end_date)
+        fresh = (row["start_date"], row["end_date"]) == (start, end) and row[
+            "fingerprint"
+        ] == self.fingerprint(user_id, start, end)
+        return report, fresh
+
+    def put(self, user_id, window_days, version, report, fingerprint, end_date=None):
+        """
+        Store a freshly generated report.
+
+        Compute ``fingerprint`` before generating the report, so that data
+        arriving while it is generated marks the entry stale.
+
+        Args:
+            user_id (int): User ID
+            window_days (int): Length of the report window in days
+            version (str): Version of the generator that built the report
+            report (dict): JSON-serializable report
+            fingerprint (str): ``fingerprint`` of the window the report covers
+            end_date (datetime.date, optional): Last day; defaults to today
+
+        Returns:
+            bool: True if the report was stored
+        """
+        start, end = self.window(window_days, end_date)
+        try:
+            payload = json.dumps(report, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Report is not JSON-serializable; not caching it: {e}")
+            return False
+        self.db_manager.execute_query(
+            """
+            INSERT OR REPLACE INTO report_cache (
+                user_id, window_days, generator_version, start_date, end_date,
+                fingerprint, report
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (user_id, window_days, str(version), start, end, fingerprint, payload),
+        )
+        return True
+
+    def invalidate(self, user_id=None):
+        """
+        Drop cached reports.
+
+        Not needed when data changes (entries go stale on their own); use it
+        when a report must be rebuilt regardless, e.g. after editing history.
+
+        Args:
+            user_id (int, optional): User whose reports to drop. If None, the
+                whole cache is cleared.
+        """
+        if user_id is None:
+            self.db_manager.execute_update("DELETE FROM report_cache")
+        else:
+            self.db_manager.execute_update(
+                "DELETE FROM report_cache WHERE user_id = ?", (user_id,)
+            )
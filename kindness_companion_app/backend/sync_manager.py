@@ -190,9 +190,9 @@ class SyncManager:
             if current_user_id:
                 self.initialize_sync_for_user(current_user_id)
 
-            # Get all posts with enhanced user information
-            posts = self.db_manager.execute_query(
-                """
+            # Posts and comments are streamed from the database straight into
+            # the file so image and avatar BLOBs are never all held in memory.
+            posts = self.db_manager.iter_query("""
                 SELECT w.*,
                        CASE
                            WHEN w.is_anonymous = 1 THEN 'Anonymous'
@@ -208,12 +208,9 @@ class SyncManager:
                 LEFT JOIN users u ON w.user_id = u.id
                 LEFT JOIN user_sync_info usi ON u.id = usi.user_id
                 ORDER BY w.created_at DESC
-                """
-            )
+                """)
 
-            # Get all comments with enhanced user information
-            comments = self.db_manager.execute_query(
-                """
+            comments = self.db_manager.iter_query("""
                 SELECT c.*,
                        CASE
                            WHEN c.is_anonymous = 1 THEN 'Anonymous'
@@ -229,62 +226,54 @@ class SyncManager:
                 LEFT JOIN users u ON c.user_id = u.id
                 LEFT JOIN user_sync_info usi ON u.id = usi.user_id
                 ORDER BY c.created_at ASC
-                """
-            )
+                """)
 
-            # Add hash to each post and include enhanced user info
-            for post in posts:
-                post["hash"] = self._calculate_post_hash(post)
-                # Include enhanced user information for proper sync
-                post["user_info"] = {
-                    "username": post.get("username", "Unknown"),
-                    "original_username": post.get(
-                        "original_username", post.get("username", "Unknown")
-                    ),
-                    "avatar": post.get("avatar", ""),
-                    "bio": post.get("bio", ""),
-                    "display_name": post.get("display_name", "Unknown"),
-                    "sync_uuid": post.get("sync_uuid"),
-                    "device_name": post.get("device_name", "Unknown"),
+            # Create export file
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            export_file = os.path.join(self.sync_dir, f"wall_export_{timestamp}.json")
+
+            # Same layout as json.dump(export_data, indent=2), written
+            # incrementally: header fields, posts, comments, then metadata.
+            with open(export_file, "w", encoding="utf-8") as f:
+                header = {
+                    "version": self.version,
+                    "export_date": datetime.now().isoformat(),
+                    "export_device": os.uname().nodename,
                 }
+                f.write("{\n")
+                for key, value in header.items():
+                    f.write(
+                        f"  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n"
+                    )
 
-            # Add hash to each comment and include enhanced user info
-            for comment in comments:
-                comment["hash"] = self._calculate_comment_hash(comment)
-                # Include enhanced user information for proper sync
-                comment["user_info"] = {
-                    "username": comment.get("username", "Unknown"),
-                    "original_username": comment.get(
-                        "original_username", comment.get("username", "Unknown")
+                total_posts = self._write_json_array(
+                    f,
+                    "posts",
+                    (
+                        self._with_sync_fields(post, self._calculate_post_hash)
+                        for post in posts
                     ),
-                    "avatar": comment.get("avatar", ""),
-                    "bio": comment.get("bio", ""),
-                    "display_name": comment.get("display_name", "Unknown"),
-                    "sync_uuid": comment.get("sync_uuid"),
-                    "device_name": comment.get("device_name", "Unknown"),
-                }
+                )
+                f.write(",\n")
+                total_comments = self._write_json_array(
+                    f,
+                    "comments",
+                    (
+                        self._with_sync_fields(comment, self._calculate_comment_hash)
+                        for comment in comments
+                    ),
+                )
+                f.write(",\n")
 
-            # Create export data with enhanced metadata
-            export_data = {
-                "version": self.version,
-                "export_date": datetime.now().isoformat(),
-                "export_device": os.uname().nodename,
-                "posts": posts,
-                "comments": comments,
-                "metadata": {
-                    "total_posts": len(posts),
-                    "total_comments": len(comments),
+                metadata = {
+                    "total_posts": total_posts,
+                    "total_comments": total_comments,
                     "last_modified": datetime.now().isoformat(),
                     "format_version": self.version,
-                },
-            }
-
-            # Create export file
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            export_file = os.path.join(self.sync_dir, f"wall_export_{timestamp}.json")
-
-            with open(export_file, "w", encoding="utf-8") as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=2)
+                }
+                f.write('  "metadata": ')
+                f.write(self._indent_json(metadata, "  ").lstrip())
+                f.write("\n}")
 
             # Clean up old exports
             self.cleanup_old_exports()
@@ -294,6 +283,45 @@ class SyncManager:
             logging.error(f"Error exporting data: {e}")
             return None
 
+    def _with_sync_fields(self, record, hash_function):
+        """Add the content hash and enhanced user info to an exported record."""
+        record["hash"] = hash_function(record)
+        # Include enhanced user information for proper sync
+        record["user_info"] = {
+            "username": record.get("username", "Unknown"),
+            "original_username": record.get(
+                "original_username", record.get("username", "Unknown")
+            ),
+            "avatar": record.get("avatar", ""),
+            "bio": record.get("bio", ""),
+            "display_name": record.get("display_name", "Unknown"),
+            "sync_uuid": record.get("sync_uuid"),
+            "device_name": record.get("device_name", "Unknown"),
+        }
+        return record
+
+    @staticmethod
+    def _indent_json(value, prefix):
+        """Serialize ``value`` with indent=2, shifted right by ``prefix``."""
+        text = json.dumps(value, ensure_ascii=False, indent=2)
+        return "\n".join(prefix + line for line in text.split("\n"))
+
+    def _write_json_array(self, f, key, records):
+        """
+        Write ``"key": [...]`` one record at a time.
+
+        Returns:
+            int: Number of records written
+        """
+        count = 0
+        f.write(f"  {json.dumps(key)}: [")
+        for record in records:
+            f.write(",\n" if count else "\n")
+            f.write(self._indent_json(record, "    "))
+            count += 1
+        f.write("\n  ]" if count else "]")
+        return count
+
     def import_data(self, import_file):
         """
         Import wall posts from a JSON file.
@@ -339,320 +367,336 @@ class SyncManager:
                 "id_mapping": {},  # Track ID mapping for comments
             }
 
-            # Import posts
-            for post in import_data["posts"]:
-                try:
-                    original_post_id = post["id"]
-
-                    # Check if a post with the same hash already exists (to avoid duplicates)
-                    post_hash = post.get("hash", self._calculate_post_hash(post))
-                    existing_by_hash = self.db_manager.execute_query(
-                        """
-                        SELECT w.id, w.content, w.created_at, w.user_id
-                        FROM kindness_wall w
-                        WHERE w.content = ? AND w.created_at = ?
-                        """,
-                        (post["content"], post["created_at"]),
-                    )
+            # Likes are collected and written in one batch per table;
+            # INSERT OR IGNORE relies on the UNIQUE (post, user) constraints.
+            pending_post_likes = []
+            pending_comment_likes = []
 
-                    if existing_by_hash:
-                        # Post with same content and timestamp exists, likely duplicate
-                        existing_post = existing_by_hash[0]
-                        existing_hash = self._calculate_post_hash(existing_post)
+            # Import everything in one transaction; each post and comment gets
+            # its own savepoint so a bad record only rolls back itself.
+            with self.db_manager.transaction():
+                # Import posts
+                for post in import_data["posts"]:
+                    try:
+                        with self.db_manager.transaction():
+                            original_post_id = post["id"]
 
-                        if existing_hash == post_hash:
-                            stats["skipped"] += 1
-                            stats["id_mapping"][original_post_id] = existing_post["id"]
-                            continue
+                            # Check if a post with the same hash already exists (to avoid duplicates)
+                            post_hash = post.get(
+                                "hash", self._calculate_post_hash(post)
+                            )
+                            existing_by_hash = self.db_manager.execute_query(
+                                """
+                                SELECT w.id, w.content, w.created_at, w.user_id
+                                FROM kindness_wall w
+                                WHERE w.content = ? AND w.created_at = ?
+                                """,
+                                (post["content"], post["created_at"]),
+                            )
 
-                    # Handle user for the post
-                    target_user_id = None
-                    user_created = False
-
-                    if post.get("user_info"):
-                        # Try to create/find user from user_info
-                        existing_user_count = self.db_manager.execute_query(
-                            "SELECT COUNT(*) as count FROM users WHERE username = ?",
-                            (post["user_info"].get("username", "Unknown"),),
-                        )[0]["count"]
-
-                        target_user_id = self._ensure_user_exists(post["user_info"])
-
-                        if target_user_id:
-                            # Check if this was a new user creation
-                            new_user_count = self.db_manager.execute_query(
-                                "SELECT COUNT(*) as count FROM users WHERE username LIKE ?",
-                                (f"{post['user_info'].get('username', 'Unknown')}%",),
-                            )[0]["count"]
-
-                            if new_user_count > existing_user_count:
-                                user_created = True
-
-                    # If user_info didn't work, try to handle the original user_id
-                    if target_user_id is None:
-                        # Check if original user_id exists
-                        existing_user = self.db_manager.execute_query(
-                            "SELECT id FROM users WHERE id = ?", (post["user_id"],)
-                        )
+                            if existing_by_hash:
+                                # Post with same content and timestamp exists, likely duplicate
+                                existing_post = existing_by_hash[0]
+                                existing_hash = self._calculate_post_hash(existing_post)
 
-                        if existing_user:
-                            target_user_id = post["user_id"]
-                        else:
-                            # For posts without user_info, create a placeholder user
-                            # This preserves the original post authorship instead of making everything anonymous
-                            placeholder_user_info = {
-                                "username": f"user_{post['user_id']}",
-                                "original_username": f"user_{post['user_id']}",
-                                "bio": "同步用户（原用户信息不完整）",
-                                "sync_uuid": None,
-                                "device_name": "Unknown",
-                                "avatar": None,
-                            }
-
-                            target_user_id = self._ensure_user_exists(
-                                placeholder_user_info
-                            )
-                            if target_user_id:
-                                user_created = True
-                                logging.info(
-                                    f"Created placeholder user for post {post['id']} (original user_id: {post['user_id']})"
-                                )
-                            else:
-                                # Only fallback to current user as last resort
-                                if current_user_id:
-                                    target_user_id = current_user_id
-                                    # Mark as anonymous since we couldn't preserve original authorship
-                                    post["is_anonymous"] = 1
-                                    logging.warning(
-                                        f"Falling back to anonymous post for {post['id']} due to user creation failure"
-                                    )
-                                else:
-                                    logging.error(
-                                        f"Cannot import post {post['id']}: no valid user found and no current user"
+                                if existing_hash == post_hash:
+                                    stats["skipped"] += 1
+                                    stats["id_mapping"][original_post_id] = (
+                                        existing_post["id"]
                                     )
-                                    stats["conflicts"] += 1
                                     continue
 
-                    # Insert new post (let database assign new ID to avoid conflicts)
-                    new_post_id = self.db_manager.execute_insert(
-                        """
-                        INSERT INTO kindness_wall
-                        (user_id, content, image_data, created_at, likes, is_anonymous)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        """,
-                        (
-                            target_user_id,
-                            post["content"],
-                            post.get("image_data"),
-                            post["created_at"],
-                            post.get("likes", 0),
-                            post.get("is_anonymous", 0),
-                        ),
-                    )
-
-                    if new_post_id:
-                        stats["imported"] += 1
-                        stats["id_mapping"][original_post_id] = new_post_id
-
-                        if user_created:
-                            stats["users_created"] += 1
+                            # Handle user for the post
+                            target_user_id = None
+                            user_created = False
 
-                        # Import likes (only if current user exists and likes > 0)
-                        if current_user_id and post.get("likes", 0) > 0:
-                            # Check if like already exists
-                            existing_like = self.db_manager.execute_query(
-                                "SELECT id FROM wall_likes WHERE wall_post_id = ? AND user_id = ?",
-                                (new_post_id, current_user_id),
-                            )
+                            if post.get("user_info"):
+                                # Try to create/find user from user_info
+                                existing_user_count = self.db_manager.execute_query(
+                                    "SELECT COUNT(*) as count FROM users WHERE username = ?",
+                                    (post["user_info"].get("username", "Unknown"),),
+                                )[0]["count"]
 
-                            if not existing_like:
-                                self.db_manager.execute_insert(
-                                    """
-                                    INSERT INTO wall_likes (wall_post_id, user_id)
-                                    VALUES (?, ?)
-                                    """,
-                                    (new_post_id, current_user_id),
+                                target_user_id = self._ensure_user_exists(
+                                    post["user_info"]
                                 )
-                    else:
-                        stats["conflicts"] += 1
 
-                except Exception as post_error:
-                    logging.error(
-                        f"Error importing post {post.get('id', 'unknown')}: {post_error}"
-                    )
-                    stats["conflicts"] += 1
-                    continue
+                                if target_user_id:
+                                    # Check if this was a new user creation
+                                    new_user_count = self.db_manager.execute_query(
+                                        "SELECT COUNT(*) as count FROM users WHERE username LIKE ?",
+                                        (
+                                            f"{post['user_info'].get('username', 'Unknown')}%",
+                                        ),
+                                    )[0]["count"]
+
+                                    if new_user_count > existing_user_count:
+                                        user_created = True
+
+                            # If user_info didn't work, try to handle the original user_id
+                            if target_user_id is None:
+                                # Check if original user_id exists
+                                existing_user = self.db_manager.execute_query(
+                                    "SELECT id FROM users WHERE id = ?",
+                                    (post["user_id"],),
+                                )
 
-            # Import comments if they exist in the import data
-            if "comments" in import_data and import_data["comments"]:
-                for comment in import_data["comments"]:
-                    try:
-                        original_comment_id = comment["id"]
-                        original_post_id = comment["wall_post_id"]
+                                if existing_user:
+                                    target_user_id = post["user_id"]
+                                else:
+                                    # For posts without user_info, create a placeholder user
+                                    # This preserves the original post authorship instead of making everything anonymous
+                                    placeholder_user_info = {
+                                        "username": f"user_{post['user_id']}",
+                                        "original_username": f"user_{post['user_id']}",
+                                        "bio": "同步用户（原用户信息不完整）",
+                                        "sync_uuid": None,
+                                        "device_name": "Unknown",
+                                        "avatar": None,
+                                    }
+
+                                    target_user_id = self._ensure_user_exists(
+                                        placeholder_user_info
+                                    )
+                                    if target_user_id:
+                                        user_created = True
+                                        logging.info(
+                                            f"Created placeholder user for post {post['id']} (original user_id: {post['user_id']})"
+                                        )
+                                    else:
+                                        # Only fallback to current user as last resort
+                                        if current_user_id:
+                                            target_user_id = current_user_id
+                                            # Mark as anonymous since we couldn't preserve original authorship
+                                            post["is_anonymous"] = 1
+                                            logging.warning(
+                                                f"Falling back to anonymous post for {post['id']} due to user creation failure"
+                                            )
+                                        else:
+                                            logging.error(
+                                                f"Cannot import post {post['id']}: no valid user found and no current user"
+                                            )
+                                            stats["conflicts"] += 1
+                                            continue
+
+                            # Insert new post (let database assign new ID to avoid conflicts)
+                            new_post_id = self.db_manager.execute_insert(
+                                """
+                                INSERT INTO kindness_wall
+                                (user_id, content, image_data, created_at, likes, is_anonymous)
+                                VALUES (?, ?, ?, ?, ?, ?)
+                                """,
+                                (
+                                    target_user_id,
+                                    post["content"],
+                                    post.get("image_data"),
+                                    post["created_at"],
+                                    post.get("likes", 0),
+                                    post.get("is_anonymous", 0),
+                                ),
+                            )
 
-                        # Map the wall_post_id to the new ID if it was remapped
-                        target_post_id = stats["id_mapping"].get(
-                            original_post_id, original_post_id
-                        )
+                            if new_post_id:
+                                stats["imported"] += 1
+                                stats["id_mapping"][original_post_id] = new_post_id
 
-                        # Check if the wall post exists
-                        post_exists = self.db_manager.execute_query(
-                            "SELECT id FROM kindness_wall WHERE id = ?",
-                            (target_post_id,),
-                        )
+                                if user_created:
+                                    stats["users_created"] += 1
 
-                        if not post_exists:
-                            logging.warning(
-                                f"Cannot import comment {comment['id']}: wall post {target_post_id} does not exist"
-                            )
-                            stats["comments_conflicts"] += 1
-                            continue
+                                # Import likes (only if current user exists and likes > 0)
+                                if current_user_id and post.get("likes", 0) > 0:
+                                    pending_post_likes.append(
+                                        (new_post_id, current_user_id)
+                                    )
+                            else:
+                                stats["conflicts"] += 1
 
-                        # Check if a comment with the same hash already exists
-                        comment_hash = comment.get(
-                            "hash", self._calculate_comment_hash(comment)
-                        )
-                        existing_by_hash = self.db_manager.execute_query(
-                            """
-                            SELECT id, content, created_at
-                            FROM wall_comments
-                            WHERE wall_post_id = ? AND content = ? AND created_at = ?
-                            """,
-                            (target_post_id, comment["content"], comment["created_at"]),
+                    except Exception as post_error:
+                        logging.error(
+                            f"Error importing post {post.get('id', 'unknown')}: {post_error}"
                         )
+                        stats["conflicts"] += 1
+                        continue
 
-                        if existing_by_hash:
-                            # Comment with same content and timestamp exists, likely duplicate
-                            existing_comment = existing_by_hash[0]
-                            existing_hash = self._calculate_comment_hash(
-                                existing_comment
-                            )
-
-                            if existing_hash == comment_hash:
-                                stats["comments_skipped"] += 1
-                                continue
-
-                        # Handle user for new comment
-                        target_user_id = None
-                        user_created = False
+                # Import comments if they exist in the import data
+                if "comments" in import_data and import_data["comments"]:
+                    for comment in import_data["comments"]:
+                        try:
+                            with self.db_manager.transaction():
+                                original_comment_id = comment["id"]
+                                original_post_id = comment["wall_post_id"]
+
+                                # Map the wall_post_id to the new ID if it was remapped
+                                target_post_id = stats["id_mapping"].get(
+                                    original_post_id, original_post_id
+                                )
 
-                        if comment.get("user_info"):
-                            # Try to create/find user from user_info
-                            existing_user_count = self.db_manager.execute_query(
-                                "SELECT COUNT(*) as count FROM users WHERE username = ?",
-                                (comment["user_info"].get("username", "Unknown"),),
-                            )[0]["count"]
+                                # Check if the wall post exists
+                                post_exists = self.db_manager.execute_query(
+                                    "SELECT id FROM kindness_wall WHERE id = ?",
+                                    (target_post_id,),
+                                )
 
-                            target_user_id = self._ensure_user_exists(
-                                comment["user_info"]
-                            )
+                                if not post_exists:
+                                    logging.warning(
+                                        f"Cannot import comment {comment['id']}: wall post {target_post_id} does not exist"
+                                    )
+                                    stats["comments_conflicts"] += 1
+                                    continue
 
-                            if target_user_id:
-                                # Check if this was a new user creation
-                                new_user_count = self.db_manager.execute_query(
-                                    "SELECT COUNT(*) as count FROM users WHERE username LIKE ?",
+                                # Check if a comment with the same hash already exists
+                                comment_hash = comment.get(
+                                    "hash", self._calculate_comment_hash(comment)
+                                )
+                                existing_by_hash = self.db_manager.execute_query(
+                                    """
+                                    SELECT id, content, created_at
+                                    FROM wall_comments
+                                    WHERE wall_post_id = ? AND content = ? AND created_at = ?
+                                    """,
                                     (
-                                        f"{comment['user_info'].get('username', 'Unknown')}%",
+                                        target_post_id,
+                                        comment["content"],
+                                        comment["created_at"],
                                     ),
-                                )[0]["count"]
+                                )
 
-                                if new_user_count > existing_user_count:
-                                    user_created = True
+                                if existing_by_hash:
+                                    # Comment with same content and timestamp exists, likely duplicate
+                                    existing_comment = existing_by_hash[0]
+                                    existing_hash = self._calculate_comment_hash(
+                                        existing_comment
+                                    )
 
-                        # If user_info didn't work, try to handle the original user_id
-                        if target_user_id is None:
-                            # Check if original user_id exists
-                            existing_user = self.db_manager.execute_query(
-                                "SELECT id FROM users WHERE id = ?",
-                                (comment["user_id"],),
-                            )
+                                    if existing_hash == comment_hash:
+                                        stats["comments_skipped"] += 1
+                                        continue
 
-                            if existing_user:
-                                target_user_id = comment["user_id"]
-                            else:
-                                # For comments without user_info, create a placeholder user
-                                # This preserves the original comment authorship
-                                placeholder_user_info = {
-                                    "username": f"user_{comment['user_id']}",
-                                    "original_username": f"user_{comment['user_id']}",
-                                    "bio": "同步用户（原用户信息不完整）",
-                                    "sync_uuid": None,
-                                    "device_name": "Unknown",
-                                    "avatar": None,
-                                }
+                                # Handle user for new comment
+                                target_user_id = None
+                                user_created = False
+
+                                if comment.get("user_info"):
+                                    # Try to create/find user from user_info
+                                    existing_user_count = self.db_manager.execute_query(
+                                        "SELECT COUNT(*) as count FROM users WHERE username = ?",
+                                        (
+                                            comment["user_info"].get(
+                                                "username", "Unknown"
+                                            ),
+                                        ),
+                                    )[0]["count"]
+
+                                    target_user_id = self._ensure_user_exists(
+                                        comment["user_info"]
+                                    )
 
-                                target_user_id = self._ensure_user_exists(
-                                    placeholder_user_info
-                                )
-                                if target_user_id:
-                                    user_created = True
-                                    logging.info(
-                                        f"Created placeholder user for comment {comment['id']} (original user_id: {comment['user_id']})"
+                                    if target_user_id:
+                                        # Check if this was a new user creation
+                                        new_user_count = self.db_manager.execute_query(
+                                            "SELECT COUNT(*) as count FROM users WHERE username LIKE ?",
+                                            (
+                                                f"{comment['user_info'].get('username', 'Unknown')}%",
+                                            ),
+                                        )[0]["count"]
+
+                                        if new_user_count > existing_user_count:
+                                            user_created = True
+
+                                # If user_info didn't work, try to handle the original user_id
+                                if target_user_id is None:
+                                    # Check if original user_id exists
+                                    existing_user = self.db_manager.execute_query(
+                                        "SELECT id FROM users WHERE id = ?",
+                                        (comment["user_id"],),
                                     )
-                                else:
-                                    # Only fallback to current user as last resort
-                                    if current_user_id:
-                                        target_user_id = current_user_id
-                                        # Mark as anonymous since we couldn't preserve original authorship
-                                        comment["is_anonymous"] = 1
-                                        logging.warning(
-                                            f"Falling back to anonymous comment for {comment['id']} due to user creation failure"
-                                        )
+
+                                    if existing_user:
+                                        target_user_id = comment["user_id"]
                                     else:
-                                        logging.error(
-                                            f"Cannot import comment {comment['id']}: no valid user found and no current user"
+                                        # For comments without user_info, create a placeholder user
+                                        # This preserves the original comment authorship
+                                        placeholder_user_info = {
+                                            "username": f"user_{comment['user_id']}",
+                                            "original_username": f"user_{comment['user_id']}",
+                                            "bio": "同步用户（原用户信息不完整）",
+                                            "sync_uuid": None,
+                                            "device_name": "Unknown",
+                                            "avatar": None,
+                                        }
+
+                                        target_user_id = self._ensure_user_exists(
+                                            placeholder_user_info
                                         )
-                                        stats["comments_conflicts"] += 1
-                                        continue
-
-                        # Insert new comment (let database assign new ID)
-                        new_comment_id = self.db_manager.execute_insert(
-                            """
-                            INSERT INTO wall_comments
-                            (wall_post_id, user_id, content, created_at, likes, is_anonymous)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                            """,
-                            (
-                                target_post_id,
-                                target_user_id,
-                                comment["content"],
-                                comment["created_at"],
-                                comment.get("likes", 0),
-                                comment.get("is_anonymous", 0),
-                            ),
-                        )
+                                        if target_user_id:
+                                            user_created = True
+                                            logging.info(
+                                                f"Created placeholder user for comment {comment['id']} (original user_id: {comment['user_id']})"
+                                            )
+                                        else:
+                                            # Only fallback to current user as last resort
+                                            if current_user_id:
+                                                target_user_id = current_user_id
+                                                # Mark as anonymous since we couldn't preserve original authorship
+                                                comment["is_anonymous"] = 1
+                                                logging.warning(
+                                                    f"Falling back to anonymous comment for {comment['id']} due to user creation failure"
+                                                )
+                                            else:
+                                                logging.error(
+                                                    f"Cannot import comment {comment['id']}: no valid user found and no current user"
+                                                )
+                                                stats["comments_conflicts"] += 1
+                                                continue
+
+                                # Insert new comment (let database assign new ID)
+                                new_comment_id = self.db_manager.execute_insert(
+                                    """
+                                    INSERT INTO wall_comments
+                                    (wall_post_id, user_id, content, created_at, likes, is_anonymous)
+                                    VALUES (?, ?, ?, ?, ?, ?)
+                                    """,
+                                    (
+                                        target_post_id,
+                                        target_user_id,
+                                        comment["content"],
+                                        comment["created_at"],
+                                        comment.get("likes", 0),
+                                        comment.get("is_anonymous", 0),
+                                    ),
+                                )
 
-                        if new_comment_id:
-                            stats["comments_imported"] += 1
+                                if new_comment_id:
+                                    stats["comments_imported"] += 1
 
-                            if user_created:
-                                stats["users_created"] += 1
+                                    if user_created:
+                                        stats["users_created"] += 1
 
-                            # Import comment likes (only if current user exists and likes > 0)
-                            if current_user_id and comment.get("likes", 0) > 0:
-                                # Check if like already exists
-                                existing_like = self.db_manager.execute_query(
-                                    "SELECT id FROM comment_likes WHERE comment_id = ? AND user_id = ?",
-                                    (new_comment_id, current_user_id),
-                                )
+                                    # Import comment likes (only if current user exists and likes > 0)
+                                    if current_user_id and comment.get("likes", 0) > 0:
+                                        pending_comment_likes.append(
+                                            (new_comment_id, current_user_id)
+                                        )
+                                else:
+                                    stats["comments_conflicts"] += 1
 
-                                if not existing_like:
-                                    self.db_manager.execute_insert(
-                                        """
-                                        INSERT INTO comment_likes (comment_id, user_id)
-                                        VALUES (?, ?)
-                                        """,
-                                        (new_comment_id, current_user_id),
-                                    )
-                        else:
+                        except Exception as comment_error:
+                            logging.error(
+                                f"Error importing comment {comment.get('id', 'unknown')}: {comment_error}"
+                            )
                             stats["comments_conflicts"] += 1
+                            continue
 
-                    except Exception as comment_error:
-                        logging.error(
-                            f"Error importing comment {comment.get('id', 'unknown')}: {comment_error}"
-                        )
-                        stats["comments_conflicts"] += 1
-                        continue
+                if pending_post_likes:
+                    self.db_manager.execute_many(
+                        "INSERT OR IGNORE INTO wall_likes (wall_post_id, user_id) VALUES (?, ?)",
+                        pending_post_likes,
+                    )
+                if pending_comment_likes:
+                    self.db_manager.execute_many(
+                        "INSERT OR IGNORE INTO comment_likes (comment_id, user_id) VALUES (?, ?)",
+                        pending_comment_likes,
+                    )
 
             # Remove id_mapping from stats before returning (internal use only)
             del stats["id_mapping"]
@@ -459,27 +459,33 @@ class UserManager:
 
         # Step 2: Delete associated data (use transaction for atomicity)
         try:
-            # Delete reminders
-            self.db_manager.execute_update(
-                "DELETE FROM reminders WHERE user_id = ?", (user_id,)
-            )
-            print(f"Deleted reminders for user {user_id}.")
+            with self.db_manager.transaction():
+                # Delete reminders
+                self.db_manager.execute_update(
+                    "DELETE FROM reminders WHERE user_id = ?", (user_id,)
+                )
+                print(f"Deleted reminders for user {user_id}.")
 
-            # Delete progress
-            self.db_manager.execute_update(
-                "DELETE FROM progress WHERE user_id = ?", (user_id,)
-            )
-            print(f"Deleted progress records for user {user_id}.")
+                # Delete progress
+                self.db_manager.execute_update(
+                    "DELETE FROM progress WHERE user_id = ?", (user_id,)
+                )
+                self.db_manager.execute_update(
+                    "DELETE FROM user_challenge_stats WHERE user_id = ?", (user_id,)
+                )
+                print(f"Deleted progress records for user {user_id}.")
 
-            # Delete challenge subscriptions
-            self.db_manager.execute_update(
-                "DELETE FROM user_challenges WHERE user_id = ?", (user_id,)
-            )
-            print(f"Deleted challenge subscriptions for user {user_id}.")
+                # Delete challenge subscriptions
+                self.db_manager.execute_update(
+                    "DELETE FROM user_challenges WHERE user_id = ?", (user_id,)
+                )
+                print(f"Deleted challenge subscriptions for user {user_id}.")
 
-            # Step 3: Delete the user record
-            self.db_manager.execute_update("DELETE FROM users WHERE id = ?", (user_id,))
-            print(f"Deleted user record for user {user_id}.")
+                # Step 3: Delete the user record
+                self.db_manager.execute_update(
+                    "DELETE FROM users WHERE id = ?", (user_id,)
+                )
+                print(f"Deleted user record for user {user_id}.")
 
             print(f"Account deletion successful for user {user_id}.")
 
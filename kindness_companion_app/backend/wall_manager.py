@@ -85,6 +85,9 @@ class WallManager:
                 )
             """
             )
+
+            # Secondary indexes for the wall feed and comment lookups
+            self.db_manager.ensure_indexes("kindness_wall", "wall_comments")
         except Exception as e:
             print(f"Error initializing wall tables: {e}")
 
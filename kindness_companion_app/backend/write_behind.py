@@ -0,0 +1,240 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    Buffers write statements and commits them in batches on a background thread.
+
+    Callers that only log data (conversation turns, analysis results) hand
+    their INSERTs to ``submit`` and return immediately instead of waiting for
+    a commit. The writer thread commits whatever has queued up once
+    ``flush_interval`` seconds have passed since the first pending write, or
+    as soon as ``batch_size`` writes are waiting, in a single transaction.
+    Statements that must land together (a row and the summary it updates)
+    go to ``submit_many`` and are always committed in the same transaction.
+
+    Memory is bounded: once ``max_pending`` writes are waiting, ``submit``
+    blocks until the writer catches up (and writes synchronously if it does
+    not within ``submit_timeout``). ``flush`` waits until everything submitted
+    so far is committed; ``close`` flushes and stops the thread, and is also
+    run at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        db_manager,
+        flush_interval=0.2,
+        batch_size=100,
+        max_pending=1000,
+        submit_timeout=5.0,
+    ):
+        """
+        Initialize the queue. The writer thread starts on the first submit.
+
+        Args:
+            db_manager (DatabaseManager): Database the statements run against
+            flush_interval (float, optional): Longest time in seconds a write
+                waits before it is committed
+            batch_size (int, optional): Writes committed per transaction; a
+                full batch is written without waiting for the interval
+            max_pending (int, optional): Writes allowed to wait before
+                ``submit`` blocks
+            submit_timeout (float, optional): Seconds ``submit`` blocks on a
+                full queue before writing synchronously instead
+        """
+        self.db_manager = db_manager
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, int(batch_size))
+        self.max_pending = max(1, int(max_pending))
+        self.submit_timeout = submit_timeout
+        self._condition = threading.Condition()
+        self._pending = deque()  # Units of [(query, params, on_written), ...]
+        self._submitted = 0  # sequence number of the last submitted write
+        self._done = 0  # sequence number of the last write handled
+        self._flush_requested = False
+        self._closed = False
+        self._thread = None
+        self._stats = {"written": 0, "failed": 0, "batches": 0, "blocked": 0}
+
+    def submit(self, query, params=(), on_written=None):
+        """
+        Queue a write statement.
+
+        Args:
+            query (str): SQL statement with placeholders
+            params (tuple, optional): Parameters for the statement
+            on_written (callable, optional): Called on the writer thread with
+                the statement's ``lastrowid`` after its batch is committed
+        """
+        self.submit_many([(query, params, on_written)])
+
+    def submit_many(self, statements):
+        """
+        Queue statements that are committed together or not at all.
+
+        The unit counts as one write towards ``batch_size`` and
+        ``max_pending`` and is never split across batches.
+
+        Args:
+            statements (list): ``(query, params)`` or
+                ``(query, params, on_written)`` tuples, run in order
+        """
+        unit = [
+            (query, params, on_written[0] if on_written else None)
+            for query, params, *on_written in statements
+        ]
+        if not unit:
+            return
+        with self._condition:
+            if not self._closed:
+                self._start()
+                if len(self._pending) >= self.max_pending:
+                    self._stats["blocked"] += 1
+                    self._flush_requested = True
+                    self._condition.notify_all()
+                    self._condition.wait_for(
+                        lambda: len(self._pending) < self.max_pending or self._closed,
+                        timeout=self.submit_timeout,
+                    )
+                if not self._closed and len(self._pending) < self.max_pending:
+                    self._pending.append(unit)
+                    self._submitted += 1
+                    if len(self._pending) >= self.batch_size:
+                        self._condition.notify_all()
+                    return
+
+        # Closed, or the writer is stuck: don't lose the write
+        logger.warning("Write-behind queue unavailable; writing synchronously")
+        self._write_batch([unit])
+
+    def flush(self, timeout=None):
+        """
+        Block until every write submitted before this call is committed.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: True if everything was written, False on timeout
+        """
+        with self._condition:
+            target = self._submitted
+            if self._done >= target:
+                return True
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: self._done >= target, timeout=timeout
+            )
+
+    def close(self):
+        """Write everything still pending and stop the writer thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    @property
+    def pending(self):
+        """int: Number of writes not yet committed."""
+        with self._condition:
+            return self._submitted - self._done
+
+    def stats(self):
+        """
+        Get queue statistics.
+
+        Returns:
+            dict: Counts of written and failed statements, committed batches,
+                submits that hit the ``max_pending`` limit, and pending writes
+        """
+        with self._condition:
+            return dict(self._stats, pending=self._submitted - self._done)
+
+    def _start(self):
+        """Start the writer thread (called with the condition held)."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="write-behind", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return  # Closed and drained
+
+                # Let more writes accumulate, unless a flush is waiting
+                deadline = time.monotonic() + self.flush_interval
+                while not (
+                    len(self._pending) >= self.batch_size
+                    or self._flush_requested
+                    or self._closed
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                count = min(self.batch_size, len(self._pending))
+                batch = [self._pending.popleft() for _ in range(count)]
+                # Room in the queue again for blocked submitters
+                self._condition.notify_all()
+
+            self._write_batch(batch)
+
+            with self._condition:
+                self._done += len(batch)
+                if self._done >= self._submitted:
+                    self._flush_requested = False
+                self._condition.notify_all()
+
+    def _write_batch(self, batch):
+        """Commit ``batch`` in one transaction, falling back to unit by unit."""
+        written, failed = [], 0
+        try:
+            with self.db_manager.transaction():
+                for unit in batch:
+                    written.extend(self._write_unit(unit))
+        except Exception as e:
+            # One bad unit must not take the rest of the batch with it
+            logger.error(f"Write-behind batch failed, retrying unit by unit: {e}")
+            written = []
+            for unit in batch:
+                try:
+                    with self.db_manager.transaction():
+                        written.extend(self._write_unit(unit))
+                except Exception as unit_error:
+                    logger.error(f"Write-behind statement failed: {unit_error}")
+                    failed += len(unit)
+
+        with self._condition:
+            self._stats["batches"] += 1
+            self._stats["written"] += len(written)
+            self._stats["failed"] += failed
+
+        for on_written, row_id in written:
+            if on_written is None:
+                continue
+            try:
+                on_written(row_id)
+            except Exception as e:
+                logger.error(f"Write-behind callback failed: {e}")
+
+    def _write_unit(self, unit):
+        """Run one unit's statements; returns (on_written, row_id) pairs."""
+        return [
+            (on_written, self.db_manager.execute_insert(query, params))
+            for query, params, on_written in unit
+        ]
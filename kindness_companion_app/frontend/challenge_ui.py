@@ -454,12 +454,8 @@ class ChallengeListWidget(QWidget):
         )
         subscribed_ids = {challenge["id"] for challenge in user_challenges}
 
-        # Get streaks for subscribed challenges
-        streaks = {}
-        for challenge_id in subscribed_ids:
-            streaks[challenge_id] = self.progress_tracker.get_streak(
-                self.current_user["id"], challenge_id
-            )
+        # Get streaks for all subscribed challenges in one lookup
+        streaks = self.progress_tracker.get_streaks(self.current_user["id"])
 
         # Create challenge cards without adding to layout yet
         all_cards = []
@@ -598,6 +594,7 @@ class ChallengeListWidget(QWidget):
             if challenge_id in self.challenge_cards:
                 card = self.challenge_cards[challenge_id]
                 card.update_ui(is_subscribed=True, streak=0)
+            self.progress_tracker.invalidate_dashboard_stats(self.current_user["id"])
             # 发射信号，通知主窗口刷新其他界面
             self.challenge_subscription_changed.emit()
             # 弹窗时始终传递主窗口parent
@@ -638,6 +635,9 @@ class ChallengeListWidget(QWidget):
                 if challenge_id in self.challenge_cards:
                     card = self.challenge_cards[challenge_id]
                     card.update_ui(is_subscribed=False, streak=0)
+                self.progress_tracker.invalidate_dashboard_stats(
+                    self.current_user["id"]
+                )
                 self.challenge_subscription_changed.emit()
 
     def resizeEvent(self, event):
@@ -0,0 +1,152 @@
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+
+class _LoadSignals(QObject):
+    """Signals for a single load job (QRunnable cannot define signals itself)."""
+
+    done = Signal(str, object, object)  # key, job, result
+    error = Signal(str, object, str)  # key, job, message
+
+
+class _LoadJob(QRunnable):
+    """Runs one loader function on a thread pool worker."""
+
+    def __init__(self, key: str, func: Callable, args: tuple, kwargs: Dict[str, Any]):
+        super().__init__()
+        self.setAutoDelete(False)  # DataLoader keeps a reference until delivery
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = _LoadSignals()
+
+    def run(self) -> None:
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            logging.exception(f"Background load failed in {self.func!r}")
+            self.signals.error.emit(self.key, self, str(e))
+        else:
+            self.signals.done.emit(self.key, self, result)
+
+
+class DataLoader(QObject):
+    """
+    Runs blocking data queries on a thread pool and delivers results on the
+    GUI thread.
+
+    Every request has a ``key`` naming the slot it fills ("progress",
+    "achievements", ...). Only the newest request per key is delivered:
+
+    * a request identical to the one already running for that key is
+      coalesced into it instead of querying twice;
+    * a request with different arguments supersedes the pending one, which is
+      taken off the queue if it has not started yet and otherwise has its
+      result dropped when it finishes.
+
+    Results arrive through ``loaded(key, result)`` / ``failed(key, message)``
+    and through the optional per-request callbacks.
+    """
+
+    loaded = Signal(str, object)
+    failed = Signal(str, str)
+
+    def __init__(self, parent: Optional[QObject] = None, max_threads: int = 2):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        # key -> (job, request signature, callback, error_callback)
+        self._pending: Dict[str, tuple] = {}
+
+    def request(
+        self,
+        key: str,
+        func: Callable,
+        *args: Any,
+        callback: Optional[Callable[[Any], None]] = None,
+        error_callback: Optional[Callable[[str], None]] = None,
+        **kwargs: Any,
+    ) -> bool:
+        """
+        Run ``func(*args, **kwargs)`` off the GUI thread.
+
+        Args:
+            key (str): Result slot; newer requests with the same key win
+            func (callable): Blocking function to run; must not touch widgets
+            *args: Positional arguments for ``func``
+            callback (callable, optional): Called on the GUI thread with the
+                result
+            error_callback (callable, optional): Called on the GUI thread with
+                the error message if ``func`` raises
+            **kwargs: Keyword arguments for ``func``
+
+        Returns:
+            bool: True if a new job was started, False if the request was
+                coalesced into an identical running one
+        """
+        signature = (func, args, tuple(sorted(kwargs.items())))
+        pending = self._pending.get(key)
+        if pending is not None:
+            job, pending_signature = pending[0], pending[1]
+            if pending_signature == signature:
+                # Same query already on its way; only refresh the callbacks
+                self._pending[key] = (job, signature, callback, error_callback)
+                return False
+            self.cancel(key)
+
+        job = _LoadJob(key, func, args, kwargs)
+        # Bound to this GUI-thread object, so delivery is queued onto its thread
+        job.signals.done.connect(self._deliver)
+        job.signals.error.connect(self._fail)
+        self._pending[key] = (job, signature, callback, error_callback)
+        self.pool.start(job)
+        return True
+
+    def cancel(self, key: str) -> None:
+        """Forget the pending request for ``key``; its result will be dropped."""
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            # Not started yet: take it off the queue entirely
+            self.pool.tryTake(pending[0])
+
+    def cancel_all(self) -> None:
+        """Forget every pending request."""
+        for key in list(self._pending):
+            self.cancel(key)
+
+    def is_pending(self, key: str) -> bool:
+        """Whether a request for ``key`` has not been delivered yet."""
+        return key in self._pending
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Block until all started jobs have finished (used on shutdown/tests)."""
+        return self.pool.waitForDone(msecs)
+
+    def _take_current(self, key: str, job: _LoadJob) -> Optional[tuple]:
+        pending = self._pending.get(key)
+        if pending is None or pending[0] is not job:
+            return None  # Superseded or cancelled
+        return self._pending.pop(key)
+
+    @Slot(str, object, object)
+    def _deliver(self, key: str, job: _LoadJob, result: Any) -> None:
+        pending = self._take_current(key, job)
+        if pending is None:
+            return
+        callback = pending[2]
+        if callback is not None:
+            callback(result)
+        self.loaded.emit(key, result)
+
+    @Slot(str, object, str)
+    def _fail(self, key: str, job: _LoadJob, message: str) -> None:
+        pending = self._take_current(key, job)
+        if pending is None:
+            return
+        error_callback = pending[3]
+        if error_callback is not None:
+            error_callback(message)
+        self.failed.emit(key, message)
@@ -0,0 +1,210 @@
+import logging
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+logger = logging.getLogger(__name__)
+
+# Events where only the newest one matters: a reply to an older chat message
+# is pointless once the user has already sent another.
+SUPERSEDING_EVENT_TYPES = frozenset({"user_message"})
+
+
+class _PetEvent:
+    """One queued call to the pet event handler."""
+
+    __slots__ = ("user_id", "event_type", "event_data", "future", "superseded")
+
+    def __init__(self, user_id: int, event_type: str, event_data: dict):
+        self.user_id = user_id
+        self.event_type = event_type
+        self.event_data = event_data
+        self.future: Future = Future()
+        self.superseded = False
+
+
+class _PetEventSignals(QObject):
+    """Signals for a running pet event (QRunnable cannot define signals itself)."""
+
+    done = Signal(object, object)  # event, response
+    error = Signal(object, str)  # event, message
+    chunk = Signal(object, str)  # event, streamed dialogue text
+
+
+class _PetEventJob(QRunnable):
+    """Runs the handler for one pet event on the worker thread."""
+
+    def __init__(self, handler: Callable, event: _PetEvent, streaming: bool = False):
+        super().__init__()
+        self.setAutoDelete(False)  # PetEventExecutor keeps a reference until delivery
+        self.handler = handler
+        self.event = event
+        self.streaming = streaming
+        self.signals = _PetEventSignals()
+
+    def run(self) -> None:
+        event = self.event
+        kwargs = {}
+        if self.streaming:
+            kwargs["on_chunk"] = partial(self.signals.chunk.emit, event)
+        try:
+            response = self.handler(
+                event.user_id, event.event_type, event.event_data, **kwargs
+            )
+        except Exception as e:
+            logger.error(f"Error calling pet event handler: {e}", exc_info=True)
+            event.future.set_exception(e)
+            self.signals.error.emit(event, str(e))
+        else:
+            event.future.set_result(response)
+            self.signals.done.emit(event, response)
+
+
+class PetEventExecutor(QObject):
+    """
+    Runs pet events (emotion analysis + dialogue generation) off the GUI thread.
+
+    Events are handled one at a time on a dedicated worker thread, because the
+    handler keeps per-user emotion and conversation state. While one is
+    running, later events wait in a bounded queue:
+
+    * a new ``user_message`` supersedes any queued or running one, whose reply
+      is dropped instead of shown;
+    * when the queue is full the oldest waiting event is dropped, so a burst
+      of check-ins cannot pile up blocking API requests.
+
+    Responses arrive on the GUI thread through ``response_ready`` and
+    ``event_failed``; ``submit`` also returns a ``concurrent.futures.Future``.
+    With ``streaming`` enabled the handler also receives an ``on_chunk``
+    callback, and the dialogue text it reports is relayed through
+    ``response_chunk`` (for events that have not been superseded) before the
+    final ``response_ready``.
+    """
+
+    response_ready = Signal(int, str, dict)  # user_id, event_type, response
+    response_chunk = Signal(int, str, str)  # user_id, event_type, dialogue text
+    event_failed = Signal(int, str, str)  # user_id, event_type, message
+    event_dropped = Signal(int, str)  # user_id, event_type
+
+    def __init__(
+        self,
+        handler: Callable[[int, str, dict], Dict[str, Any]],
+        parent: Optional[QObject] = None,
+        max_pending: int = 3,
+        streaming: bool = False,
+    ):
+        """
+        Args:
+            handler (callable): ``handler(user_id, event_type, event_data)``
+                returning the pet response dictionary
+            parent (QObject, optional): Parent object
+            max_pending (int): Maximum number of events waiting behind the
+                running one
+            streaming (bool): Pass ``on_chunk`` to the handler and relay the
+                streamed text through ``response_chunk``
+        """
+        super().__init__(parent)
+        self.handler = handler
+        self.max_pending = max_pending
+        self.streaming = streaming
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._queue: deque = deque()
+        self._running: Optional[_PetEvent] = None
+        # Keeps the running job (and its signals object) alive until delivery
+        self._running_job: Optional[_PetEventJob] = None
+        self._retired_job: Optional[_PetEventJob] = None
+
+    def submit(self, user_id: int, event_type: str, event_data: dict) -> Future:
+        """
+        Queue a pet event.
+
+        Args:
+            user_id (int): User ID
+            event_type (str): Event type passed to the handler
+            event_data (dict): Event payload passed to the handler
+
+        Returns:
+            Future: Resolves with the handler's response, or is cancelled if
+                the event is dropped before it starts
+        """
+        event = _PetEvent(user_id, event_type, event_data)
+
+        if event_type in SUPERSEDING_EVENT_TYPES:
+            for queued in [e for e in self._queue if e.event_type == event_type]:
+                self._queue.remove(queued)
+                self._drop(queued)
+            if self._running is not None and self._running.event_type == event_type:
+                self._running.superseded = True
+
+        while len(self._queue) >= self.max_pending:
+            self._drop(self._queue.popleft())
+
+        self._queue.append(event)
+        self._start_next()
+        return event.future
+
+    def cancel_all(self) -> None:
+        """Drop every waiting event and ignore the reply of the running one."""
+        while self._queue:
+            self._drop(self._queue.popleft())
+        if self._running is not None:
+            self._running.superseded = True
+
+    def is_busy(self) -> bool:
+        """Whether an event is running or waiting."""
+        return self._running is not None or bool(self._queue)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        """Block until the running event has finished (used on shutdown/tests)."""
+        return self.pool.waitForDone(msecs)
+
+    def _drop(self, event: _PetEvent) -> None:
+        logger.info(f"Dropping superseded pet event: {event.event_type}")
+        event.future.cancel()
+        self.event_dropped.emit(event.user_id, event.event_type)
+
+    def _start_next(self) -> None:
+        if self._running is not None or not self._queue:
+            return
+        event = self._queue.popleft()
+        if not event.future.set_running_or_notify_cancel():
+            self._start_next()
+            return
+        job = _PetEventJob(self.handler, event, self.streaming)
+        # Bound to this GUI-thread object, so delivery is queued onto its thread
+        job.signals.done.connect(self._deliver)
+        job.signals.error.connect(self._fail)
+        job.signals.chunk.connect(self._relay_chunk)
+        self._running = event
+        self._running_job = job
+        self.pool.start(job)
+
+    def _finish(self, event: _PetEvent) -> bool:
+        """Mark ``event`` finished, start the next one; True if it should be shown."""
+        if event is self._running:
+            self._running = None
+            # The worker may still be returning from run(); keep the job alive
+            # until the next one is delivered
+            self._retired_job, self._running_job = self._running_job, None
+        self._start_next()
+        return not event.superseded
+
+    @Slot(object, str)
+    def _relay_chunk(self, event: _PetEvent, text: str) -> None:
+        # Chunks are queued ahead of the event's done/error signal
+        if event is self._running and not event.superseded:
+            self.response_chunk.emit(event.user_id, event.event_type, text)
+
+    @Slot(object, object)
+    def _deliver(self, event: _PetEvent, response: Any) -> None:
+        if self._finish(event):
+            self.response_ready.emit(event.user_id, event.event_type, response or {})
+
+    @Slot(object, str)
+    def _fail(self, event: _PetEvent, message: str) -> None:
+        if self._finish(event):
+            self.event_failed.emit(event.user_id, event.event_type, message)
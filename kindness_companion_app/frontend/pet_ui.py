@@ -21,6 +21,7 @@ from PySide6.QtGui import (
     QPainterPath,
     QIcon,
     QRegion,
+    QTextCursor,
 )
 from datetime import datetime
 
@@ -77,6 +78,8 @@ except ImportError as e:
 # Import UserManager
 from kindness_companion_app.backend.user_manager import UserManager
 
+from .pet_event_executor import PetEventExecutor
+
 logger = logging.getLogger(__name__)
 
 
@@ -91,6 +94,9 @@ class PetWidget(QWidget):
         self.chat_messages = (
             []
         )  # 存储聊天消息的列表，格式：[{'message': str, 'is_user': bool, 'timestamp': datetime}, ...]
+        # AI回复流式输出时正在增长的消息（chat_messages中的条目）及其在文档中的起始位置
+        self._streaming_message = None
+        self._stream_start = 0
 
         # Initialize enhanced dialogue generator if possible
         try:
@@ -110,6 +116,14 @@ class PetWidget(QWidget):
                 f"Error initializing enhanced dialogue generator: {e}", exc_info=True
             )
 
+        # Pet events run on a worker thread so API calls never block the window
+        self.pet_executor = PetEventExecutor(
+            self._run_pet_event, parent=self, streaming=True
+        )
+        self.pet_executor.response_ready.connect(self._on_pet_response)
+        self.pet_executor.response_chunk.connect(self._on_pet_chunk)
+        self.pet_executor.event_failed.connect(self._on_pet_event_failed)
+
         self.setup_ui()
         self.connect_signals()  # 连接信号
 
@@ -274,11 +288,10 @@ class PetWidget(QWidget):
         # --- End AI Consent Check Removed ---
 
     def _call_ai_handler(self, user_id: int, event_type: str, event_data: dict):
-        """Internal method to actually call the AI handler."""
+        """Internal method to queue an event for the AI handler."""
         logger.info(
             f"Calling AI core: User {user_id}, Type: {event_type}, Data: {event_data}"
         )
-        self.pet_status_label.setText("正在思考...")  # Changed thinking text
 
         # Check if handle_pet_event is available
         if handle_pet_event is None:
@@ -291,27 +304,104 @@ class PetWidget(QWidget):
             )
             return
 
-        try:
-            # Log the type of handle_pet_event for debugging
-            logger.info(f"handle_pet_event type: {type(handle_pet_event)}")
-            logger.info(f"handle_pet_event callable: {callable(handle_pet_event)}")
-
-            # Call the AI handler
-            logger.info("About to call handle_pet_event...")
-            response = handle_pet_event(user_id, event_type, event_data)
-            logger.info(f"Received AI response: {response}")
-            self.update_pet_display(response)
-        except Exception as e:
-            logger.error(f"Error calling handle_pet_event: {e}", exc_info=True)
-            self.update_pet_display(
-                {"dialogue": "哎呀！好像出错了。", "suggested_animation": "confused"}
-            )  # Example error state
+        # Show the thinking state right away; the reply arrives asynchronously
+        self.update_pet_display({"suggested_animation": "thinking"})
+        self.pet_status_label.setText("正在思考...")  # Changed thinking text
+        self.pet_executor.submit(user_id, event_type, event_data)
+
+    @staticmethod
+    def _run_pet_event(
+        user_id: int, event_type: str, event_data: dict, on_chunk=None
+    ) -> dict:
+        """Runs on the pet executor's worker thread; must not touch widgets."""
+        return handle_pet_event(user_id, event_type, event_data, on_chunk=on_chunk)
+
+    @Slot(int, str, str)
+    def _on_pet_chunk(self, user_id: int, event_type: str, chunk: str):
+        """Grows the AI chat bubble as the reply is streamed in."""
+        if not self.current_user or self.current_user.get("id") != user_id:
+            return
+        if self._streaming_message is None:
+            self._streaming_message = {
+                "message": chunk,
+                "is_user": False,
+                "timestamp": datetime.now(),
+            }
+            self.chat_messages.append(self._streaming_message)
+            self._stream_start = self._chat_end_position()
+            self._render_message_to_ui(
+                chunk, False, self._streaming_message["timestamp"]
+            )
+        else:
+            self._streaming_message["message"] += chunk
+            self._rerender_streaming_message()
+
+    def _chat_end_position(self) -> int:
+        """聊天记录文档末尾的光标位置"""
+        return self.chat_history.document().characterCount() - 1
+
+    def _rerender_streaming_message(self):
+        """用最新文本替换正在流式输出的消息（它总是文档中的最后一条）"""
+        cursor = QTextCursor(self.chat_history.document())
+        cursor.setPosition(self._stream_start)
+        cursor.movePosition(
+            QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor
+        )
+        cursor.removeSelectedText()
+        self._render_message_to_ui(
+            self._streaming_message["message"],
+            False,
+            self._streaming_message["timestamp"],
+        )
+
+    def _finish_streaming_message(self, final_text: str = "") -> bool:
+        """
+        结束流式输出的消息。
+
+        Args:
+            final_text (str): 完整回复；与已显示内容不同时替换之
+
+        Returns:
+            bool: 是否存在正在流式输出的消息
+        """
+        if self._streaming_message is None:
+            return False
+        if final_text and final_text != self._streaming_message["message"]:
+            self._streaming_message["message"] = final_text
+            self._rerender_streaming_message()
+        self._streaming_message = None
+        return True
+
+    @Slot(int, str, dict)
+    def _on_pet_response(self, user_id: int, event_type: str, response: dict):
+        """Shows an AI response delivered by the pet executor."""
+        if not self.current_user or self.current_user.get("id") != user_id:
+            logger.info(f"Ignoring pet response for inactive user {user_id}")
+            return
+        logger.info(f"Received AI response: {response}")
+        # A streamed reply is already in the chat; only settle its final text
+        streamed = self._finish_streaming_message(response.get("dialogue", ""))
+        self.update_pet_display(response, add_to_history=not streamed)
+
+    @Slot(int, str, str)
+    def _on_pet_event_failed(self, user_id: int, event_type: str, message: str):
+        """Shows the error state when the AI handler raised."""
+        if not self.current_user or self.current_user.get("id") != user_id:
+            return
+        logger.error(f"Error calling handle_pet_event ({event_type}): {message}")
+        self._finish_streaming_message()
+        self.update_pet_display(
+            {"dialogue": "哎呀！好像出错了。", "suggested_animation": "confused"}
+        )  # Example error state
 
     def add_message_to_history(self, message: str, is_user: bool = True):
         """添加消息到聊天历史记录"""
         if not message:
             return
 
+        # 新消息出现在流式消息之后，后者不再增长
+        self._streaming_message = None
+
         # 获取当前时间
         current_time = datetime.now()
 
@@ -381,12 +471,21 @@ class PetWidget(QWidget):
 
         # 重新渲染所有保存的消息
         for msg_data in self.chat_messages:
+            if msg_data is self._streaming_message:
+                self._stream_start = self._chat_end_position()
             self._render_message_to_ui(
                 msg_data["message"], msg_data["is_user"], msg_data["timestamp"]
             )
 
-    def update_pet_display(self, response: dict):
-        """Updates the pet animation GIF and dialogue bubble."""
+    def update_pet_display(self, response: dict, add_to_history: bool = True):
+        """
+        Updates the pet animation GIF and dialogue bubble.
+
+        Args:
+            response (dict): Pet response from the AI handler
+            add_to_history (bool): Add the dialogue to the chat history; False
+                when it has already been streamed there
+        """
         dialogue = response.get("dialogue", "")
         suggested_animation = response.get("suggested_animation", "idle")
         logger.info(
@@ -394,7 +493,7 @@ class PetWidget(QWidget):
         )
 
         # 添加AI回复到聊天历史
-        if dialogue:
+        if dialogue and add_to_history:
             self.add_message_to_history(dialogue, is_user=False)
 
         # --- Update Status Label Text based on animation ---
@@ -528,9 +627,8 @@ class PetWidget(QWidget):
         # 添加用户消息到聊天历史
         self.add_message_to_history(user_message, is_user=True)
 
-        # Clear input and show thinking state
+        # Clear input; _call_ai_handler shows the thinking state
         self.message_input.clear()
-        self.pet_status_label.setText("正在思考...")
 
         # Prepare event data
         event_data = {"message": user_message}
@@ -560,6 +658,8 @@ class PetWidget(QWidget):
 
         else:
             logger.info("PetWidget user set to None (logged out).")
+            # Replies still in flight belong to the previous user
+            self.pet_executor.cancel_all()
             # Clear pet state and hide UI elements
             self.pet_animation_label.clear()
             self.pet_status_label.setText("请先登录")
@@ -568,6 +668,7 @@ class PetWidget(QWidget):
             self.send_button.setEnabled(False)
             self.chat_history.clear()  # 清空聊天历史
             self.chat_messages.clear()  # 清空聊天消息存储
+            self._streaming_message = None
 
     @Slot(str, str)
     def handle_theme_changed(self, theme_type: str, theme_style: str):
@@ -1,5 +1,6 @@
 import datetime
 import logging
+from functools import partial
 
 from PySide6.QtWidgets import (
     QWidget,
@@ -12,8 +13,6 @@ from PySide6.QtWidgets import (
     QCalendarWidget,
     QComboBox,
     QGridLayout,
-    QTableWidget,
-    QTableWidgetItem,
     QHeaderView,
     QSizePolicy,
     QMessageBox,
@@ -54,6 +53,8 @@ from PySide6.QtCharts import (
 
 # Import the custom message box
 from .widgets.animated_message_box import AnimatedMessageBox
+from .widgets.check_in_table_model import CheckInTableModel, UndoButtonDelegate
+from .data_loader import DataLoader
 
 # Import AI report generator
 try:
@@ -234,6 +235,7 @@ class ProgressWidget(QWidget):
         self.report_last_generated = None
         self.report_history = []  # Store report history
         self.ai_report_generator = None  # Initialize AI report generator
+        self.report_fingerprint = None  # Data fingerprint of the report being generated
 
         # Initialize UI attributes to None for clarity
         self.main_layout = None
@@ -256,6 +258,11 @@ class ProgressWidget(QWidget):
         self.achievements_placeholder = None
         self.achievements_spacer = None
         self.progress_table = None
+        self.progress_model = None
+
+        # 后台数据加载：查询在线程池中执行，结果通过信号回到界面线程
+        self.data_loader = DataLoader(self)
+        self.cached_check_ins = []
 
         # New tab-based layout attributes
         self.tab_widget = None
@@ -465,11 +472,16 @@ class ProgressWidget(QWidget):
         layout.setContentsMargins(2, 2, 2, 2)  # 最大化减少内边距为日历腾出最多空间
         layout.setSpacing(4)  # 最大化减少间距为日历腾出最多空间
 
-        # 表格
-        self.progress_table = QTableWidget()
+        # 表格：按需分页加载的模型/视图，排序在 SQL 中完成
+        self.progress_model = CheckInTableModel(self.progress_tracker, parent=self)
+        self.progress_table = QTableView()
         self.progress_table.setObjectName("progress_table")
-        self.progress_table.setColumnCount(4)
-        self.progress_table.setHorizontalHeaderLabels(["日期", "挑战", "分类", "操作"])
+        self.progress_table.setModel(self.progress_model)
+        self.undo_delegate = UndoButtonDelegate(self.progress_table)
+        self.undo_delegate.clicked.connect(self.on_undo_row_clicked)
+        self.progress_table.setItemDelegateForColumn(
+            CheckInTableModel.ACTION_COLUMN, self.undo_delegate
+        )
 
         header = self.progress_table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
@@ -486,11 +498,13 @@ class ProgressWidget(QWidget):
             QHeaderView.ResizeMode.Fixed
         )
         self.progress_table.verticalHeader().setDefaultSectionSize(40)
-        self.progress_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.progress_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.progress_table.setSelectionBehavior(
-            QTableWidget.SelectionBehavior.SelectRows
+            QTableView.SelectionBehavior.SelectRows
         )
         self.progress_table.setAlternatingRowColors(True)
+        header.setSortIndicator(0, Qt.SortOrder.DescendingOrder)
+        self.progress_table.setSortingEnabled(True)
         self.progress_table.setSizePolicy(
             QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding
         )
@@ -645,38 +659,10 @@ class ProgressWidget(QWidget):
         super().resizeEvent(event)
 
     def refresh_chart_layout(self):
-        """刷新图表布局以确保标签正确显示"""
+        """刷新图表布局以确保标签正确显示（使用缓存数据，不重新查询数据库）"""
         if self.pie_view and self.current_user:
-            # 重新绘制图表
             self.pie_view.update()
-            # 如果有数据，重新更新图表
-            if hasattr(self, "current_user") and self.current_user:
-                # 获取当前的check_ins数据并重新更新图表
-                challenge_id = (
-                    self.challenge_combo.currentData() if self.challenge_combo else None
-                )
-                days = self.range_combo.currentData() if self.range_combo else None
-
-                end_date = datetime.date.today()
-                start_date = None
-                if days:
-                    start_date = end_date - datetime.timedelta(days=days - 1)
-
-                if challenge_id:
-                    check_ins = self.progress_tracker.get_check_ins(
-                        self.current_user["id"],
-                        challenge_id,
-                        start_date.isoformat() if start_date else None,
-                        end_date.isoformat(),
-                    )
-                else:
-                    check_ins = self.progress_tracker.get_all_user_check_ins(
-                        self.current_user["id"],
-                        start_date.isoformat() if start_date else None,
-                        end_date.isoformat(),
-                    )
-
-                self.update_charts(check_ins)
+            self.update_charts(self.cached_check_ins)
 
     @Slot(dict)
     def set_user(self, user):
@@ -714,7 +700,7 @@ class ProgressWidget(QWidget):
                 self.challenge_combo.addItem(challenge["title"], challenge["id"])
 
     def load_progress(self):
-        """Load and display progress."""
+        """Load and display progress; the queries run on the data loader."""
         if not self.current_user:
             return
 
@@ -729,54 +715,76 @@ class ProgressWidget(QWidget):
         if days:
             start_date = end_date - datetime.timedelta(days=days - 1)
 
+        # 快速切换挑战或时间范围时，旧请求会被新的请求取代
+        self.data_loader.request(
+            "progress",
+            self.fetch_progress_data,
+            self.current_user["id"],
+            challenge_id,
+            start_date.isoformat() if start_date else None,
+            end_date.isoformat(),
+            days,
+            callback=self.apply_progress_data,
+        )
+        self.update_table(
+            challenge_id,
+            start_date.isoformat() if start_date else None,
+            end_date.isoformat(),
+        )
+        self.load_achievements()
+
+    def fetch_progress_data(self, user_id, challenge_id, start_date, end_date, days):
+        """
+        Query everything the overview needs. Runs on a data loader thread, so
+        it must not touch any widget.
+
+        Returns:
+            dict: ``check_ins``, ``streak`` (None for all challenges) and
+                ``rate`` (None when it does not apply)
+        """
         if challenge_id:
             check_ins = self.progress_tracker.get_check_ins(
-                self.current_user["id"],
-                challenge_id,
-                start_date.isoformat() if start_date else None,
-                end_date.isoformat(),
-            )
-            streak = self.progress_tracker.get_streak(
-                self.current_user["id"], challenge_id
+                user_id, challenge_id, start_date, end_date
             )
+            streak = self.progress_tracker.get_streak(user_id, challenge_id)
+            # Default to 30 days for rate if 'All' selected
             rate = self.progress_tracker.get_completion_rate(
-                self.current_user["id"],
-                challenge_id,
-                days or 30,  # Default to 30 days for rate if 'All' selected
+                user_id, challenge_id, days or 30
             )
-            if self.total_label is not None:
-                self.total_label.setText(f"总打卡次数: {len(check_ins)}")
-            if self.streak_label is not None:
-                self.streak_label.setText(f"当前连续打卡: {streak} 天")
-            if self.rate_label is not None:
-                self.rate_label.setText(f"完成率: {rate * 100:.1f}%")
         else:
             check_ins = self.progress_tracker.get_all_user_check_ins(
-                self.current_user["id"],
-                start_date.isoformat() if start_date else None,
-                end_date.isoformat(),
+                user_id, start_date, end_date
             )
-            unique_dates = set(ci["check_in_date"] for ci in check_ins)
-            if self.total_label is not None:
-                self.total_label.setText(f"总打卡次数: {len(check_ins)}")
-            if self.streak_label is not None:
-                self.streak_label.setText(
-                    "当前连续打卡: - 天"
-                )  # Streak is challenge-specific
+            streak = None  # Streak is challenge-specific
+            rate = None  # Rate doesn't make sense for 'All'
             if days:
                 # Calculate rate based on unique days checked in within the period
-                rate = len(unique_dates) / days if days > 0 else 0
-                if self.rate_label is not None:
-                    self.rate_label.setText(f"完成率: {rate * 100:.1f}%")
+                unique_dates = set(ci["check_in_date"] for ci in check_ins)
+                rate = len(unique_dates) / days
+        return {"check_ins": check_ins, "streak": streak, "rate": rate}
+
+    def apply_progress_data(self, data):
+        """Show the result of ``fetch_progress_data`` (GUI thread)."""
+        if not self.current_user:
+            return
+        check_ins = data["check_ins"]
+        self.cached_check_ins = check_ins
+
+        if self.total_label is not None:
+            self.total_label.setText(f"总打卡次数: {len(check_ins)}")
+        if self.streak_label is not None:
+            streak = data["streak"]
+            self.streak_label.setText(
+                f"当前连续打卡: {streak if streak is not None else '-'} 天"
+            )
+        if self.rate_label is not None:
+            rate = data["rate"]
+            if rate is None:
+                self.rate_label.setText("完成率: - %")
             else:
-                if self.rate_label is not None:
-                    self.rate_label.setText(
-                        "完成率: - %"
-                    )  # Rate doesn't make sense for 'All'
+                self.rate_label.setText(f"完成率: {rate * 100:.1f}%")
 
         self.update_calendar(check_ins)
-        self.update_table(check_ins)
-        self.load_achievements()
         self.update_charts(check_ins)
 
     def update_calendar(self, check_ins):
@@ -829,80 +837,40 @@ class ProgressWidget(QWidget):
         # 隐藏相邻月份的日期
         QTimer.singleShot(50, self.update_calendar_display)
 
-    def update_table(self, check_ins):
+    def update_table(self, challenge_id=None, start_date=None, end_date=None):
         """
-        Update the table with check-in records.
+        Point the check-in table at the records matching the given filters.
+
+        The first page is loaded on the data loader, so a quick run of calendar
+        clicks only shows the last one; the model fetches further pages as the
+        table scrolls.
 
         Args:
-            check_ins (list): List of check-in dictionaries
+            challenge_id (int, optional): Only show this challenge's check-ins
+            start_date (str, optional): Start date in YYYY-MM-DD format
+            end_date (str, optional): End date in YYYY-MM-DD format
         """
-        if self.progress_table is not None:
-            self.progress_table.setRowCount(0)
-
-        # Sort check-ins by date descending
-        sorted_check_ins = sorted(
-            check_ins, key=lambda x: x["check_in_date"], reverse=True
+        if self.progress_model is None:
+            return
+        if not self.current_user:
+            self.data_loader.cancel("table")
+            self.progress_model.clear()
+            return
+        query = self.progress_model.query_for(
+            self.current_user["id"], challenge_id, start_date, end_date
+        )
+        self.data_loader.request(
+            "table",
+            self.progress_model.fetch_first_page,
+            query,
+            callback=partial(self.progress_model.show_first_page, query),
         )
 
-        for i, check_in in enumerate(sorted_check_ins):
-            if self.progress_table is not None:
-                self.progress_table.insertRow(i)
-
-            date_str = check_in["check_in_date"]
-            try:
-                date_obj = datetime.date.fromisoformat(date_str)
-                formatted_date = date_obj.strftime("%Y-%m-%d (%a)")
-            except ValueError:
-                formatted_date = date_str  # Fallback if format is wrong
-            date_item = QTableWidgetItem(formatted_date)
-            date_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            if self.progress_table is not None:
-                self.progress_table.setItem(i, 0, date_item)
-
-            challenge_title = check_in.get("challenge_title")
-            if not challenge_title:
-                challenge = self.challenge_manager.get_challenge_by_id(
-                    check_in["challenge_id"]
-                )
-                challenge_title = challenge["title"] if challenge else "未知挑战"
-            challenge_item = QTableWidgetItem(challenge_title)
-            if self.progress_table is not None:
-                self.progress_table.setItem(i, 1, challenge_item)
-
-            category = check_in.get("category")
-            if not category:
-                challenge = self.challenge_manager.get_challenge_by_id(
-                    check_in["challenge_id"]
-                )
-                category = challenge["category"] if challenge else "未知分类"
-            category_item = QTableWidgetItem(category)
-            category_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            if self.progress_table is not None:
-                self.progress_table.setItem(i, 2, category_item)
-
-            # Action button (Undo)
-            button_widget = QWidget()  # Use a container widget for centering
-            button_layout = QHBoxLayout(button_widget)
-            button_layout.setContentsMargins(5, 2, 5, 2)  # Small margins
-            button_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            undo_button = QPushButton("撤销")
-            undo_button.setObjectName("undo_button")
-            undo_button.setIcon(QIcon(":/icons/rotate-ccw.svg"))
-            undo_button.setIconSize(QSize(16, 16))
-            undo_button.setFixedSize(QSize(80, 28))  # Fixed size for consistency
-            undo_button.setSizePolicy(
-                QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed
-            )
-            undo_button.clicked.connect(
-                lambda checked=False, ci=check_in: self.undo_check_in(ci)
-            )
-            button_layout.addWidget(undo_button)
-            if self.progress_table is not None:
-                self.progress_table.setCellWidget(i, 3, button_widget)
-
-        # Adjust row heights after populating
-        if self.progress_table is not None:
-            self.progress_table.resizeRowsToContents()
+    def on_undo_row_clicked(self, row):
+        """Undo the check-in shown in ``row`` of the table."""
+        check_in = self.progress_model.check_in_at(row) if self.progress_model else None
+        if check_in:
+            self.undo_check_in(check_in)
 
     def clear_progress(self):
         """Clear progress display."""
@@ -913,8 +881,10 @@ class ProgressWidget(QWidget):
         # Reset calendar formatting
         self.update_calendar([])  # Update with empty list to clear highlights
 
-        if self.progress_table is not None:
-            self.progress_table.setRowCount(0)
+        self.data_loader.cancel_all()
+        self.cached_check_ins = []
+        if self.progress_model is not None:
+            self.progress_model.clear()
 
         if self.total_label is not None:
             self.total_label.setText("总打卡次数: 0")
@@ -947,18 +917,8 @@ class ProgressWidget(QWidget):
         else:
             challenge_id = None
 
-        # Get check-ins specifically for the clicked date
-        if challenge_id:
-            check_ins = self.progress_tracker.get_check_ins(
-                self.current_user["id"], challenge_id, date_str, date_str
-            )
-        else:
-            check_ins = self.progress_tracker.get_all_user_check_ins(
-                self.current_user["id"], date_str, date_str
-            )
-
-        # Update table only
-        self.update_table(check_ins)
+        # Update table only, showing check-ins for the clicked date
+        self.update_table(challenge_id, date_str, date_str)
         # Do NOT call load_progress() here, as it would reset the date filter
 
     def undo_check_in(self, check_in):
@@ -975,8 +935,12 @@ class ProgressWidget(QWidget):
             print("[UI] 错误: 用户未登录")
             return
 
-        challenge = self.challenge_manager.get_challenge_by_id(check_in["challenge_id"])
-        challenge_title = challenge["title"] if challenge else "未知挑战"
+        challenge_title = check_in.get("challenge_title")
+        if not challenge_title:
+            challenge = self.challenge_manager.get_challenge_by_id(
+                check_in["challenge_id"]
+            )
+            challenge_title = challenge["title"] if challenge else "未知挑战"
         print(f"[UI] 获取到挑战信息: {challenge_title}")
 
         # 确保日期为字符串且只取日期部分
@@ -1027,26 +991,28 @@ class ProgressWidget(QWidget):
             print("[UI] 用户取消撤销")
 
     def load_achievements(self):
-        """Load and display user achievements/badges within a scroll area."""
+        """Load user achievements/badges in the background and display them."""
         if not self.current_user:
             return
 
-        user_id = self.current_user["id"]
-
-        # --- Fetch achievement data (remains the same) ---
-        total_check_ins = self.progress_tracker.get_total_check_ins(user_id)
-        longest_streak = self.progress_tracker.get_longest_streak_all_challenges(
-            user_id
-        )
-        subscribed_challenges = self.challenge_manager.get_user_challenges(user_id)
-        subscribed_challenges_count = len(subscribed_challenges)
-        eco_check_ins = self.progress_tracker.get_check_ins_count_by_category(
-            user_id, "环保"
-        )
-        community_check_ins = self.progress_tracker.get_check_ins_count_by_category(
-            user_id, "社区服务"
+        self.data_loader.request(
+            "achievements",
+            self.progress_tracker.get_user_dashboard_stats,
+            self.current_user["id"],
+            callback=self.render_achievements,
         )
 
+    def render_achievements(self, stats):
+        """Display achievements/badges within a scroll area (GUI thread)."""
+        if not self.current_user:
+            return
+
+        total_check_ins = stats["total_check_ins"]
+        longest_streak = stats["longest_streak"]
+        subscribed_challenges_count = stats["subscribed_count"]
+        eco_check_ins = stats["category_counts"].get("环保", 0)
+        community_check_ins = stats["category_counts"].get("社区服务", 0)
+
         # --- Define achievements_data (remains the same) ---
         achievements_data = [
             # --- Check-in Milestones ---
@@ -1264,11 +1230,31 @@ class ProgressWidget(QWidget):
             "end_date": datetime.datetime.now().strftime("%Y-%m-%d"),
         }
 
+        # 本周已有报告时立即显示；只有期间数据有变化时才在后台重新生成
+        cached_report = self.progress_tracker.get_weekly_report(
+            report_input["user_id"],
+            report_input["start_date"],
+            report_input["end_date"],
+            check_stale=True,
+        )
+        if cached_report:
+            self.weekly_report_text = cached_report["report_text"]
+            if self.weekly_report_text_edit:
+                self.weekly_report_text_edit.setPlainText(cached_report["report_text"])
+            if not cached_report["stale"]:
+                return
+        # 生成前记录数据指纹，生成期间到达的新数据会让这份报告再次过期
+        self.report_fingerprint = self.progress_tracker.report_fingerprint(
+            report_input["user_id"],
+            report_input["start_date"],
+            report_input["end_date"],
+        )
+
         # 更新UI状态
         if self.generate_report_button:
             self.generate_report_button.setEnabled(False)
             self.generate_report_button.setText("生成中...")
-        if self.weekly_report_text_edit:
+        if self.weekly_report_text_edit and not cached_report:
             self.weekly_report_text_edit.setPlainText("正在生成报告，请稍候...")
         if self.report_progress_bar:
             self.report_progress_bar.setVisible(True)
@@ -1300,6 +1286,7 @@ class ProgressWidget(QWidget):
                 report_text,
                 current_week_start.strftime("%Y-%m-%d"),
                 current_week_end.strftime("%Y-%m-%d"),
+                self.report_fingerprint,
             )
 
         # 更新UI状态
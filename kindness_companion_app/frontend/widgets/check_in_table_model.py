@@ -0,0 +1,241 @@
+import datetime
+import logging
+from typing import Any, Dict, List, Optional
+
+from PySide6.QtCore import QAbstractTableModel, QEvent, QModelIndex, QRect, Qt, Signal
+from PySide6.QtGui import QIcon
+from PySide6.QtWidgets import (
+    QApplication,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+)
+
+
+class CheckInTableModel(QAbstractTableModel):
+    """
+    Lazily paged check-in history for the progress details table.
+
+    Rows are fetched from ``ProgressTracker.get_check_ins_page`` one page at a
+    time as the view scrolls (``canFetchMore``/``fetchMore``), and sorting is
+    delegated to SQL, so opening a long history only loads the first page.
+    """
+
+    HEADERS = ["日期", "挑战", "分类", "操作"]
+    ACTION_COLUMN = 3
+    # Sortable columns -> ProgressTracker sort keys
+    SORT_KEYS = {0: "date", 1: "challenge", 2: "category"}
+    CheckInRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, progress_tracker: Any, page_size: int = 200, parent=None):
+        super().__init__(parent)
+        self.progress_tracker = progress_tracker
+        self.page_size = page_size
+        self._rows: List[Dict[str, Any]] = []
+        self._has_more = False
+        self._query: Optional[Dict[str, Any]] = None
+        self._sort_by = "date"
+        self._order = "desc"
+        self._undo_icon = QIcon(":/icons/rotate-ccw.svg")
+
+    def set_query(
+        self,
+        user_id: int,
+        challenge_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> None:
+        """Show the check-ins matching the given filters, starting from page one."""
+        self._query = self.query_for(user_id, challenge_id, start_date, end_date)
+        self.reload()
+
+    def query_for(
+        self,
+        user_id: int,
+        challenge_id: Optional[int] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Return the query for the given filters in the current sort order."""
+        return {
+            "user_id": user_id,
+            "challenge_id": challenge_id,
+            "start_date": start_date,
+            "end_date": end_date,
+            "sort_by": self._sort_by,
+            "order": self._order,
+        }
+
+    def fetch_first_page(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Fetch page one of ``query`` (see ``query_for``).
+
+        Reads no model state, so it can run on a worker thread; hand the rows
+        to ``show_first_page`` on the GUI thread.
+        """
+        return self._fetch_page(query, 0)
+
+    def show_first_page(
+        self, query: Dict[str, Any], rows: List[Dict[str, Any]]
+    ) -> None:
+        """Show ``rows`` from ``fetch_first_page`` as page one of ``query``."""
+        if (query["sort_by"], query["order"]) != (self._sort_by, self._order):
+            # Sorted while the page was loading; it no longer matches
+            self._query = dict(query, sort_by=self._sort_by, order=self._order)
+            self.reload()
+            return
+        self.beginResetModel()
+        self._query = query
+        self._rows = list(rows)
+        self._has_more = len(rows) >= self.page_size
+        self.endResetModel()
+
+    def reload(self) -> None:
+        """Drop loaded rows and fetch the first page again."""
+        self.beginResetModel()
+        self._rows = []
+        self._has_more = self._query is not None
+        self.endResetModel()
+        if self._has_more:
+            self.fetchMore(QModelIndex())
+
+    def clear(self) -> None:
+        """Remove all rows and forget the current query."""
+        self.beginResetModel()
+        self._rows = []
+        self._has_more = False
+        self._query = None
+        self.endResetModel()
+
+    def check_in_at(self, row: int) -> Optional[Dict[str, Any]]:
+        """Return the check-in dictionary shown in ``row``."""
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def _fetch_page(self, query: Dict[str, Any], offset: int) -> List[Dict[str, Any]]:
+        try:
+            return self.progress_tracker.get_check_ins_page(
+                query["user_id"],
+                query["challenge_id"],
+                offset=offset,
+                limit=self.page_size,
+                order=query["order"],
+                sort_by=query["sort_by"],
+                start_date=query["start_date"],
+                end_date=query["end_date"],
+            )
+        except Exception as e:
+            logging.error(f"Error loading check-in page: {e}")
+            return []
+
+    # --- QAbstractTableModel interface ---
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid() or not self._has_more:
+            return
+        page = self._fetch_page(self._query, len(self._rows))
+        self._has_more = len(page) >= self.page_size
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder) -> None:
+        sort_by = self.SORT_KEYS.get(column)
+        if sort_by is None:
+            return
+        self._sort_by = sort_by
+        self._order = "asc" if order == Qt.SortOrder.AscendingOrder else "desc"
+        if self._query is not None:
+            self._query = dict(self._query, sort_by=self._sort_by, order=self._order)
+            self.reload()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+            and 0 <= section < len(self.HEADERS)
+        ):
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        check_in = self._rows[index.row()]
+        column = index.column()
+
+        if role == self.CheckInRole:
+            return check_in
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                date_str = check_in["check_in_date"]
+                try:
+                    return datetime.date.fromisoformat(date_str).strftime(
+                        "%Y-%m-%d (%a)"
+                    )
+                except (TypeError, ValueError):
+                    return date_str  # Fallback if format is wrong
+            if column == 1:
+                return check_in.get("challenge_title") or "未知挑战"
+            if column == 2:
+                return check_in.get("category") or "未知分类"
+            if column == self.ACTION_COLUMN:
+                return "撤销"
+        if role == Qt.ItemDataRole.DecorationRole and column == self.ACTION_COLUMN:
+            return self._undo_icon
+        if role == Qt.ItemDataRole.TextAlignmentRole and column != 1:
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+
+class UndoButtonDelegate(QStyledItemDelegate):
+    """
+    Paints the action column as a push button without creating a widget per row.
+
+    Emits ``clicked(row)`` when the painted button is released.
+    """
+
+    clicked = Signal(int)
+
+    BUTTON_SIZE = (80, 28)
+
+    def _button_rect(self, option) -> QRect:
+        width, height = self.BUTTON_SIZE
+        rect = QRect(0, 0, width, height)
+        rect.moveCenter(option.rect.center())
+        return rect
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = self._button_rect(option)
+        button.text = index.data(Qt.ItemDataRole.DisplayRole)
+        icon = index.data(Qt.ItemDataRole.DecorationRole)
+        if icon is not None:
+            button.icon = icon
+            button.iconSize = option.decorationSize
+        button.state = QStyle.StateFlag.State_Enabled
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter)
+
+    def editorEvent(self, event, model, option, index):
+        if (
+            event.type() == QEvent.Type.MouseButtonRelease
+            and event.button() == Qt.MouseButton.LeftButton
+            and self._button_rect(option).contains(event.position().toPoint())
+        ):
+            self.clicked.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
@@ -209,17 +209,10 @@ class StatsAchievementsWidget(QWidget):
             return
 
         try:
-            total_check_ins = self.progress_tracker.get_total_check_ins(user_id)
-            self.total_label.setText(str(total_check_ins))
-
-            longest_streak = self.progress_tracker.get_longest_streak_all_challenges(
-                user_id
-            )
-            self.streak_label.setText(str(longest_streak))
-
-            challenges = self.challenge_manager.get_user_challenges(user_id)
-            subscribed_challenges_count = len(challenges)
-            self.challenges_label.setText(str(subscribed_challenges_count))
+            stats = self.progress_tracker.get_user_dashboard_stats(user_id)
+            self.total_label.setText(str(stats["total_check_ins"]))
+            self.streak_label.setText(str(stats["longest_streak"]))
+            self.challenges_label.setText(str(stats["subscribed_count"]))
 
             self.load_achievements()
         except Exception as e:
@@ -245,19 +238,13 @@ class StatsAchievementsWidget(QWidget):
             return
 
         try:
-            # Fetch necessary data
-            total_check_ins = self.progress_tracker.get_total_check_ins(user_id)
-            longest_streak = self.progress_tracker.get_longest_streak_all_challenges(
-                user_id
-            )
-            subscribed_challenges = self.challenge_manager.get_user_challenges(user_id)
-            subscribed_challenges_count = len(subscribed_challenges)
-            eco_check_ins = self.progress_tracker.get_check_ins_count_by_category(
-                user_id, "环保"
-            )
-            community_check_ins = self.progress_tracker.get_check_ins_count_by_category(
-                user_id, "社区服务"
-            )
+            # Fetch necessary data (cached until the next check-in)
+            stats = self.progress_tracker.get_user_dashboard_stats(user_id)
+            total_check_ins = stats["total_check_ins"]
+            longest_streak = stats["longest_streak"]
+            subscribed_challenges_count = stats["subscribed_count"]
+            eco_check_ins = stats["category_counts"].get("环保", 0)
+            community_check_ins = stats["category_counts"].get("社区服务", 0)
 
             # Define achievements data
             achievements_data: List[Dict[str, Any]] = [
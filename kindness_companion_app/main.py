@@ -232,8 +232,20 @@ def main():
     parser.add_argument(
         "--reset-login", action="store_true", help="清除登录状态，显示登录界面"
     )
+    parser.add_argument(
+        "--rebuild-stats",
+        action="store_true",
+        help="根据打卡记录重新计算连续打卡统计表后退出",
+    )
     args = parser.parse_args()
 
+    # 修复模式：重新计算 user_challenge_stats，不启动界面
+    if args.rebuild_stats:
+        db_manager = DatabaseManager()
+        rebuilt = db_manager.rebuild_challenge_stats()
+        print(f"Rebuilt challenge stats for {rebuilt} user/challenge pairs.")
+        return
+
     # 创建应用程序实例
     print("DEBUG: Creating QApplication...")
     app = QApplication(sys.argv)
@@ -268,7 +280,9 @@ def main():
 
     # Initialize backend managers
     print("DEBUG: Initializing DatabaseManager...")
-    db_manager = DatabaseManager()
+    db_manager = DatabaseManager(use_pool=True)
+    # 退出时关闭连接池中的所有长连接
+    app.aboutToQuit.connect(db_manager.close)
     print("DEBUG: DatabaseManager initialized.")
     print("DEBUG: Initializing UserManager...")
     user_manager = UserManager(db_manager)
@@ -311,7 +325,9 @@ def main():
         )
 
         if initialize_enhanced_dialogue:
-            initialize_enhanced_dialogue(db_manager)
+            # Pet events already run off the GUI thread; also overlap the
+            # emotion-analysis and dialogue API calls within each event
+            initialize_enhanced_dialogue(db_manager, concurrent=True)
             print("DEBUG: Enhanced Dialogue Generator initialized.")
         else:
             print("DEBUG: initialize_enhanced_dialogue function not available.")
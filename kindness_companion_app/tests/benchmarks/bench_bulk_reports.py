@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: weekly reports for every user, one by one vs. a process pool.
+
+Fills a temporary database with a week of synthetic chat for many users,
+then generates every user's report first in this process, one user after
+another (what calling ``generate_weekly_report`` per user amounts to), and
+then with ``generate_all_weekly_reports`` at increasing worker counts. The
+speed-up is bounded by the number of CPU cores.
+
+Usage (from the repository root):
+    python -m kindness_companion_app.tests.benchmarks.bench_bulk_reports
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+
+from kindness_companion_app.ai_core.conversation_analyzer import ConversationAnalyzer
+from kindness_companion_app.ai_core.report_generator import (
+    PERMAReportGenerator,
+    generate_all_weekly_reports,
+)
+from kindness_companion_app.backend.database_manager import DatabaseManager
+
+PHRASES = [
+    "今天帮助了一位老人过马路，感觉很开心",
+    "和朋友一起完成了项目，很有成就感",
+    "有点累，觉得做什么都没有意义",
+    "学到了很多新东西，专注了一整个下午",
+    "I feel grateful for my family today",
+]
+
+
+def fill_database(db_manager, users, per_day, seed):
+    rng = random.Random(seed)
+    now = datetime.now()
+    rows = (
+        {
+            "user_id": user_id,
+            "message": rng.choice(PHRASES),
+            "is_user": 1,
+            "timestamp": (now - timedelta(days=day, minutes=n)).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            ),
+            "topic": rng.choice(["joy", "sadness", "neutral"]),
+        }
+        for user_id in range(1, users + 1)
+        for day in range(7)
+        for n in range(per_day)
+    )
+    db_manager.bulk_insert("conversation_history", rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--per-day", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    temp_db_file.close()
+    db_manager = DatabaseManager(temp_db_file.name)
+    try:
+        ConversationAnalyzer(db_manager)  # Creates the analysis tables
+        fill_database(db_manager, args.users, args.per_day, args.seed)
+        generator = PERMAReportGenerator(db_manager)
+        generator.rollup.backfill()
+        print(
+            f"{args.users} users, {args.users * args.per_day * 7} messages, "
+            f"{os.cpu_count()} CPU cores"
+        )
+
+        started = time.perf_counter()
+        for user_id in range(1, args.users + 1):
+            generator.generate_comprehensive_report(user_id, 7)
+        serial_time = time.perf_counter() - started
+        print(
+            f"one by one        {serial_time:6.2f} s | "
+            f"{args.users / serial_time:7.1f} reports/s"
+        )
+
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            stats = generate_all_weekly_reports(
+                db_manager, max_workers=workers, use_cache=False
+            )
+            print(
+                f"{workers:2d} worker(s)      {stats['elapsed']:6.2f} s | "
+                f"{stats['reports_per_second']:7.1f} reports/s | "
+                f"x{serial_time / stats['elapsed']:.1f}"
+            )
+            workers *= 2
+    finally:
+        db_manager.close()
+        os.unlink(temp_db_file.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: queries/sec with per-query connections vs. the connection pool.
+
+Builds a temporary database with 100k ``progress`` rows and runs the same
+indexed SELECT through ``DatabaseManager.execute_query`` in both modes, first
+from a single thread and then from several worker threads.
+
+Usage (from the repository root):
+    python -m kindness_companion_app.tests.benchmarks.bench_connection_pool
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+
+from kindness_companion_app.backend.database_manager import DatabaseManager
+
+USERS = 50
+CHALLENGES = 40
+QUERY = """
+SELECT check_in_date FROM progress
+WHERE user_id = ? AND challenge_id = ?
+ORDER BY check_in_date DESC
+LIMIT 30
+"""
+
+
+def seed_progress(db_manager, rows):
+    """Insert ``rows`` synthetic check-ins with a chunked bulk insert."""
+    start = date(2020, 1, 1)
+    days_per_pair = rows // (USERS * CHALLENGES) + 1
+
+    def generate():
+        produced = 0
+        for user_id in range(1, USERS + 1):
+            for challenge_id in range(1, CHALLENGES + 1):
+                for day in range(days_per_pair):
+                    if produced >= rows:
+                        return
+                    produced += 1
+                    yield {
+                        "user_id": user_id,
+                        "challenge_id": challenge_id,
+                        "check_in_date": (start + timedelta(days=day)).isoformat(),
+                    }
+
+    db_manager.bulk_insert("progress", generate(), chunk_size=10_000)
+
+
+def run_queries(db_manager, count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        db_manager.execute_query(
+            QUERY, (rng.randint(1, USERS), rng.randint(1, CHALLENGES))
+        )
+
+
+def measure(db_manager, queries, threads):
+    per_thread = queries // threads
+    workers = [
+        threading.Thread(target=run_queries, args=(db_manager, per_thread, i))
+        for i in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    return per_thread * threads / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=5_000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        legacy = DatabaseManager(db_path)
+        seed_progress(legacy, args.rows)
+        print(f"Seeded {args.rows} progress rows in {db_path}")
+
+        pooled = DatabaseManager(db_path, use_pool=True, pool_size=args.threads)
+
+        for label, threads in (("1 thread", 1), (f"{args.threads} threads", args.threads)):
+            legacy_qps = measure(legacy, args.queries, threads)
+            pooled_qps = measure(pooled, args.queries, threads)
+            print(
+                f"{label:>10}: per-query connect {legacy_qps:10.0f} q/s | "
+                f"pooled {pooled_qps:10.0f} q/s | x{pooled_qps / legacy_qps:.1f}"
+            )
+
+        print(f"Pool stats: {pooled.pool_stats()}")
+        pooled.close()
+    finally:
+        os.unlink(db_path)
+
+
+if __name__ == "__main__":
+    main()
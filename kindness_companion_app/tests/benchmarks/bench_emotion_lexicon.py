@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: texts/sec for per-keyword substring scans vs. the lexicon automaton.
+
+Generates synthetic reflection texts and computes the keyword hits the emotion
+analyzer needs, first by testing every keyword with ``in`` (how each analysis
+stage used to scan the text) and then with one ``EMOTION_LEXICON.match`` pass.
+Both paths must find the same keywords; the full ``analyze_emotion_advanced``
+throughput is reported as well.
+
+Usage (from the repository root):
+    python -m kindness_companion_app.tests.benchmarks.bench_emotion_lexicon
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+
+from kindness_companion_app.ai_core.emotion_analyzer import (
+    EMOTION_LEXICON,
+    EMOTION_LEXICONS,
+    EmotionAnalyzer,
+)
+
+FILLER = list("今天我在路上帮助了一位老人，天气晴朗，我们一起聊天。！？ ")
+
+
+def generate_texts(count, seed):
+    rng = random.Random(seed)
+    words = sorted({word for words in EMOTION_LEXICONS.values() for word in words})
+    texts = []
+    for _ in range(count):
+        parts = [
+            rng.choice(words) if rng.random() < 0.25 else rng.choice(FILLER)
+            for _ in range(rng.randint(10, 60))
+        ]
+        texts.append("".join(parts))
+    return texts
+
+
+def scan_substrings(text):
+    """Legacy path: one ``in`` test per keyword per list."""
+    text = text.lower()
+    return {
+        tag: sorted({word for word in words if word in text})
+        for tag, words in EMOTION_LEXICONS.items()
+    }
+
+
+def scan_automaton(text):
+    hits = EMOTION_LEXICON.match(text.lower())
+    return {tag: sorted(hits.patterns(tag)) for tag in hits.tags()}
+
+
+def measure(func, texts):
+    started = time.perf_counter()
+    results = [func(text) for text in texts]
+    return len(texts) / (time.perf_counter() - started), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--texts", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    texts = generate_texts(args.texts, args.seed)
+    print(
+        f"{len(texts)} texts, {EMOTION_LEXICON.size} keyword entries "
+        f"in {len(EMOTION_LEXICONS)} lists"
+    )
+
+    legacy_tps, legacy = measure(scan_substrings, texts)
+    automaton_tps, matched = measure(scan_automaton, texts)
+    for text, expected, actual in zip(texts, legacy, matched):
+        expected = {tag: words for tag, words in expected.items() if words}
+        assert expected == actual, f"Keyword hits differ for {text!r}"
+
+    print(
+        f"keyword hits: substring scan {legacy_tps:10.0f} texts/s | "
+        f"automaton {automaton_tps:10.0f} texts/s | "
+        f"x{automaton_tps / legacy_tps:.1f}"
+    )
+
+    analyzer = EmotionAnalyzer()
+    analyzer.api_key = None  # Keyword path only; no network
+    analyze_tps, _ = measure(analyzer.analyze_emotion_advanced, texts)
+    print(f"analyze_emotion_advanced: {analyze_tps:10.0f} texts/s")
+
+
+if __name__ == "__main__":
+    main()
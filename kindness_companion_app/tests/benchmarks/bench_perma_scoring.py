@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: PERMA dimension scoring, five keyword passes vs. one engine pass.
+
+Generates 30 days of synthetic chat messages and scores them first the way
+``_calculate_dimension_score`` used to (one loop over every message and
+whitespace-split word per dimension, testing each keyword with ``in``), then
+with ``PERMAScoringEngine.base_scores``, which tokenizes and matches every
+message once. The two report different scores on Chinese text, since the old
+path counted a whole unspaced sentence as one word; only timings are compared.
+
+Usage (from the repository root):
+    python -m kindness_companion_app.tests.benchmarks.bench_perma_scoring
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
+
+from kindness_companion_app.ai_core.report_generator import (
+    PERMA_DIMENSIONS,
+    PERMA_KEYWORDS,
+    PERMAScoringEngine,
+)
+
+FILLER = list("今天我在路上帮助了一位老人，天气晴朗，我们一起聊天。！？ ") + [
+    " today ",
+    " really ",
+]
+
+
+def generate_chat(days, per_day, seed):
+    rng = random.Random(seed)
+    words = sorted(
+        {
+            word
+            for lists in PERMA_KEYWORDS.values()
+            for ws in lists.values()
+            for word in ws
+        }
+    )
+    messages = []
+    for _ in range(days * per_day):
+        parts = [
+            rng.choice(words) if rng.random() < 0.1 else rng.choice(FILLER)
+            for _ in range(rng.randint(5, 80))
+        ]
+        messages.append("".join(parts))
+    return messages
+
+
+def legacy_scores(texts):
+    """Old path: one full pass over all messages per dimension."""
+    scores = []
+    for dimension in PERMA_DIMENSIONS:
+        positive_keywords = PERMA_KEYWORDS[dimension]["positive"]
+        negative_keywords = PERMA_KEYWORDS[dimension]["negative"]
+        positive_count = negative_count = total_words = 0
+        for text in texts:
+            words = text.lower().split()
+            total_words += len(words)
+            for word in words:
+                if any(keyword in word for keyword in positive_keywords):
+                    positive_count += 1
+                elif any(keyword in word for keyword in negative_keywords):
+                    negative_count += 1
+        if total_words == 0:
+            scores.append(5.0)
+        else:
+            ratio = (positive_count - negative_count) / total_words
+            scores.append(max(0.0, min(10.0, 5.0 + ratio * 100)))
+    return scores
+
+
+def measure(func, texts, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func(texts)
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--per-day", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    texts = generate_chat(args.days, args.per_day, args.seed)
+    print(
+        f"{len(texts)} messages over {args.days} days, "
+        f"{sum(len(text) for text in texts)} characters"
+    )
+
+    engine = PERMAScoringEngine()
+    legacy_time, legacy = measure(legacy_scores, texts, args.repeat)
+    engine_time, scores = measure(engine.base_scores, texts, args.repeat)
+
+    print(
+        f"report scoring: five passes {legacy_time * 1000:8.1f} ms | "
+        f"engine {engine_time * 1000:8.1f} ms | "
+        f"x{legacy_time / engine_time:.1f}"
+    )
+    for dimension, old, new in zip(PERMA_DIMENSIONS, legacy, scores):
+        print(f"  {dimension.value:<17} five passes {old:5.2f} | engine {new:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Test module for the shared API client, run against a local stub HTTP server.
+"""
+
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from kindness_companion_app.ai_core.api_client import ApiClient, CircuitBreaker
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Replies with the next (status, body) queued on the server."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection reuse is visible
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.server.requests.append(json.loads(self.rfile.read(length) or b"null"))
+        self.server.ports.add(self.client_address[1])
+        status, body = (
+            self.server.responses.pop(0) if self.server.responses else (200, {})
+        )
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Keep test output quiet
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    """Streams the server's ``events`` as server-sent events, one chunk each."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.server.requests.append(json.loads(self.rfile.read(length) or b"null"))
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in self.server.events:
+            data = f"data: {event}\n\n".encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestApiClient(unittest.TestCase):
+    """Test cases for ApiClient."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.responses = []
+        self.server.requests = []
+        self.server.ports = set()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/chat"
+        self.client = ApiClient(max_retries=2, backoff_factor=0, failure_threshold=3)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_success_reuses_connection(self):
+        """Sequential requests go over one kept-alive connection."""
+        self.server.responses = [(200, {"n": 1}), (200, {"n": 2})]
+        self.assertEqual(self.client.request(self.url, data={"q": 1}), {"n": 1})
+        self.assertEqual(self.client.request(self.url, data={"q": 2}), {"n": 2})
+        self.assertEqual(self.server.requests, [{"q": 1}, {"q": 2}])
+        self.assertEqual(len(self.server.ports), 1)
+
+    def test_retries_transient_errors(self):
+        self.server.responses = [(503, {}), (429, {}), (200, {"ok": True})]
+        self.assertEqual(self.client.request(self.url), {"ok": True})
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.client.breaker_for(self.url).state, CircuitBreaker.CLOSED)
+
+    def test_client_errors_are_not_retried(self):
+        self.server.responses = [(400, {"error": "bad"})]
+        self.assertIsNone(self.client.request(self.url))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_circuit_opens_and_fails_fast(self):
+        """Once the breaker opens, no request reaches the server."""
+        self.server.responses = [(500, {})] * 3
+        self.assertIsNone(self.client.request(self.url))
+        self.assertEqual(self.client.breaker_for(self.url).state, CircuitBreaker.OPEN)
+
+        self.assertIsNone(self.client.request(self.url))
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_circuit_half_open_trial_closes_it(self):
+        self.server.responses = [(500, {})] * 3 + [(200, {"ok": True})]
+        self.client.request(self.url)
+        breaker = self.client.breaker_for(self.url)
+        with patch(
+            "kindness_companion_app.ai_core.api_client.time.monotonic",
+            return_value=breaker._opened_at + breaker.reset_timeout + 1,
+        ):
+            self.assertEqual(self.client.request(self.url), {"ok": True})
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_connection_refused_counts_as_failure(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertIsNone(self.client.request(self.url, timeout=1))
+        self.assertEqual(self.client.breaker_for(self.url).state, CircuitBreaker.OPEN)
+
+
+class TestStreamRequest(unittest.TestCase):
+    """Test cases for ApiClient.stream_request."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StreamHandler)
+        self.server.requests = []
+        self.server.status = 200
+        self.server.events = []
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/chat"
+        self.client = ApiClient(failure_threshold=1)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def delta(content):
+        return json.dumps(
+            {"choices": [{"delta": {"content": content}}]}, ensure_ascii=False
+        )
+
+    def test_chunks_are_passed_on_in_order(self):
+        self.server.events = [self.delta("你好"), self.delta("，朋友"), "[DONE]"]
+        chunks = []
+        text = self.client.stream_request(self.url, chunks.append, data={"q": 1})
+        self.assertEqual(text, "你好，朋友")
+        self.assertEqual(chunks, ["你好", "，朋友"])
+        self.assertEqual(self.server.requests, [{"q": 1, "stream": True}])
+
+    def test_error_status_returns_none(self):
+        self.server.status = 503
+        self.assertIsNone(self.client.stream_request(self.url, lambda chunk: None))
+        self.assertEqual(self.client.breaker_for(self.url).state, CircuitBreaker.OPEN)
+
+    def test_malformed_event_returns_none(self):
+        self.server.events = [self.delta("半句"), "{not json"]
+        chunks = []
+        self.assertIsNone(self.client.stream_request(self.url, chunks.append))
+        self.assertEqual(chunks, ["半句"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+"""
+Test module for cached weekly reports, generated one by one or for all users
+in worker processes.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from kindness_companion_app.ai_core import report_generator
+from kindness_companion_app.ai_core.conversation_analyzer import ConversationAnalyzer
+from kindness_companion_app.ai_core.report_generator import (
+    REPORT_GENERATOR_VERSION,
+    PERMAReportGenerator,
+    WellbeingRollup,
+    generate_all_weekly_reports,
+    generate_weekly_report,
+)
+from kindness_companion_app.backend.database_manager import DatabaseManager
+from kindness_companion_app.backend.report_cache import ReportCache
+
+MESSAGES = {
+    1: ["今天很开心，和朋友一起完成了项目", "学到了很多新东西"],
+    2: ["感觉无意义，很空虚"],
+    3: ["I feel 开心 today!", "有点累，但是很有成就感"],
+}
+
+
+class TestBulkReports(unittest.TestCase):
+    """Test cases for generate_all_weekly_reports."""
+
+    def setUp(self):
+        temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        temp_db_file.close()
+        self.db_path = temp_db_file.name
+        self.db_manager = DatabaseManager(self.db_path)
+        analyzer = ConversationAnalyzer(self.db_manager)
+        for user_id, messages in MESSAGES.items():
+            for message in messages:
+                analyzer.store_message(user_id, message, "", "joy")
+        analyzer.flush()
+
+        # User 4 only checked in; user 5 was last active a month ago
+        today = datetime.now()
+        self.db_manager.execute_insert(
+            "INSERT INTO progress (user_id, challenge_id, check_in_date) VALUES (?, 1, ?)",
+            (4, today.strftime("%Y-%m-%d")),
+        )
+        self.db_manager.execute_insert(
+            "INSERT INTO progress (user_id, challenge_id, check_in_date) VALUES (?, 1, ?)",
+            (5, (today - timedelta(days=30)).strftime("%Y-%m-%d")),
+        )
+
+    def tearDown(self):
+        self.db_manager.close()
+        os.unlink(self.db_path)
+
+    def test_reports_generated_for_active_users(self):
+        progress = []
+        stats = generate_all_weekly_reports(
+            self.db_manager,
+            max_workers=2,
+            shard_size=2,
+            progress_callback=lambda done, total: progress.append((done, total)),
+        )
+
+        self.assertEqual(
+            {key: stats[key] for key in ("users", "generated", "cached", "failed")},
+            {"users": 4, "generated": 4, "cached": 0, "failed": 0},
+        )
+        self.assertEqual(sorted(done for done, _ in progress), [2, 4])
+        self.assertTrue(all(total == 4 for _, total in progress))
+
+        rows = self.db_manager.execute_query(
+            "SELECT user_id, overall_wellbeing_score FROM perma_assessments"
+        )
+        self.assertEqual(sorted(row["user_id"] for row in rows), [1, 2, 3, 4])
+        stored = self.db_manager.execute_query("SELECT user_id FROM wellbeing_reports")
+        self.assertEqual(len(stored), 4)
+
+        # Same scores as generating in this process
+        generator = PERMAReportGenerator(self.db_manager)
+        for row in rows:
+            report = generator.generate_comprehensive_report(
+                row["user_id"], 7, store=False
+            )
+            self.assertAlmostEqual(
+                row["overall_wellbeing_score"], report.perma_scores.overall_wellbeing
+            )
+
+        cache = ReportCache(self.db_manager)
+        cached, fresh = cache.get(1, 7, REPORT_GENERATOR_VERSION)
+        self.assertTrue(fresh)
+        self.assertEqual(cached["user_id"], 1)
+
+    def test_fresh_reports_are_skipped(self):
+        generate_all_weekly_reports(self.db_manager, max_workers=1)
+        ConversationAnalyzer(self.db_manager).store_message(2, "今天好多了", "", "joy")
+
+        stats = generate_all_weekly_reports(self.db_manager, max_workers=1)
+        self.assertEqual((stats["generated"], stats["cached"]), (1, 3))
+        rows = self.db_manager.execute_query(
+            "SELECT user_id FROM perma_assessments WHERE user_id = 2"
+        )
+        self.assertEqual(len(rows), 2)
+
+    def test_failed_users_are_counted_and_not_written(self):
+        load = WellbeingRollup.load
+
+        def load_failing_for_user_2(rollup, user_id, *args):
+            if user_id == 2:
+                raise RuntimeError("database is locked")
+            return load(rollup, user_id, *args)
+
+        # Threads instead of processes so that the patch reaches the workers
+        def thread_pool(max_workers, mp_context, initializer, initargs):
+            return ThreadPoolExecutor(max_workers, None, initializer, initargs)
+
+        with patch.object(
+            WellbeingRollup, "load", load_failing_for_user_2
+        ), patch.object(report_generator, "ProcessPoolExecutor", thread_pool):
+            stats = generate_all_weekly_reports(self.db_manager, max_workers=1)
+
+        self.assertEqual(
+            {key: stats[key] for key in ("users", "generated", "cached", "failed")},
+            {"users": 4, "generated": 3, "cached": 0, "failed": 1},
+        )
+        rows = self.db_manager.execute_query("SELECT user_id FROM wellbeing_reports")
+        self.assertEqual(sorted(row["user_id"] for row in rows), [1, 3, 4])
+        cache = ReportCache(self.db_manager)
+        self.assertIsNone(cache.get(2, 7, REPORT_GENERATOR_VERSION)[0])
+
+        # The failed user is generated on the next run
+        stats = generate_all_weekly_reports(self.db_manager, max_workers=1)
+        self.assertEqual((stats["generated"], stats["cached"]), (1, 3))
+
+
+class TestWeeklyReportCache(unittest.TestCase):
+    """Test cases for generate_weekly_report and its cache."""
+
+    def setUp(self):
+        temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        temp_db_file.close()
+        self.db_path = temp_db_file.name
+        self.db_manager = DatabaseManager(self.db_path)
+        analyzer = ConversationAnalyzer(self.db_manager)
+        for message in MESSAGES[1]:
+            analyzer.store_message(1, message, "", "joy")
+        analyzer.flush()
+
+        # generate_weekly_report opens the default database
+        patcher = patch(
+            "kindness_companion_app.backend.database_manager.DatabaseManager",
+            side_effect=lambda *args, **kwargs: DatabaseManager(self.db_path),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        report_generator._report_generator = None
+        self.addCleanup(setattr, report_generator, "_report_generator", None)
+
+    def tearDown(self):
+        self.db_manager.close()
+        os.unlink(self.db_path)
+
+    def test_fresh_report_is_served_from_cache(self):
+        report = generate_weekly_report(1)
+        self.assertTrue(report["success"])
+        self.assertNotIn("cached", report)
+        cached = generate_weekly_report(1)
+        self.assertTrue(cached["cached"])
+        self.assertEqual(cached["overall_wellbeing"], report["overall_wellbeing"])
+
+    def test_failed_generation_is_not_cached(self):
+        with patch.object(WellbeingRollup, "load", side_effect=RuntimeError("busy")):
+            failed = generate_weekly_report(1)
+        self.assertEqual((failed["success"], failed["degraded"]), (False, True))
+        self.assertEqual(
+            ReportCache(self.db_manager).get(1, 7, REPORT_GENERATOR_VERSION),
+            (None, False),
+        )
+
+        report = generate_weekly_report(1)
+        self.assertTrue(report["success"])
+        self.assertNotIn("cached", report)
+        self.assertEqual(
+            report["overall_wellbeing"],
+            generate_weekly_report(1, use_cache=False)["overall_wellbeing"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
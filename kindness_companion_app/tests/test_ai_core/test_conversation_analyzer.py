@@ -6,6 +6,9 @@ import unittest
 import os
 import sys
 import json
+import tempfile
+import threading
+import time
 from unittest.mock import MagicMock, patch
 
 # Add the parent directory to the Python path
@@ -273,5 +276,163 @@ class TestConversationAnalyzer(unittest.TestCase):
         self.assertEqual(context_id, "ctx_1")
 
 
+class TestConversationMessageCount(unittest.TestCase):
+    """The per-user message counter, against a real database."""
+
+    def setUp(self):
+        temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        temp_db_file.close()
+        self.db_path = temp_db_file.name
+        self.db_manager = DatabaseManager(self.db_path)
+        self.analyzer = ConversationAnalyzer(self.db_manager)
+
+    def tearDown(self):
+        os.unlink(self.db_path)
+
+    def test_store_message_updates_count(self):
+        self.assertEqual(self.analyzer.get_message_count(1), 0)
+        self.analyzer.store_message(1, "你好")
+        self.analyzer.store_message(1, "在吗", response="在的")
+        self.analyzer.store_message(2, "嗨")
+        self.assertEqual(self.analyzer.get_message_count(1), 3)
+        self.assertEqual(self.analyzer.get_message_count(2), 1)
+
+    def test_rebuild_matches_history(self):
+        for n in range(5):
+            self.analyzer.store_message(1, f"消息{n}")
+        self.analyzer.flush()
+        self.db_manager.execute_update(
+            "DELETE FROM conversation_history WHERE id IN "
+            "(SELECT id FROM conversation_history LIMIT 2)"
+        )
+        self.assertEqual(self.analyzer.get_message_count(1), 5)
+        self.db_manager.rebuild_conversation_stats()
+        # The in-memory count is a cache of conversation_stats
+        self.analyzer.invalidate_context_cache(1)
+        self.assertEqual(self.analyzer.get_message_count(1), 3)
+
+
+class TestConversationContextBuffer(unittest.TestCase):
+    """The in-memory ring buffer in front of conversation_history."""
+
+    def setUp(self):
+        temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        temp_db_file.close()
+        self.db_path = temp_db_file.name
+        self.db_manager = DatabaseManager(self.db_path)
+        self.analyzer = ConversationAnalyzer(self.db_manager)
+
+    def tearDown(self):
+        os.unlink(self.db_path)
+
+    def test_warms_from_database_then_serves_from_memory(self):
+        self.db_manager.execute_insert(
+            "INSERT INTO conversation_history (user_id, message, is_user) "
+            "VALUES (1, '早上好', 1)"
+        )
+        self.assertEqual(
+            [m["content"] for m in self.analyzer.get_conversation_history(1)],
+            ["早上好"],
+        )
+
+        with patch.object(
+            self.analyzer,
+            "_query_conversation_history",
+            side_effect=AssertionError("hot path hit the database"),
+        ):
+            self.analyzer.store_message(1, "今天帮了邻居", response="真棒！")
+            # Row ids are filled in once the write-behind batch is committed
+            self.analyzer.flush()
+            history = self.analyzer.get_conversation_history(1, limit=2)
+
+        self.assertEqual([m["content"] for m in history], ["今天帮了邻居", "真棒！"])
+        self.assertEqual([m["role"] for m in history], ["user", "assistant"])
+        # The buffered entries match what was written to the database
+        self.analyzer.invalidate_context_cache()
+        self.assertEqual(self.analyzer.get_conversation_history(1, limit=2), history)
+
+    def test_buffer_is_bounded(self):
+        self.analyzer.max_context_length = 3
+        self.analyzer.get_conversation_history(1)
+        for n in range(5):
+            self.analyzer.store_message(1, f"消息{n}")
+        self.assertEqual(
+            [m["content"] for m in self.analyzer.get_conversation_history(1, limit=3)],
+            ["消息2", "消息3", "消息4"],
+        )
+        # Longer requests than the buffer holds go to the database
+        self.assertEqual(len(self.analyzer.get_conversation_history(1, limit=10)), 5)
+
+    def test_idle_users_are_evicted(self):
+        self.analyzer.max_cached_contexts = 2
+        for user_id in (1, 2, 1, 3):
+            self.analyzer.get_conversation_history(user_id)
+        self.assertEqual(list(self.analyzer._context_buffers), [(1, None), (3, None)])
+
+
+class TestConversationWriteBehind(unittest.TestCase):
+    """Conversation and analysis records go through the write-behind queue."""
+
+    def setUp(self):
+        temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        temp_db_file.close()
+        self.db_path = temp_db_file.name
+        self.db_manager = DatabaseManager(self.db_path)
+        self.db_manager.write_behind().flush_interval = 60  # Only explicit flushes
+        self.analyzer = ConversationAnalyzer(self.db_manager)
+
+    def tearDown(self):
+        self.db_manager.close()
+        os.unlink(self.db_path)
+
+    def count_rows(self, table):
+        return self.db_manager.execute_query(f"SELECT COUNT(*) AS n FROM {table}")[0][
+            "n"
+        ]
+
+    def test_writes_are_deferred_until_flush(self):
+        self.analyzer.store_message(1, "你好", response="你好呀")
+        self.analyzer._store_cognitive_restructuring(1, "我不行", "我在进步", "重构")
+        self.assertEqual(self.count_rows("conversation_history"), 0)
+        # Reads served from memory already see the message
+        self.assertEqual(self.analyzer.get_message_count(1), 2)
+
+        self.analyzer.flush()
+        self.assertEqual(self.count_rows("conversation_history"), 2)
+        self.assertEqual(self.count_rows("cognitive_restructuring"), 1)
+
+    def test_full_queue_does_not_block_other_users(self):
+        self.analyzer.get_conversation_history(2)
+        release = threading.Event()
+        submit = self.analyzer._writer.submit
+
+        def blocked_submit(*args, **kwargs):
+            release.wait(5)  # A full queue makes submit wait for the writer
+            submit(*args, **kwargs)
+
+        with patch.object(self.analyzer._writer, "submit", side_effect=blocked_submit):
+            writer = threading.Thread(
+                target=self.analyzer.store_message, args=(1, "你好")
+            )
+            writer.start()
+            try:
+                started = time.monotonic()
+                self.analyzer.get_conversation_history(2)
+                self.analyzer.get_message_count(2)
+                self.assertLess(time.monotonic() - started, 1)
+            finally:
+                release.set()
+                writer.join()
+
+        self.assertEqual(
+            [m["content"] for m in self.analyzer.get_conversation_history(1)], ["你好"]
+        )
+
+    def test_close_flushes_pending_writes(self):
+        self.analyzer.store_message(1, "再见")
+        self.db_manager.close()
+        self.assertEqual(self.count_rows("conversation_history"), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -179,5 +179,43 @@ class TestDialogueGenerator(unittest.TestCase):
         self.assertIn('neutral', prompt)
         self.assertIn('Respond directly', prompt)  # Check that it mentions responding directly to the message
 
+    @patch('ai_core.dialogue_generator.get_api_key')
+    @patch('ai_core.dialogue_generator.make_api_request')
+    @patch('ai_core.dialogue_generator.stream_api_request')
+    def test_call_dialogue_api_streams_chunks(self, mock_stream, mock_make_request, mock_get_api_key):
+        """Test that on_chunk uses the streaming endpoint and skips the blocking call."""
+        mock_get_api_key.return_value = "fake_api_key"
+        chunks = []
+
+        def fake_stream(url, on_chunk, headers=None, data=None):
+            for piece in ["Great ", "job!"]:
+                on_chunk(piece)
+            return "Great job!"
+
+        mock_stream.side_effect = fake_stream
+
+        result = _call_dialogue_api("Test prompt", on_chunk=chunks.append)
+
+        self.assertEqual(result, "Great job!")
+        self.assertEqual(chunks, ["Great ", "job!"])
+        mock_make_request.assert_not_called()
+
+    @patch('ai_core.dialogue_generator.get_api_key')
+    @patch('ai_core.dialogue_generator.make_api_request')
+    @patch('ai_core.dialogue_generator.stream_api_request')
+    def test_call_dialogue_api_stream_falls_back(self, mock_stream, mock_make_request, mock_get_api_key):
+        """Test that a failed stream falls back to the blocking request."""
+        mock_get_api_key.return_value = "fake_api_key"
+        mock_stream.return_value = None
+        mock_make_request.return_value = {
+            "choices": [{"message": {"content": "This is a test response"}}]
+        }
+
+        result = _call_dialogue_api("Test prompt", on_chunk=lambda chunk: None)
+
+        self.assertEqual(result, "This is a test response")
+        mock_stream.assert_called_once()
+        mock_make_request.assert_called_once()
+
 if __name__ == '__main__':
     unittest.main()
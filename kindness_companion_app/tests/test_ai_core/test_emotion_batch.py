@@ -0,0 +1,88 @@
+"""
+Test module for EmotionAnalyzer.analyze_emotions_batch.
+"""
+
+import os
+import random
+import sys
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from kindness_companion_app.ai_core.emotion_analyzer import (
+    EMOTION_LEXICONS,
+    EmotionAnalyzer,
+)
+
+
+def state_key(state):
+    return (
+        state.primary_emotion,
+        state.intensity,
+        state.dimensions,
+        state.secondary_emotions,
+        state.confidence,
+        getattr(state, "_special_animation", None),
+    )
+
+
+class TestAnalyzeEmotionsBatch(unittest.TestCase):
+    """Batch results must match the single-text path exactly."""
+
+    def make_analyzer(self):
+        analyzer = EmotionAnalyzer()
+        analyzer.api_key = None
+        return analyzer
+
+    def test_matches_single_text_path(self):
+        """Random keyword soups give identical states and histories."""
+        words = sorted({word for words in EMOTION_LEXICONS.values() for word in words})
+        filler = list("今天我们去公园帮助了一位老人。") + ["！", "？", " "]
+        rng = random.Random(3)
+        texts = [
+            "".join(
+                rng.choice(words) if rng.random() < 0.3 else rng.choice(filler)
+                for _ in range(rng.randint(0, 30))
+            )
+            for _ in range(500)
+        ]
+        user_ids = [rng.choice([None, 1, 2]) for _ in texts]
+
+        single = self.make_analyzer()
+        expected = [
+            single.analyze_emotion_advanced(text, user_id)
+            for text, user_id in zip(texts, user_ids)
+        ]
+        batch = self.make_analyzer()
+        actual = batch.analyze_emotions_batch(texts, user_ids)
+
+        self.assertEqual(
+            [state_key(s) for s in actual], [state_key(s) for s in expected]
+        )
+        for user_id in (1, 2):
+            self.assertEqual(
+                [state_key(s) for s in batch.emotion_history[user_id]],
+                [state_key(s) for s in single.emotion_history[user_id]],
+            )
+
+    def test_dimension_fallback_without_keywords(self):
+        """Texts without emotion keywords use the nearest Plutchik emotion."""
+        analyzer = self.make_analyzer()
+        texts = ["我很平静", "压力好大", "今天出门散步"]
+        expected = [self.make_analyzer().analyze_emotion_advanced(t) for t in texts]
+        actual = analyzer.analyze_emotions_batch(texts)
+        self.assertEqual(
+            [state_key(s) for s in actual], [state_key(s) for s in expected]
+        )
+
+    def test_empty_batch(self):
+        self.assertEqual(self.make_analyzer().analyze_emotions_batch([]), [])
+
+    def test_user_ids_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.make_analyzer().analyze_emotions_batch(["开心"], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Test module for the persisted emotion time series.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from kindness_companion_app.ai_core.emotion_analyzer import (
+    EmotionAnalyzer,
+    EmotionDimensions,
+    EmotionIntensity,
+    EmotionState,
+    PlutchikEmotions,
+)
+from kindness_companion_app.ai_core.emotion_timeline import (
+    SAMPLE_DTYPE,
+    EmotionTimeline,
+)
+from kindness_companion_app.ai_core.report_generator import PERMAReportGenerator
+from kindness_companion_app.ai_core.result_cache import ResultCache
+from kindness_companion_app.backend.database_manager import DatabaseManager
+
+START = datetime(2024, 3, 1, 12, 0, 0)
+
+
+def state(emotion, valence, intensity=EmotionIntensity.MEDIUM, confidence=0.8):
+    return EmotionState(
+        primary_emotion=emotion,
+        intensity=intensity,
+        dimensions=EmotionDimensions(valence, 0.25, -0.5),
+        secondary_emotions=[],
+        confidence=confidence,
+    )
+
+
+class TestEmotionTimeline(unittest.TestCase):
+    """Test cases for EmotionTimeline."""
+
+    def setUp(self):
+        temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        temp_db_file.close()
+        self.db_path = temp_db_file.name
+        self.db_manager = DatabaseManager(self.db_path)
+        self.timeline = EmotionTimeline(self.db_manager)
+
+    def tearDown(self):
+        self.db_manager.close()
+        os.unlink(self.db_path)
+
+    def fill(self, days=3, per_day=4):
+        """Joy in the morning, sadness in the afternoon, for several days."""
+        for day in range(days):
+            for hour in range(per_day):
+                sad = hour >= per_day // 2
+                self.timeline.append(
+                    1,
+                    state(
+                        PlutchikEmotions.SADNESS if sad else PlutchikEmotions.JOY,
+                        -0.5 if sad else 0.75,
+                    ),
+                    START + timedelta(days=day, hours=hour),
+                )
+
+    def test_round_trip_is_compact(self):
+        self.timeline.append(
+            1, state(PlutchikEmotions.TRUST, 0.43214, EmotionIntensity.HIGH, 0.9), START
+        )
+        (sample,) = self.timeline.samples(1)
+        self.assertEqual(sample.timestamp, START.timestamp())
+        self.assertEqual(sample.primary_emotion, PlutchikEmotions.TRUST)
+        self.assertEqual(sample.intensity, EmotionIntensity.HIGH.value)
+        self.assertAlmostEqual(sample.dimensions.valence, 0.4321)
+        self.assertEqual((sample.arousal, sample.dominance), (0.25, -0.5))
+        self.assertAlmostEqual(sample.confidence, 0.9)
+        with self.assertRaises(AttributeError):
+            sample.note = "no __dict__"
+
+        self.fill()
+        self.db_manager.write_behind().flush()
+        rows = self.db_manager.execute_query(
+            "SELECT sample_count, length(samples) AS size FROM emotion_timeline"
+        )
+        # One row per day, 18 bytes per sample
+        self.assertEqual(SAMPLE_DTYPE.itemsize, 18)
+        self.assertEqual(sum(row["sample_count"] for row in rows), 13)
+        self.assertTrue(all(row["size"] == 18 * row["sample_count"] for row in rows))
+
+    def test_range_queries(self):
+        self.fill()
+        second_day = START + timedelta(days=1)
+        series = self.timeline.series(1, second_day, second_day + timedelta(hours=2))
+        self.assertEqual(len(series["timestamp"]), 3)
+        self.assertTrue((series["timestamp"][:-1] <= series["timestamp"][1:]).all())
+        self.assertEqual(list(series["valence"]), [0.75, 0.75, -0.5])
+
+        latest = self.timeline.samples(1, limit=2)
+        self.assertEqual(
+            latest[-1].timestamp, (START + timedelta(days=2, hours=3)).timestamp()
+        )
+        self.assertEqual(len(latest), 2)
+        self.assertEqual(self.timeline.samples(2), [])
+
+    def test_downsample(self):
+        self.fill()
+        daily = self.timeline.downsample(1, START, START + timedelta(days=3))
+        self.assertEqual([bucket["start"] for bucket in daily][0], START)
+        self.assertEqual([bucket["count"] for bucket in daily], [4, 4, 4])
+        self.assertAlmostEqual(daily[0]["valence"], 0.125)
+
+        halves = self.timeline.downsample(
+            1, START, START + timedelta(hours=3), bucket_seconds=2 * 3600
+        )
+        self.assertEqual([bucket["emotion"] for bucket in halves], ["joy", "sadness"])
+        self.assertEqual(self.timeline.downsample(2, START, START), [])
+
+    def test_analyzer_history_survives_restart(self):
+        analyzer = EmotionAnalyzer(
+            result_cache=ResultCache(persistent=False), timeline=self.timeline
+        )
+        analyzer.api_key = None
+        for n in range(25):
+            analyzer.analyze_emotion_advanced(f"今天很开心 {n}", user_id=7)
+        self.assertEqual(len(analyzer.emotion_history[7]), 20)
+
+        # A new process: fresh manager, timeline and report generator
+        self.db_manager.close()
+        db_manager = DatabaseManager(self.db_path)
+        generator = PERMAReportGenerator(db_manager)
+        user_data = generator._collect_user_data(
+            7, datetime.now() - timedelta(days=1), datetime.now() + timedelta(days=1)
+        )
+        self.assertEqual(len(user_data["emotions"]), 25)
+        self.assertEqual(
+            user_data["emotions"][-1].primary_emotion,
+            analyzer.emotion_history[7][-1].primary_emotion,
+        )
+        db_manager.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
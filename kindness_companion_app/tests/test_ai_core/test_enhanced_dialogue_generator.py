@@ -244,6 +244,31 @@ class TestEnhancedDialogueGenerator(unittest.TestCase):
         context_id = self.generator.get_active_context(user_id=2)
         self.assertIsNone(context_id)
 
+    def test_user_message_uses_counter_and_one_history_query(self):
+        """Test that a user message reads the message counter, not full history."""
+        self.mock_conversation_analyzer.generate_dialogue_with_style.return_value = (
+            "你好！",
+            "ctx_1",
+        )
+        self.mock_conversation_analyzer.get_message_count.return_value = 20
+        self.mock_conversation_analyzer.get_conversation_history.return_value = []
+
+        self.generator.generate_dialogue(
+            user_id=1,
+            event_type="user_message",
+            event_data=self.sample_user_message_event,
+        )
+
+        self.mock_conversation_analyzer.get_message_count.assert_called_once_with(1)
+        self.mock_conversation_analyzer.analyze_user_psychology.assert_called_once_with(
+            1
+        )
+        history = self.mock_conversation_analyzer.get_conversation_history
+        history.assert_called_once()
+        self.assertEqual(
+            history.call_args.kwargs["limit"], self.generator.context_history_limit
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
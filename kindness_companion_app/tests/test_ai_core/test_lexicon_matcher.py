@@ -0,0 +1,118 @@
+"""
+Test module for the Aho–Corasick lexicon matcher.
+"""
+
+import os
+import random
+import sys
+import unittest
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from kindness_companion_app.ai_core.emotion_analyzer import (
+    EMOTION_LEXICON,
+    EMOTION_LEXICONS,
+    EmotionAnalyzer,
+    PlutchikEmotions,
+)
+from kindness_companion_app.ai_core.lexicon_matcher import LexiconMatcher
+
+
+class TestLexiconMatcher(unittest.TestCase):
+    """Test cases for LexiconMatcher."""
+
+    def test_overlapping_patterns(self):
+        """Patterns that are suffixes/prefixes of each other are all found."""
+        matcher = LexiconMatcher.from_lexicons({"a": ["he", "she", "his", "hers"]})
+        hits = matcher.match("ushers")
+        self.assertEqual(sorted(hits.patterns("a")), ["he", "hers", "she"])
+        self.assertEqual(hits.count("a"), 3)
+
+    def test_pattern_in_several_tags(self):
+        """A pattern registered under several tags counts for each of them."""
+        matcher = LexiconMatcher.from_lexicons({"pos": ["不错"], "neg": ["不", "错"]})
+        hits = matcher.match("今天还不错")
+        self.assertTrue(hits.has("pos"))
+        self.assertEqual(hits.count("neg"), 2)
+        self.assertEqual(set(hits.tags()), {"pos", "neg"})
+
+    def test_repeated_occurrences_count_once(self):
+        """Matching mirrors ``word in text``: repeats in the text count once."""
+        matcher = LexiconMatcher.from_lexicons({"joy": ["开心"]})
+        hits = matcher.match("开心开心开心")
+        self.assertEqual(hits.count("joy"), 1)
+        self.assertEqual(hits.score("joy"), 1.0)
+
+    def test_duplicate_words_weighted(self):
+        """Words listed twice in a lexicon score twice, like the per-word loop."""
+        matcher = LexiconMatcher.from_lexicons({"joy": ["开心", "开心", "快乐"]})
+        self.assertEqual(matcher.match("很开心").score("joy"), 2.0)
+        self.assertEqual(matcher.match("开心又快乐").score("joy"), 3.0)
+
+    def test_no_hits(self):
+        """Unknown tags and empty texts report nothing."""
+        matcher = LexiconMatcher.from_lexicons({"joy": ["开心"], "empty": [""]})
+        hits = matcher.match("")
+        self.assertFalse(hits.has("joy"))
+        self.assertEqual(hits.count("missing"), 0)
+        self.assertEqual(hits.score("missing"), 0)
+        self.assertEqual(hits.tags(), [])
+        self.assertEqual(matcher.size, 1)
+
+    def test_find_all_reports_every_occurrence(self):
+        """find_all returns each occurrence with its span, overlaps included."""
+        matcher = LexiconMatcher.from_lexicons({"pos": ["意义"], "neg": ["无意义"]})
+        self.assertEqual(
+            matcher.find_all("无意义的意义"),
+            [(0, 3, "无意义", "neg"), (1, 3, "意义", "pos"), (4, 6, "意义", "pos")],
+        )
+        self.assertEqual(matcher.find_all(""), [])
+
+    def test_equivalent_to_substring_scan(self):
+        """The emotion lexicon finds exactly the keywords ``in`` would find."""
+        words = sorted({word for words in EMOTION_LEXICONS.values() for word in words})
+        rng = random.Random(42)
+        for _ in range(300):
+            text = "".join(
+                rng.choice(words) if rng.random() < 0.3 else rng.choice("我们今天！？")
+                for _ in range(rng.randint(0, 30))
+            ).lower()
+            hits = EMOTION_LEXICON.match(text)
+            for tag, lexicon in EMOTION_LEXICONS.items():
+                expected = {word for word in lexicon if word in text}
+                self.assertEqual(set(hits.patterns(tag)), expected, text)
+
+
+class TestEmotionAnalyzerLexicon(unittest.TestCase):
+    """Keyword stages of EmotionAnalyzer backed by the shared lexicon."""
+
+    def setUp(self):
+        self.analyzer = EmotionAnalyzer()
+        self.analyzer.api_key = None
+
+    def test_positive_negation_phrase_not_negated(self):
+        """'不错' is positive and does not trigger the negation penalty."""
+        dimensions = self.analyzer._keyword_dimension_analysis("今天还不错")
+        self.assertGreater(dimensions.valence, 0)
+
+    def test_negation_lowers_valence(self):
+        dimensions = self.analyzer._keyword_dimension_analysis("我不想去")
+        self.assertLess(dimensions.valence, 0)
+
+    def test_keyword_plutchik_match(self):
+        self.assertEqual(
+            self.analyzer._keyword_plutchik_match("今天好开心"), PlutchikEmotions.JOY
+        )
+        self.assertIsNone(self.analyzer._keyword_plutchik_match("zzz"))
+
+    def test_special_text_priority(self):
+        self.assertEqual(self.analyzer._detect_special_text_types("你好呀"), "happy")
+        self.assertEqual(
+            self.analyzer._detect_special_text_types("测试一下"), "confused"
+        )
+        self.assertEqual(self.analyzer._detect_special_text_types("嗯？"), "thinking")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Test module for the single-pass PERMA scoring engine.
+"""
+
+import os
+import random
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from kindness_companion_app.ai_core.emotion_analyzer import (
+    EmotionDimensions,
+    EmotionIntensity,
+    EmotionState,
+    PlutchikEmotions,
+)
+from kindness_companion_app.ai_core.report_generator import (
+    PERMA_DIMENSIONS,
+    PERMA_KEYWORDS,
+    PERMA_POLARITIES,
+    PERMADimension,
+    PERMAReportGenerator,
+    PERMAScoringEngine,
+)
+
+
+def reference_counts(text):
+    """Per-dimension ``str.find`` scan with the same longest-match rule."""
+    text = text.lower()
+    counts = np.zeros((len(PERMA_DIMENSIONS), 2), dtype=np.int64)
+    for dim_index, dimension in enumerate(PERMA_DIMENSIONS):
+        occurrences = []
+        for polarity_index, polarity in enumerate(PERMA_POLARITIES):
+            for word in PERMA_KEYWORDS[dimension][polarity]:
+                start = text.find(word)
+                while start != -1:
+                    occurrences.append((start, start + len(word), polarity_index))
+                    start = text.find(word, start + 1)
+        covered_until = 0
+        for start, end, polarity_index in sorted(
+            occurrences, key=lambda hit: (hit[0], -hit[1])
+        ):
+            if start >= covered_until:
+                counts[dim_index, polarity_index] += 1
+                covered_until = end
+    return counts
+
+
+class TestPERMAScoringEngine(unittest.TestCase):
+    """Test cases for PERMAScoringEngine."""
+
+    def setUp(self):
+        self.engine = PERMAScoringEngine()
+
+    def test_chinese_sentences_are_tokenized_by_character(self):
+        counts, tokens = self.engine.count_matrix(
+            ["今天很开心，和朋友一起完成了项目", "I feel 开心 today!", ""]
+        )
+        self.assertEqual(tokens.tolist(), [15, 5, 0])
+        self.assertEqual(counts.shape, (3, 5, 2))
+        first = {
+            dimension: counts[0, index].tolist()
+            for index, dimension in enumerate(PERMA_DIMENSIONS)
+        }
+        self.assertEqual(first[PERMADimension.POSITIVE_EMOTION], [1, 0])
+        self.assertEqual(first[PERMADimension.RELATIONSHIPS], [1, 0])
+        self.assertEqual(first[PERMADimension.ACHIEVEMENT], [1, 0])
+        self.assertEqual(counts[2].sum(), 0)
+
+    def test_overlapping_keywords_count_once(self):
+        """The longest keyword wins: 无意义 is not also 意义, 价值观 not also 价值."""
+        meaning = PERMA_DIMENSIONS.index(PERMADimension.MEANING)
+        counts, _ = self.engine.count_matrix(["感觉无意义", "我的价值观", "没有价值"])
+        self.assertEqual(counts[:, meaning].tolist(), [[0, 1], [1, 0], [0, 1]])
+
+    def test_matches_reference_scan(self):
+        words = sorted(
+            {
+                word
+                for lists in PERMA_KEYWORDS.values()
+                for ws in lists.values()
+                for word in ws
+            }
+        )
+        rng = random.Random(21)
+        texts = [
+            "".join(
+                (
+                    rng.choice(words)
+                    if rng.random() < 0.3
+                    else rng.choice("我们今天很，！ ")
+                )
+                for _ in range(rng.randint(0, 30))
+            )
+            for _ in range(200)
+        ]
+        counts, _ = self.engine.count_matrix(texts)
+        for row, text in enumerate(texts):
+            np.testing.assert_array_equal(counts[row], reference_counts(text), text)
+
+    def test_base_scores(self):
+        np.testing.assert_array_equal(self.engine.base_scores([]), [5.0] * 5)
+        # 10 tokens, one positive-emotion and one relationship keyword
+        scores = self.engine.base_scores(["今天很开心", "朋友不在家"])
+        self.assertAlmostEqual(scores[0], 10.0)
+        self.assertAlmostEqual(scores[1], 5.0)
+        self.assertAlmostEqual(scores[2], 10.0)
+        # One failure in every 12 tokens pushes achievement below zero
+        scores = self.engine.base_scores(["a b c d e f g h i j 失败"] * 10)
+        self.assertEqual(scores[4], 0.0)
+
+
+class TestPERMAReportGeneratorScores(unittest.TestCase):
+    """Dimension scores computed by PERMAReportGenerator from the engine."""
+
+    def setUp(self):
+        self.generator = PERMAReportGenerator(MagicMock())
+
+    @staticmethod
+    def user_data(texts, emotions=(), cognitive_analyses=()):
+        return {
+            "messages": [{"message": text} for text in texts],
+            "emotions": list(emotions),
+            "cognitive_analyses": list(cognitive_analyses),
+        }
+
+    def test_scores_and_overall_wellbeing(self):
+        texts = ["这" * 196 + "开心", "朋友"]  # 200 tokens
+        scores = self.generator._assess_perma_dimensions(self.user_data(texts))
+        self.assertEqual(scores.positive_emotion, 5.5)
+        self.assertEqual(scores.relationships, 5.5)
+        self.assertEqual(scores.engagement, 5.0)
+        self.assertAlmostEqual(scores.overall_wellbeing, 5.0 + 0.5 * 0.5)
+        self.assertEqual(
+            self.generator._calculate_dimension_score(
+                PERMADimension.RELATIONSHIPS, self.user_data(texts)
+            ),
+            5.5,
+        )
+
+    def test_emotion_and_cognitive_adjustments(self):
+        joy = EmotionState(
+            primary_emotion=PlutchikEmotions.JOY,
+            intensity=EmotionIntensity.MEDIUM,
+            dimensions=EmotionDimensions(0.5, 0.5, 0.5),
+            secondary_emotions=[],
+            confidence=0.8,
+        )
+        analyses = [{"distortions": '["overgeneralization", "labeling"]'}]
+        scores = self.generator._assess_perma_dimensions(
+            self.user_data(["这是一句话"], [joy], analyses)
+        )
+        # Emotions lift positive emotion by 2, two distortions cost 1 everywhere
+        self.assertEqual(scores.positive_emotion, 6.0)
+        self.assertEqual(scores.meaning, 4.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Test module for the concurrent mode of pet_handler.handle_pet_event.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from kindness_companion_app.ai_core import pet_handler
+from kindness_companion_app.ai_core.enhanced_dialogue_generator import (
+    EnhancedDialogueGenerator,
+)
+from kindness_companion_app.backend.database_manager import DatabaseManager
+
+
+class TestPetHandlerConcurrency(unittest.TestCase):
+    """Dialogue generation overlaps the full emotion analysis."""
+
+    def setUp(self):
+        self.generator = patch.object(pet_handler, "_enhanced_dialogue_generator", None)
+        self.generator.start()
+        pet_handler.configure_concurrency(True, deadline=5.0, emotion_deadline=5.0)
+
+    def tearDown(self):
+        pet_handler.configure_concurrency(
+            False,
+            deadline=pet_handler.DEFAULT_RESPONSE_DEADLINE,
+            emotion_deadline=pet_handler.DEFAULT_EMOTION_DEADLINE,
+        )
+        self.generator.stop()
+
+    def test_sub_calls_run_in_parallel_and_merge(self):
+        """Latency is about max(call), and refined emotion wins the merge."""
+        both_started = threading.Barrier(2, timeout=2)
+        prompts = []
+
+        def slow_analysis(user_id, text):
+            both_started.wait()
+            time.sleep(0.3)
+            return "sadness", "concerned", "有点担心你..."
+
+        def slow_dialogue(user_id, event_type, context):
+            prompts.append(context)
+            both_started.wait()
+            time.sleep(0.3)
+            return "我在这里陪着你。"
+
+        with patch.object(
+            pet_handler, "analyze_emotion_for_pet", side_effect=slow_analysis
+        ), patch.object(
+            pet_handler, "generate_pet_dialogue", side_effect=slow_dialogue
+        ):
+            started = time.perf_counter()
+            result = pet_handler.handle_pet_event(
+                1, "user_message", {"message": "今天好难过"}
+            )
+            elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(result["dialogue"], "我在这里陪着你。")
+        self.assertEqual(result["emotion_detected"], "sadness")
+        self.assertEqual(result["suggested_animation"], "concerned")
+        self.assertEqual(result["smart_status_text"], "有点担心你...")
+        # The dialogue prompt got the keyword emotion before analysis finished
+        self.assertEqual(prompts[0]["analyzed_emotion"], "sadness")
+
+    def test_deadline_returns_what_is_ready(self):
+        """A slow emotion analysis falls back to the keyword emotion."""
+        pet_handler.configure_concurrency(True, emotion_deadline=0.2)
+        release = threading.Event()
+
+        def stuck_analysis(user_id, text):
+            release.wait(2)
+            return "joy", "excited", "好开心！"
+
+        with patch.object(
+            pet_handler, "analyze_emotion_for_pet", side_effect=stuck_analysis
+        ), patch.object(pet_handler, "generate_pet_dialogue", return_value="太好了！"):
+            result = pet_handler.handle_pet_event(
+                1, "user_message", {"message": "今天好开心"}
+            )
+        release.set()
+
+        self.assertEqual(result["dialogue"], "太好了！")
+        self.assertEqual(result["emotion_detected"], "joy")
+        self.assertIsNone(result["smart_status_text"])
+
+    def test_slow_dialogue_waits_past_emotion_deadline(self):
+        """The emotion deadline does not cut off a dialogue still in flight."""
+        pet_handler.configure_concurrency(True, emotion_deadline=0.1)
+
+        def slow_dialogue(user_id, event_type, context):
+            time.sleep(0.3)
+            return "我在听。"
+
+        with patch.object(
+            pet_handler,
+            "analyze_emotion_for_pet",
+            return_value=("sadness", "concerned", "有点担心你..."),
+        ), patch.object(
+            pet_handler, "generate_pet_dialogue", side_effect=slow_dialogue
+        ):
+            result = pet_handler.handle_pet_event(
+                1, "user_message", {"message": "今天好难过"}
+            )
+
+        self.assertEqual(result["dialogue"], "我在听。")
+        self.assertEqual(result["emotion_detected"], "sadness")
+
+    def test_non_text_events_stay_sequential(self):
+        with patch.object(
+            pet_handler, "analyze_emotion_for_pet"
+        ) as analyze, patch.object(
+            pet_handler, "generate_pet_dialogue", return_value="打卡成功！"
+        ):
+            result = pet_handler.handle_pet_event(1, "check_in", {"challenge_id": 1})
+        analyze.assert_not_called()
+        self.assertEqual(result["suggested_animation"], "happy")
+
+
+class TestLateDialogueNotStored(unittest.TestCase):
+    """A reply finished after the deadline is not stored, against a real database."""
+
+    def setUp(self):
+        temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        temp_db_file.close()
+        self.db_path = temp_db_file.name
+        self.db_manager = DatabaseManager(self.db_path)
+        self.dialogue_generator = EnhancedDialogueGenerator(self.db_manager)
+        self.analyzer = self.dialogue_generator.conversation_analyzer
+        self.generator = patch.object(
+            pet_handler, "_enhanced_dialogue_generator", self.dialogue_generator
+        )
+        self.generator.start()
+        pet_handler.configure_concurrency(True, deadline=0.2, emotion_deadline=0.2)
+
+    def tearDown(self):
+        pet_handler.configure_concurrency(
+            False,
+            deadline=pet_handler.DEFAULT_RESPONSE_DEADLINE,
+            emotion_deadline=pet_handler.DEFAULT_EMOTION_DEADLINE,
+        )
+        self.generator.stop()
+        os.unlink(self.db_path)
+
+    def _history_count(self):
+        self.analyzer.flush()
+        return self.db_manager.execute_query(
+            "SELECT COUNT(*) AS n FROM conversation_history"
+        )[0]["n"]
+
+    def test_late_reply_is_not_stored(self):
+        before = self._history_count()
+        finished = threading.Event()
+        chunks = []
+
+        def slow_reply(user_id, prompt, context_id=None, on_chunk=None):
+            time.sleep(0.5)
+            on_chunk("晚到的回复")
+            finished.set()
+            return "晚到的回复", "ctx_1"
+
+        with patch.object(
+            pet_handler,
+            "analyze_emotion_for_pet",
+            return_value=("joy", "excited", "好开心！"),
+        ), patch.object(
+            self.analyzer, "generate_dialogue_with_style", side_effect=slow_reply
+        ):
+            result = pet_handler.handle_pet_event(
+                1,
+                "reflection_added",
+                {"text": "今天帮助了邻居"},
+                on_chunk=chunks.append,
+            )
+            self.assertTrue(finished.wait(2))
+            # Let the worker finish storing (or not) after the reply
+            time.sleep(0.1)
+
+        self.assertEqual(result["dialogue"], "... (The pet seems lost in thought)")
+        self.assertEqual(chunks, [])
+        self.assertEqual(self._history_count(), before)
+        self.assertEqual(self.analyzer.get_conversation_history(1), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Test module for the two-tier API result cache.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from kindness_companion_app.ai_core.emotion_analyzer import EmotionAnalyzer
+from kindness_companion_app.ai_core.result_cache import ResultCache, make_cache_key
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cases for ResultCache."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "cache.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_cache_key_depends_on_every_part(self):
+        key = make_cache_key("model", "prompt", ["ctx"], "谢谢")
+        self.assertEqual(key, make_cache_key("model", "prompt", ["ctx"], "谢谢"))
+        self.assertNotEqual(key, make_cache_key("model", "prompt", [], "谢谢"))
+        self.assertNotEqual(key, make_cache_key("other", "prompt", ["ctx"], "谢谢"))
+
+    def test_memory_lru_eviction(self):
+        cache = ResultCache(max_entries=2, persistent=False)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)  # "a" becomes most recently used
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_disk_tier_survives_new_instance(self):
+        cache = ResultCache(self.db_path)
+        cache.set("key", {"valence": 0.5})
+        cache.close()
+
+        reopened = ResultCache(self.db_path)
+        self.assertEqual(reopened.get("key"), {"valence": 0.5})
+        self.assertEqual(reopened.get("key"), {"valence": 0.5})
+        stats = reopened.stats()
+        self.assertEqual(stats["disk_hits"], 1)
+        self.assertEqual(stats["memory_hits"], 1)
+        reopened.close()
+
+    def test_expired_entries_are_misses(self):
+        cache = ResultCache(self.db_path, ttl_seconds=10)
+        with patch("kindness_companion_app.ai_core.result_cache.time.time") as now:
+            now.return_value = 1000.0
+            cache.set("key", "value")
+            now.return_value = 1011.0
+            self.assertIsNone(cache.get("key"))
+            self.assertEqual(cache.purge_expired(), 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        cache.close()
+
+    def test_stats_and_clear(self):
+        cache = ResultCache(self.db_path)
+        self.assertIsNone(cache.get("missing"))
+        cache.set("key", 1)
+        cache.get("key")
+        stats = cache.stats()
+        self.assertEqual((stats["misses"], stats["memory_hits"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+        cache.clear()
+        self.assertIsNone(cache.get("key"))
+        cache.close()
+
+
+class TestEmotionAnalyzerApiCache(unittest.TestCase):
+    """The dimension API is called once per distinct request."""
+
+    def test_repeated_text_uses_cache(self):
+        analyzer = EmotionAnalyzer(result_cache=ResultCache(persistent=False))
+        analyzer.api_key = "test-key"
+        response = '{"valence": 0.6, "arousal": 0.1, "dominance": 0.2}'
+        with patch.object(analyzer, "_call_api", return_value=response) as call_api:
+            first = analyzer._api_dimension_analysis("谢谢")
+            second = analyzer._api_dimension_analysis("谢谢")
+            analyzer._api_dimension_analysis("谢谢", context=["你好"])
+        self.assertEqual(first, second)
+        self.assertEqual(call_api.call_count, 2)
+        self.assertEqual(analyzer.result_cache.stats()["memory_hits"], 1)
+
+    def test_failed_responses_are_not_cached(self):
+        analyzer = EmotionAnalyzer(result_cache=ResultCache(persistent=False))
+        analyzer.api_key = "test-key"
+        with patch.object(analyzer, "_call_api", return_value="not json") as call_api:
+            analyzer._api_dimension_analysis("还好")
+            analyzer._api_dimension_analysis("还好")
+        self.assertEqual(call_api.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
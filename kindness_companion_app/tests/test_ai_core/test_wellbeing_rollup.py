@@ -0,0 +1,182 @@
+"""
+Test module for the daily wellbeing rollups behind PERMA reports.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from kindness_companion_app.ai_core.conversation_analyzer import (
+    CognitiveAnalysisResult,
+    CognitiveDistortion,
+    ConversationAnalyzer,
+)
+from kindness_companion_app.ai_core.report_generator import PERMAReportGenerator
+from kindness_companion_app.backend.database_manager import DatabaseManager
+
+MESSAGES = [
+    ("今天很开心，和朋友一起完成了项目", "真为你高兴", "joy"),
+    ("感觉无意义，很空虚", "", "sadness"),
+    ("I feel 开心 today!", "", ""),
+]
+
+
+class TestWellbeingRollup(unittest.TestCase):
+    """Test cases for WellbeingRollup and the reports built on it."""
+
+    def setUp(self):
+        temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        temp_db_file.close()
+        self.db_path = temp_db_file.name
+        self.db_manager = DatabaseManager(self.db_path)
+        self.analyzer = ConversationAnalyzer(self.db_manager)
+        self.generator = PERMAReportGenerator(self.db_manager)
+        self.rollup = self.generator.rollup
+
+    def tearDown(self):
+        self.db_manager.close()
+        os.unlink(self.db_path)
+
+    def snapshot(self):
+        return (
+            self.db_manager.execute_query(
+                "SELECT * FROM wellbeing_daily ORDER BY user_id, day"
+            ),
+            self.db_manager.execute_query(
+                "SELECT * FROM wellbeing_daily_labels ORDER BY user_id, day, kind, label"
+            ),
+        )
+
+    def store_all(self, user_id=1):
+        for message, response, emotion in MESSAGES:
+            self.analyzer.store_message(user_id, message, response, emotion)
+        result = CognitiveAnalysisResult(
+            distortions=[
+                (CognitiveDistortion.LABELING, 0.5),
+                (CognitiveDistortion.OVERGENERALIZATION, 0.25),
+            ],
+            irrational_beliefs=[],
+            core_beliefs=[],
+            automatic_thoughts=[],
+            emotional_patterns={},
+            behavioral_patterns=[],
+            confidence=0.6,
+        )
+        self.analyzer._store_cognitive_analysis(user_id, "我总是失败", result)
+        self.analyzer.flush()
+
+    def test_incremental_updates_match_backfill(self):
+        self.store_all(1)
+        self.store_all(2)
+        incremental = self.snapshot()
+        self.assertEqual(len(incremental[0]), 2)
+        self.assertEqual(incremental[0][0]["message_count"], 4)
+
+        self.assertEqual(
+            [
+                (row["label"], row["count"])
+                for row in incremental[1]
+                if row["user_id"] == 1
+            ],
+            [
+                ("labeling", 1),
+                ("overgeneralization", 1),
+                ("joy", 1),
+                ("neutral", 1),
+                ("sadness", 1),
+            ],
+        )
+
+        self.rollup.backfill()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_report_scores_match_raw_messages(self):
+        self.store_all(1)
+        user_data = self.generator._collect_user_data(
+            1, datetime.now() - timedelta(days=7), datetime.now()
+        )
+        self.assertEqual(user_data["metadata"]["total_interactions"], 4)
+        self.assertEqual(user_data["metadata"]["active_days"], 1)
+        self.assertEqual(user_data["metadata"]["cognitive_analysis_count"], 1)
+        self.assertEqual(
+            user_data["emotion_distribution"], {"joy": 1, "sadness": 1, "neutral": 1}
+        )
+
+        raw = [
+            {"message": text}
+            for message, response, _emotion in MESSAGES
+            for text in (message, response)
+            if text
+        ]
+        expected = self.generator._calculate_dimension_scores(
+            dict(user_data, perma_counts=None, messages=raw)
+        )
+        self.assertEqual(
+            self.generator._calculate_dimension_scores(user_data), expected
+        )
+
+        patterns = self.generator._analyze_cognitive_patterns(user_data)
+        self.assertEqual(
+            patterns["common_distortions"],
+            [
+                {"type": "labeling", "frequency": 0.5},
+                {"type": "overgeneralization", "frequency": 0.25},
+            ],
+        )
+
+    def test_existing_history_is_backfilled_on_first_report(self):
+        self.db_manager.execute_insert(
+            "INSERT INTO conversation_history (user_id, message, is_user, topic) "
+            "VALUES (?, ?, ?, ?)",
+            (3, "和家人在一起很幸福", 1, "joy"),
+        )
+        self.assertEqual(self.snapshot(), ([], []))
+
+        user_data = self.generator._collect_user_data(
+            3, datetime.now() - timedelta(days=7), datetime.now()
+        )
+        self.assertEqual(user_data["metadata"]["total_interactions"], 1)
+        # Later messages are added on top, not recounted
+        self.analyzer.store_message(3, "谢谢你的陪伴")
+        self.analyzer.flush()
+        self.rollup.ensure_backfilled(3)
+        self.assertEqual(self.snapshot()[0][0]["message_count"], 2)
+
+    def test_report_from_another_manager_sees_queued_messages(self):
+        self.db_manager.write_behind().flush_interval = 60  # Only explicit flushes
+        self.analyzer.store_message(4, "今天很开心", emotion_detected="joy")
+
+        # What generate_weekly_report does: a fresh manager on the same file
+        generator = PERMAReportGenerator(DatabaseManager(self.db_path))
+        user_data = generator._collect_user_data(
+            4, datetime.now() - timedelta(days=7), datetime.now()
+        )
+        # Counted once: the backfill saw the message, not also its queued upsert
+        self.assertEqual(user_data["metadata"]["total_interactions"], 1)
+        self.assertEqual(self.snapshot()[0][0]["message_count"], 1)
+
+    def test_load_sums_days_in_range(self):
+        for day, count in [("2024-01-01", 1), ("2024-01-02", 2), ("2024-01-09", 4)]:
+            for query, params in self.rollup.message_statements(
+                1, day, [("开心", "joy")] * count
+            ):
+                self.db_manager.execute_insert(query, params)
+
+        totals = self.rollup.load(1, date(2024, 1, 1), date(2024, 1, 7))
+        self.assertEqual(totals["message_count"], 3)
+        self.assertEqual(totals["active_days"], 2)
+        self.assertEqual(totals["perma_counts"][0].tolist(), [3, 0])
+        self.assertEqual(totals["emotion_counts"], {"joy": 3})
+
+        empty = self.rollup.load(1, date(2023, 1, 1), date(2023, 1, 7))
+        self.assertEqual((empty["message_count"], empty["active_days"]), (0, 0))
+        self.assertEqual(empty["perma_counts"].sum(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
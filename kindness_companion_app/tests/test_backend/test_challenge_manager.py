@@ -83,10 +83,9 @@ class TestChallengeManager(unittest.TestCase):
         # Check that the result is the expected challenge
         self.assertEqual(result, self.sample_challenges[0])
         
-        # Check that the mock was called correctly
+        # Check that the catalog was loaded with a single query
         self.mock_db_manager.execute_query.assert_called_once_with(
-            "SELECT * FROM challenges WHERE id = ?",
-            (1,)
+            "SELECT * FROM challenges ORDER BY difficulty, title"
         )
     
     def test_get_challenge_by_id_not_found(self):
@@ -100,11 +99,45 @@ class TestChallengeManager(unittest.TestCase):
         # Check that the result is None
         self.assertIsNone(result)
         
-        # Check that the mock was called correctly
+        # Check that the catalog was loaded with a single query
         self.mock_db_manager.execute_query.assert_called_once_with(
-            "SELECT * FROM challenges WHERE id = ?",
-            (999,)
+            "SELECT * FROM challenges ORDER BY difficulty, title"
+        )
+
+    def test_challenge_catalog_cached(self):
+        """Test that challenge lookups are served from the loaded catalog."""
+        self.mock_db_manager.execute_query.return_value = self.sample_challenges
+
+        self.assertEqual(self.challenge_manager.get_challenge_by_id(1)["title"], "每日微笑")
+        self.assertEqual(self.challenge_manager.get_challenge_by_id("2")["title"], "扶老助残")
+        self.assertEqual(len(self.challenge_manager.get_all_challenges()), 2)
+        self.assertEqual(
+            self.challenge_manager.get_challenges_by_category("社区服务"),
+            [self.sample_challenges[1]]
         )
+
+        # Only the initial catalog load hits the database
+        self.mock_db_manager.execute_query.assert_called_once()
+
+    def test_create_challenge_invalidates_catalog(self):
+        """Test that creating a challenge reloads the catalog on next read."""
+        self.mock_db_manager.execute_query.return_value = self.sample_challenges
+        self.challenge_manager.get_all_challenges()
+        self.mock_db_manager.execute_insert.return_value = 3
+
+        challenge_id = self.challenge_manager.create_challenge("新挑战", "描述", "环保", 2)
+        new_challenge = {
+            "id": 3,
+            "title": "新挑战",
+            "description": "描述",
+            "category": "环保",
+            "difficulty": 2,
+        }
+        self.mock_db_manager.execute_query.return_value = self.sample_challenges + [new_challenge]
+
+        self.assertEqual(challenge_id, 3)
+        self.assertEqual(self.challenge_manager.get_challenge_by_id(3)["title"], "新挑战")
+        self.assertEqual(self.mock_db_manager.execute_query.call_count, 2)
     
     def test_get_challenges_by_category(self):
         """Test getting challenges by category."""
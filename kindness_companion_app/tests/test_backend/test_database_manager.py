@@ -3,12 +3,13 @@ import os
 import tempfile
 import sqlite3
 import sys
+import threading
 from pathlib import Path
 
 # Add the parent directory to sys.path to allow importing the modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from backend.database_manager import DatabaseManager
+from backend.database_manager import DatabaseManager, SCHEMA_MIGRATIONS
 
 class TestDatabaseManager(unittest.TestCase):
     """Test cases for the DatabaseManager class."""
@@ -150,5 +151,286 @@ class TestDatabaseManager(unittest.TestCase):
             self.assertIn("category", challenge)
             self.assertIn("difficulty", challenge)
 
+    def test_transaction_commits_once(self):
+        """Test that statements inside a transaction are committed together."""
+        with self.db_manager.transaction():
+            user_id = self.db_manager.execute_insert(
+                "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                ("tx_user", "hash:salt")
+            )
+            self.db_manager.execute_update(
+                "UPDATE users SET email = ? WHERE id = ?",
+                ("tx@example.com", user_id)
+            )
+            # Still inside the transaction: the connection stays open
+            self.assertIsNotNone(self.db_manager.connection)
+
+        self.assertIsNone(self.db_manager.connection)
+        result = self.db_manager.execute_query(
+            "SELECT email FROM users WHERE id = ?", (user_id,)
+        )
+        self.assertEqual(result[0]["email"], "tx@example.com")
+
+    def test_transaction_rolls_back_on_error(self):
+        """Test that an error inside a transaction undoes every statement."""
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.db_manager.transaction():
+                self.db_manager.execute_insert(
+                    "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                    ("rollback_user", "hash:salt")
+                )
+                # Duplicate username violates the UNIQUE constraint
+                self.db_manager.execute_insert(
+                    "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                    ("rollback_user", "hash:salt")
+                )
+
+        result = self.db_manager.execute_query(
+            "SELECT * FROM users WHERE username = ?", ("rollback_user",)
+        )
+        self.assertEqual(result, [])
+
+    def test_nested_transaction_uses_savepoint(self):
+        """Test that a failing nested block only rolls back itself."""
+        with self.db_manager.transaction():
+            self.db_manager.execute_insert(
+                "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                ("outer_user", "hash:salt")
+            )
+            try:
+                with self.db_manager.transaction():
+                    self.db_manager.execute_insert(
+                        "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                        ("inner_user", "hash:salt")
+                    )
+                    raise ValueError("abort inner block")
+            except ValueError:
+                pass
+
+        usernames = [
+            row["username"]
+            for row in self.db_manager.execute_query("SELECT username FROM users")
+        ]
+        self.assertIn("outer_user", usernames)
+        self.assertNotIn("inner_user", usernames)
+
+    def test_storage_profile_pragmas(self):
+        """Test that the default storage profile enables WAL and tuned PRAGMAs."""
+        self.db_manager.connect()
+        cursor = self.db_manager.cursor
+        self.assertEqual(cursor.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(cursor.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(cursor.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+        self.db_manager.disconnect()
+
+    def test_compatible_storage_profile(self):
+        """Test that the compatible profile keeps the rollback journal."""
+        temp = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        temp.close()
+        try:
+            manager = DatabaseManager(temp.name, storage_profile="compatible")
+            result = manager.execute_query("PRAGMA journal_mode")
+            self.assertEqual(result[0]["journal_mode"], "delete")
+        finally:
+            os.unlink(temp.name)
+
+    def test_migrations_create_indexes(self):
+        """Test that startup migrations record the schema version and add indexes."""
+        self.assertEqual(
+            self.db_manager.get_schema_version(), SCHEMA_MIGRATIONS[-1][0]
+        )
+        indexes = [
+            row["name"]
+            for row in self.db_manager.execute_query(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        ]
+        self.assertIn("idx_conversation_history_user_time", indexes)
+        self.assertIn("idx_conversation_history_user_context", indexes)
+        self.assertIn("idx_reminders_enabled", indexes)
+
+    def test_ensure_indexes_for_late_tables(self):
+        """Test that tables created after startup get their indexes on demand."""
+        self.db_manager.execute_query(
+            "CREATE TABLE kindness_wall (id INTEGER PRIMARY KEY, created_at TIMESTAMP)"
+        )
+        self.db_manager.ensure_indexes("kindness_wall", "wall_comments")
+
+        plan = self.db_manager.execute_query(
+            "EXPLAIN QUERY PLAN SELECT * FROM kindness_wall ORDER BY created_at DESC"
+        )
+        self.assertTrue(
+            any("idx_kindness_wall_created_at" in row["detail"] for row in plan)
+        )
+
+    def test_execute_many(self):
+        """Test that execute_many writes every row and returns the row count."""
+        rows = [(f"user_{i}", "hash:salt") for i in range(50)]
+        affected = self.db_manager.execute_many(
+            "INSERT INTO users (username, password_hash) VALUES (?, ?)", rows
+        )
+        self.assertEqual(affected, 50)
+        count = self.db_manager.execute_query("SELECT COUNT(*) AS n FROM users")
+        self.assertEqual(count[0]["n"], 50)
+
+    def test_bulk_insert_returns_id_ranges(self):
+        """Test chunked bulk inserts and the returned id ranges."""
+        rows = ({"username": f"bulk_{i}", "password_hash": "hash:salt"} for i in range(25))
+        stats = self.db_manager.bulk_insert("users", rows, chunk_size=10)
+
+        self.assertEqual(stats["inserted"], 25)
+        self.assertEqual(len(stats["id_ranges"]), 3)
+        first_id, _ = stats["id_ranges"][0]
+        _, last_id = stats["id_ranges"][-1]
+        ids = [
+            row["id"]
+            for row in self.db_manager.execute_query(
+                "SELECT id FROM users WHERE username LIKE 'bulk_%' ORDER BY id"
+            )
+        ]
+        self.assertEqual(ids, list(range(first_id, last_id + 1)))
+
+    def test_bulk_insert_or_ignore(self):
+        """Test that or_ignore skips rows violating UNIQUE constraints."""
+        self.db_manager.bulk_insert(
+            "users", [{"username": "dup", "password_hash": "hash:salt"}]
+        )
+        stats = self.db_manager.bulk_insert(
+            "users",
+            [
+                {"username": "dup", "password_hash": "hash:salt"},
+                {"username": "fresh", "password_hash": "hash:salt"},
+            ],
+            or_ignore=True,
+        )
+        self.assertEqual(stats["inserted"], 1)
+
+    def test_bulk_insert_rejects_bad_identifiers(self):
+        """Test that table and column names are validated."""
+        with self.assertRaises(ValueError):
+            self.db_manager.bulk_insert("users; DROP TABLE users", [{"username": "x"}])
+
+    def test_iter_query_row_types(self):
+        """Test lazy iteration with dict, tuple and namedtuple rows."""
+        self.db_manager.bulk_insert(
+            "users",
+            ({"username": f"iter_{i}", "password_hash": "hash:salt"} for i in range(30)),
+        )
+        query = "SELECT id, username FROM users ORDER BY id"
+
+        dict_rows = list(self.db_manager.iter_query(query, batch_size=7))
+        self.assertEqual(len(dict_rows), 30)
+        self.assertEqual(dict_rows[0]["username"], "iter_0")
+
+        tuple_rows = list(self.db_manager.iter_query(query, row_type="tuple"))
+        self.assertEqual(tuple_rows[0][1], "iter_0")
+
+        named_rows = list(self.db_manager.iter_query(query, row_type="namedtuple"))
+        self.assertEqual(named_rows[-1].username, "iter_29")
+
+    def test_iter_query_survives_nested_queries(self):
+        """Test that other queries during iteration do not break the cursor."""
+        self.db_manager.bulk_insert(
+            "users",
+            ({"username": f"nested_{i}", "password_hash": "hash:salt"} for i in range(10)),
+        )
+        seen = 0
+        for row in self.db_manager.iter_query("SELECT id FROM users", batch_size=3):
+            self.db_manager.execute_query("SELECT * FROM users WHERE id = ?", (row["id"],))
+            seen += 1
+        self.assertEqual(seen, 10)
+
+    def test_iter_query_rejects_unknown_row_type(self):
+        """Test that an unsupported row_type raises ValueError."""
+        with self.assertRaises(ValueError):
+            list(self.db_manager.iter_query("SELECT 1", row_type="object"))
+
+    def test_read_only_manager(self):
+        """Test that a read-only manager reads existing data but cannot write."""
+        self.db_manager.execute_insert(
+            "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+            ("reader", "hash:salt"),
+        )
+        for use_pool in (False, True):
+            reader = DatabaseManager(self.temp_db_file.name, use_pool=use_pool, read_only=True)
+            rows = reader.execute_query("SELECT username FROM users")
+            self.assertEqual(rows, [{"username": "reader"}])
+            self.assertEqual(len(list(reader.iter_query("SELECT id FROM users"))), 1)
+            with self.assertRaises(sqlite3.OperationalError):
+                with reader.transaction():
+                    reader.execute_insert(
+                        "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                        ("writer", "hash:salt"),
+                    )
+            reader.close()
+
+
+class TestDatabaseManagerPool(unittest.TestCase):
+    """Test cases for the pooled connection mode of DatabaseManager."""
+
+    def setUp(self):
+        """Set up a temporary database with a pooled manager."""
+        self.temp_db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        self.temp_db_file.close()
+        self.db_manager = DatabaseManager(self.temp_db_file.name, use_pool=True, pool_size=2)
+
+    def tearDown(self):
+        """Close the pool and remove the temporary database."""
+        self.db_manager.close()
+        if os.path.exists(self.temp_db_file.name):
+            os.unlink(self.temp_db_file.name)
+
+    def test_connection_reused_between_queries(self):
+        """Test that consecutive queries reuse the same pooled connection."""
+        self.db_manager.execute_query("SELECT 1")
+        self.db_manager.execute_query("SELECT 1")
+
+        stats = self.db_manager.pool_stats()
+        self.assertEqual(stats["created"], 1)
+        self.assertEqual(stats["in_use"], 0)
+        self.assertGreaterEqual(stats["reused"], 2)
+
+    def test_crud_through_pool(self):
+        """Test that inserts are visible to later queries in pooled mode."""
+        user_id = self.db_manager.execute_insert(
+            "INSERT INTO users (username, password_hash) VALUES (?, ?)",
+            ("pooled_user", "hash:salt")
+        )
+        result = self.db_manager.execute_query(
+            "SELECT username FROM users WHERE id = ?", (user_id,)
+        )
+        self.assertEqual(result[0]["username"], "pooled_user")
+
+    def test_pool_is_bounded_across_threads(self):
+        """Test that worker threads share at most pool_size connections."""
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(20):
+                    self.db_manager.execute_query("SELECT COUNT(*) AS n FROM challenges")
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        stats = self.db_manager.pool_stats()
+        self.assertLessEqual(stats["created"], 2)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_close_releases_connections(self):
+        """Test that close() shuts the pool down."""
+        self.db_manager.execute_query("SELECT 1")
+        self.db_manager.close()
+
+        self.assertTrue(self.db_manager.pool.closed)
+        self.assertEqual(self.db_manager.pool_stats()["size"], 0)
+        self.assertEqual(self.db_manager.execute_query("SELECT 1"), [])
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import os
 import sys
+import tempfile
 from unittest.mock import MagicMock, patch
 import datetime
 
@@ -207,65 +208,38 @@ class TestProgressTracker(unittest.TestCase):
         self.assertEqual(result, [])
         self.mock_db_manager.execute_query.assert_called_once()
 
-    def test_get_streak_consecutive(self):
-        """Test getting streak with consecutive days."""
-        # Sample progress data with consecutive days
-        dates = [
-            (datetime.datetime.now() - datetime.timedelta(days=i)).date().isoformat()
-            for i in range(3)
-        ]
-        sample_progress = [
-            {
-                "id": i + 1,
-                "user_id": self.sample_user_id,
-                "challenge_id": self.sample_challenge_id,
-                "check_in_date": date,
-                "notes": f"Check-in {i+1}",
-            }
-            for i, date in enumerate(dates)
+    def test_get_streak_current(self):
+        """Test reading a streak whose last check-in was today."""
+        # Configure mock to return the materialized stats row
+        self.mock_db_manager.execute_query.return_value = [
+            {"current_streak": 3, "last_check_in_date": self.sample_date}
         ]
 
-        # Configure mock
-        self.mock_db_manager.execute_query.return_value = sample_progress
-
         # Get streak
         result = self.progress_tracker.get_streak(
             self.sample_user_id, self.sample_challenge_id
         )
 
         # Verify result
-        self.assertEqual(result, 3)  # Should be 3 consecutive days
+        self.assertEqual(result, 3)
         self.mock_db_manager.execute_query.assert_called_once()
 
-    def test_get_streak_with_gap(self):
-        """Test getting streak with a gap in check-ins."""
-        # Sample progress data with a gap
-        dates = [
-            datetime.datetime.now().date().isoformat(),
-            (datetime.datetime.now() - datetime.timedelta(days=2)).date().isoformat(),
-            (datetime.datetime.now() - datetime.timedelta(days=3)).date().isoformat(),
-        ]
-        sample_progress = [
-            {
-                "id": i + 1,
-                "user_id": self.sample_user_id,
-                "challenge_id": self.sample_challenge_id,
-                "check_in_date": date,
-                "notes": f"Check-in {i+1}",
-            }
-            for i, date in enumerate(dates)
+    def test_get_streak_broken(self):
+        """Test that a streak ending before yesterday reads as 0."""
+        last_date = (
+            (datetime.datetime.now() - datetime.timedelta(days=2)).date().isoformat()
+        )
+        self.mock_db_manager.execute_query.return_value = [
+            {"current_streak": 5, "last_check_in_date": last_date}
         ]
 
-        # Configure mock
-        self.mock_db_manager.execute_query.return_value = sample_progress
-
         # Get streak
         result = self.progress_tracker.get_streak(
             self.sample_user_id, self.sample_challenge_id
         )
 
         # Verify result
-        self.assertEqual(result, 1)  # Should be 1 due to gap
+        self.assertEqual(result, 0)  # Should be 0 because the streak was broken
         self.mock_db_manager.execute_query.assert_called_once()
 
     def test_get_streak_empty(self):
@@ -385,14 +359,14 @@ class TestProgressTracker(unittest.TestCase):
             {"id": 1, "name": "Challenge 1"},
             {"id": 2, "name": "Challenge 2"},
         ]
-        # 只关注聚合逻辑，mock get_streak
+        # 只关注聚合逻辑，mock get_streaks（未订阅的挑战 3 不参与比较）
         with patch.object(
-            self.progress_tracker, "get_streak", side_effect=[3, 2]
-        ) as mock_get_streak:
+            self.progress_tracker, "get_streaks", return_value={1: 3, 2: 2, 3: 9}
+        ) as mock_get_streaks:
             result = self.progress_tracker.get_longest_streak_all_challenges(1)
             self.assertEqual(result, 3)  # 应返回最大值 3
             self.mock_challenge_manager.get_user_challenges.assert_called_once_with(1)
-            self.assertEqual(mock_get_streak.call_count, 2)
+            mock_get_streaks.assert_called_once_with(1)
 
     def test_get_longest_streak_all_challenges_empty(self):
         """测试获取空挑战列表的最长连续打卡天数"""
@@ -521,5 +495,203 @@ class TestProgressTracker(unittest.TestCase):
         self.mock_db_manager.execute_query.assert_called_once()
 
 
+class TestProgressTrackerStats(unittest.TestCase):
+    """Test cases for the materialized user_challenge_stats table."""
+
+    def setUp(self):
+        """Set up a temporary database for testing."""
+        self.temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        self.temp_db_file.close()
+        self.db_manager = DatabaseManager(self.temp_db_file.name)
+        self.progress_tracker = ProgressTracker(self.db_manager)
+        self.today = datetime.date.today()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.db_manager.close()
+        if os.path.exists(self.temp_db_file.name):
+            os.unlink(self.temp_db_file.name)
+
+    def day(self, offset):
+        """Return the ISO date ``offset`` days before today."""
+        return (self.today - datetime.timedelta(days=offset)).isoformat()
+
+    def stats(self, user_id=1, challenge_id=1):
+        """Fetch the stats row for a user/challenge pair."""
+        rows = self.db_manager.execute_query(
+            "SELECT * FROM user_challenge_stats WHERE user_id = ? AND challenge_id = ?",
+            (user_id, challenge_id),
+        )
+        return rows[0] if rows else None
+
+    def all_stats(self):
+        """Fetch every stats row in a stable order."""
+        return self.db_manager.execute_query(
+            "SELECT * FROM user_challenge_stats ORDER BY user_id, challenge_id"
+        )
+
+    def test_check_in_maintains_stats(self):
+        """Test that consecutive and broken check-ins update the stats row."""
+        for offset in (6, 5, 4, 1, 0):
+            self.assertTrue(self.progress_tracker.check_in(1, 1, self.day(offset)))
+
+        stats = self.stats()
+        self.assertEqual(stats["current_streak"], 2)
+        self.assertEqual(stats["longest_streak"], 3)
+        self.assertEqual(stats["last_check_in_date"], self.day(0))
+        self.assertEqual(stats["total_check_ins"], 5)
+        self.assertEqual(self.progress_tracker.get_streak(1, 1), 2)
+
+    def test_back_dated_check_in_joins_streaks(self):
+        """Test that a check-in filling a gap merges the surrounding streaks."""
+        for offset in (0, 1, 3, 4):
+            self.progress_tracker.check_in(1, 1, self.day(offset))
+        self.assertEqual(self.progress_tracker.get_streak(1, 1), 2)
+
+        self.assertTrue(self.progress_tracker.check_in(1, 1, self.day(2)))
+
+        stats = self.stats()
+        self.assertEqual(stats["current_streak"], 5)
+        self.assertEqual(stats["longest_streak"], 5)
+        self.assertEqual(stats["total_check_ins"], 5)
+
+    def test_duplicate_check_in_leaves_stats_unchanged(self):
+        """Test that a rejected check-in does not touch the stats row."""
+        self.progress_tracker.check_in(1, 1, self.day(0))
+        self.assertFalse(self.progress_tracker.check_in(1, 1, self.day(0)))
+        self.assertEqual(self.stats()["total_check_ins"], 1)
+
+    def test_undo_check_in_recomputes_stats(self):
+        """Test that undoing a check-in splits the streak it belonged to."""
+        for offset in (3, 2, 1, 0):
+            self.progress_tracker.check_in(1, 1, self.day(offset))
+
+        self.assertTrue(self.progress_tracker.undo_check_in(1, 1, self.day(1)))
+
+        stats = self.stats()
+        self.assertEqual(stats["current_streak"], 1)
+        self.assertEqual(stats["longest_streak"], 2)
+        self.assertEqual(stats["total_check_ins"], 3)
+
+        for offset in (0, 2, 3):
+            self.progress_tracker.undo_check_in(1, 1, self.day(offset))
+        self.assertIsNone(self.stats())
+        self.assertEqual(self.progress_tracker.get_streak(1, 1), 0)
+
+    def test_get_streaks(self):
+        """Test reading every streak of a user with one query."""
+        self.progress_tracker.check_in(1, 1, self.day(1))
+        self.progress_tracker.check_in(1, 1, self.day(0))
+        self.progress_tracker.check_in(1, 2, self.day(5))
+        self.progress_tracker.check_in(2, 1, self.day(0))
+
+        self.assertEqual(self.progress_tracker.get_streaks(1), {1: 2, 2: 0})
+        self.assertEqual(self.progress_tracker.get_streaks(3), {})
+
+    def test_rebuild_challenge_stats(self):
+        """Test that a rebuild repairs drifted rows and matches incremental state."""
+        for user_id, challenge_id, offset in [
+            (1, 1, 2),
+            (1, 1, 1),
+            (1, 1, 0),
+            (1, 2, 9),
+            (2, 1, 4),
+            (2, 1, 3),
+        ]:
+            self.progress_tracker.check_in(user_id, challenge_id, self.day(offset))
+        expected = self.all_stats()
+
+        self.db_manager.execute_update(
+            "UPDATE user_challenge_stats SET current_streak = 99, total_check_ins = 0"
+        )
+        self.assertEqual(self.progress_tracker.rebuild_challenge_stats(1), 2)
+        self.assertEqual(self.stats(2, 1)["current_streak"], 99)
+
+        self.assertEqual(self.progress_tracker.rebuild_challenge_stats(), 3)
+        self.assertEqual(self.all_stats(), expected)
+
+    def test_get_user_dashboard_stats(self):
+        """Test the grouped dashboard statistics and their cache."""
+        for challenge_id in (9, 5):  # 环保 and 社区服务
+            self.db_manager.execute_insert(
+                "INSERT INTO user_challenges (user_id, challenge_id) VALUES (1, ?)",
+                (challenge_id,),
+            )
+        self.progress_tracker.check_in(1, 9, self.day(1))
+        self.progress_tracker.check_in(1, 9, self.day(0))
+        self.progress_tracker.check_in(1, 10, self.day(0))  # not subscribed
+        self.progress_tracker.check_in(1, 5, self.day(3))
+
+        stats = self.progress_tracker.get_user_dashboard_stats(1)
+
+        self.assertEqual(stats["total_check_ins"], 4)
+        self.assertEqual(stats["longest_streak"], 2)
+        self.assertEqual(stats["subscribed_count"], 2)
+        self.assertEqual(stats["category_counts"], {"环保": 3, "社区服务": 1})
+        self.assertEqual(set(stats["challenges"]), {9, 5})
+        self.assertEqual(stats["challenges"][9]["streak"], 2)
+        self.assertEqual(stats["challenges"][9]["total_check_ins"], 2)
+        self.assertAlmostEqual(stats["challenges"][9]["completion_rate"], 2 / 30)
+        self.assertEqual(stats["challenges"][5]["streak"], 0)
+        self.assertEqual(stats["challenges"][5]["longest_streak"], 1)
+
+        # Served from the cache until a check-in invalidates it
+        self.assertIs(self.progress_tracker.get_user_dashboard_stats(1), stats)
+        self.progress_tracker.check_in(1, 5, self.day(0))
+        refreshed = self.progress_tracker.get_user_dashboard_stats(1)
+        self.assertEqual(refreshed["total_check_ins"], 5)
+        self.assertEqual(refreshed["category_counts"]["社区服务"], 2)
+
+        self.progress_tracker.undo_check_in(1, 9, self.day(0))
+        self.assertEqual(
+            self.progress_tracker.get_user_dashboard_stats(1)["total_check_ins"], 4
+        )
+
+    def test_get_user_dashboard_stats_empty(self):
+        """Test dashboard statistics for a user without any activity."""
+        stats = self.progress_tracker.get_user_dashboard_stats(1)
+        self.assertEqual(stats["total_check_ins"], 0)
+        self.assertEqual(stats["longest_streak"], 0)
+        self.assertEqual(stats["subscribed_count"], 0)
+        self.assertEqual(stats["category_counts"], {})
+        self.assertEqual(stats["challenges"], {})
+
+    def test_get_check_ins_page(self):
+        """Test paging, SQL sorting and filters of the check-in history."""
+        for offset in range(5):
+            self.progress_tracker.check_in(1, 1, self.day(offset))
+        self.progress_tracker.check_in(1, 9, self.day(0))
+        self.progress_tracker.check_in(2, 1, self.day(0))
+
+        first = self.progress_tracker.get_check_ins_page(1, offset=0, limit=4)
+        rest = self.progress_tracker.get_check_ins_page(1, offset=4, limit=4)
+        dates = [row["check_in_date"] for row in first + rest]
+        self.assertEqual(len(first), 4)
+        self.assertEqual(len(rest), 2)
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(rest[-1]["challenge_title"], "每日微笑")
+        self.assertEqual(len({row["id"] for row in first + rest}), 6)
+
+        ascending = self.progress_tracker.get_check_ins_page(
+            1, 1, offset=0, limit=10, order="asc"
+        )
+        self.assertEqual(
+            [row["check_in_date"] for row in ascending],
+            [self.day(offset) for offset in range(4, -1, -1)],
+        )
+
+        by_category = self.progress_tracker.get_check_ins_page(
+            1, limit=10, sort_by="category", start_date=self.day(0)
+        )
+        self.assertEqual([row["category"] for row in by_category], ["环保", "日常行为"])
+
+    def test_get_check_ins_page_invalid_sort(self):
+        """Test that unsupported sort arguments are rejected."""
+        with self.assertRaises(ValueError):
+            self.progress_tracker.get_check_ins_page(1, order="sideways")
+        with self.assertRaises(ValueError):
+            self.progress_tracker.get_check_ins_page(1, sort_by="notes; DROP TABLE")
+
+
 if __name__ == "__main__":
     unittest.main()
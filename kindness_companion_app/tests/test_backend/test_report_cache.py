@@ -0,0 +1,143 @@
+import datetime
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# Add the parent directory to sys.path to allow importing the modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.database_manager import DatabaseManager
+from backend.progress_tracker import ProgressTracker
+from backend.report_cache import ReportCache
+
+END_DATE = datetime.date(2024, 1, 7)
+
+
+def set_timezone(name):
+    """Switch the process's local timezone (POSIX only)."""
+    if name is None:
+        os.environ.pop("TZ", None)
+    else:
+        os.environ["TZ"] = name
+    time.tzset()
+
+
+class TestReportCache(unittest.TestCase):
+    """Test cases for the ReportCache class."""
+
+    def setUp(self):
+        # Message timestamps are UTC; pin the local zone the windows use
+        self.saved_tz = os.environ.get("TZ")
+        if hasattr(time, "tzset"):
+            set_timezone("UTC")
+        temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        temp_db_file.close()
+        self.db_path = temp_db_file.name
+        self.db_manager = DatabaseManager(self.db_path)
+        self.cache = ReportCache(self.db_manager)
+        self.start, self.end = ReportCache.window(7, END_DATE)
+
+    def tearDown(self):
+        os.unlink(self.db_path)
+        if hasattr(time, "tzset"):
+            set_timezone(self.saved_tz)
+
+    def add_message(self, user_id, timestamp):
+        self.db_manager.execute_insert(
+            "INSERT INTO conversation_history (user_id, message, is_user, timestamp) "
+            "VALUES (?, ?, 1, ?)",
+            (user_id, "你好", timestamp),
+        )
+
+    def add_check_in(self, user_id, day):
+        self.db_manager.execute_insert(
+            "INSERT INTO progress (user_id, challenge_id, check_in_date) "
+            "VALUES (?, 1, ?)",
+            (user_id, day),
+        )
+
+    def put(self, user_id=1, version="1"):
+        fingerprint = self.cache.fingerprint(user_id, self.start, self.end)
+        self.cache.put(user_id, 7, version, {"score": 3}, fingerprint, END_DATE)
+
+    def test_window(self):
+        self.assertEqual((self.start, self.end), ("2023-12-31", "2024-01-07"))
+
+    def test_fresh_until_data_in_window_changes(self):
+        self.add_message(1, "2024-01-03 10:00:00")
+        self.put()
+        self.assertEqual(self.cache.get(1, 7, "1", END_DATE), ({"score": 3}, True))
+
+        # Activity outside the window or by another user doesn't matter
+        self.add_message(1, "2024-01-08 09:00:00")
+        self.add_message(2, "2024-01-05 09:00:00")
+        self.assertTrue(self.cache.get(1, 7, "1", END_DATE)[1])
+
+        # A message late on the last day does
+        self.add_message(1, "2024-01-07 23:59:59")
+        self.assertEqual(self.cache.get(1, 7, "1", END_DATE), ({"score": 3}, False))
+
+    @unittest.skipUnless(hasattr(time, "tzset"), "needs time.tzset")
+    def test_late_local_message_behind_utc_changes_fingerprint(self):
+        set_timezone("America/New_York")
+        self.assertEqual(
+            ReportCache.utc_days(self.start, self.end), ("2023-12-31", "2024-01-08")
+        )
+        self.put()
+        fingerprint = self.cache.fingerprint(1, self.start, self.end)
+
+        # 21:30 on the last local day is already the next day in UTC
+        self.add_message(1, "2024-01-08 02:30:00")
+        self.assertNotEqual(self.cache.fingerprint(1, self.start, self.end), fingerprint)
+        self.assertFalse(self.cache.get(1, 7, "1", END_DATE)[1])
+        self.assertEqual(self.cache.active_users(self.start, self.end), [1])
+
+    def test_creating_a_dependency_table_keeps_entry_fresh(self):
+        self.db_manager.execute_query("DROP TABLE IF EXISTS emotion_timeline")
+        self.put()
+        self.db_manager.execute_query(
+            "CREATE TABLE emotion_timeline "
+            "(user_id INTEGER, day TEXT, sample_count INTEGER, samples BLOB)"
+        )
+        self.assertTrue(self.cache.get(1, 7, "1", END_DATE)[1])
+
+    def test_check_in_makes_entry_stale(self):
+        self.put()
+        self.add_check_in(1, "2024-01-02")
+        self.assertFalse(self.cache.get(1, 7, "1", END_DATE)[1])
+
+    def test_new_day_makes_entry_stale(self):
+        self.put()
+        next_day = END_DATE + datetime.timedelta(days=1)
+        self.assertFalse(self.cache.get(1, 7, "1", next_day)[1])
+
+    def test_keyed_by_version_and_window(self):
+        self.put(version="1")
+        self.assertEqual(self.cache.get(1, 7, "2", END_DATE), (None, False))
+        self.assertEqual(self.cache.get(1, 30, "1", END_DATE), (None, False))
+
+    def test_invalidate(self):
+        self.put(user_id=1)
+        self.put(user_id=2)
+        self.cache.invalidate(1)
+        self.assertIsNone(self.cache.get(1, 7, "1", END_DATE)[0])
+        self.assertIsNotNone(self.cache.get(2, 7, "1", END_DATE)[0])
+
+    def test_weekly_report_stale_flag(self):
+        tracker = ProgressTracker(self.db_manager)
+        fingerprint = tracker.report_fingerprint(1, self.start, self.end)
+        tracker.save_weekly_report(1, "周报", self.start, self.end, fingerprint)
+
+        report = tracker.get_weekly_report(1, self.start, self.end, check_stale=True)
+        self.assertFalse(report["stale"])
+        self.assertNotIn("stale", tracker.get_weekly_report(1))
+
+        self.add_check_in(1, "2024-01-04")
+        report = tracker.get_weekly_report(1, self.start, self.end, check_stale=True)
+        self.assertTrue(report["stale"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+# Add the parent directory to sys.path to allow importing the modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.database_manager import DatabaseManager
+from backend.write_behind import WriteBehindQueue
+
+INSERT = "INSERT INTO notes (text) VALUES (?)"
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    """Test cases for the WriteBehindQueue class."""
+
+    def setUp(self):
+        temp_db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        temp_db_file.close()
+        self.db_path = temp_db_file.name
+        self.db_manager = DatabaseManager(self.db_path)
+        self.db_manager.execute_query(
+            "CREATE TABLE notes (id INTEGER PRIMARY KEY, text TEXT NOT NULL)"
+        )
+        self.queue = WriteBehindQueue(self.db_manager, flush_interval=60)
+
+    def tearDown(self):
+        self.queue.close()
+        os.unlink(self.db_path)
+
+    def notes(self):
+        return [
+            row["text"]
+            for row in self.db_manager.execute_query(
+                "SELECT text FROM notes ORDER BY id"
+            )
+        ]
+
+    def test_flush_commits_one_batch(self):
+        row_ids = []
+        for n in range(10):
+            self.queue.submit(INSERT, (f"note {n}",), on_written=row_ids.append)
+        self.assertEqual(self.notes(), [])
+        self.assertEqual(self.queue.pending, 10)
+
+        self.assertTrue(self.queue.flush(timeout=5))
+        self.assertEqual(self.notes(), [f"note {n}" for n in range(10)])
+        self.assertEqual(row_ids, list(range(1, 11)))
+        stats = self.queue.stats()
+        self.assertEqual(
+            (stats["batches"], stats["written"], stats["pending"]), (1, 10, 0)
+        )
+
+    def test_full_batch_is_written_without_waiting(self):
+        self.queue.batch_size = 3
+        for n in range(3):
+            self.queue.submit(INSERT, (f"note {n}",))
+        for _ in range(50):
+            if self.queue.pending == 0:
+                break
+            threading.Event().wait(0.1)
+        self.assertEqual(len(self.notes()), 3)
+
+    def test_bad_statement_does_not_lose_the_batch(self):
+        self.queue.submit(INSERT, ("kept",))
+        self.queue.submit(INSERT, (None,))  # Violates NOT NULL
+        self.queue.submit(INSERT, ("also kept",))
+        self.queue.flush(timeout=5)
+        self.assertEqual(self.notes(), ["kept", "also kept"])
+        self.assertEqual(self.queue.stats()["failed"], 1)
+
+    def test_submit_blocks_when_queue_is_full(self):
+        self.queue.batch_size = 1
+        self.queue.max_pending = 2
+        gate = threading.Event()
+        write_batch = self.queue._write_batch
+
+        def slow_write_batch(batch):
+            gate.wait(5)
+            write_batch(batch)
+
+        self.queue._write_batch = slow_write_batch
+        self.queue.submit(INSERT, ("first",))
+        for _ in range(50):  # Wait for the writer to take it and stall
+            if not self.queue._pending:
+                break
+            threading.Event().wait(0.01)
+        self.queue.submit(INSERT, ("second",))
+        self.queue.submit(INSERT, ("third",))
+
+        blocked = threading.Thread(target=self.queue.submit, args=(INSERT, ("late",)))
+        blocked.start()
+        blocked.join(0.3)
+        self.assertTrue(blocked.is_alive())
+
+        gate.set()
+        blocked.join(5)
+        self.assertFalse(blocked.is_alive())
+        self.queue.flush(timeout=5)
+        self.assertEqual(self.notes(), ["first", "second", "third", "late"])
+        self.assertEqual(self.queue.stats()["blocked"], 1)
+
+    def test_units_are_committed_together(self):
+        self.queue.batch_size = 2
+        self.queue.submit(INSERT, ("single",))
+        self.queue.submit_many([(INSERT, ("a",)), (INSERT, ("b",))])
+        self.queue.submit_many([(INSERT, ("c",)), (INSERT, (None,))])
+        self.queue.flush(timeout=5)
+        # A unit is never split across batches, and fails as a whole
+        self.assertEqual(self.notes(), ["single", "a", "b"])
+        stats = self.queue.stats()
+        self.assertEqual((stats["written"], stats["failed"]), (3, 2))
+
+    def test_managers_on_one_file_share_a_queue(self):
+        other = DatabaseManager(self.db_path)
+        queue = self.db_manager.write_behind()
+        self.assertIs(other.write_behind(), queue)
+        self.assertIsNot(
+            DatabaseManager(self.db_path, read_only=True).write_behind(), queue
+        )
+
+        queue.flush_interval = 60
+        queue.submit(INSERT, ("queued",))
+        other.close()  # Flushes, but the queue belongs to self.db_manager
+        self.assertEqual(self.notes(), ["queued"])
+        queue.submit(INSERT, ("still queued",))
+        other.write_behind().flush()
+        self.assertEqual(self.notes(), ["queued", "still queued"])
+
+        self.db_manager.close()
+        self.assertIsNot(other.write_behind(), queue)
+        other.close()
+
+    def test_close_writes_pending_and_later_submits_synchronously(self):
+        self.queue.submit(INSERT, ("pending",))
+        self.queue.close()
+        self.assertEqual(self.notes(), ["pending"])
+        self.queue.submit(INSERT, ("after close",))
+        self.assertEqual(self.notes(), ["pending", "after close"])
+
+
+if __name__ == "__main__":
+    unittest.main()
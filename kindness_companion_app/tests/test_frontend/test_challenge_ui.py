@@ -46,6 +46,7 @@ def mock_managers():
     
     # Configure progress_tracker to return sample streaks
     progress_tracker.get_streak.return_value = 3
+    progress_tracker.get_streaks.return_value = {1: 3}
     
     return {
         "challenge_manager": challenge_manager,
@@ -0,0 +1,146 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import Qt
+
+# Add the parent directory to sys.path to allow importing the modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from frontend.widgets.check_in_table_model import CheckInTableModel
+from backend.progress_tracker import ProgressTracker
+
+# Create a QApplication instance for the tests
+app = QApplication.instance()
+if not app:
+    app = QApplication([])
+
+
+def make_rows(count, offset=0):
+    """Build fake check-in rows as returned by get_check_ins_page."""
+    return [
+        {
+            "id": offset + i + 1,
+            "user_id": 1,
+            "challenge_id": 1,
+            "check_in_date": f"2024-01-{(offset + i) % 28 + 1:02d}",
+            "challenge_title": "每日微笑",
+            "category": None,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def progress_tracker():
+    """Create a mock progress tracker serving pages of a 5-row history."""
+    tracker = MagicMock(spec=ProgressTracker)
+    rows = make_rows(5)
+    tracker.get_check_ins_page.side_effect = (
+        lambda user_id, challenge_id, offset, limit, **kwargs: rows[offset:offset + limit]
+    )
+    return tracker
+
+
+def test_set_query_loads_first_page_only(progress_tracker):
+    """Test that only the first page is fetched until more rows are requested."""
+    model = CheckInTableModel(progress_tracker, page_size=2)
+    model.set_query(1, None, "2024-01-01", "2024-01-31")
+
+    assert model.rowCount() == 2
+    assert model.canFetchMore()
+    progress_tracker.get_check_ins_page.assert_called_once_with(
+        1,
+        None,
+        offset=0,
+        limit=2,
+        order="desc",
+        sort_by="date",
+        start_date="2024-01-01",
+        end_date="2024-01-31",
+    )
+
+    while model.canFetchMore():
+        model.fetchMore()
+    assert model.rowCount() == 5
+    assert progress_tracker.get_check_ins_page.call_count == 3
+
+
+def test_data_roles(progress_tracker):
+    """Test displayed values and the check-in role."""
+    model = CheckInTableModel(progress_tracker)
+    model.set_query(1)
+
+    assert model.columnCount() == 4
+    assert model.data(model.index(0, 0)) == "2024-01-01 (Mon)"
+    assert model.data(model.index(0, 1)) == "每日微笑"
+    assert model.data(model.index(0, 2)) == "未知分类"
+    assert model.data(model.index(0, 3)) == "撤销"
+    assert model.data(model.index(1, 0), CheckInTableModel.CheckInRole)["id"] == 2
+    assert model.check_in_at(4)["id"] == 5
+    assert model.check_in_at(5) is None
+
+
+def test_sort_reloads_in_sql(progress_tracker):
+    """Test that sorting re-queries with the matching SQL sort key."""
+    model = CheckInTableModel(progress_tracker, page_size=2)
+    model.set_query(1)
+    model.fetchMore()
+    assert model.rowCount() == 4
+
+    model.sort(1, Qt.SortOrder.AscendingOrder)
+
+    assert model.rowCount() == 2
+    kwargs = progress_tracker.get_check_ins_page.call_args.kwargs
+    assert kwargs["sort_by"] == "challenge"
+    assert kwargs["order"] == "asc"
+    assert kwargs["offset"] == 0
+
+    # The action column is not sortable
+    calls = progress_tracker.get_check_ins_page.call_count
+    model.sort(3, Qt.SortOrder.DescendingOrder)
+    assert progress_tracker.get_check_ins_page.call_count == calls
+
+
+def test_clear(progress_tracker):
+    """Test clearing the model."""
+    model = CheckInTableModel(progress_tracker)
+    model.set_query(1)
+    model.clear()
+
+    assert model.rowCount() == 0
+    assert not model.canFetchMore()
+
+
+def test_first_page_fetched_separately(progress_tracker):
+    """Test that page one can be fetched elsewhere and handed to the model."""
+    model = CheckInTableModel(progress_tracker, page_size=2)
+    query = model.query_for(1, None, "2024-01-01", "2024-01-31")
+
+    rows = model.fetch_first_page(query)
+    assert model.rowCount() == 0
+
+    model.show_first_page(query, rows)
+    assert model.rowCount() == 2
+    assert progress_tracker.get_check_ins_page.call_count == 1
+    assert model.canFetchMore()
+
+    model.fetchMore()
+    assert model.rowCount() == 4
+    assert progress_tracker.get_check_ins_page.call_args.kwargs["start_date"] == "2024-01-01"
+
+
+def test_first_page_sorted_meanwhile_is_reloaded(progress_tracker):
+    """Test that a page fetched in a stale sort order is queried again."""
+    model = CheckInTableModel(progress_tracker, page_size=2)
+    query = model.query_for(1)
+    rows = model.fetch_first_page(query)
+
+    model.sort(1, Qt.SortOrder.AscendingOrder)
+    model.show_first_page(query, rows)
+
+    assert model.rowCount() == 2
+    kwargs = progress_tracker.get_check_ins_page.call_args.kwargs
+    assert kwargs["sort_by"] == "challenge"
+    assert kwargs["order"] == "asc"
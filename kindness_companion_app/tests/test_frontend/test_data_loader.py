@@ -0,0 +1,89 @@
+import pytest
+import sys
+import os
+import threading
+
+# Add the parent directory to sys.path to allow importing the modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from frontend.data_loader import DataLoader
+
+
+@pytest.fixture
+def loader(qtbot):
+    """Create a data loader and make sure its workers finish after each test."""
+    data_loader = DataLoader()
+    yield data_loader
+    data_loader.cancel_all()
+    data_loader.wait_for_done()
+
+
+def blocking_call(gate, value):
+    """Wait until the test opens the gate, then return the value and thread."""
+    gate.wait(5)
+    return value, threading.get_ident()
+
+
+def test_result_delivered_on_gui_thread(qtbot, loader):
+    """Test that results are computed off-thread and delivered on the GUI thread."""
+    gate = threading.Event()
+    gate.set()
+    results = []
+
+    with qtbot.waitSignal(loader.loaded, timeout=5000) as blocker:
+        loader.request("progress", blocking_call, gate, 42, callback=results.append)
+
+    value, worker_thread = blocker.args[1]
+    assert blocker.args[0] == "progress"
+    assert value == 42
+    assert worker_thread != threading.get_ident()
+    assert results == [(42, worker_thread)]
+    assert not loader.is_pending("progress")
+
+
+def test_duplicate_requests_are_coalesced(qtbot, loader):
+    """Test that an identical in-flight request is not started twice."""
+    gate = threading.Event()
+    calls = []
+
+    def counted(value):
+        calls.append(value)
+        return blocking_call(gate, value)
+
+    assert loader.request("progress", counted, 1) is True
+    assert loader.request("progress", counted, 1) is False
+
+    with qtbot.waitSignal(loader.loaded, timeout=5000):
+        gate.set()
+    assert calls == [1]
+
+
+def test_newer_request_supersedes_stale_one(qtbot, loader):
+    """Test that only the latest request for a key is delivered."""
+    gate = threading.Event()
+    delivered = []
+    loader.loaded.connect(lambda key, result: delivered.append(result[0]))
+
+    loader.request("progress", blocking_call, gate, "old")
+    loader.request("progress", blocking_call, gate, "new")
+
+    with qtbot.waitSignal(loader.loaded, timeout=5000):
+        gate.set()
+    loader.wait_for_done()
+    qtbot.wait(50)
+
+    assert delivered == ["new"]
+
+
+def test_errors_are_reported(qtbot, loader):
+    """Test that exceptions in the loader function are delivered as failures."""
+    errors = []
+
+    def broken():
+        raise RuntimeError("database is locked")
+
+    with qtbot.waitSignal(loader.failed, timeout=5000) as blocker:
+        loader.request("achievements", broken, error_callback=errors.append)
+
+    assert blocker.args == ["achievements", "database is locked"]
+    assert errors == ["database is locked"]
@@ -0,0 +1,143 @@
+import pytest
+import sys
+import os
+import threading
+
+# Add the parent directory to sys.path to allow importing the modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from frontend.pet_event_executor import PetEventExecutor
+
+
+class GatedHandler:
+    """Pet event handler that blocks until the test opens its gate."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Event()
+        self.calls = []
+
+    def __call__(self, user_id, event_type, event_data):
+        self.calls.append((event_type, event_data))
+        self.started.set()
+        self.gate.wait(5)
+        if event_data.get("fail"):
+            raise RuntimeError("boom")
+        return {"dialogue": event_data.get("message", ""), "thread": threading.get_ident()}
+
+
+@pytest.fixture
+def handler():
+    return GatedHandler()
+
+
+@pytest.fixture
+def executor(qtbot, handler):
+    """Create an executor and make sure its worker finishes after each test."""
+    pet_executor = PetEventExecutor(handler, max_pending=2)
+    yield pet_executor
+    pet_executor.cancel_all()
+    handler.gate.set()
+    pet_executor.wait_for_done()
+
+
+def test_response_delivered_on_gui_thread(qtbot, executor, handler):
+    """Test that the handler runs off-thread and replies arrive as a signal."""
+    handler.gate.set()
+
+    with qtbot.waitSignal(executor.response_ready, timeout=5000) as blocker:
+        future = executor.submit(1, "user_message", {"message": "你好"})
+
+    user_id, event_type, response = blocker.args
+    assert (user_id, event_type) == (1, "user_message")
+    assert response["dialogue"] == "你好"
+    assert response["thread"] != threading.get_ident()
+    assert future.result(timeout=1) == response
+    assert not executor.is_busy()
+
+
+def test_new_message_supersedes_queued_and_running(qtbot, executor, handler):
+    """Test that only the newest chat message gets its reply shown."""
+    shown = []
+    executor.response_ready.connect(lambda *args: shown.append(args[2]["dialogue"]))
+
+    executor.submit(1, "user_message", {"message": "first"})
+    assert handler.started.wait(5)
+    second = executor.submit(1, "user_message", {"message": "second"})
+    executor.submit(1, "user_message", {"message": "third"})
+    assert second.cancelled()
+
+    handler.gate.set()
+    qtbot.waitUntil(lambda: not executor.is_busy(), timeout=5000)
+    assert [data["message"] for _, data in handler.calls] == ["first", "third"]
+    assert shown == ["third"]
+
+
+def test_queue_is_bounded(qtbot, executor, handler):
+    """Test that a burst of events drops the oldest waiting ones."""
+    dropped = []
+    executor.event_dropped.connect(lambda user_id, event_type: dropped.append(event_type))
+
+    executor.submit(1, "check_in", {"n": 0})
+    assert handler.started.wait(5)
+    futures = [executor.submit(1, "check_in", {"n": n}) for n in range(1, 5)]
+
+    assert [f.cancelled() for f in futures] == [True, True, False, False]
+    assert dropped == ["check_in", "check_in"]
+
+    handler.gate.set()
+    qtbot.waitUntil(lambda: not executor.is_busy(), timeout=5000)
+    assert [data["n"] for _, data in handler.calls] == [0, 3, 4]
+
+
+def test_handler_error_emits_failed(qtbot, executor, handler):
+    """Test that handler exceptions are reported through event_failed."""
+    handler.gate.set()
+
+    with qtbot.waitSignal(executor.event_failed, timeout=5000) as blocker:
+        future = executor.submit(1, "check_in", {"fail": True})
+
+    assert blocker.args == [1, "check_in", "boom"]
+    with pytest.raises(RuntimeError):
+        future.result(timeout=1)
+
+
+def test_streamed_chunks_precede_response(qtbot):
+    """Test that streamed dialogue arrives through response_chunk before the reply."""
+
+    def streaming_handler(user_id, event_type, event_data, on_chunk=None):
+        for piece in ["你", "好"]:
+            on_chunk(piece)
+        return {"dialogue": "你好"}
+
+    pet_executor = PetEventExecutor(streaming_handler, streaming=True)
+    received = []
+    pet_executor.response_chunk.connect(lambda *args: received.append(args))
+
+    with qtbot.waitSignal(pet_executor.response_ready, timeout=5000):
+        pet_executor.submit(1, "user_message", {"message": "hi"})
+    pet_executor.wait_for_done()
+
+    assert received == [(1, "user_message", "你"), (1, "user_message", "好")]
+
+
+def test_superseded_event_chunks_are_dropped(qtbot, executor, handler):
+    """Test that chunks from a superseded message are not relayed."""
+    executor.streaming = True
+
+    def streaming_handler(user_id, event_type, event_data, on_chunk=None):
+        response = handler(user_id, event_type, event_data)
+        on_chunk(event_data["message"])
+        return response
+
+    executor.handler = streaming_handler
+    received = []
+    executor.response_chunk.connect(lambda *args: received.append(args[2]))
+
+    executor.submit(1, "user_message", {"message": "first"})
+    assert handler.started.wait(5)
+    executor.submit(1, "user_message", {"message": "second"})
+
+    handler.gate.set()
+    qtbot.waitUntil(lambda: not executor.is_busy(), timeout=5000)
+    assert received == ["second"]
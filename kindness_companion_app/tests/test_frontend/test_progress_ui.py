@@ -1,9 +1,10 @@
 import unittest
 import sys
 import os
+import threading
 from unittest.mock import MagicMock, patch
 from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QDate, QDeadlineTimer
 
 # Add the parent directory to sys.path to allow importing the modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
@@ -73,6 +74,11 @@ class TestProgressUI(unittest.TestCase):
             }
         ]
     
+    def tearDown(self):
+        """Drop background loads so they are not delivered into later tests."""
+        self.progress_widget.data_loader.cancel_all()
+        self.progress_widget.data_loader.wait_for_done()
+    
     def test_set_user(self):
         """Test setting the current user."""
         # Configure the mocks
@@ -146,6 +152,31 @@ class TestProgressUI(unittest.TestCase):
         self.mock_progress_tracker.get_all_user_check_ins.assert_called_once_with(1)
         self.assertEqual(self.mock_challenge_manager.get_challenge_by_id.call_count, 2)
     
+    def test_calendar_click_loads_table_off_gui_thread(self):
+        """Test that a calendar click fetches the table's first page on the data loader."""
+        threads = []
+
+        def page(user_id, challenge_id, offset, limit, **kwargs):
+            threads.append(threading.get_ident())
+            return [self.sample_progress[0]] if kwargs["start_date"] == "2023-01-01" else []
+
+        self.mock_progress_tracker.get_check_ins_page.side_effect = page
+        self.progress_widget.current_user = self.sample_user
+
+        # A quick run of clicks only shows the last date
+        self.progress_widget.calendar_date_clicked(QDate(2023, 1, 2))
+        self.progress_widget.calendar_date_clicked(QDate(2023, 1, 1))
+        self.assertTrue(self.progress_widget.data_loader.is_pending("table"))
+
+        deadline = QDeadlineTimer(5000)
+        while self.progress_widget.data_loader.is_pending("table") and not deadline.hasExpired():
+            app.processEvents()
+
+        self.assertNotIn(threading.get_ident(), threads)
+        model = self.progress_widget.progress_model
+        self.assertEqual(model.rowCount(), 1)
+        self.assertEqual(model.check_in_at(0)["check_in_date"], "2023-01-01")
+
     def test_update_stats(self):
         """Test updating stats."""
         # Configure the mocks